@@ -1,242 +1,156 @@
 import sys
 import os
-from antlr4 import *
-from CompiscriptLexer import CompiscriptLexer
-from CompiscriptParser import CompiscriptParser
-from PrettyErrorListener import PrettyErrorListener
-from treeutils import tree_to_pretty_text, tree_to_dot
-from SemanticListener import SemanticListener
-from antlr4 import ParseTreeWalker
-from ast_builder import AstBuilder
-from tac_generator import TACGenerator
-from dataclasses import is_dataclass, fields
-
-def dump_ast_to_str(node, indent=0):
-    pad = "  " * indent
-    out = []
-    if not is_dataclass(node):
-        return f"{pad}{repr(node)}"
-    cls = node.__class__.__name__
-    out.append(f"{pad}{cls}")
-    for f in fields(node):
-        if f.name in ("line", "col"):  
-            continue
-        val = getattr(node, f.name)
-        if is_dataclass(val):
-            out.append(f"{pad}  .{f.name}:")
-            out.append(dump_ast_to_str(val, indent + 2))
-        elif isinstance(val, list):
-            out.append(f"{pad}  .{f.name}:")
-            for it in val:
-                if is_dataclass(it):
-                    out.append(dump_ast_to_str(it, indent + 2))
-                else:
-                    out.append(f"{pad}    {it}")
-        else:
-            out.append(f"{pad}  {f.name}={val}")
-    return "\n".join(out)
-
-def ast_to_dot(root):
-    lines = ["digraph AST {", '  node [shape=box, fontname="Arial"];']
-    counter = 0
-
-    def new_id():
-        nonlocal counter
-        nid = f"n{counter}"
-        counter += 1
-        return nid
-
-    def label_of(node):
-        lbl = node.__class__.__name__
-        for k in ("name", "op", "kind", "class_name"):
-            if hasattr(node, k):
-                v = getattr(node, k)
-                if v is not None:
-                    lbl += f"\\n{k}={v}"
-        return lbl
-
-    def is_node(x):
-        return is_dataclass(x)
-
-    def walk(node):
-        nid = new_id()
-        lines.append(f'  {nid} [label="{label_of(node)}"];')
-        for f in fields(node):
-            if f.name in ("line", "col"):
-                continue
-            val = getattr(node, f.name)
-            def link(child):
-                if child is None or not is_node(child):
-                    return
-                cid = walk(child)
-                lines.append(f'  {nid} -> {cid} [label="{f.name}"];')
-            if isinstance(val, list):
-                for ch in val:
-                    link(ch)
-            else:
-                link(val)
-        return nid
-
-    walk(root)
-    lines.append("}")
-    return "\n".join(lines)
+from treeutils import tree_to_pretty_text, tree_to_dot, dump_ast_to_str, ast_to_dot
+from compiler_session import CompilerSession
+from mips_generator import REGALLOCS
+from phase_timer import PhaseTimer
+from artifacts import (ArtifactPipeline, select_artifacts, PARSE_TREE_TXT, PARSE_TREE_DOT,
+                       AST_TXT, AST_DOT, PNG, SYMTAB)
+import tracing
 
 
 def main(argv):
     script_dir = os.path.dirname(os.path.abspath(__file__))
     if len(argv) < 2:
-        print("Uso: python3 Driver.py <archivo.cps> [--ast-dump] [--ast-dot] [--tac] [--mips]")
+        print("Uso: python3 Driver.py <archivo.cps> [--parse-tree] [--ast-dump] [--ast-dot] [--png] [--symtab]"
+              f" [--all-artifacts] [--tac] [--mips] [-O0|-O1|-O2] [--regalloc=<{'|'.join(REGALLOCS)}>]"
+              " [--time-report]"
+              " [--trace=<nivel|fase=nivel,...>] [--trace-file=<archivo.jsonl>]")
         return
 
-    want_ast_dump = ("--ast-dump" in argv)
-    want_ast_dot  = ("--ast-dot" in argv)
+    # Sin flags se generan todos los artefactos; con --tac/--mips solo lo pedido
+    artifacts = select_artifacts(argv[2:])
     want_tac = ("--tac" in argv)
     want_mips = ("--mips" in argv)
+    want_time_report = ("--time-report" in argv)
+    opt_level = _opt_level(argv)
+    # -O1 pliega constantes en el AST; -O2 ademas propaga constantes (SCCP), reutiliza operaciones (GVN),
+    # saca invariantes de los lazos (LICM), reduce variables de induccion, propaga copias, elimina codigo
+    # muerto y cambia el asignador por defecto a coloreo de grafos; --regalloc manda
+    regalloc = _flag_value(argv, "--regalloc") or ("graph" if opt_level >= 2 else "linear")
+    if regalloc not in REGALLOCS:
+        print(f"Asignador de registros desconocido: {regalloc} (opciones: {', '.join(REGALLOCS)})")
+        return
 
-    with open(argv[1], encoding="utf-8") as f:
-        source_lines = f.readlines()
-
-    input_stream = FileStream(argv[1], encoding="utf-8")
-    lexer = CompiscriptLexer(input_stream)
-    err = PrettyErrorListener(source_lines)
-    lexer.removeErrorListeners()
-    lexer.addErrorListener(err)
-
-    stream = CommonTokenStream(lexer)
-    parser = CompiscriptParser(stream)
-    parser.removeErrorListeners()
-    parser.addErrorListener(err)
-
-    tree = parser.program()
+    trace_spec = _flag_value(argv, "--trace")
+    trace_file = _flag_value(argv, "--trace-file")
+    if trace_spec or trace_file:
+        tracing.configure(trace_spec, trace_file)
 
-    
-    if getattr(err, "errors", []):
+    # Con --time-report tambien se mide el pico de memoria de cada fase
+    timer = PhaseTimer(trace_memory=want_time_report)
+    try:
+        _run(argv[1], script_dir, timer, artifacts, want_tac, want_mips, regalloc, opt_level)
+    finally:
+        timer.stop()
+        if want_time_report:
+            print("\n--- Reporte de tiempos por fase ---")
+            print(timer.report())
+        if trace_spec or trace_file:
+            tracing.close()
+
+
+def _flag_value(argv, name):
+    """Valor de una opcion con la forma --nombre=valor (None si no esta)."""
+    prefix = name + "="
+    for arg in argv:
+        if arg.startswith(prefix):
+            return arg[len(prefix):]
+    return None
+
+
+def _opt_level(argv):
+    """Nivel de optimizacion de la ultima opcion -O<n> (0 si no hay)."""
+    level = 0
+    for arg in argv:
+        if len(arg) > 2 and arg.startswith("-O") and arg[2:].isdigit():
+            level = int(arg[2:])
+    return level
+
+
+def _run(path, script_dir, timer, artifacts, want_tac, want_mips, regalloc="linear", opt_level=0):
+    with timer.phase("read"):
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+
+    session = CompilerSession(capture_output=False, regalloc=regalloc, opt_level=opt_level)
+    result = session.compile(source, tac=want_tac or want_mips, mips=want_mips, ast=False, timer=timer)
+
+    if result.syntax_errors:
         print("No se genero el arbol por errores sintacticos...")
         return
+    if result.tree is None:
+        sys.stderr.write(result.stderr)
+        return
 
-    
-    pretty = tree_to_pretty_text(tree, parser.ruleNames)
-    with open(os.path.join(script_dir, "parse_tree.txt"), "w", encoding="utf-8") as f:
-        f.write(pretty)
-
-    dot = tree_to_dot(tree, parser)
-    with open(os.path.join(script_dir, "parse_tree.dot"), "w", encoding="utf-8") as f:
-        f.write(dot)
-
-    
-    walker = ParseTreeWalker()
-    sem = SemanticListener(source_lines)
-    walker.walk(sem, tree)
+    pipeline = ArtifactPipeline(script_dir, artifacts, timer)
+    tree, parser = result.tree, result.parser
+    pipeline.write(PARSE_TREE_TXT, lambda: tree_to_pretty_text(tree, parser.ruleNames))
+    pipeline.write(PARSE_TREE_DOT, lambda: tree_to_dot(tree, parser))
 
-    if sem.errors:
-        print(f"{len(sem.errors)} error(es) semantico(s) encontrados.")
-        print("Analisis completado.")
+    if result.semantic_errors:
+        print(f"{len(result.semantic_errors)} error(es) semantico(s) encontrados.")
+        _finish(pipeline)
         return
     else:
         print("Chequeos semanticos OK.")
-        if hasattr(sem, "symbtab"):
-            print(sem.symbtab.dump())
+        if pipeline.wants(SYMTAB) and result.symbtab is not None:
+            print(result.symbtab.dump())
 
-    builder = AstBuilder()
-    ast = builder.visit(tree)
-
-    if want_ast_dump or (not want_ast_dot and not want_ast_dump):
-        txt = dump_ast_to_str(ast)
-        with open(os.path.join(script_dir, "ast.txt"), "w", encoding="utf-8") as f:
-            f.write(txt)
+    if not result.success:
+        # Error interno en alguna fase posterior (AST, TAC o MIPS)
+        sys.stderr.write(result.stderr)
+        pipeline.wait()
+        return
 
-    if want_ast_dot or (not want_ast_dot and not want_ast_dump):
-        astdot = ast_to_dot(ast)
-        with open(os.path.join(script_dir, "ast.dot"), "w", encoding="utf-8") as f:
-            f.write(astdot)
+    ast = result.ast_root
+    pipeline.write(AST_TXT, lambda: dump_ast_to_str(ast))
+    pipeline.write(AST_DOT, lambda: ast_to_dot(ast))
 
-    if want_tac:
+    if want_tac or want_mips:
         print("Generando codigo intermedio (TAC)...")
-        # Asignar direcciones de memoria y etiquetas antes de generar TAC
-        sem.symbtab.assign_memory_addresses()
-        sem.symbtab.assign_function_labels()
-        
-        tac_gen = TACGenerator(sem.symbtab)
-        tac_code = tac_gen.generate(ast)
         tac_path = os.path.join(script_dir, "tac.txt")
-        with open(tac_path, "w", encoding="utf-8") as f:
-            f.write("\n".join(map(str, tac_code)))
+        with timer.phase("write_tac"), open(tac_path, "w", encoding="utf-8") as f:
+            f.write(result.tac)
         print(f"TAC guardado en: {tac_path}")
-        
+
+    if (want_tac or want_mips) and opt_level >= 1:
+        print("\n--- Resumen de optimizaciones ---")
+        print(result.optimization_summary())
+
+    if want_tac:
         # Mostrar información adicional de la tabla de símbolos
         print("\n--- Información adicional para generación de código assembler ---")
-        print(sem.symbtab.dump())
-        
-        # Generar MIPS si se solicita
-        if want_mips:
-            print("\nGenerando codigo MIPS...")
-            from mips_generator import MIPSGen
-            # Convert TAC objects to strings for MIPSGen
-            tac_strings = [str(t) for t in tac_code]
-            mips_gen = MIPSGen(tac_strings)
-            mips_asm = mips_gen.translate()
-            mips_path = os.path.join(script_dir, "out.s")
-            with open(mips_path, "w", encoding="utf-8") as f:
-                f.write(mips_asm)
-                f.write("\n")
-            print(f"MIPS guardado en: {mips_path}")
-    elif want_mips:
-        # Si se pide MIPS sin TAC, generar TAC primero
-        print("Generando codigo MIPS (requiere TAC)...")
-        sem.symbtab.assign_memory_addresses()
-        sem.symbtab.assign_function_labels()
-        
-        tac_gen = TACGenerator(sem.symbtab)
-        tac_code = tac_gen.generate(ast)
-        tac_path = os.path.join(script_dir, "tac.txt")
-        with open(tac_path, "w", encoding="utf-8") as f:
-            f.write("\n".join(map(str, tac_code)))
-        
-        print("Generando codigo MIPS...")
-        from mips_generator import MIPSGen
-        # Convert TAC objects to strings for MIPSGen
-        tac_strings = [str(t) for t in tac_code]
-        mips_gen = MIPSGen(tac_strings)
-        mips_asm = mips_gen.translate()
+        print(result.symbtab.dump())
+
+    if want_mips:
+        print("\nGenerando codigo MIPS...")
         mips_path = os.path.join(script_dir, "out.s")
-        with open(mips_path, "w", encoding="utf-8") as f:
-            f.write(mips_asm)
+        with timer.phase("write_mips"), open(mips_path, "w", encoding="utf-8") as f:
+            f.write(result.mips)
             f.write("\n")
         print(f"MIPS guardado en: {mips_path}")
+        print(f"Instrucciones MIPS: {result.metrics['mips_instructions']} (regalloc={regalloc})")
+
+    _finish(pipeline)
 
-    # Generar imágenes PNG automáticamente
-    print("Generando imágenes PNG...")
-    try:
-        import subprocess
-        
-        # Generar parse_tree.png
-        parse_tree_dot = os.path.join(script_dir, 'parse_tree.dot')
-        parse_tree_png = os.path.join(script_dir, 'parse_tree.png')
-        result = subprocess.run(['dot', '-Tpng', parse_tree_dot, '-o', parse_tree_png], 
-                              capture_output=True, text=True)
-        if result.returncode == 0:
-            print(f"✓ Parse tree PNG generado: {parse_tree_png}")
-        else:
-            print(f"⚠ Error generando parse_tree.png: {result.stderr}")
-        
-        # Generar ast.png
-        ast_dot = os.path.join(script_dir, 'ast.dot')
-        ast_png = os.path.join(script_dir, 'ast.png')
-        result = subprocess.run(['dot', '-Tpng', ast_dot, '-o', ast_png], 
-                              capture_output=True, text=True)
-        if result.returncode == 0:
-            print(f"✓ AST PNG generado: {ast_png}")
-        else:
-            print(f"⚠ Error generando ast.png: {result.stderr}")
-            
-    except FileNotFoundError:
-        print("⚠ Graphviz (dot) no encontrado. Instala con: sudo apt-get install graphviz")
-    except Exception as e:
-        print(f"⚠ Error generando imágenes PNG: {e}")
+
+def _finish(pipeline):
+    """Espera los PNG que se renderizan en segundo plano y resume lo generado."""
+    if pipeline.wants(PNG):
+        print("Generando imágenes PNG...")
+    for msg in pipeline.wait():
+        print(msg)
 
     print("Analisis completado.")
-    print(f"Parse tree: {os.path.join(script_dir, 'parse_tree.txt')}, {os.path.join(script_dir, 'parse_tree.dot')}, {os.path.join(script_dir, 'parse_tree.png')}")
-    print(f"AST:        {os.path.join(script_dir, 'ast.txt')}, {os.path.join(script_dir, 'ast.dot')}, {os.path.join(script_dir, 'ast.png')}")
+    parse_tree = [p for n, p in pipeline.written.items() if n in (PARSE_TREE_TXT, PARSE_TREE_DOT)
+                  or p.endswith("parse_tree.png")]
+    ast = [p for n, p in pipeline.written.items() if n in (AST_TXT, AST_DOT) or p.endswith("ast.png")]
+    if parse_tree:
+        print(f"Parse tree: {', '.join(parse_tree)}")
+    if ast:
+        print(f"AST:        {', '.join(ast)}")
+
 
 if __name__ == "__main__":
     main(sys.argv)
@@ -2,12 +2,15 @@ from antlr4.error.ErrorListener import ErrorListener
 import sys
 
 class PrettyErrorListener(ErrorListener):
-    def __init__(self, source_lines=None, use_color=None):
+    def __init__(self, source_lines=None, use_color=None, stream=None):
         super().__init__()
         self.errors = []
         self.source_lines = source_lines or []
-        
-        self.use_color = sys.stdout.isatty() if use_color is None else bool(use_color)
+        # Destino de los mensajes; None = sys.stdout en el momento de reportar
+        self.stream = stream
+
+        out = stream if stream is not None else sys.stdout
+        self.use_color = out.isatty() if use_color is None else bool(use_color)
 
         self.RED = "\033[91m"
         self.YELLOW = "\033[93m"
@@ -18,21 +21,24 @@ class PrettyErrorListener(ErrorListener):
     def _c(self, text, code):
         return f"{code}{text}{self.RESET}" if self.use_color else text
 
+    def _print(self, text):
+        print(text, file=self.stream if self.stream is not None else sys.stdout)
+
     def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
         tok = getattr(offendingSymbol, "text", "")
         
-        print(self._c(f"Error sintactico (linea {line}, columna {column})", self.RED + self.BOLD))
+        self._print(self._c(f"Error sintactico (linea {line}, columna {column})", self.RED + self.BOLD))
 
         
         if 1 <= line <= len(self.source_lines):
             src = self.source_lines[line - 1].rstrip("\n")
-            print(self._c("    " + src, self.DIM))
-            print(self._c("    " + (" " * column) + "^", self.YELLOW + self.BOLD))
+            self._print(self._c("    " + src, self.DIM))
+            self._print(self._c("    " + (" " * column) + "^", self.YELLOW + self.BOLD))
 
         # Mensaje corto
         if tok:
-            print("  " + self._c(f"Token '{tok}': {msg}", self.YELLOW))
+            self._print("  " + self._c(f"Token '{tok}': {msg}", self.YELLOW))
         else:
-            print("  " + self._c(msg, self.YELLOW))
+            self._print("  " + self._c(msg, self.YELLOW))
 
         self.errors.append((line, column, msg))
@@ -14,8 +14,10 @@ from typing import Optional, Tuple, Dict, List
 import sys
 
 class SemanticListener(CompiscriptListener):
-    def __init__(self, source_lines):
+    def __init__(self, source_lines, diag=None):
         self.symbtab = SymbolTable()
+        # Sumidero de diagnosticos; None = sys.stderr en el momento de reportar
+        self.diag = diag
         self.scopes = self.symbtab.scopes
         self.errors = []
         self.source_lines = source_lines
@@ -61,11 +63,12 @@ class SemanticListener(CompiscriptListener):
     def _err(self, ctx, msg: str):
         tok = self._tok(ctx)
         line, col = self._lc(tok)
-        sys.stderr.write("\x1b[91;1mError semantico (linea {}, columna {})\x1b[0m\n".format(line, col))
+        out = self.diag if self.diag is not None else sys.stderr
+        out.write("\x1b[91;1mError semantico (linea {}, columna {})\x1b[0m\n".format(line, col))
         if 1 <= line <= len(self.source_lines):
             src = self.source_lines[line - 1].rstrip("\n")
-            sys.stderr.write("\x1b[2m    {}\n    {}\x1b[0m\n".format(src, " " * col + "^"))
-        sys.stderr.write("  {}\n\n".format(msg))
+            out.write("\x1b[2m    {}\n    {}\x1b[0m\n".format(src, " " * col + "^"))
+        out.write("  {}\n\n".format(msg))
         self.errors.append((line, col, msg))
 
     def set_type(self, node, t: TypeLike):
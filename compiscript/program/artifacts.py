@@ -0,0 +1,134 @@
+"""
+Pipeline de artefactos de Driver.py.
+
+Cada artefacto (arbol de parseo en texto/dot, AST en texto/dot, PNGs y dump
+de la tabla de simbolos) se produce solo si se pidio. Los PNG se renderizan
+con Graphviz en segundo plano, en paralelo entre si y con el resto del
+trabajo del Driver; wait() recoge los resultados al final.
+
+    pipeline = ArtifactPipeline(out_dir, select_artifacts(argv), timer)
+    pipeline.write("ast_txt", lambda: dump_ast_to_str(ast))
+    ...
+    for msg in pipeline.wait():
+        print(msg)
+"""
+import os
+import subprocess
+from contextlib import nullcontext
+from typing import Callable, Iterable, List, Optional
+
+PARSE_TREE_TXT = "parse_tree_txt"
+PARSE_TREE_DOT = "parse_tree_dot"
+AST_TXT = "ast_txt"
+AST_DOT = "ast_dot"
+PNG = "png"
+SYMTAB = "symtab"
+
+ALL_ARTIFACTS = (PARSE_TREE_TXT, PARSE_TREE_DOT, AST_TXT, AST_DOT, PNG, SYMTAB)
+
+FILENAMES = {
+    PARSE_TREE_TXT: "parse_tree.txt",
+    PARSE_TREE_DOT: "parse_tree.dot",
+    AST_TXT: "ast.txt",
+    AST_DOT: "ast.dot",
+}
+
+# dot -> png que se genera a partir de el
+PNG_SOURCES = {PARSE_TREE_DOT: "parse_tree.png", AST_DOT: "ast.png"}
+
+# Flags de Driver.py -> artefactos
+FLAG_ARTIFACTS = {
+    "--parse-tree": (PARSE_TREE_TXT, PARSE_TREE_DOT),
+    "--ast-dump": (AST_TXT,),
+    "--ast-dot": (AST_DOT,),
+    "--png": (PNG,),
+    "--symtab": (SYMTAB,),
+    "--all-artifacts": ALL_ARTIFACTS,
+}
+
+
+def select_artifacts(argv: Iterable[str]) -> set:
+    """
+    Artefactos pedidos en la linea de comandos.
+
+    Sin ningun flag de artefactos ni de generacion de codigo se producen todos
+    (el comportamiento historico de `python3 Driver.py programa.cps`). Con
+    --tac/--mips solos no se produce ninguno.
+    """
+    argv = list(argv)
+    wanted = set()
+    for flag, names in FLAG_ARTIFACTS.items():
+        if flag in argv:
+            wanted.update(names)
+    if not wanted and "--tac" not in argv and "--mips" not in argv:
+        wanted = set(ALL_ARTIFACTS)
+    if PNG in wanted:
+        # Los PNG se renderizan desde los .dot
+        wanted.update(PNG_SOURCES)
+    return wanted
+
+
+class ArtifactPipeline:
+    def __init__(self, out_dir: str, wanted: Iterable[str], timer=None, dot_cmd: str = "dot"):
+        self.out_dir = out_dir
+        self.wanted = set(wanted)
+        self.timer = timer
+        self.dot_cmd = dot_cmd
+        self.written = {}      # artefacto (o nombre del png) -> ruta
+        self._renders = []     # (ruta png, Popen)
+        self._messages = []
+
+    def wants(self, *names: str) -> bool:
+        return any(n in self.wanted for n in names)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.out_dir, FILENAMES.get(name) or PNG_SOURCES[name])
+
+    def write(self, name: str, produce: Callable[[], str]) -> Optional[str]:
+        """Genera y escribe el artefacto `name` solo si fue pedido. Devuelve su ruta."""
+        if name not in self.wanted:
+            return None
+        with self._phase(name):
+            content = produce()
+            path = self.path(name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+        self.written[name] = path
+        if name in PNG_SOURCES and PNG in self.wanted:
+            self._start_render(path, os.path.join(self.out_dir, PNG_SOURCES[name]))
+        return path
+
+    def wait(self) -> List[str]:
+        """Espera los renders pendientes y devuelve los mensajes para el usuario."""
+        with self._phase("png_wait") if self._renders else nullcontext():
+            for png_path, proc in self._renders:
+                _, err = proc.communicate()
+                if proc.returncode == 0:
+                    self.written[os.path.basename(png_path)] = png_path
+                    self._messages.append(f"✓ PNG generado: {png_path}")
+                else:
+                    self._messages.append(f"⚠ Error generando {os.path.basename(png_path)}: {err}")
+        self._renders = []
+        messages, self._messages = self._messages, []
+        return messages
+
+    # ---------------- internos ----------------
+
+    def _start_render(self, dot_path: str, png_path: str) -> None:
+        try:
+            proc = subprocess.Popen([self.dot_cmd, "-Tpng", dot_path, "-o", png_path],
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        except FileNotFoundError:
+            msg = "⚠ Graphviz (dot) no encontrado. Instala con: sudo apt-get install graphviz"
+            if msg not in self._messages:
+                self._messages.append(msg)
+            return
+        except OSError as e:
+            self._messages.append(f"⚠ Error generando imágenes PNG: {e}")
+            return
+        self._renders.append((png_path, proc))
+
+    def _phase(self, name: str):
+        if self.timer is None:
+            return nullcontext()
+        return self.timer.phase(name)
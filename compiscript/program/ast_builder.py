@@ -3,6 +3,7 @@ from antlr4 import ParserRuleContext, TerminalNode # Import TerminalNode
 from typing import List, Optional
 import ast_nodes as A
 from ast_nodes import ExprStmt, Call, Return, Assign # Nuevas importaciones
+import tracing
 
 def pos(ctx: ParserRuleContext):
     t = ctx.start if hasattr(ctx, "start") else None
@@ -12,6 +13,10 @@ def pos(ctx: ParserRuleContext):
 
 class AstBuilder: # No hereda de CompiscriptVisitor
 
+    def __init__(self):
+        # Se consulta una sola vez: apagado no cuesta nada por nodo
+        self._trace = tracing.enabled("ast", tracing.DEBUG)
+
     def visit(self, node):
         if node is None:
             return None
@@ -65,14 +70,15 @@ class AstBuilder: # No hereda de CompiscriptVisitor
 
   
     def visitVariableDeclaration(self, ctx):
-        print(f"[DEBUG AstBuilder] Entering visitVariableDeclaration for {ctx.Identifier().getText()}")
         line, col = pos(ctx)
         kind = "let" if ctx.getChild(0).getText() == "let" else "var"
         name = ctx.Identifier().getText()
         type_ref = self.visit(ctx.typeAnnotation().type_()) if ctx.typeAnnotation() else None
         init = self.visit(ctx.initializer().expression()) if ctx.initializer() else None
         var_decl_node = A.VarDecl(line, col, name, type_ref, init, kind)
-        print(f"[DEBUG AstBuilder] visitVariableDeclaration returning {type(var_decl_node)}: {var_decl_node.name}")
+        if self._trace:
+            tracing.emit("ast", tracing.DEBUG, "var_decl", name=name, kind=kind,
+                         init=type(init).__name__, line=line)
         return var_decl_node
 
 
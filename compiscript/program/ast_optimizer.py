@@ -0,0 +1,354 @@
+"""
+Plegado de constantes y simplificacion algebraica sobre el AST (ast_nodes),
+antes de generar TAC. Corre con opt_level >= 1 (-O1).
+
+- Pliega expresiones con literales enteros, booleanos y strings:
+  `2 + 3` -> 5, `4 < 3` -> false, `"a" + "b"` -> "ab", `!true` -> false.
+  La aritmetica entera sigue a MIPS: 32 bits, `/` y `%` truncan hacia cero.
+  Una division por cero literal no se pliega (queda para tiempo de ejecucion).
+- Identidades: `x * 1`, `x / 1`, `x - 0`, `x + 0` (si x es numerico),
+  `x * 0` (si x es entero y no tiene efectos), `!!x`, `-(-x)`,
+  `true && x`, `false || x`, ...
+- Condiciones constantes: `c ? a : b`, `if`, `while` y `for` con condicion
+  literal se reemplazan por la rama que se ejecuta (o por nada). (El codigo
+  despues de un return ya es un error semantico.)
+
+El AST original no se modifica: los nodos que cambian se copian.
+
+    ast, stats = fold_constants(ast)
+    stats -> {"ast_folded": 7}
+"""
+from dataclasses import fields, replace
+from typing import Dict, List, Optional, Tuple
+
+import ast_nodes as A
+
+INT_MIN, INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+NUMERIC = ("integer", "float")
+
+
+def _wrap32(value: int) -> int:
+    """Entero con el desborde de un registro de 32 bits."""
+    value &= 0xFFFFFFFF
+    return value - (1 << 32) if value > INT_MAX else value
+
+
+def _div(a: int, b: int) -> Tuple[int, int]:
+    """Cociente y resto como `div` de MIPS (truncando hacia cero)."""
+    q = abs(a) // abs(b)
+    if (a < 0) != (b < 0):
+        q = -q
+    return q, a - q * b
+
+
+def _literal_value(node):
+    """(tipo, valor) de un literal plegable, o None."""
+    if isinstance(node, A.LiteralBool):
+        return "boolean", node.value
+    if isinstance(node, A.LiteralInt):
+        return "integer", node.value
+    if isinstance(node, A.LiteralString):
+        return "string", node.value
+    return None
+
+
+def _make_literal(like: A.Node, value):
+    line, col = like.line, like.col
+    if isinstance(value, bool):
+        return A.LiteralBool(line, col, value)
+    if isinstance(value, int):
+        return A.LiteralInt(line, col, _wrap32(value))
+    return A.LiteralString(line, col, value)
+
+
+def _is_pure(node) -> bool:
+    """True si evaluar la expresion no tiene efectos (ni puede fallar)."""
+    if isinstance(node, (A.Name, A.LiteralInt, A.LiteralFloat, A.LiteralString, A.LiteralBool, A.LiteralNull)):
+        return True
+    if isinstance(node, A.Unary):
+        return _is_pure(node.expr)
+    if isinstance(node, A.Binary):
+        return node.op not in ("/", "%") and _is_pure(node.left) and _is_pure(node.right)
+    return False
+
+
+def _unwrap(value):
+    """AstBuilder deja muchas expresiones envueltas en una lista de un elemento."""
+    while isinstance(value, list) and len(value) == 1:
+        value = value[0]
+    return value
+
+
+def _same(new, old) -> bool:
+    """True si visit() devolvio lo mismo (elemento por elemento en las listas)."""
+    if isinstance(new, list) and isinstance(old, list):
+        return len(new) == len(old) and all(a is b for a, b in zip(new, old))
+    return new is old
+
+
+class ConstantFolder:
+    """Visitor AST -> AST; visit() devuelve el nodo (nuevo o el mismo)."""
+
+    def __init__(self):
+        self.folded = 0
+        self.scopes: List[Dict[str, str]] = [{}]    # nombre -> tipo declarado
+
+    # ---------------- despacho ----------------
+
+    def visit(self, node):
+        if node is None:
+            return None
+        if isinstance(node, list):
+            return [self.visit(n) for n in node]
+        method = getattr(self, "visit" + node.__class__.__name__, self.generic_visit)
+        return method(node)
+
+    def generic_visit(self, node):
+        """Visita los campos que son nodos (o listas de nodos) y copia el nodo si alguno cambio."""
+        if not hasattr(node, "__dataclass_fields__"):
+            return node
+        changes = {}
+        for f in fields(node):
+            value = getattr(node, f.name)
+            if isinstance(value, (A.Node, list)):
+                new = self.visit(value)
+                if not _same(new, value):
+                    changes[f.name] = new
+        return replace(node, **changes) if changes else node
+
+    def expr(self, value):
+        """Visita una expresion (o sentencia) desenvuelta de su lista."""
+        return self.visit(_unwrap(value))
+
+    def _fold(self, node):
+        self.folded += 1
+        return node
+
+    # ---------------- tipos (solo lo necesario para las identidades) ----------------
+
+    def _declare(self, name: str, type_ref, init=None):
+        type_ref = _unwrap(type_ref)
+        t = type_ref.name if isinstance(type_ref, A.SimpleType) else None
+        if t is None and init is not None:
+            t = self.type_of(init)
+        self.scopes[-1][name] = t
+
+    def type_of(self, node) -> Optional[str]:
+        lit = _literal_value(node)
+        if lit is not None:
+            return lit[0]
+        if isinstance(node, A.LiteralFloat):
+            return "float"
+        if isinstance(node, A.Name):
+            for scope in reversed(self.scopes):
+                if node.name in scope:
+                    return scope[node.name]
+            return None
+        if isinstance(node, A.Unary):
+            return "boolean" if node.op == "!" else self.type_of(node.expr)
+        if isinstance(node, A.Binary):
+            if node.op in ("<", "<=", ">", ">=", "==", "!=", "&&", "||"):
+                return "boolean"
+            left, right = self.type_of(node.left), self.type_of(node.right)
+            if node.op == "+" and "string" in (left, right):
+                return "string"
+            if left == right and left in NUMERIC:
+                return left
+        return None
+
+    # ---------------- declaraciones y bloques ----------------
+
+    def visitProgram(self, node: A.Program):
+        return self.generic_visit(node)
+
+    def visitVarDecl(self, node: A.VarDecl):
+        init = self.expr(node.init)
+        self._declare(node.name, node.type, init)
+        return node if init is node.init else replace(node, init=init)
+
+    def visitFunctionDecl(self, node: A.FunctionDecl):
+        self.scopes[-1][node.name] = None
+        self.scopes.append({})
+        for p in node.params:
+            self._declare(p.name, p.type)
+        try:
+            return self.generic_visit(node)
+        finally:
+            self.scopes.pop()
+
+    def visitClassDecl(self, node: A.ClassDecl):
+        self.scopes[-1][node.name] = None
+        self.scopes.append({})
+        try:
+            return self.generic_visit(node)
+        finally:
+            self.scopes.pop()
+
+    def visitBlock(self, node: A.Block):
+        self.scopes.append({})
+        try:
+            return self.generic_visit(node)
+        finally:
+            self.scopes.pop()
+
+    def _empty(self, node) -> A.Block:
+        return A.Block(node.line, node.col, [])
+
+    # ---------------- sentencias con condicion ----------------
+
+    def visitIf(self, node: A.If):
+        cond = self.expr(node.cond)
+        if isinstance(cond, A.LiteralBool):
+            self.folded += 1
+            taken = node.then if cond.value else node.else_
+            return self.expr(taken) if taken is not None else self._empty(node)
+        then, else_ = self.expr(node.then), self.expr(node.else_)
+        if cond is node.cond and then is node.then and else_ is node.else_:
+            return node
+        return replace(node, cond=cond, then=then, else_=else_)
+
+    def visitWhile(self, node: A.While):
+        cond = self.expr(node.cond)
+        if isinstance(cond, A.LiteralBool) and not cond.value:
+            return self._fold(self._empty(node))
+        body = self.visit(node.body)
+        if cond is node.cond and body is node.body:
+            return node
+        return replace(node, cond=cond, body=body)
+
+    def visitFor(self, node: A.For):
+        self.scopes.append({})
+        try:
+            init = self.expr(node.init)
+            cond = self.expr(node.cond)
+            if isinstance(cond, A.LiteralBool) and not cond.value:
+                self.folded += 1
+                return A.Block(node.line, node.col, [init] if init is not None else [])
+            update, body = self.expr(node.update), self.visit(node.body)
+            if _same([init, cond, update, body], [node.init, node.cond, node.update, node.body]):
+                return node
+            return replace(node, init=init, cond=cond, update=update, body=body)
+        finally:
+            self.scopes.pop()
+
+    def visitForeach(self, node: A.Foreach):
+        self.scopes.append({})
+        try:
+            self._declare(node.var_name, node.elem_type)
+            return self.generic_visit(node)
+        finally:
+            self.scopes.pop()
+
+    # ---------------- expresiones ----------------
+
+    def visitTernary(self, node: A.Ternary):
+        cond = self.expr(node.cond)
+        if isinstance(cond, A.LiteralBool):
+            return self._fold(self.expr(node.then if cond.value else node.otherwise))
+        then, otherwise = self.expr(node.then), self.expr(node.otherwise)
+        if cond is node.cond and then is node.then and otherwise is node.otherwise:
+            return node
+        return replace(node, cond=cond, then=then, otherwise=otherwise)
+
+    def visitUnary(self, node: A.Unary):
+        expr = self.expr(node.expr)
+        lit = _literal_value(expr)
+        if node.op == "-" and lit and lit[0] == "integer":
+            return self._fold(_make_literal(node, -lit[1]))
+        if node.op == "-" and isinstance(expr, A.LiteralFloat):
+            return self._fold(A.LiteralFloat(node.line, node.col, -expr.value))
+        if node.op == "!" and lit and lit[0] == "boolean":
+            return self._fold(_make_literal(node, not lit[1]))
+        if isinstance(expr, A.Unary) and expr.op == node.op and node.op in ("-", "!"):
+            return self._fold(expr.expr)          # -(-x), !!x
+        return node if expr is node.expr else replace(node, expr=expr)
+
+    def visitBinary(self, node: A.Binary):
+        left, right = self.expr(node.left), self.expr(node.right)
+        folded = self._fold_binary(node, left, right)
+        if folded is not None:
+            return self._fold(folded)
+        if left is node.left and right is node.right:
+            return node
+        return replace(node, left=left, right=right)
+
+    def _fold_binary(self, node, left, right):
+        op, l, r = node.op, _literal_value(left), _literal_value(right)
+        if l and r:
+            value = self._eval(op, l, r)
+            if value is not None:
+                return _make_literal(node, value)
+
+        # && / ||: con un lado literal no hace falta evaluar o basta el otro lado
+        if op in ("&&", "||"):
+            absorbing = op == "||"              # true || x, false && x
+            if l and l[0] == "boolean":
+                return left if l[1] == absorbing else right
+            if r and r[0] == "boolean":
+                if r[1] != absorbing:
+                    return left                 # x && true, x || false
+                if _is_pure(left):
+                    return right                # x && false, x || true
+            return None
+
+        rv = r[1] if r and r[0] == "integer" else None
+        lv = l[1] if l and l[0] == "integer" else None
+        numeric = self.type_of(left) in NUMERIC, self.type_of(right) in NUMERIC
+        if op in ("*", "/") and rv == 1:
+            return left
+        if op == "*" and lv == 1:
+            return right
+        if op == "-" and rv == 0:
+            return left
+        if op == "+" and rv == 0 and numeric[0]:
+            return left
+        if op == "+" and lv == 0 and numeric[1]:
+            return right
+        if op == "*" and rv == 0 and self.type_of(left) == "integer" and _is_pure(left):
+            return right
+        if op == "*" and lv == 0 and self.type_of(right) == "integer" and _is_pure(right):
+            return left
+        return None
+
+    @staticmethod
+    def _eval(op: str, l, r):
+        """Valor de `l op r` para dos literales (tipo, valor), o None si no se pliega."""
+        (lt, a), (rt, b) = l, r
+        if op in ("==", "!=") and lt == rt:
+            return (a == b) == (op == "==")
+        if lt == rt == "integer":
+            if op == "+":
+                return a + b
+            if op == "-":
+                return a - b
+            if op == "*":
+                return a * b
+            if op in ("/", "%"):
+                if b == 0:
+                    return None
+                q, rem = _div(a, b)
+                return q if op == "/" else rem
+            if op == "<":
+                return a < b
+            if op == "<=":
+                return a <= b
+            if op == ">":
+                return a > b
+            if op == ">=":
+                return a >= b
+        if lt == rt == "boolean":
+            if op == "&&":
+                return a and b
+            if op == "||":
+                return a or b
+        if lt == rt == "string" and op == "+":
+            return a + b
+        return None
+
+
+def fold_constants(ast: A.Program) -> Tuple[A.Program, Dict[str, int]]:
+    """Devuelve (AST optimizado, {"ast_folded": n}); no modifica el AST recibido."""
+    folder = ConstantFolder()
+    new = folder.visit(ast)
+    return new, {"ast_folded": folder.folded}
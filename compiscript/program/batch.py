@@ -0,0 +1,218 @@
+"""
+Compilacion por lotes de muchos archivos .cps.
+
+Reparte los archivos entre un pool de procesos (CompilerWorkerPool, uno por
+CPU por defecto) cuyos trabajadores reutilizan su parser ya calentado, y
+escribe los artefactos de cada archivo en su propio directorio:
+
+    python batch.py tests_cps/ otros/*.cps -o build/ -j 8
+
+    build/<ruta relativa sin .cps>/tac.txt
+                                  /out.s
+                                  /ast.txt
+                                  /diagnostics.txt   (solo si hubo errores)
+
+Un archivo suelto (fuera de los directorios dados) va a build/<nombre sin
+.cps>/. Si dos archivos caen en el mismo directorio (a/x.cps y b/x.cps), el
+segundo usa build/x-2/, el tercero build/x-3/, ...
+
+Al final imprime un resumen con exitos, fallos y tiempos por fase. El codigo
+de salida es 1 si algun archivo fallo.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from compile_workers import CompilerWorkerPool
+from compiler_session import OUTPUT_FORMATS, CompilationResult
+
+
+def collect_sources(paths: List[str]) -> List[Path]:
+    """Expande directorios (recursivamente) a sus .cps; conserva el orden y quita duplicados."""
+    found, seen = [], set()
+    for raw in paths:
+        p = Path(raw)
+        candidates = sorted(p.rglob("*.cps")) if p.is_dir() else [p]
+        for c in candidates:
+            key = c.resolve()
+            if key not in seen:
+                seen.add(key)
+                found.append(c)
+    return found
+
+
+def output_dir_for(source: Path, out_root: Path, roots: List[Path]) -> Path:
+    """Directorio de salida de `source`: su ruta relativa a la raiz de entrada, sin extension."""
+    resolved = source.resolve()
+    for root in roots:
+        root = root.resolve()
+        if root.is_dir() and root in resolved.parents:
+            rel = resolved.relative_to(root)
+            return out_root / root.name / rel.with_suffix("")
+    return out_root / source.stem
+
+
+def output_dirs(sources: List[Path], out_root: Path, roots: List[Path]) -> List[Path]:
+    """output_dir_for() de cada archivo, con sufijo -2, -3, ... si el directorio ya lo usa otro."""
+    dirs, used = [], set()
+    for source in sources:
+        out_dir = base = output_dir_for(source, out_root, roots)
+        n = 1
+        while out_dir in used:
+            n += 1
+            out_dir = base.with_name(f"{base.name}-{n}")
+        used.add(out_dir)
+        dirs.append(out_dir)
+    return dirs
+
+
+class BatchSummary:
+    """Acumula resultados por archivo y arma el resumen final."""
+
+    def __init__(self):
+        self.files = []        # dicts por archivo
+        self.phase_ms = {}     # fase -> ms acumulados
+        self.wall_time = 0.0
+
+    def add(self, source: Path, result, out_dir: Optional[Path]):
+        self.files.append({
+            "file": str(source),
+            "success": result.success,
+            "time_ms": round(result.compilation_time * 1000.0, 3),
+            "errors": list(result.errors),
+            "output_dir": str(out_dir) if out_dir else None,
+        })
+        for phase, t in result.timings.items():
+            if phase != "total":
+                self.phase_ms[phase] = self.phase_ms.get(phase, 0.0) + t["wall_ms"]
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for f in self.files if f["success"])
+
+    @property
+    def failed(self) -> int:
+        return len(self.files) - self.succeeded
+
+    def as_dict(self) -> dict:
+        times = [f["time_ms"] for f in self.files]
+        return {
+            "total": len(self.files),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "wall_time_s": round(self.wall_time, 3),
+            "files_per_sec": round(len(self.files) / self.wall_time, 2) if self.wall_time else None,
+            "file_ms": {
+                "min": min(times) if times else 0.0,
+                "avg": round(sum(times) / len(times), 3) if times else 0.0,
+                "max": max(times) if times else 0.0,
+            },
+            "phase_ms": {k: round(v, 3) for k, v in self.phase_ms.items()},
+            "files": self.files,
+        }
+
+    def report(self) -> str:
+        d = self.as_dict()
+        lines = [
+            "--- Resumen de compilacion por lotes ---",
+            f"Archivos: {d['total']}  OK: {d['succeeded']}  Fallidos: {d['failed']}",
+            f"Tiempo total: {d['wall_time_s']:.2f} s ({d['files_per_sec'] or 0} archivos/s)",
+            f"Por archivo (ms): min {d['file_ms']['min']:.1f}  prom {d['file_ms']['avg']:.1f}"
+            f"  max {d['file_ms']['max']:.1f}",
+        ]
+        if d["phase_ms"]:
+            lines.append("Tiempo acumulado por fase (ms):")
+            for phase, ms in d["phase_ms"].items():
+                lines.append(f"  {phase:<10} {ms:>10.2f}")
+        for f in self.files:
+            if not f["success"]:
+                first = f["errors"][0] if f["errors"] else "error desconocido"
+                lines.append(f"FALLO {f['file']}: {first}")
+        return "\n".join(lines)
+
+
+def write_outputs(result, out_dir: Path) -> None:
+    result.write_artifacts(out_dir)
+    diagnostics = (result.stdout or "") + (result.stderr or "")
+    if result.errors or diagnostics.strip():
+        out_dir.mkdir(parents=True, exist_ok=True)
+        with open(out_dir / "diagnostics.txt", "w", encoding="utf-8") as f:
+            if diagnostics.strip():
+                f.write(diagnostics)
+            for err in result.errors:
+                f.write(err + "\n")
+
+
+def run_batch(paths: List[str], out_root: str, workers: Optional[int] = None,
+              output_format: str = "all", job_timeout: float = 60.0,
+              progress=None) -> BatchSummary:
+    """Compila todos los .cps de `paths` con un pool de procesos."""
+    sources = collect_sources(paths)
+    roots = [Path(p) for p in paths]
+    out_root = Path(out_root)
+    summary = BatchSummary()
+    if not sources:
+        return summary
+
+    start = time.time()
+    size = min(workers or os.cpu_count() or 1, len(sources))
+    with CompilerWorkerPool(workers=size, queue_size=max(2 * size, 1), job_timeout=job_timeout) as pool:
+        pending = []
+        for src, out_dir in zip(sources, output_dirs(sources, out_root, roots)):
+            try:
+                code = src.read_text(encoding="utf-8")
+            except OSError as e:
+                pending.append((src, out_dir, None, str(e)))
+                continue
+            # block=True: la cola acotada regula el ritmo de lectura de archivos
+            pending.append((src, out_dir, pool.submit(code, output_format, block=True), None))
+
+        for src, out_dir, fut, read_error in pending:
+            if fut is None:
+                result = CompilationResult(success=False, errors=[f"No se pudo leer: {read_error}"])
+                summary.add(src, result, None)
+                continue
+            result = fut.result()
+            write_outputs(result, out_dir)
+            summary.add(src, result, out_dir)
+            if progress:
+                progress(src, result)
+
+    summary.wall_time = time.time() - start
+    return summary
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compila muchos archivos .cps en paralelo")
+    ap.add_argument("inputs", nargs="+", help="Archivos .cps o directorios")
+    ap.add_argument("-o", "--out-dir", default="build", help="Directorio raiz de salida (por defecto build/)")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="Procesos (por defecto, numero de CPUs)")
+    ap.add_argument("--format", default="all", choices=OUTPUT_FORMATS)
+    ap.add_argument("--timeout", type=float, default=60.0, help="Segundos maximos por archivo")
+    ap.add_argument("--summary-json", help="Ademas, guardar el resumen en este archivo JSON")
+    ap.add_argument("-q", "--quiet", action="store_true", help="No imprimir una linea por archivo")
+    args = ap.parse_args(argv)
+
+    def progress(src, result):
+        if not args.quiet:
+            status = "OK   " if result.success else "FALLO"
+            print(f"{status} {src} ({result.compilation_time * 1000.0:.1f} ms)")
+
+    summary = run_batch(args.inputs, args.out_dir, workers=args.workers, output_format=args.format,
+                        job_timeout=args.timeout, progress=progress)
+    if not summary.files:
+        print("No se encontraron archivos .cps.")
+        return 1
+    print(summary.report())
+    if args.summary_json:
+        with open(args.summary_json, "w", encoding="utf-8") as f:
+            json.dump(summary.as_dict(), f, indent=2)
+    return 0 if summary.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
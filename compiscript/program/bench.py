@@ -0,0 +1,202 @@
+"""
+Harness de benchmarks del compilador.
+
+Compila en proceso (CompilerSession) los programas de bench_programs.py y
+reporta, por fase, tiempo de reloj/CPU, throughput (lineas/s y tokens/s) y
+pico de memoria. Los resultados se guardan en JSON para comparar corridas.
+
+    python bench.py                               # presets small y medium
+    python bench.py --preset large --repeat 5
+    python bench.py --sweep functions=10,50,100   # escala una dimension
+    python bench.py --compare bench_results/anterior.json
+
+Cada programa se compila una vez sin medir (calienta los DFA de ANTLR),
+luego `repeat` veces midiendo tiempos (se reporta la mediana) y una ultima
+vez con tracemalloc activo solo para los picos de memoria, para que el costo
+de tracemalloc no contamine los tiempos.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+from bench_programs import PRESETS, ProgramSpec, generate_program, sweep
+from compiler_session import COMPILER_VERSION, CompilerSession
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(SCRIPT_DIR, "bench_results")
+
+
+def _count_tokens(res) -> int:
+    """Tokens del programa (sin EOF), tomados del stream que uso el parser."""
+    if res.parser is None:
+        return 0
+    tokens = res.parser.getTokenStream().tokens
+    return sum(1 for t in tokens if t.type != -1)
+
+
+def _per_second(amount: int, ms: float) -> Optional[float]:
+    return round(amount / (ms / 1000.0), 1) if ms > 0 else None
+
+
+def run_benchmark(spec: ProgramSpec, repeat: int = 3, output_format: str = "all",
+                  session: Optional[CompilerSession] = None) -> dict:
+    """Compila el programa de `spec` y devuelve sus metricas por fase."""
+    session = session or CompilerSession(capture_output=True)
+    source = generate_program(spec)
+    lines = source.count("\n")
+
+    warm = session.compile(source, output_format)
+    tokens = _count_tokens(warm)
+
+    runs = [session.compile(source, output_format).timings for _ in range(max(1, repeat))]
+    mem = session.compile(source, output_format, trace_memory=True).timings
+
+    phases = {}
+    for name in runs[0]:
+        wall = statistics.median(r[name]["wall_ms"] for r in runs if name in r)
+        cpu = statistics.median(r[name]["cpu_ms"] for r in runs if name in r)
+        phases[name] = {
+            "wall_ms": round(wall, 3),
+            "cpu_ms": round(cpu, 3),
+            "peak_kib": mem.get(name, {}).get("peak_kib"),
+            "lines_per_sec": _per_second(lines, wall),
+            "tokens_per_sec": _per_second(tokens, wall),
+        }
+
+    return {
+        "name": spec.name(),
+        "spec": spec.as_dict(),
+        "lines": lines,
+        "tokens": tokens,
+        "success": warm.success,
+        "errors": warm.errors,
+        "parse_stage": warm.metrics.get("parse_stage"),
+        "repeat": repeat,
+        "phases": phases,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPT_DIR,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suite(specs: List[ProgramSpec], repeat: int = 3, output_format: str = "all") -> dict:
+    session = CompilerSession(capture_output=True)
+    results = []
+    for spec in specs:
+        results.append(run_benchmark(spec, repeat=repeat, output_format=output_format, session=session))
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "compiler_version": COMPILER_VERSION,
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "format": output_format,
+        },
+        "results": results,
+    }
+
+
+def save_results(data: dict, path: Optional[str] = None) -> str:
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"bench-{stamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    return path
+
+
+def format_report(data: dict) -> str:
+    lines = []
+    for r in data["results"]:
+        total = r["phases"]["total"]
+        status = "OK" if r["success"] else "ERROR"
+        lines.append(f"{r['name']}  ({r['lines']} lineas, {r['tokens']} tokens, "
+                     f"parse {r['parse_stage']}, {status})")
+        lines.append(f"  {'fase':<10} {'wall (ms)':>10} {'cpu (ms)':>10} {'lineas/s':>10} "
+                     f"{'tokens/s':>10} {'pico (KiB)':>11}")
+        for name, p in r["phases"].items():
+            if name == "total":
+                continue
+            lines.append(_report_row(name, p))
+        lines.append(_report_row("TOTAL", total))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _report_row(name: str, p: dict) -> str:
+    def num(v, fmt):
+        return "-" if v is None else format(v, fmt)
+    return (f"  {name:<10} {p['wall_ms']:>10.2f} {p['cpu_ms']:>10.2f} "
+            f"{num(p['lines_per_sec'], '>10.0f'):>10} {num(p['tokens_per_sec'], '>10.0f'):>10} "
+            f"{num(p['peak_kib'], '>11.1f'):>11}")
+
+
+def compare(old: dict, new: dict) -> str:
+    """Compara el tiempo total por programa entre dos corridas (por nombre)."""
+    previous = {r["name"]: r for r in old["results"]}
+    lines = [f"{'programa':<28} {'antes (ms)':>11} {'ahora (ms)':>11} {'cambio':>8}"]
+    for r in new["results"]:
+        before = previous.get(r["name"])
+        now = r["phases"]["total"]["wall_ms"]
+        if before is None:
+            lines.append(f"{r['name']:<28} {'-':>11} {now:>11.2f} {'-':>8}")
+            continue
+        then = before["phases"]["total"]["wall_ms"]
+        change = (now - then) / then * 100.0 if then else 0.0
+        lines.append(f"{r['name']:<28} {then:>11.2f} {now:>11.2f} {change:>+7.1f}%")
+    return "\n".join(lines)
+
+
+def _parse_sweep(text: str, base: ProgramSpec) -> List[ProgramSpec]:
+    param, _, values = text.partition("=")
+    if not values:
+        raise argparse.ArgumentTypeError("--sweep espera parametro=v1,v2,...")
+    return sweep(base, param.strip(), [int(v) for v in values.split(",")])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmarks del compilador Compiscript")
+    ap.add_argument("--preset", action="append", choices=sorted(PRESETS),
+                    help="Tamaño predefinido (se puede repetir). Por defecto: small y medium.")
+    ap.add_argument("--sweep", help="Barrido de una dimension sobre el preset base, p. ej. depth=1,2,4,8")
+    ap.add_argument("--base", choices=sorted(PRESETS), default="small", help="Preset base para --sweep")
+    ap.add_argument("--repeat", type=int, default=3, help="Corridas medidas por programa (mediana)")
+    ap.add_argument("--format", default="all", choices=("all", "tac", "mips", "ast"))
+    ap.add_argument("--output", help="Archivo JSON de salida (por defecto bench_results/bench-<fecha>.json)")
+    ap.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    args = ap.parse_args(argv)
+
+    if args.sweep:
+        specs = _parse_sweep(args.sweep, PRESETS[args.base])
+    else:
+        specs = [PRESETS[p] for p in (args.preset or ["small", "medium"])]
+
+    data = run_suite(specs, repeat=args.repeat, output_format=args.format)
+    print(format_report(data))
+    path = save_results(data, args.output)
+    print(f"Resultados guardados en: {path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print()
+            print(compare(json.load(f), data))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Generador de programas Compiscript sinteticos para benchmarks.
+
+Cada programa se arma a partir de unos pocos parametros que controlan como
+escala el compilador:
+
+- functions:   numero de funciones de nivel superior.
+- depth:       anidamiento de if/while dentro de cada funcion.
+- expr_len:    operandos por expresion aritmetica.
+- class_depth: largo de la cadena de herencia de clases.
+- array_size:  elementos del literal de arreglo global.
+
+El programa generado es valido (pasa el analisis semantico) y deterministico
+para los mismos parametros y semilla.
+
+    src = generate_program(functions=50, depth=4)
+"""
+import random
+from dataclasses import dataclass, asdict, replace
+
+_OPS = ("+", "-", "*")
+
+
+@dataclass(frozen=True)
+class ProgramSpec:
+    functions: int = 10
+    depth: int = 3
+    expr_len: int = 8
+    class_depth: int = 3
+    array_size: int = 16
+    seed: int = 0
+
+    def name(self) -> str:
+        return (f"f{self.functions}_d{self.depth}_e{self.expr_len}"
+                f"_c{self.class_depth}_a{self.array_size}")
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+# Tamaños predefinidos para bench.py
+PRESETS = {
+    "small": ProgramSpec(functions=5, depth=2, expr_len=4, class_depth=2, array_size=8),
+    "medium": ProgramSpec(functions=40, depth=3, expr_len=8, class_depth=4, array_size=64),
+    "large": ProgramSpec(functions=200, depth=4, expr_len=16, class_depth=8, array_size=512),
+}
+
+
+def sweep(base: ProgramSpec, param: str, values) -> list:
+    """Variantes de `base` cambiando solo `param` (para ver como escala una dimension)."""
+    if param not in ProgramSpec.__dataclass_fields__ or param == "seed":
+        raise ValueError(f"Parametro de barrido desconocido: {param}")
+    return [replace(base, **{param: v}) for v in values]
+
+
+class _Writer:
+    """Acumula lineas con indentacion."""
+
+    def __init__(self):
+        self.lines = []
+        self.level = 0
+
+    def emit(self, text: str = ""):
+        self.lines.append("  " * self.level + text if text else "")
+
+    def open(self, text: str):
+        self.emit(text + " {")
+        self.level += 1
+
+    def close(self, suffix: str = ""):
+        self.level -= 1
+        self.emit("}" + suffix)
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _expr(rng: random.Random, operands, length: int) -> str:
+    """Expresion entera de `length` operandos, con algun parentesis."""
+    terms = [str(rng.choice(operands)) for _ in range(max(1, length))]
+    out = terms[0]
+    for i, term in enumerate(terms[1:], 1):
+        op = rng.choice(_OPS)
+        if i % 4 == 0:
+            out = f"({out}) {op} {term}"
+        else:
+            out = f"{out} {op} {term}"
+    return out
+
+
+def _emit_classes(w: _Writer, spec: ProgramSpec):
+    for level in range(spec.class_depth):
+        header = f"class C{level}" + (f" : C{level - 1}" if level else "")
+        w.open(header)
+        w.emit(f"let v{level}: integer;")
+        w.emit()
+        w.open(f"function get{level}(): integer")
+        w.emit(f"return this.v{level} + {level};")
+        w.close()
+        w.close()
+        w.emit()
+
+
+def _emit_body(w: _Writer, rng: random.Random, spec: ProgramSpec, level: int):
+    """Cuerpo anidado: alterna if/else y while hasta llegar a `depth`."""
+    operands = ["a", "b", "acc"] + [rng.randint(1, 9) for _ in range(3)]
+    w.emit(f"acc = {_expr(rng, operands, spec.expr_len)};")
+    if level >= spec.depth:
+        return
+    if level % 2 == 0:
+        w.open(f"if (acc > {rng.randint(0, 50)})")
+        _emit_body(w, rng, spec, level + 1)
+        w.close(" else {")
+        w.level += 1
+        w.emit(f"acc = acc + {level + 1};")
+        w.close()
+    else:
+        counter = f"i{level}"
+        w.emit(f"let {counter}: integer = 0;")
+        w.open(f"while ({counter} < {rng.randint(2, 5)})")
+        _emit_body(w, rng, spec, level + 1)
+        w.emit(f"{counter} = {counter} + 1;")
+        w.close()
+
+
+def _emit_functions(w: _Writer, rng: random.Random, spec: ProgramSpec):
+    for i in range(spec.functions):
+        w.open(f"function fn{i}(a: integer, b: integer): integer")
+        w.emit("let acc: integer = a;")
+        _emit_body(w, rng, spec, 0)
+        if i > 0:
+            w.emit(f"acc = acc + fn{i - 1}(b, a);")
+        w.emit("return acc;")
+        w.close()
+        w.emit()
+
+
+def generate_program(spec: ProgramSpec = None, **params) -> str:
+    """Genera el codigo fuente. Acepta un ProgramSpec o sus campos como kwargs."""
+    if spec is None:
+        spec = ProgramSpec(**params)
+    elif params:
+        spec = replace(spec, **params)
+    rng = random.Random(spec.seed)
+    w = _Writer()
+    w.emit(f"// Programa sintetico {spec.name()} (seed={spec.seed})")
+
+    _emit_classes(w, spec)
+    _emit_functions(w, rng, spec)
+
+    values = ", ".join(str(rng.randint(0, 99)) for _ in range(max(1, spec.array_size)))
+    w.emit(f"let data: integer[] = [{values}];")
+    w.emit("let total: integer = 0;")
+    w.open("foreach (item in data)")
+    w.emit("total = total + item;")
+    w.close()
+
+    if spec.class_depth:
+        last = spec.class_depth - 1
+        w.emit(f"let obj: C{last} = new C{last}();")
+        for level in range(spec.class_depth):
+            w.emit(f"obj.v{level} = {level};")
+            w.emit(f"total = total + obj.get{level}();")
+
+    for i in range(0, spec.functions, max(1, spec.functions // 8)):
+        w.emit(f"total = total + fn{i}({i}, total);")
+    w.emit("print(total);")
+    return w.text()
@@ -0,0 +1,658 @@
+"""
+Grafo de flujo de control (CFG) sobre el TAC.
+
+- split_functions() separa la lista plana de TACGenerator en unidades: cada
+  funcion (Label + BeginFunc ... EndFunc) y cada tramo de codigo global entre
+  funciones. Las funciones anidadas se sacan de su funcion contenedora y
+  quedan como unidades propias. join_functions() vuelve a armar la lista.
+  entered_from_outside() marca las unidades a las que se entra por un salto
+  desde otra unidad.
+- CFG.build() parte el cuerpo de una unidad en bloques basicos con aristas de
+  predecesores/sucesores, un bloque de salida virtual y, si hace falta, un
+  bloque de entrada sin predecesores.
+- Analisis bajo demanda (se recalculan solo si el grafo cambio desde la
+  ultima vez): orden postorden/RPO, dominadores (Cooper-Harvey-Kennedy),
+  arbol de dominadores, fronteras de dominancia y bosque de lazos naturales.
+- Ediciones incrementales para las pasadas de optimizacion:
+  set_instrs(), redirect(), split_edge(), insert_preheader(),
+  remove_block() y remove_unreachable(). Cada edicion mantiene las aristas
+  consistentes e invalida los analisis cacheados.
+
+    for unit in split_functions(code):
+        cfg = CFG.build(unit.body, unit.name)
+        for loop in cfg.loops().loops:
+            ...
+        unit.body = cfg.linearize()
+    code = join_functions(units)
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+from tac import TAC, Label, Jump, CondJump, Return, BeginFunc, EndFunc
+
+GLOBAL = "global"
+FUNCTION = "function"
+
+
+# ---------------------------------------------------------------------------
+# Unidades (funciones y codigo global)
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Unit:
+    """Una funcion o un tramo de codigo global, sin los marcadores de funcion."""
+    name: str
+    kind: str                      # FUNCTION o GLOBAL
+    body: List[TAC] = field(default_factory=list)
+    parent: Optional[str] = None   # funcion contenedora (funciones anidadas)
+    positions: List[int] = field(default_factory=list)  # indice original de cada instruccion de body
+    start: Optional[int] = None    # indice original del Label/BeginFunc de una funcion
+    params: List[str] = field(default_factory=list)     # parametros declarados (BeginFunc)
+
+    @property
+    def is_function(self) -> bool:
+        return self.kind == FUNCTION
+
+
+def split_functions(code: List[TAC]) -> List[Unit]:
+    """
+    Separa el TAC en unidades en orden de aparicion. Una funcion anidada queda
+    como unidad propia a continuacion de su funcion contenedora.
+    """
+    units: List[Unit] = []
+    stack: List[Unit] = []          # funciones abiertas
+    current_global: Optional[Unit] = None
+    i = 0
+    while i < len(code):
+        instr = code[i]
+        starts_function = isinstance(instr, Label) and i + 1 < len(code) and isinstance(code[i + 1], BeginFunc)
+        if starts_function or isinstance(instr, BeginFunc):
+            name = instr.name if starts_function else f"anon_func{i}"
+            begin = code[i + 1] if starts_function else instr
+            unit = Unit(name, FUNCTION, parent=stack[-1].name if stack else None, start=i,
+                        params=list(begin.params))
+            units.append(unit)
+            stack.append(unit)
+            current_global = None
+            i += 2 if starts_function else 1
+            continue
+        if isinstance(instr, EndFunc) and stack:
+            stack.pop()
+            i += 1
+            continue
+        if stack:
+            unit = stack[-1]
+        else:
+            if current_global is None:
+                current_global = Unit(f"global{sum(1 for u in units if not u.is_function)}", GLOBAL)
+                units.append(current_global)
+            unit = current_global
+        unit.body.append(instr)
+        unit.positions.append(i)
+        i += 1
+    return units
+
+
+def merge_globals(units: Iterable[Unit]) -> List[Unit]:
+    """
+    Las funciones tal cual y todos los tramos globales juntos en una unidad
+    "global" al final (se ejecutan uno tras otro). Para analisis que no
+    vuelven a armar el codigo con join_functions().
+    """
+    functions, merged = [], Unit("global", GLOBAL)
+    for unit in units:
+        if unit.is_function:
+            functions.append(unit)
+        else:
+            merged.body.extend(unit.body)
+            merged.positions.extend(unit.positions)
+    return functions + ([merged] if merged.body else [])
+
+
+def join_functions(units: Iterable[Unit]) -> List[TAC]:
+    """Inversa de split_functions (las funciones anidadas quedan despues de su contenedora)."""
+    code: List[TAC] = []
+    for unit in units:
+        if unit.is_function:
+            code.append(Label(name=unit.name))
+            code.append(BeginFunc(params=list(unit.params)))
+            code.extend(unit.body)
+            code.append(EndFunc())
+        else:
+            code.extend(unit.body)
+    return code
+
+
+def entered_from_outside(units: Iterable[Unit]) -> Set[str]:
+    """
+    Nombres de las unidades con alguna etiqueta a la que salta otra unidad.
+    Pasa con un lazo global que declara una funcion adentro: el cuerpo queda
+    partido en dos tramos globales que saltan uno al otro. El CFG de una
+    unidad no ve esas aristas, asi que las pasadas que dependen del flujo
+    (alcanzabilidad, constantes) deben dejar esas unidades como estan.
+    """
+    units = list(units)
+    owner = {}
+    for unit in units:
+        for instr in unit.body:
+            if isinstance(instr, Label):
+                owner[instr.name] = unit.name
+    result = set()
+    for unit in units:
+        for instr in unit.body:
+            target = _jump_target(instr)
+            if target in owner and owner[target] != unit.name:
+                result.add(owner[target])
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Bloques basicos
+# ---------------------------------------------------------------------------
+
+@dataclass(eq=False)
+class BasicBlock:
+    id: int
+    label: Optional[str] = None             # etiqueta con la que empieza el bloque
+    instrs: List[TAC] = field(default_factory=list)  # sin la etiqueta
+    succs: List[int] = field(default_factory=list)
+    preds: List[int] = field(default_factory=list)
+    fallthrough: Optional[int] = None        # sucesor alcanzado sin salto
+
+    @property
+    def terminator(self) -> Optional[TAC]:
+        if self.instrs and isinstance(self.instrs[-1], (Jump, CondJump, Return)):
+            return self.instrs[-1]
+        return None
+
+    def __repr__(self):
+        return f"BasicBlock({self.id}, label={self.label!r}, n={len(self.instrs)}, succs={self.succs})"
+
+
+def _ends_block(instr: TAC) -> bool:
+    return isinstance(instr, (Jump, CondJump, Return))
+
+
+def _jump_target(instr: TAC) -> Optional[str]:
+    if isinstance(instr, (Jump, CondJump)):
+        return instr.target
+    return None
+
+
+class CFG:
+    EXIT = -1
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.blocks: Dict[int, BasicBlock] = {}
+        self.order: List[int] = []           # disposicion (layout) de los bloques
+        self.entry: Optional[int] = None
+        self.exit = BasicBlock(CFG.EXIT)
+        self.unresolved: Set[str] = set()    # etiquetas saltadas que no existen en la unidad
+        self._next_id = 0
+        self._label_counter = 0
+        self._version = 0
+        self._cache = {}
+
+    # ---------------- construccion ----------------
+
+    @classmethod
+    def build(cls, instrs: List[TAC], name: str = "") -> "CFG":
+        cfg = cls(name)
+        current: Optional[BasicBlock] = None
+        for instr in instrs:
+            if isinstance(instr, Label):
+                current = cfg._new_block(label=instr.name)
+                continue
+            if current is None:
+                current = cfg._new_block()
+            current.instrs.append(instr)
+            if _ends_block(instr):
+                current = None
+        if not cfg.order:
+            cfg._new_block()
+        cfg.entry = cfg.order[0]
+        cfg._link_all()
+        if cfg.blocks[cfg.entry].preds:
+            # La entrada no debe tener predecesores (p. ej. un lazo al inicio)
+            cfg._add_entry_block()
+        return cfg
+
+    def _new_block(self, label: Optional[str] = None, position: Optional[int] = None) -> BasicBlock:
+        block = BasicBlock(self._next_id, label)
+        self._next_id += 1
+        self.blocks[block.id] = block
+        if position is None:
+            self.order.append(block.id)
+        else:
+            self.order.insert(position, block.id)
+        return block
+
+    def _add_entry_block(self):
+        self.entry = self.add_block(fallthrough=self.entry, before=self.entry)
+
+    def new_label(self) -> str:
+        """Etiqueta nueva para un bloque creado por una pasada."""
+        while True:
+            label = f"{self.name or 'cfg'}_B{self._label_counter}"
+            self._label_counter += 1
+            if label not in self.label_map():
+                return label
+
+    # ---------------- aristas ----------------
+
+    def label_map(self) -> Dict[str, int]:
+        return {b.label: b.id for b in self.blocks.values() if b.label is not None}
+
+    def _link_all(self):
+        labels = self.label_map()
+        for b in self.blocks.values():
+            b.preds = []
+        self.exit.preds = []
+        for idx, bid in enumerate(self.order):
+            b = self.blocks[bid]
+            term = b.terminator
+            falls = not isinstance(term, (Jump, Return))
+            b.fallthrough = (self.order[idx + 1] if idx + 1 < len(self.order) else CFG.EXIT) if falls else None
+            b.succs = self._compute_succs(b, labels)
+        for b in self.blocks.values():
+            for s in b.succs:
+                self._block(s).preds.append(b.id)
+        self._invalidate()
+
+    def _compute_succs(self, b: BasicBlock, labels: Dict[str, int]) -> List[int]:
+        succs = []
+        if b.fallthrough is not None:
+            succs.append(b.fallthrough)
+        term = b.terminator
+        if isinstance(term, Return):
+            succs.append(CFG.EXIT)
+        target = _jump_target(term) if term is not None else None
+        if target is not None:
+            if target in labels:
+                succs.append(labels[target])
+            else:
+                self.unresolved.add(target)
+                succs.append(CFG.EXIT)
+        # Sin duplicados (if_false c goto <siguiente>) pero conservando el orden
+        seen, out = set(), []
+        for s in succs:
+            if s not in seen:
+                seen.add(s)
+                out.append(s)
+        return out
+
+    def _relink(self, b: BasicBlock):
+        """Recalcula las aristas de salida de un bloque tras editarlo."""
+        for s in b.succs:
+            preds = self._block(s).preds
+            if b.id in preds:
+                preds.remove(b.id)
+        b.succs = self._compute_succs(b, self.label_map())
+        for s in b.succs:
+            self._block(s).preds.append(b.id)
+        self._invalidate()
+
+    def _block(self, bid: int) -> BasicBlock:
+        return self.exit if bid == CFG.EXIT else self.blocks[bid]
+
+    def succs(self, bid: int) -> List[int]:
+        return self._block(bid).succs
+
+    def preds(self, bid: int) -> List[int]:
+        return self._block(bid).preds
+
+    def edges(self):
+        for b in self.blocks.values():
+            for s in b.succs:
+                yield b.id, s
+
+    def _invalidate(self):
+        self._version += 1
+        self._cache.clear()
+
+    # ---------------- ediciones incrementales ----------------
+    #
+    # La caida (fallthrough) de un bloque es una arista logica: no depende de
+    # que el sucesor quede a continuacion en `order`. linearize() agrega el
+    # salto explicito cuando el layout no coincide, asi que las ediciones
+    # pueden insertar bloques donde convenga sin romper el flujo.
+
+    def set_instrs(self, bid: int, instrs: List[TAC]):
+        """
+        Reemplaza las instrucciones de un bloque (solo la ultima puede ser un
+        salto o return) y actualiza sus aristas de salida.
+        """
+        for instr in instrs[:-1]:
+            if _ends_block(instr) or isinstance(instr, Label):
+                raise ValueError("Solo la ultima instruccion de un bloque puede ser un salto")
+        b = self.blocks[bid]
+        b.instrs = list(instrs)
+        if isinstance(b.terminator, (Jump, Return)):
+            b.fallthrough = None
+        elif b.fallthrough is None:
+            b.fallthrough = self._layout_next(bid)
+        self._relink(b)
+
+    def redirect(self, bid: int, old: int, new: int):
+        """Cambia la arista bid -> old por bid -> new (sea por salto o por caida)."""
+        b = self.blocks[bid]
+        term = b.terminator
+        changed = False
+        target = _jump_target(term) if term is not None else None
+        if target is not None and self.label_map().get(target) == old:
+            new_label = self.ensure_label(new)
+            if isinstance(term, Jump):
+                b.instrs[-1] = Jump(target=new_label)
+            else:
+                b.instrs[-1] = CondJump(condition=term.condition, target=new_label)
+            changed = True
+        if b.fallthrough == old:
+            b.fallthrough = new
+            changed = True
+        if not changed:
+            raise ValueError(f"No hay arista {bid} -> {old}")
+        self._relink(b)
+
+    def ensure_label(self, bid: int) -> str:
+        b = self.blocks[bid]
+        if b.label is None:
+            b.label = self.new_label()
+        return b.label
+
+    def _layout_next(self, bid: int) -> int:
+        idx = self.order.index(bid)
+        return self.order[idx + 1] if idx + 1 < len(self.order) else CFG.EXIT
+
+    def add_block(self, instrs: Iterable[TAC] = (), fallthrough: Optional[int] = None,
+                  before: Optional[int] = None, after: Optional[int] = None) -> int:
+        """Agrega un bloque nuevo (sin predecesores todavia) y devuelve su id."""
+        if before is not None:
+            position = self.order.index(before)
+        elif after is not None:
+            position = self.order.index(after) + 1
+        else:
+            position = None
+        b = self._new_block(position=position)
+        b.instrs = list(instrs)
+        b.fallthrough = None if isinstance(b.terminator, (Jump, Return)) else fallthrough
+        self._relink(b)
+        return b.id
+
+    def split_edge(self, u: int, v: int) -> int:
+        """Inserta un bloque vacio en la arista u -> v y devuelve su id."""
+        if v == CFG.EXIT:
+            raise ValueError("No se puede partir una arista hacia la salida")
+        if v not in self.blocks[u].succs:
+            raise ValueError(f"No hay arista {u} -> {v}")
+        after = u if self.blocks[u].fallthrough == v else None
+        w = self.add_block(fallthrough=v, after=after, before=None if after is not None else v)
+        self.redirect(u, v, w)
+        return w
+
+    def insert_preheader(self, header: int, latches: Iterable[int] = ()) -> int:
+        """
+        Crea un preheader para el lazo con cabecera `header`: todos los
+        predecesores de la cabecera salvo `latches` pasan a entrar por el.
+        """
+        latches = set(latches)
+        outside = [p for p in self.blocks[header].preds if p not in latches]
+        pre = self.add_block(fallthrough=header, before=header)
+        for p in outside:
+            self.redirect(p, header, pre)
+        if self.entry == header:
+            self.entry = pre
+        return pre
+
+    def remove_block(self, bid: int):
+        """Elimina un bloque que ya no tiene predecesores."""
+        b = self.blocks[bid]
+        if b.preds:
+            raise ValueError(f"El bloque {bid} todavia tiene predecesores: {b.preds}")
+        if bid == self.entry:
+            raise ValueError("No se puede eliminar el bloque de entrada")
+        for s in b.succs:
+            preds = self._block(s).preds
+            while bid in preds:
+                preds.remove(bid)
+        del self.blocks[bid]
+        self.order.remove(bid)
+        self._invalidate()
+
+    def remove_unreachable(self) -> List[int]:
+        """Elimina los bloques que no se alcanzan desde la entrada. Devuelve sus ids."""
+        reachable = set(self.postorder())
+        dead = [bid for bid in self.order if bid not in reachable]
+        for bid in dead:
+            for s in self.blocks[bid].succs:
+                preds = self._block(s).preds
+                while bid in preds:
+                    preds.remove(bid)
+        for bid in dead:
+            del self.blocks[bid]
+            self.order.remove(bid)
+        if dead:
+            self._invalidate()
+        return dead
+
+    # ---------------- linealizacion ----------------
+
+    def linearize(self) -> List[TAC]:
+        """TAC en el orden de layout, con los saltos que hagan falta para respetar las caidas."""
+        code: List[TAC] = []
+        end_label = None
+        for idx, bid in enumerate(self.order):
+            b = self.blocks[bid]
+            if b.label is not None:
+                code.append(Label(name=b.label))
+            code.extend(b.instrs)
+            nxt = self.order[idx + 1] if idx + 1 < len(self.order) else CFG.EXIT
+            if b.fallthrough is None or b.fallthrough == nxt:
+                continue
+            if b.fallthrough == CFG.EXIT:
+                # Caia al final de la unidad: saltar a una etiqueta al final
+                end_label = end_label or self.new_label()
+                code.append(Jump(target=end_label))
+            else:
+                code.append(Jump(target=self.ensure_label(b.fallthrough)))
+        if end_label is not None:
+            code.append(Label(name=end_label))
+        return code
+
+    def instructions(self):
+        """(id de bloque, indice, instruccion) en orden de layout."""
+        for bid in self.order:
+            for i, instr in enumerate(self.blocks[bid].instrs):
+                yield bid, i, instr
+
+    # ---------------- ordenes ----------------
+
+    def postorder(self) -> List[int]:
+        key = ("postorder", self._version)
+        if key not in self._cache:
+            seen, out = set(), []
+            stack = [(self.entry, iter(self.blocks[self.entry].succs))]
+            seen.add(self.entry)
+            while stack:
+                bid, it = stack[-1]
+                for s in it:
+                    if s != CFG.EXIT and s not in seen:
+                        seen.add(s)
+                        stack.append((s, iter(self.blocks[s].succs)))
+                        break
+                else:
+                    stack.pop()
+                    out.append(bid)
+            self._cache[key] = out
+        return self._cache[key]
+
+    def reverse_postorder(self) -> List[int]:
+        return list(reversed(self.postorder()))
+
+    # ---------------- dominadores ----------------
+
+    def idoms(self) -> Dict[int, int]:
+        """Dominador inmediato de cada bloque alcanzable (la entrada se domina a si misma)."""
+        key = ("idom", self._version)
+        if key in self._cache:
+            return self._cache[key]
+        rpo = self.reverse_postorder()
+        index = {b: i for i, b in enumerate(rpo)}
+        idom = {self.entry: self.entry}
+
+        def intersect(a, b):
+            while a != b:
+                while index[a] > index[b]:
+                    a = idom[a]
+                while index[b] > index[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for b in rpo[1:]:
+                new = None
+                for p in self.blocks[b].preds:
+                    if p in idom:
+                        new = p if new is None else intersect(p, new)
+                if new is not None and idom.get(b) != new:
+                    idom[b] = new
+                    changed = True
+        self._cache[key] = idom
+        return idom
+
+    def dom_tree(self) -> Dict[int, List[int]]:
+        """Hijos de cada bloque en el arbol de dominadores (en RPO)."""
+        key = ("domtree", self._version)
+        if key not in self._cache:
+            idom = self.idoms()
+            children = {b: [] for b in idom}
+            for b in self.reverse_postorder():
+                if b != self.entry:
+                    children[idom[b]].append(b)
+            self._cache[key] = children
+        return self._cache[key]
+
+    def dominates(self, a: int, b: int) -> bool:
+        idom = self.idoms()
+        if b not in idom:
+            return False
+        while True:
+            if a == b:
+                return True
+            if b == self.entry:
+                return False
+            b = idom[b]
+
+    def dominance_frontiers(self) -> Dict[int, Set[int]]:
+        key = ("df", self._version)
+        if key not in self._cache:
+            idom = self.idoms()
+            df = {b: set() for b in idom}
+            for b in idom:
+                preds = [p for p in self.blocks[b].preds if p in idom]
+                if len(preds) >= 2:
+                    for p in preds:
+                        runner = p
+                        while runner != idom[b]:
+                            df[runner].add(b)
+                            runner = idom[runner]
+            self._cache[key] = df
+        return self._cache[key]
+
+    # ---------------- lazos ----------------
+
+    def loops(self) -> "LoopForest":
+        key = ("loops", self._version)
+        if key not in self._cache:
+            self._cache[key] = LoopForest.build(self)
+        return self._cache[key]
+
+    def __str__(self):
+        lines = []
+        for bid in self.order:
+            b = self.blocks[bid]
+            lines.append(f"B{bid}" + (f" ({b.label})" if b.label else "")
+                         + f" preds={b.preds} succs={b.succs}")
+            lines.extend(f"    {instr}" for instr in b.instrs)
+        return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Bosque de lazos
+# ---------------------------------------------------------------------------
+
+@dataclass(eq=False)
+class Loop:
+    header: int
+    blocks: Set[int] = field(default_factory=set)
+    latches: Set[int] = field(default_factory=set)   # origen de las aristas de retorno
+    parent: Optional["Loop"] = None
+    children: List["Loop"] = field(default_factory=list)
+
+    @property
+    def depth(self) -> int:
+        d, loop = 1, self.parent
+        while loop is not None:
+            d += 1
+            loop = loop.parent
+        return d
+
+    def exits(self, cfg: CFG) -> Set[int]:
+        """Bloques fuera del lazo alcanzados desde dentro."""
+        return {s for b in self.blocks for s in cfg.succs(b) if s not in self.blocks}
+
+    def __repr__(self):
+        return f"Loop(header={self.header}, blocks={sorted(self.blocks)}, depth={self.depth})"
+
+
+class LoopForest:
+    """Lazos naturales (uno por cabecera) anidados por inclusion."""
+
+    def __init__(self):
+        self.loops: List[Loop] = []        # de afuera hacia adentro
+        self.roots: List[Loop] = []
+        self._innermost: Dict[int, Loop] = {}
+
+    @classmethod
+    def build(cls, cfg: CFG) -> "LoopForest":
+        forest = cls()
+        by_header: Dict[int, Loop] = {}
+        for b in cfg.reverse_postorder():
+            for s in cfg.succs(b):
+                if s != CFG.EXIT and cfg.dominates(s, b):
+                    loop = by_header.setdefault(s, Loop(s, {s}))
+                    loop.latches.add(b)
+                    # Cuerpo: todo lo que llega al latch sin pasar por la cabecera
+                    work = [b]
+                    while work:
+                        n = work.pop()
+                        if n not in loop.blocks:
+                            loop.blocks.add(n)
+                            work.extend(p for p in cfg.preds(n) if p in cfg.idoms())
+        # Anidar: el padre es el lazo mas chico que contiene al otro
+        loops = sorted(by_header.values(), key=lambda l: len(l.blocks), reverse=True)
+        for i, loop in enumerate(loops):
+            for outer in reversed(loops[:i]):
+                if loop.header in outer.blocks and loop.blocks <= outer.blocks:
+                    loop.parent = outer
+                    outer.children.append(loop)
+                    break
+        forest.loops = loops
+        forest.roots = [l for l in loops if l.parent is None]
+        for loop in loops:                   # de afuera hacia adentro: el ultimo gana
+            for b in loop.blocks:
+                forest._innermost[b] = loop
+        return forest
+
+    def loop_of(self, bid: int) -> Optional[Loop]:
+        """Lazo mas interno que contiene al bloque (None si no esta en ninguno)."""
+        return self._innermost.get(bid)
+
+    def depth(self, bid: int) -> int:
+        loop = self.loop_of(bid)
+        return loop.depth if loop else 0
+
+    def innermost_first(self) -> List[Loop]:
+        return sorted(self.loops, key=lambda l: l.depth, reverse=True)
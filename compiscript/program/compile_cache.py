@@ -0,0 +1,153 @@
+"""
+Cache de resultados de compilacion direccionado por contenido.
+
+La clave es un hash SHA-256 del codigo fuente, el formato pedido, la version
+del compilador y cualquier opcion extra que cambie la salida. Cada entrada
+guarda el resultado ya normalizado (TAC, MIPS, dump del AST y diagnosticos).
+
+- Limite de memoria configurable (en bytes del JSON de cada entrada) con
+  desalojo LRU.
+- Persistencia opcional en disco (un archivo JSON por clave) para sobrevivir
+  reinicios del servidor.
+- Contadores de hits/misses para dimensionarlo.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from compiler_session import COMPILER_VERSION
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+class CompileCache:
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, persist_dir: Optional[str] = None,
+                 version: str = COMPILER_VERSION):
+        self.max_bytes = max_bytes
+        self.persist_dir = persist_dir
+        self.version = version
+        self._entries = OrderedDict()   # clave -> (payload, tamaño)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+
+    def key(self, source: str, output_format: str = "all", **options) -> str:
+        """Clave de cache para (codigo, formato, version, opciones)."""
+        h = hashlib.sha256()
+        h.update(self.version.encode("utf-8"))
+        h.update(b"\0")
+        h.update(output_format.encode("utf-8"))
+        h.update(b"\0")
+        h.update(json.dumps(options, sort_keys=True, default=str).encode("utf-8"))
+        h.update(b"\0")
+        h.update(source.encode("utf-8"))
+        return h.hexdigest()
+
+    # ---------------- consulta / insercion ----------------
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[0])
+
+        payload = self._load_from_disk(key)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._insert(key, payload, self._size_of(payload))
+        return dict(payload)
+
+    def put(self, key: str, payload: dict) -> None:
+        size = self._size_of(payload)
+        with self._lock:
+            self._insert(key, payload, size)
+        self._save_to_disk(key, payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "persist_dir": self.persist_dir,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    # ---------------- internos ----------------
+
+    @staticmethod
+    def _size_of(payload: dict) -> int:
+        return len(json.dumps(payload).encode("utf-8"))
+
+    def _insert(self, key: str, payload: dict, size: int) -> None:
+        """Inserta (con el lock tomado) y desaloja por LRU hasta respetar el limite."""
+        if size > self.max_bytes:
+            return  # no cabe ni sola; no vale la pena vaciar el cache por ella
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = (dict(payload), size)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.persist_dir, f"{key}.json")
+
+    def _load_from_disk(self, key: str) -> Optional[dict]:
+        if not self.persist_dir:
+            return None
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_to_disk(self, key: str, payload: dict) -> None:
+        if not self.persist_dir:
+            return
+        tmp = self._path(key) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            # La persistencia es opcional: si el disco falla, el cache en memoria sigue funcionando
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
@@ -0,0 +1,273 @@
+"""
+Pool de procesos de compilacion pre-creados (pre-fork) con parsers calientes.
+
+El primer parse de cada proceso paga la deserializacion del ATN de
+CompiscriptParser y la construccion en frio de los DFA del
+ParserATNSimulator. Este modulo:
+
+1. Importa el compilador y calienta los DFA del lexer/parser una sola vez
+   parseando el corpus de warmup/ (en el proceso padre cuando el sistema
+   permite fork, asi los hijos heredan los caches ya construidos).
+2. Lanza N procesos trabajadores que reciben trabajos de una cola acotada.
+3. Aplica un timeout por trabajo: si un trabajador se pasa, se mata y se
+   reemplaza por uno nuevo (tambien caliente). Cualquier otro error de un
+   trabajo se entrega en su Future y el trabajador tambien se reemplaza.
+
+Uso tipico (server.py --workers N):
+
+    pool = CompilerWorkerPool(workers=4)
+    result = pool.compile(source, "all")   # -> CompilationResult
+    pool.shutdown()
+"""
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional
+
+from compiler_session import CompilerSession, CompilationResult
+
+WARMUP_DIR = Path(__file__).resolve().parent / "warmup"
+
+TIMEOUT_MSG = "Compilación excedió el tiempo límite"
+
+
+class PoolBusy(Exception):
+    """La cola de trabajos esta llena."""
+
+
+def warm_up(session: CompilerSession, corpus_dir=WARMUP_DIR) -> int:
+    """
+    Parsea (y analiza) cada .cps del corpus para poblar los caches DFA del
+    runtime de ANTLR. Devuelve cuantos archivos se procesaron.
+    """
+    count = 0
+    for path in sorted(Path(corpus_dir).glob("*.cps")):
+        source = path.read_text(encoding="utf-8")
+        lines = source.splitlines(True)
+        sink = _NullSink()
+        tree, _, err, _ = session.parse(source, lines, out=sink)
+        if not err.errors:
+            session.analyze(tree, lines, diag=sink)
+        count += 1
+    return count
+
+
+class _NullSink:
+    """Sumidero de diagnosticos que descarta todo (usado durante el warmup)."""
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+def _worker_main(conn, corpus_dir, already_warm: bool):
+    """Bucle de un proceso trabajador: recibe (codigo, formato), devuelve el resultado."""
+    session = CompilerSession(capture_output=True)
+    if not already_warm:
+        warm_up(session, corpus_dir)
+    conn.send("ready")
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+        source, output_format = job
+        res = session.compile(source, output_format)
+        payload = res.to_dict()
+        payload["syntax_errors"] = res.syntax_errors
+        payload["semantic_errors"] = res.semantic_errors
+        conn.send(payload)
+    conn.close()
+
+
+class _Worker:
+    """Un proceso trabajador y su extremo del pipe."""
+
+    def __init__(self, ctx, corpus_dir, already_warm: bool):
+        self.ctx = ctx
+        self.corpus_dir = corpus_dir
+        self.already_warm = already_warm
+        self.process = None
+        self.conn = None
+        self.start()
+
+    def start(self):
+        parent, child = self.ctx.Pipe()
+        self.process = self.ctx.Process(
+            target=_worker_main, args=(child, str(self.corpus_dir), self.already_warm), daemon=True
+        )
+        self.process.start()
+        child.close()
+        self.conn = parent
+        self.conn.recv()  # esperar a que termine el warmup
+
+    def run(self, job, timeout: float) -> dict:
+        self.conn.send(job)
+        if not self.conn.poll(timeout):
+            raise TimeoutError()
+        return self.conn.recv()
+
+    def restart(self):
+        self.kill()
+        self.start()
+
+    def kill(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+        if self.process is not None:
+            self.process.join(timeout=5)
+        if self.conn is not None:
+            self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        self.kill()
+
+
+class CompilerWorkerPool:
+    """
+    Pool de N trabajadores alimentado por una cola acotada de trabajos.
+
+    workers:     numero de procesos (por defecto, os.cpu_count()).
+    queue_size:  trabajos en espera antes de rechazar con PoolBusy.
+    job_timeout: segundos maximos por compilacion.
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_size: int = 64,
+                 job_timeout: float = 60.0, corpus_dir=WARMUP_DIR):
+        self.size = workers or os.cpu_count() or 1
+        self.job_timeout = job_timeout
+        self._jobs = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+        methods = mp.get_all_start_methods()
+        ctx = mp.get_context("fork" if "fork" in methods else "spawn")
+        forking = ctx.get_start_method() == "fork"
+        if forking:
+            # Calentar una vez en el padre: cada fork hereda los DFA ya construidos
+            warm_up(CompilerSession(capture_output=True), corpus_dir)
+
+        self._workers = [_Worker(ctx, corpus_dir, already_warm=forking) for _ in range(self.size)]
+        self._threads = []
+        for w in self._workers:
+            t = threading.Thread(target=self._dispatch, args=(w,), daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    # ---------------- API ----------------
+
+    def submit(self, source: str, output_format: str = "all", block: bool = False,
+               timeout: Optional[float] = None) -> Future:
+        """Encola un trabajo. Lanza PoolBusy si la cola esta llena."""
+        if self._closed:
+            raise RuntimeError("El pool ya fue cerrado.")
+        fut = Future()
+        try:
+            self._jobs.put(((source, output_format), fut), block=block, timeout=timeout)
+        except queue.Full:
+            raise PoolBusy("Cola de compilacion llena")
+        return fut
+
+    def compile(self, source: str, output_format: str = "all") -> CompilationResult:
+        """Compila de forma sincronica usando el pool (PoolBusy si la cola esta llena)."""
+        return self.submit(source, output_format).result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.size,
+                "queued": self._jobs.qsize(),
+                "queue_size": self._jobs.maxsize,
+                "completed": self.completed,
+                "timeouts": self.timeouts,
+                "restarts": self.restarts,
+            }
+
+    def shutdown(self):
+        self._closed = True
+        for _ in self._threads:
+            self._jobs.put(None)
+        for t in self._threads:
+            t.join(timeout=5)
+        for w in self._workers:
+            w.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    # ---------------- despacho ----------------
+
+    def _dispatch(self, worker: _Worker):
+        """Hilo dedicado a un trabajador: saca trabajos de la cola y se los pasa."""
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                return
+            job, fut = item
+            if not fut.set_running_or_notify_cancel():
+                continue
+            start = time.time()
+            try:
+                res = self._run(worker, job, start)
+            except Exception as e:
+                # Cualquier otro error (un payload que no arma un CompilationResult,
+                # un trabajador que no se pudo reemplazar, ...) se entrega en el
+                # futuro: el hilo sigue atendiendo la cola con un proceso nuevo
+                fut.set_exception(e)
+                self._restart(worker)
+            else:
+                fut.set_result(res)
+            finally:
+                with self._lock:
+                    self.completed += 1
+
+    def _run(self, worker: _Worker, job, start: float) -> CompilationResult:
+        """Corre un trabajo; un timeout o un trabajador caido dan un resultado de error."""
+        try:
+            payload = worker.run(job, self.job_timeout)
+            return CompilationResult(**payload)
+        except TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            self._restart(worker)
+            return CompilationResult(success=False, stderr=TIMEOUT_MSG, errors=[TIMEOUT_MSG],
+                                     compilation_time=time.time() - start)
+        except (EOFError, OSError) as e:
+            # El trabajador murio (p. ej. por falta de memoria): reemplazarlo
+            self._restart(worker)
+            return CompilationResult(success=False, stderr=str(e), errors=[f"Worker caido: {e}"],
+                                     compilation_time=time.time() - start)
+
+    def _restart(self, worker: _Worker) -> None:
+        """
+        Reemplaza el proceso del trabajador. Si el nuevo no arranca, su pipe
+        queda cerrado o sin proceso del otro lado: el proximo trabajo falla con
+        EOFError/OSError y se vuelve a intentar.
+        """
+        with self._lock:
+            self.restarts += 1
+        try:
+            worker.restart()
+        except Exception:
+            pass
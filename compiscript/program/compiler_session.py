@@ -0,0 +1,392 @@
+"""
+Motor de compilacion en proceso.
+
+CompilerSession ejecuta todo el pipeline (lexer -> parser -> SemanticListener ->
+AstBuilder -> TACGenerator -> MIPSGen) dentro del mismo interprete y devuelve
+un CompilationResult con los artefactos en memoria, sin archivos temporales ni
+subprocesos. Lo usan tanto Driver.py como las rutas de server.py.
+
+Cada compilacion es independiente: los artefactos viven en su propio
+CompilationResult y los diagnosticos van a sumideros propios de la llamada (no
+se toca sys.stdout/sys.stderr), asi que varias compilaciones pueden correr en
+paralelo en hilos distintos.
+"""
+import io
+import os
+import sys
+import time
+import traceback
+from collections import namedtuple
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from antlr4 import InputStream, CommonTokenStream, ParseTreeWalker
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+from CompiscriptLexer import CompiscriptLexer
+from CompiscriptParser import CompiscriptParser
+from PrettyErrorListener import PrettyErrorListener
+from SemanticListener import SemanticListener
+from ast_builder import AstBuilder
+from tac_generator import TACGenerator
+from mips_generator import MIPSGen, count_instructions
+from treeutils import dump_ast_to_str
+from phase_timer import PhaseTimer
+from temp_rename import rename_temps
+from ast_optimizer import fold_constants
+from sccp import global_constants, run_sccp
+from gvn import value_numbering
+from licm import hoist_invariants
+from induction import reduce_induction_variables
+from copyprop import propagate_copies
+from dce import eliminate_dead_code
+
+COMPILER_VERSION = "2.2"
+
+OUTPUT_FORMATS = ("all", "tac", "mips", "ast")
+
+# Pasadas de -O2 sobre el TAC, en orden: (fase, descripcion para el resumen)
+TAC_PASSES = (
+    ("sccp", "propagacion de constantes"),
+    ("gvn", "numeracion de valores"),
+    ("licm", "invariantes de lazos"),
+    ("iv", "variables de induccion"),
+    ("copies", "propagacion de copias"),
+    ("dce", "codigo muerto"),
+)
+
+# Resultado de la fase de parseo. stage indica que pasada produjo el arbol:
+# "sll" (rapida, sin errores) o "ll" (completa, con reporte de errores).
+ParseOutcome = namedtuple("ParseOutcome", "tree parser listener stage")
+
+
+@dataclass
+class CompilationResult:
+    """Resultado estructurado de una compilacion."""
+    success: bool = False
+    tac: str = ""
+    mips: str = ""
+    ast: str = ""
+    stdout: str = ""
+    stderr: str = ""
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    compilation_time: float = 0.0
+    # Metricas de la compilacion (p. ej. parse_stage)
+    metrics: dict = field(default_factory=dict)
+    # Tiempo/memoria por fase (ver PhaseTimer.as_dict)
+    timings: dict = field(default_factory=dict)
+
+    # Objetos intermedios, utiles para quien usa la API directamente (Driver, tests)
+    tree: Any = None
+    parser: Any = None
+    ast_root: Any = None
+    symbtab: Any = None
+    tac_code: list = field(default_factory=list)
+    syntax_errors: list = field(default_factory=list)
+    semantic_errors: list = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """Solo los campos serializables a JSON."""
+        return {
+            "success": self.success,
+            "tac": self.tac,
+            "mips": self.mips,
+            "ast": self.ast,
+            "stdout": self.stdout,
+            "stderr": self.stderr,
+            "errors": list(self.errors),
+            "warnings": list(self.warnings),
+            "compilation_time": self.compilation_time,
+            "metrics": dict(self.metrics),
+            "timings": dict(self.timings),
+        }
+
+    def optimization_summary(self) -> str:
+        """Resumen legible de lo que hizo cada optimizacion (a partir de metrics)."""
+        m = self.metrics
+        lines = []
+        if "ast_folded" in m:
+            lines.append(f"fold (AST): {m['ast_folded']} expresiones plegadas")
+        if "tac_generated" in m:
+            lines.append(f"TAC generado: {m['tac_generated']} instrucciones")
+            for phase, label in TAC_PASSES:
+                removed = m.get(f"{phase}_instrs_removed")
+                if removed is None:
+                    continue
+                line = f"  {phase} ({label}): {-removed:+d}" if removed else f"  {phase} ({label}): 0"
+                if phase == "gvn":
+                    line += f" [{m['gvn_local']} locales, {m['gvn_global']} globales reutilizadas]"
+                elif phase == "licm":
+                    line += f" [{m['licm_hoisted']} instrucciones movidas a {m['licm_loops']} preheaders]"
+                elif phase == "iv":
+                    line += f" [{m['iv_reduced']} multiplicaciones reducidas, {m['iv_counters_removed']} contadores eliminados]"
+                lines.append(line)
+            lines.append(f"TAC final: {m['tac_instructions']} instrucciones")
+        return "\n".join(lines)
+
+    def write_artifacts(self, directory) -> dict:
+        """
+        Escribe tac.txt / out.s / ast.txt en `directory` (solo los generados).
+        Devuelve {nombre: ruta}. Permite darle a cada compilacion su propio
+        directorio de trabajo en vez de compartir los archivos de PROG_DIR.
+        """
+        os.makedirs(directory, exist_ok=True)
+        written = {}
+        for name, content in (("tac.txt", self.tac), ("out.s", self.mips), ("ast.txt", self.ast)):
+            if not content:
+                continue
+            path = os.path.join(directory, name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+                if name == "out.s":
+                    f.write("\n")
+            written[name] = path
+        return written
+
+
+def _wanted_outputs(output_format: str):
+    """Traduce el 'format' del IDE a (tac, mips, ast)."""
+    want_tac = output_format in ("all", "tac", "mips")
+    want_mips = output_format in ("all", "mips")
+    want_ast = output_format in ("all", "ast")
+    return want_tac, want_mips, want_ast
+
+
+class CompilerSession:
+    """
+    Sesion de compilacion reutilizable.
+
+    Los modulos de ANTLR se importan una sola vez por proceso, asi que cada
+    llamada a compile() solo paga el costo del analisis en si.
+
+    capture_output=True guarda los diagnosticos en result.stdout (sintacticos)
+    y result.stderr (semanticos), que es lo que necesita el servidor; con False
+    salen directo a la consola, que es lo que necesita Driver.py.
+
+    two_stage_parse=True parsea primero con PredictionMode.SLL y
+    BailErrorStrategy; solo si esa pasada falla se vuelve a parsear con LL
+    completo y PrettyErrorListener. Para programas validos (la mayoria) la
+    pasada SLL basta y es bastante mas barata.
+
+    rename_temps=True renombra los temporales del TAC a un conjunto minimo
+    segun sus rangos de vida (temp_rename.py); result.metrics registra
+    temps_before / temps_after.
+
+    opt_level >= 1 (-O1) pliega constantes y simplifica el AST antes de
+    generar TAC (ast_optimizer.py; fase "fold", metrica ast_folded). El AST
+    de result.ast_root / result.ast es el original.
+
+    opt_level >= 2 (-O2) ademas pasa cada unidad del TAC a SSA y propaga
+    constantes con SCCP (sccp.py; fase "sccp", metricas ssa_* / sccp_*,
+    entre ellas sccp_instrs_removed y sccp_branches_removed), reutiliza
+    operaciones repetidas con numeracion de valores (gvn.py; fase "gvn",
+    metricas gvn_*), saca de los lazos las operaciones invariantes (licm.py;
+    fase "licm", metricas licm_*), reduce las variables de induccion
+    (induction.py; fase "iv", metricas iv_*), propaga y coalesce copias
+    (copyprop.py; fase "copies", metricas copies_*) y despues elimina codigo
+    muerto (dce.py; fase "dce", metricas dce_*). tac_generated / tac_instructions cuentan el TAC antes y
+    despues de estas pasadas y result.optimization_summary() lo resume.
+
+    regalloc elige el asignador de registros de MIPSGen (mips_generator.REGALLOCS);
+    por defecto "linear", o "graph" con opt_level >= 2 (-O2).
+    result.metrics["mips_instructions"] cuenta las instrucciones generadas y la
+    fase "regalloc" mide el tiempo de la asignacion.
+    """
+
+    def __init__(self, capture_output: bool = True, two_stage_parse: bool = True,
+                 trace_memory: bool = False, rename_temps: bool = True,
+                 regalloc: Optional[str] = None, opt_level: int = 0):
+        self.capture_output = capture_output
+        self.two_stage_parse = two_stage_parse
+        self.rename_temps = rename_temps
+        self.opt_level = opt_level
+        self.regalloc = regalloc or ("graph" if opt_level >= 2 else "linear")
+        # Valor por defecto de compile(trace_memory=...)
+        self.trace_memory = trace_memory
+
+    # ---------------- fases ----------------
+
+    def parse(self, source: str, source_lines: Optional[List[str]] = None, out=None,
+              timer: Optional[PhaseTimer] = None) -> ParseOutcome:
+        """Lexer + parser. Devuelve un ParseOutcome(tree, parser, listener, stage)."""
+        timer = timer or PhaseTimer()
+        if source_lines is None:
+            source_lines = source.splitlines(True)
+        with timer.phase("lex"):
+            lexer = CompiscriptLexer(InputStream(source))
+            err = PrettyErrorListener(source_lines, stream=out)
+            lexer.removeErrorListeners()
+            lexer.addErrorListener(err)
+            stream = CommonTokenStream(lexer)
+            stream.fill()
+
+        with timer.phase("parse"):
+            parser = CompiscriptParser(stream)
+            parser.removeErrorListeners()
+
+            if self.two_stage_parse:
+                # Etapa 1: SLL sin recuperacion; cualquier error cancela el parseo
+                parser._interp.predictionMode = PredictionMode.SLL
+                parser._errHandler = BailErrorStrategy()
+                try:
+                    tree = parser.program()
+                    return ParseOutcome(tree, parser, err, "sll")
+                except ParseCancellationException:
+                    # Etapa 2: mismos tokens, LL completo y reporte normal de errores
+                    stream.seek(0)
+                    parser._errHandler = DefaultErrorStrategy()
+                    parser.reset()
+                    parser._interp.predictionMode = PredictionMode.LL
+
+            parser.addErrorListener(err)
+            tree = parser.program()
+            return ParseOutcome(tree, parser, err, "ll")
+
+    def analyze(self, tree, source_lines: List[str], diag=None) -> SemanticListener:
+        """Analisis semantico sobre el parse tree."""
+        sem = SemanticListener(source_lines, diag=diag)
+        ParseTreeWalker().walk(sem, tree)
+        return sem
+
+    def build_ast(self, tree):
+        return AstBuilder().visit(tree)
+
+    def generate_tac(self, ast, symbtab) -> list:
+        # Asignar direcciones de memoria y etiquetas antes de generar TAC
+        symbtab.assign_memory_addresses()
+        symbtab.assign_function_labels()
+        return TACGenerator(symbtab).generate(ast)
+
+    def generate_mips(self, tac_code: list) -> str:
+        return MIPSGen(tac_code, regalloc=self.regalloc).translate()
+
+    # ---------------- pipeline completo ----------------
+
+    def compile(self, source: str, output_format: str = "all", *,
+                tac: Optional[bool] = None, mips: Optional[bool] = None,
+                ast: Optional[bool] = None, timer: Optional[PhaseTimer] = None,
+                trace_memory: Optional[bool] = None) -> CompilationResult:
+        """
+        Compila `source` y devuelve un CompilationResult.
+
+        output_format sigue la convencion del IDE ("all", "tac", "mips", "ast");
+        los argumentos tac/mips/ast, si se pasan, la sobreescriben.
+
+        Los tiempos por fase quedan en result.timings. Se puede pasar un
+        PhaseTimer propio para seguir midiendo fases fuera de la sesion (como
+        hace Driver.py con la escritura de artefactos).
+        """
+        own_timer = timer is None
+        if own_timer:
+            if trace_memory is None:
+                trace_memory = self.trace_memory
+            timer = PhaseTimer(trace_memory=trace_memory)
+        want_tac, want_mips, want_ast = _wanted_outputs(output_format)
+        if tac is not None:
+            want_tac = tac
+        if mips is not None:
+            want_mips = mips
+        if ast is not None:
+            want_ast = ast
+        want_tac = want_tac or want_mips
+
+        res = CompilationResult()
+        # Sumideros de diagnosticos propios de esta compilacion
+        if self.capture_output:
+            out, diag = io.StringIO(), io.StringIO()
+        else:
+            out, diag = sys.stdout, sys.stderr
+        start = time.time()
+
+        try:
+            self._run(source, res, want_tac, want_mips, want_ast, out, diag, timer)
+        except Exception as e:
+            res.success = False
+            res.errors.append(str(e))
+            diag.write(traceback.format_exc())
+        finally:
+            res.compilation_time = time.time() - start
+            if own_timer:
+                timer.stop()
+            res.timings = timer.as_dict()
+            if self.capture_output:
+                res.stdout = out.getvalue()
+                res.stderr = diag.getvalue()
+
+        return res
+
+    def _run(self, source: str, res: CompilationResult,
+             want_tac: bool, want_mips: bool, want_ast: bool, out, diag, timer: PhaseTimer) -> None:
+        source_lines = source.splitlines(True)
+
+        # 1. Lexing y Parsing
+        tree, parser, err, stage = self.parse(source, source_lines, out=out, timer=timer)
+        res.tree, res.parser = tree, parser
+        res.metrics["parse_stage"] = stage
+        if err.errors:
+            res.syntax_errors = list(err.errors)
+            res.errors = [f"Error sintactico (linea {l}, columna {c}): {m}" for (l, c, m) in err.errors]
+            return
+
+        # 2. Analisis semantico
+        with timer.phase("semantic"):
+            sem = self.analyze(tree, source_lines, diag=diag)
+        res.symbtab = sem.symbtab
+        if sem.errors:
+            res.semantic_errors = list(sem.errors)
+            res.errors = [f"Error semantico (linea {l}, columna {c}): {m}" for (l, c, m) in sem.errors]
+            return
+
+        # 3. AST
+        with timer.phase("ast"):
+            res.ast_root = self.build_ast(tree)
+        if want_ast:
+            with timer.phase("ast_dump"):
+                res.ast = dump_ast_to_str(res.ast_root)
+
+        # 4. TAC y MIPS
+        if want_tac:
+            ast = res.ast_root
+            if self.opt_level >= 1:
+                with timer.phase("fold"):
+                    ast, stats = fold_constants(ast)
+                res.metrics.update(stats)
+            with timer.phase("tac"):
+                res.tac_code = self.generate_tac(ast, sem.symbtab)
+            if self.opt_level >= 2:
+                res.metrics["tac_generated"] = len(res.tac_code)
+                with timer.phase("sccp"):
+                    res.tac_code, stats = run_sccp(res.tac_code, global_constants(ast))
+                res.metrics.update(stats)
+                with timer.phase("gvn"):
+                    res.tac_code, stats = value_numbering(res.tac_code)
+                res.metrics.update(stats)
+                with timer.phase("licm"):
+                    res.tac_code, stats = hoist_invariants(res.tac_code)
+                res.metrics.update(stats)
+                with timer.phase("iv"):
+                    res.tac_code, stats = reduce_induction_variables(res.tac_code)
+                res.metrics.update(stats)
+                with timer.phase("copies"):
+                    res.tac_code, stats = propagate_copies(res.tac_code)
+                res.metrics.update(stats)
+                with timer.phase("dce"):
+                    res.tac_code, stats = eliminate_dead_code(res.tac_code)
+                res.metrics.update(stats)
+                res.metrics["tac_instructions"] = len(res.tac_code)
+            if self.rename_temps:
+                with timer.phase("temps"):
+                    res.tac_code, stats = rename_temps(res.tac_code)
+                res.metrics.update(stats)
+            res.tac = "\n".join(map(str, res.tac_code))
+        if want_mips:
+            with timer.phase("regalloc"):
+                gen = MIPSGen(res.tac_code, regalloc=self.regalloc)
+            with timer.phase("mips"):
+                res.mips = gen.translate()
+            res.metrics["mips_instructions"] = count_instructions(res.mips)
+            res.metrics.update(gen.regalloc_stats())
+
+        res.success = True
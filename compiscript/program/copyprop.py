@@ -0,0 +1,181 @@
+"""
+Propagacion de copias sobre el TAC. Corre con opt_level >= 2 (-O2), despues
+de la numeracion de valores (gvn.py) y antes de DCE, que borra las copias que
+quedan sin usos.
+
+Dos pasadas por unidad (cfg.split_functions), en este orden (si primero se
+reemplazara x por t, t ya no estaria muerto despues de la copia):
+
+- Hacia atras (coalescing): `t = a + b` seguido de `x = t`, con t muerto
+  despues de la copia y x sin leerse ni escribirse en el medio, se vuelve
+  `x = a + b`. Es el patron de visitVarDecl/visitAssign.
+- Hacia adelante: con copias disponibles (analisis de flujo "must": la copia
+  `x = y` se ejecuto en todos los caminos y ni x ni y cambiaron despues),
+  cada lectura de x pasa a leer y. Tambien con literales (`x = 5`). Los param
+  se miran en la call, que es donde el backend los lee. Una llamada invalida
+  las copias que tocan variables que escribe alguna funcion.
+
+En las unidades a las que se entra por un salto desde otra unidad
+(cfg.entered_from_outside) las copias no cruzan bloques.
+
+    code, stats = propagate_copies(code)
+    stats -> {"copies_propagated": 14, "copies_coalesced": 6, "copies_instrs_removed": 6}
+"""
+from dataclasses import replace
+from typing import Dict, List, Optional, Set, Tuple
+
+from cfg import CFG, entered_from_outside, join_functions, split_functions
+from liveness import Liveness
+from tac import TAC, Assign, BinaryOp, Call, Param, UnaryOp, defs, is_temp, is_var, replace_uses, uses
+
+Copies = Dict[str, object]          # destino -> origen de las copias disponibles
+
+
+def _kill(copies: Copies, written) -> None:
+    for v in written:
+        copies.pop(v, None)
+    if copies:
+        dead = [x for x, y in copies.items() if y in written]
+        for x in dead:
+            del copies[x]
+
+
+class CopyPropagation:
+    """Propagacion de copias de una unidad (modifica los bloques de `cfg`)."""
+
+    def __init__(self, cfg: CFG, clobbered: Set[str] = frozenset()):
+        self.cfg = cfg
+        self.clobbered = clobbered      # variables que una llamada puede cambiar
+        self.propagated = 0             # lecturas reemplazadas
+        self.coalesced = 0              # copias absorbidas por la definicion anterior
+
+    # ---------------- hacia adelante ----------------
+
+    def _transfer(self, instr: TAC, copies: Copies) -> None:
+        written = defs(instr)
+        if isinstance(instr, Call):
+            written = written + [v for v in self.clobbered if v in copies or v in copies.values()]
+        _kill(copies, set(written))
+        if isinstance(instr, Assign) and is_var(instr.target) and instr.source != instr.target:
+            copies[instr.target] = instr.source
+
+    def available(self) -> Dict[int, Copies]:
+        """Copias disponibles a la entrada de cada bloque."""
+        cfg = self.cfg
+        order = cfg.reverse_postorder()
+        out: Dict[int, Optional[Copies]] = {bid: None for bid in order}   # None: todavia sin visitar
+        ins: Dict[int, Copies] = {}
+        changed = True
+        while changed:
+            changed = False
+            for bid in order:
+                preds = [out[p] for p in cfg.preds(bid) if p in out]
+                if bid == cfg.entry or not preds:
+                    cur: Copies = {}
+                else:
+                    known = [p for p in preds if p is not None]
+                    cur = dict(known[0]) if known else {}
+                    for other in known[1:]:
+                        cur = {x: y for x, y in cur.items() if x in other and other[x] == y}
+                ins[bid] = dict(cur)
+                for instr in cfg.blocks[bid].instrs:
+                    self._transfer(instr, cur)
+                if cur != out[bid]:
+                    out[bid] = cur
+                    changed = True
+        return ins
+
+    def forward(self, local: bool = False) -> None:
+        cfg = self.cfg
+        ins = {} if local else self.available()
+        for bid in cfg.order:
+            copies = dict(ins.get(bid, {}))
+            out: List[TAC] = []
+            params: List[Tuple[int, Copies]] = []    # (posicion en out, copias en el param)
+            dirty = False
+            for instr in cfg.blocks[bid].instrs:
+                if isinstance(instr, Param):
+                    params.append((len(out), dict(copies)))
+                elif isinstance(instr, Call):
+                    # La copia tiene que seguir valiendo en el param y en la call
+                    for at, before in params:
+                        p = out[at]
+                        src = before.get(p.value)
+                        if src is not None and copies.get(p.value) == src:
+                            out[at] = Param(value=src)
+                            self.propagated += 1
+                            dirty = True
+                    params = []
+                else:
+                    mapping = {u: copies[u] for u in uses(instr) if u in copies}
+                    if mapping:
+                        instr = replace_uses(instr, mapping)
+                        self.propagated += len(mapping)
+                        dirty = True
+                self._transfer(instr, copies)
+                out.append(instr)
+            if dirty:
+                cfg.set_instrs(bid, out)
+
+    # ---------------- hacia atras ----------------
+
+    def coalesce(self) -> None:
+        cfg = self.cfg
+        live = Liveness(cfg)
+        for bid in cfg.order:
+            instrs = list(cfg.blocks[bid].instrs)
+            after = live.live_after(bid)
+            dirty = False
+            for k, instr in enumerate(instrs):
+                if not (isinstance(instr, Assign) and is_temp(instr.source) and is_var(instr.target)):
+                    continue
+                t, x = instr.source, instr.target
+                if t in after[k] or x == t:
+                    continue
+                j = self._definition(instrs, k, t, x)
+                if j is None:
+                    continue
+                instrs[j] = replace(instrs[j], target=x)
+                instrs[k] = None
+                self.coalesced += 1
+                dirty = True
+            if dirty:
+                cfg.set_instrs(bid, [i for i in instrs if i is not None])
+
+    @staticmethod
+    def _definition(instrs: List[Optional[TAC]], k: int, t: str, x: str) -> Optional[int]:
+        """Indice de la definicion de t que puede escribir x directamente (o None)."""
+        for j in range(k - 1, -1, -1):
+            instr = instrs[j]
+            if instr is None:
+                continue
+            if defs(instr) == [t]:
+                if isinstance(instr, (Assign, BinaryOp, UnaryOp, Call)):
+                    return j
+                return None
+            # En el medio: nadie mas lee t, x ni se lee ni se escribe, y no hay
+            # llamadas (leen los param pendientes y pueden leer x si es global)
+            if isinstance(instr, Call) or t in uses(instr) or x in uses(instr) \
+                    or x in defs(instr) or t in defs(instr):
+                return None
+        return None
+
+
+def propagate_copies(code: List[TAC]) -> Tuple[List[TAC], dict]:
+    """Devuelve (TAC con las copias propagadas, estadisticas). No modifica `code`."""
+    stats = dict.fromkeys(("copies_propagated", "copies_coalesced", "copies_instrs_removed"), 0)
+    units = split_functions(code)
+    clobbered = {v for unit in units if unit.is_function
+                 for instr in unit.body for v in defs(instr) if not is_temp(v)}
+    fixed = entered_from_outside(units)
+    for unit in units:
+        before = len(unit.body)
+        cfg = CFG.build(unit.body, unit.name)
+        cp = CopyPropagation(cfg, clobbered)
+        cp.coalesce()
+        cp.forward(local=unit.name in fixed)
+        unit.body = cfg.linearize()
+        stats["copies_propagated"] += cp.propagated
+        stats["copies_coalesced"] += cp.coalesced
+        stats["copies_instrs_removed"] += before - len(unit.body)
+    return join_functions(units), stats
@@ -0,0 +1,160 @@
+"""
+Eliminacion de codigo muerto sobre el TAC. Corre con opt_level >= 2 (-O2),
+despues de SCCP.
+
+Por cada unidad (cfg.split_functions):
+
+- se eliminan los bloques inalcanzables;
+- con el analisis de vida (liveness.Liveness) se recorre cada bloque hacia
+  atras y se borran las instrucciones puras (copias y operaciones) cuyo
+  destino no se lee despues: temporales que nadie usa y stores a variables
+  que se sobrescriben (o se dejan de usar) antes de leerse. Las llamadas se
+  conservan por sus efectos; si su resultado no se usa solo se les quita el
+  destino (`call print, 1` en vez de `t3 = call print, 1`). Se repite hasta
+  que no cambie nada: borrar un uso puede dejar muerta otra definicion;
+- se quitan los saltos a la etiqueta que viene justo despues (un if que se
+  quedo sin cuerpo) y se vuelve a barrer: la comparacion que alimentaba el
+  salto tambien queda muerta.
+
+Lo que una unidad escribe y puede leerse despues se considera vivo a la
+salida: en el codigo global, las variables que aparecen en otra unidad y los
+temporales que cruzan tramos globales; en una funcion, las variables
+globales y las de su funcion contenedora o de sus anidadas (sus temporales
+no). Una llamada, ademas de sus `param`, lee todas las variables (no
+temporales) que lee alguna funcion (Liveness(call_uses=...)): un store a una
+global que la funcion llamada usa no esta muerto. En las unidades a las que
+se entra por un salto desde otra unidad (cfg.entered_from_outside) no se
+eliminan bloques.
+
+Al final, sobre el programa completo, se quitan las etiquetas a las que no
+salta nadie.
+
+    code, stats = eliminate_dead_code(code)
+    stats -> {"dce_removed": 12, "dce_dead_stores": 2, "dce_call_results": 5,
+              "dce_blocks_removed": 1, "dce_jumps_removed": 2, "dce_labels_removed": 3,
+              "dce_instrs_removed": 25}
+"""
+from typing import Dict, List, Set, Tuple
+
+from cfg import CFG, entered_from_outside, join_functions, split_functions
+from liveness import Liveness
+from tac import TAC, Assign, BeginFunc, BinaryOp, Call, CondJump, Jump, Label, UnaryOp, defs, is_temp, uses
+
+PURE = (Assign, BinaryOp, UnaryOp)
+
+
+def _sweep(cfg: CFG, exit_live: Set[str], call_uses: Set[str], stats: Dict[str, int]) -> bool:
+    """Una pasada hacia atras por cada bloque. Devuelve True si borro algo."""
+    live = Liveness(cfg, exit_live=exit_live, call_uses=call_uses)
+    changed = False
+    for bid in cfg.order:
+        instrs = cfg.blocks[bid].instrs
+        read = live.uses_of[bid]
+        current = set(live.live_out[bid])
+        kept: List[TAC] = []
+        dirty = False
+        for k in range(len(instrs) - 1, -1, -1):
+            instr = instrs[k]
+            written = defs(instr)
+            useless = isinstance(instr, Assign) and instr.target == instr.source
+            if written and (written[0] not in current or useless):
+                if isinstance(instr, PURE):
+                    stats["dce_removed" if is_temp(written[0]) or useless else "dce_dead_stores"] += 1
+                    dirty = True
+                    continue
+                if isinstance(instr, Call):
+                    instr = Call(target=None, name=instr.name, num_params=instr.num_params)
+                    stats["dce_call_results"] += 1
+                    dirty = True
+            current.difference_update(written)
+            current.update(read[k])
+            kept.append(instr)
+        if dirty:
+            cfg.set_instrs(bid, kept[::-1])
+            changed = True
+    return changed
+
+
+def _operands(unit) -> Set[str]:
+    found = set()
+    for instr in unit.body:
+        found.update(defs(instr))
+        found.update(uses(instr))
+    return found
+
+
+def _drop_jumps_to_next(code: List[TAC], stats: Dict[str, int]) -> List[TAC]:
+    """Quita los saltos a la etiqueta que viene justo despues."""
+    out: List[TAC] = []
+    for i, instr in enumerate(code):
+        nxt = code[i + 1] if i + 1 < len(code) else None
+        if (isinstance(instr, (Jump, CondJump)) and isinstance(nxt, Label)
+                and nxt.name == instr.target):
+            # La condicion de un if_false es un operando, evaluarla no tiene efectos
+            stats["dce_jumps_removed"] += 1
+            continue
+        out.append(instr)
+    return out
+
+
+def _drop_unused_labels(code: List[TAC], stats: Dict[str, int]) -> List[TAC]:
+    """Quita las etiquetas a las que no salta nadie (salvo las de funcion)."""
+    targets = {instr.target for instr in code if isinstance(instr, (Jump, CondJump))}
+    out: List[TAC] = []
+    for i, instr in enumerate(code):
+        if isinstance(instr, Label) and instr.name not in targets:
+            starts_function = i + 1 < len(code) and isinstance(code[i + 1], BeginFunc)
+            if not starts_function:
+                stats["dce_labels_removed"] += 1
+                continue
+        out.append(instr)
+    return out
+
+
+def eliminate_dead_code(code: List[TAC]) -> Tuple[List[TAC], dict]:
+    """Devuelve (TAC sin codigo muerto, estadisticas). No modifica `code`."""
+    stats = dict.fromkeys(("dce_removed", "dce_dead_stores", "dce_call_results",
+                           "dce_blocks_removed", "dce_jumps_removed", "dce_labels_removed",
+                           "dce_instrs_removed"), 0)
+    units = split_functions(code)
+    operands = {u.name: _operands(u) for u in units}
+    # Temporales de un tramo global que aparecen en otro tramo global
+    seen: Dict[str, int] = {}
+    for unit in units:
+        if not unit.is_function:
+            for v in operands[unit.name]:
+                seen[v] = seen.get(v, 0) + 1
+    shared = {v for v, n in seen.items() if n > 1}
+    globals_ = {v for v in seen if not is_temp(v)}
+    fixed = entered_from_outside(units)
+    read_by_calls = {v for unit in units if unit.is_function
+                     for instr in unit.body for v in uses(instr) if not is_temp(v)}
+
+    for unit in units:
+        ops = operands[unit.name]
+        if unit.is_function:
+            # Lo que puede leerse despues de la funcion: variables globales y
+            # las de la funcion contenedora o de las anidadas. Sus temporales no
+            related = [u for u in units if u.name == unit.parent or u.parent == unit.name]
+            outside = globals_.union(*(operands[u.name] for u in related))
+            exit_live = {v for v in ops if not is_temp(v) and v in outside}
+        else:
+            others = set().union(*(operands[u.name] for u in units if u is not unit))
+            exit_live = {v for v in ops if v in shared or (not is_temp(v) and v in others)}
+        body = unit.body
+        while True:
+            cfg = CFG.build(body, unit.name)
+            if unit.name not in fixed:
+                stats["dce_blocks_removed"] += len(cfg.remove_unreachable())
+            while _sweep(cfg, exit_live, read_by_calls, stats):
+                pass
+            linear = cfg.linearize()
+            # Un if sin cuerpo deja un salto a la etiqueta siguiente; al quitarlo
+            # la comparacion que lo alimentaba puede quedar muerta
+            body = _drop_jumps_to_next(linear, stats)
+            if len(body) == len(linear):
+                break
+        unit.body = body
+    out = _drop_unused_labels(_drop_jumps_to_next(join_functions(units), stats), stats)
+    stats["dce_instrs_removed"] = len(code) - len(out)
+    return out, stats
@@ -0,0 +1,255 @@
+"""
+Numeracion de valores sobre el TAC: reutiliza el resultado de operaciones
+puras identicas (`a[i] + a[i]`, `obj.x` leido dos veces, `i * 4` repetido).
+Corre con opt_level >= 2 (-O2), despues de SCCP y antes de DCE.
+
+- Local (LVN): dentro de cada bloque basico, cada operando tiene un numero
+  de valor y cada BinaryOp/UnaryOp se busca por (op, numeros de operandos).
+  Si el valor ya esta en alguna variable, la operacion se vuelve una copia
+  (`t5 = a + b` -> `t5 = t3`) y los usos posteriores del temporal leen
+  directamente esa variable, asi que DCE despues borra la copia.
+- Global (dominadores): se recorre el arbol de dominadores y cada bloque
+  empieza con la tabla de su dominador inmediato, quitando las variables que
+  se escriben en algun camino entre los dos (el TAC no esta en SSA).
+
+Lecturas de memoria ("[]", ".", "length") llevan ademas una "epoca" que
+cambia con cada llamada y cada "append": no se reutilizan a traves de algo
+que pueda modificar un arreglo u objeto. Una llamada tambien invalida las
+variables que escribe alguna funcion (pueden ser globales).
+
+En las unidades a las que se entra por un salto desde otra unidad
+(cfg.entered_from_outside) solo se hace la version local.
+
+    code, stats = value_numbering(code)                    # global
+    code, stats = value_numbering(code, dominators=False)  # solo LVN
+    stats -> {"gvn_local": 3, "gvn_global": 1, "gvn_operands": 4, "gvn_instrs_removed": 0}
+"""
+from typing import Dict, List, Optional, Set, Tuple
+
+from cfg import CFG, entered_from_outside, join_functions, split_functions
+from tac import TAC, Assign, BinaryOp, Call, Param, UnaryOp, defs, is_temp, is_var, replace_uses, uses
+
+# Operadores donde el orden de los operandos no importa ("+" tambien concatena strings)
+COMMUTATIVE = {"*", "==", "!=", "&&", "||"}
+# Leen memoria: dependen de la epoca
+LOADS = {"[]", ".", "length"}
+# Modifican su operando: nunca se reutilizan y cambian la epoca
+MUTATORS = {"append"}
+
+
+class _Table:
+    """Numeros de valor vigentes en un punto del programa."""
+
+    def __init__(self, counter: List[int]):
+        self.counter = counter                                  # compartido entre copias
+        self.vn: Dict[str, int] = {}                            # variable -> numero de valor
+        self.consts: Dict[Tuple[str, object], int] = {}
+        self.exprs: Dict[tuple, Tuple[int, int]] = {}           # clave -> (numero, bloque)
+        self.holders: Dict[int, List[str]] = {}                 # numero -> variables que lo tienen
+        self.epoch = 0
+
+    def copy(self) -> "_Table":
+        t = _Table(self.counter)
+        t.vn = dict(self.vn)
+        t.consts = self.consts
+        t.exprs = dict(self.exprs)
+        t.holders = {n: list(hs) for n, hs in self.holders.items()}
+        t.epoch = self.epoch
+        return t
+
+    def fresh(self) -> int:
+        self.counter[0] += 1
+        return self.counter[0]
+
+    def value(self, op) -> int:
+        if is_var(op):
+            n = self.vn.get(op)
+            if n is None:
+                n = self.fresh()
+                self.define(op, n)
+            return n
+        key = (type(op).__name__, op)
+        n = self.consts.get(key)
+        if n is None:
+            n = self.consts[key] = self.fresh()
+        return n
+
+    def define(self, var: str, n: int):
+        self.vn[var] = n
+        holders = self.holders.setdefault(n, [])
+        if var in holders:
+            holders.remove(var)         # lo tenia de antes: ahora es el ultimo en tenerlo
+        holders.append(var)
+
+    def kill(self, var: str):
+        self.vn.pop(var, None)
+
+    def leader(self, n: int) -> Optional[str]:
+        """Primera variable que todavia tiene el valor n."""
+        for var in self.holders.get(n, ()):
+            if self.vn.get(var) == n:
+                return var
+        return None
+
+    def key(self, instr) -> tuple:
+        if isinstance(instr, UnaryOp):
+            return (instr.op, self.value(instr.source))
+        a, b = self.value(instr.left), self.value(instr.right)
+        if instr.op in COMMUTATIVE and b < a:
+            a, b = b, a
+        if instr.op in LOADS:
+            return (instr.op, a, b, self.epoch)
+        return (instr.op, a, b)
+
+
+class ValueNumbering:
+    """Numeracion de valores de una unidad (modifica los bloques de `cfg`)."""
+
+    def __init__(self, cfg: CFG, clobbered: Set[str] = frozenset()):
+        self.cfg = cfg
+        self.clobbered = clobbered      # variables que una llamada puede cambiar
+        self.counter = [0]
+        self.local = 0                  # redundancias dentro del mismo bloque
+        self.globl = 0                  # redundancias con un bloque dominador
+        self.operands = 0               # usos que pasaron a leer otra variable
+
+    def run_local(self) -> "ValueNumbering":
+        for bid in self.cfg.order:
+            self._block(bid, _Table(self.counter))
+        return self
+
+    def run(self) -> "ValueNumbering":
+        cfg = self.cfg
+        idom = cfg.idoms()
+        children = cfg.dom_tree()
+        written = {bid: set() for bid in cfg.order}
+        calls = {bid: False for bid in cfg.order}
+        for bid in cfg.order:
+            for instr in cfg.blocks[bid].instrs:
+                written[bid].update(defs(instr))
+                if isinstance(instr, Call) or (isinstance(instr, BinaryOp) and instr.op in MUTATORS):
+                    calls[bid] = True
+        work = [(cfg.entry, _Table(self.counter))]
+        while work:
+            bid, table = work.pop()
+            self._block(bid, table)
+            for child in reversed(children.get(bid, [])):
+                inherited = table.copy()
+                # Bloques en algun camino de bid a child (sin volver a pasar por bid)
+                between = self._between(idom[child], child)
+                for b in between:
+                    for v in written[b]:
+                        inherited.kill(v)
+                if any(calls[b] for b in between):
+                    inherited.epoch = inherited.fresh()
+                    for v in self.clobbered:
+                        inherited.kill(v)
+                work.append((child, inherited))
+        return self
+
+    def _between(self, dom: int, bid: int) -> Set[int]:
+        seen: Set[int] = set()
+        work = [p for p in self.cfg.preds(bid) if p != dom]
+        while work:
+            b = work.pop()
+            if b in seen:
+                continue
+            seen.add(b)
+            work.extend(p for p in self.cfg.preds(b) if p != dom)
+        return seen
+
+    def _block(self, bid: int, table: _Table):
+        out: List[TAC] = []
+        dirty = False
+        for instr in self.cfg.blocks[bid].instrs:
+            new = self._instr(instr, table, bid)
+            dirty = dirty or new is not instr
+            if new is not None:
+                out.append(new)
+        if dirty:
+            self.cfg.set_instrs(bid, out)
+
+    def _instr(self, instr: TAC, table: _Table, bid: int) -> Optional[TAC]:
+        # Los temporales leen la primera variable que tenga su valor. Los param
+        # no: el backend los lee recien en la call
+        if not isinstance(instr, Param):
+            mapping = {}
+            for u in uses(instr):
+                if is_temp(u):
+                    leader = table.leader(table.value(u))
+                    if leader is not None and leader != u:
+                        mapping[u] = leader
+            if mapping:
+                instr = replace_uses(instr, mapping)
+                self.operands += len(mapping)
+
+        if isinstance(instr, (BinaryOp, UnaryOp)) and is_var(instr.target):
+            if isinstance(instr, BinaryOp) and instr.op in MUTATORS:
+                table.kill(instr.target)
+                table.define(instr.target, table.fresh())
+                table.epoch = table.fresh()
+                return instr
+            key = table.key(instr)
+            found = table.exprs.get(key)
+            leader = table.leader(found[0]) if found else None
+            if leader is not None:
+                if found[1] == bid:
+                    self.local += 1
+                else:
+                    self.globl += 1
+                return self._copy(instr.target, leader, table, found[0])
+            # Sin nadie que lo tenga se recalcula, pero sigue siendo el mismo valor
+            n = found[0] if found else table.fresh()
+            table.exprs[key] = (n, bid)
+            table.kill(instr.target)
+            table.define(instr.target, n)
+            return instr
+
+        if isinstance(instr, Assign) and is_var(instr.target):
+            n = table.value(instr.source)
+            if table.vn.get(instr.target) == n:
+                return None                     # ya tenia ese valor
+            table.kill(instr.target)
+            table.define(instr.target, n)
+            return instr
+
+        if isinstance(instr, Call):
+            table.epoch = table.fresh()
+            for v in self.clobbered:
+                table.kill(v)
+        for v in defs(instr):
+            table.kill(v)
+            table.define(v, table.fresh())
+        return instr
+
+    @staticmethod
+    def _copy(target: str, source: str, table: _Table, n: int) -> Optional[TAC]:
+        if source == target:
+            return None
+        table.kill(target)
+        table.define(target, n)
+        return Assign(target=target, source=source)
+
+
+def value_numbering(code: List[TAC], dominators: bool = True) -> Tuple[List[TAC], dict]:
+    """Devuelve (TAC con las operaciones redundantes reutilizadas, estadisticas). No modifica `code`."""
+    stats = dict.fromkeys(("gvn_local", "gvn_global", "gvn_operands", "gvn_instrs_removed"), 0)
+    units = split_functions(code)
+    clobbered = {v for unit in units if unit.is_function
+                 for instr in unit.body for v in defs(instr) if not is_temp(v)}
+    fixed = entered_from_outside(units)
+    for unit in units:
+        before = len(unit.body)
+        cfg = CFG.build(unit.body, unit.name)
+        vn = ValueNumbering(cfg, clobbered)
+        if dominators and unit.name not in fixed:
+            cfg.remove_unreachable()
+            vn.run()
+        else:
+            vn.run_local()
+        unit.body = cfg.linearize()
+        stats["gvn_local"] += vn.local
+        stats["gvn_global"] += vn.globl
+        stats["gvn_operands"] += vn.operands
+        stats["gvn_instrs_removed"] += before - len(unit.body)
+    return join_functions(units), stats
@@ -0,0 +1,329 @@
+"""
+Variables de induccion y reduccion de fuerza sobre el TAC. Corre con
+opt_level >= 2 (-O2), despues de LICM (los factores invariantes ya estan
+fuera del lazo) y antes de la propagacion de copias.
+
+Por cada lazo del bosque (cfg.loops(), de adentro hacia afuera):
+
+- Variables de induccion basicas: i se escribe una sola vez en el lazo, con
+  `i = i + c` / `i = i - c` y c invariante (o `t = i + c` seguido de
+  `i = t`, como lo genera TACGenerator).
+- Reduccion de fuerza: cada `t = i * c` con c invariante pasa a ser
+  `t = s`, donde s vale i * c en todo el lazo: se inicializa en el
+  preheader y se le suma c * paso justo despues del incremento de i. La
+  multiplicacion de cada vuelta queda como una suma.
+- Contadores redundantes: si i solo se usa para incrementarse y en
+  comparaciones con valores invariantes, y esta muerta a la salida, las
+  comparaciones pasan a otra variable que avanza a la par y el incremento
+  de i se borra. La otra variable es un s = i * c de la reduccion con c
+  constante positiva (`i < n` -> `s < n * c`) o un contador j con el mismo
+  paso que se incrementa en el mismo bloque (`i < n` -> `j < n + (j - i)`).
+  Se supone que los contadores no desbordan.
+
+Las llamadas a funciones del programa invalidan las variables que escribe
+alguna funcion. Igual que en licm.py, antes se le da un nombre propio a
+cada rango de vida de los temporales, y en las unidades a las que se entra
+por un salto desde otra unidad (cfg.entered_from_outside) no se toca nada.
+
+    code, stats = reduce_induction_variables(code)
+    stats -> {"iv_basic": 2, "iv_reduced": 1, "iv_counters_removed": 1, "iv_instrs_removed": 2}
+"""
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from cfg import CFG, Loop, entered_from_outside, join_functions, split_functions
+from licm import may_write, split_temps, temp_counter, visible_outside
+from liveness import Liveness
+from tac import TAC, Assign, BinaryOp, Call, defs, is_temp, is_var, uses
+
+COMPARISONS = {"<", "<=", ">", ">=", "==", "!="}
+_INT_RE = re.compile(r"-?\d+\Z")
+_INT_MIN, _INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def _int(op) -> Optional[int]:
+    """Valor de un literal entero (None si no lo es)."""
+    text = str(op)
+    return int(text) if _INT_RE.match(text) else None
+
+
+def _fold(a, op: str, b) -> Optional[str]:
+    """a op b si se puede calcular ya (literales o identidades como x * 1)."""
+    x, y = _int(a), _int(b)
+    if x is not None and y is not None:
+        value = {"+": x + y, "-": x - y, "*": x * y}[op]
+        return str(value) if _INT_MIN <= value <= _INT_MAX else None
+    if op == "*":
+        if x == 0 or y == 0:
+            return "0"
+        if x == 1 or y == 1:
+            return b if x == 1 else a
+    if (op == "+" and x == 0) or y == 0:
+        return b if x == 0 else a
+    return None
+
+
+def _step(instr: TAC, var: str) -> Optional[Tuple[str, object]]:
+    """(signo, paso) si la instruccion calcula var + paso o var - paso."""
+    if not isinstance(instr, BinaryOp) or instr.op not in ("+", "-"):
+        return None
+    if instr.left == var and instr.right != var:
+        return instr.op, instr.right
+    if instr.op == "+" and instr.right == var and instr.left != var:
+        return "+", instr.left
+    return None
+
+
+@dataclass
+class Basic:
+    """Variable de induccion basica: var cambia en sign + step una vez por vuelta."""
+    var: str
+    block: int
+    at: int                 # indice de la escritura de var en el bloque
+    sign: str
+    step: object
+    incr: List[int]         # indices de las instrucciones del incremento
+
+
+class InductionVariables:
+    """Reduccion de fuerza y eliminacion de contadores de una unidad (modifica `cfg`)."""
+
+    def __init__(self, cfg: CFG, fresh: Callable[[], str], clobbered: Set[str] = frozenset(),
+                 functions: Set[str] = frozenset(), outside: Set[str] = frozenset()):
+        self.cfg = cfg
+        self.fresh = fresh              # nombres de temporales nuevos
+        self.clobbered = clobbered      # variables que una llamada puede cambiar
+        self.functions = functions      # funciones del programa
+        self.outside = outside          # variables que aparecen en otras unidades
+        self.basic = 0                  # variables de induccion basicas encontradas
+        self.reduced = 0                # multiplicaciones reemplazadas
+        self.removed = 0                # contadores eliminados
+
+    def run(self) -> "InductionVariables":
+        done: Set[int] = set()
+        while True:
+            pending = [l for l in self.cfg.loops().innermost_first() if l.header not in done]
+            if not pending:
+                return self
+            done.add(pending[0].header)
+            self._loop(pending[0])
+
+    def _emit(self, pre: List[TAC], a, op: str, b, target: Optional[str] = None):
+        """
+        Calcula a op b en el preheader (en `target` o en un temporal nuevo) y
+        devuelve el operando con el resultado; si se puede plegar, sin target
+        no agrega nada.
+        """
+        value = _fold(a, op, b)
+        if value is not None and target is None:
+            return value
+        target = target or self.fresh()
+        pre.append(Assign(target=target, source=value) if value is not None
+                   else BinaryOp(target=target, left=a, op=op, right=b))
+        return target
+
+    def _entry(self, loop: Loop, var: str):
+        """Literal con que var entra al lazo, si el unico predecesor de afuera se lo asigna (si no, var)."""
+        outside = [p for p in self.cfg.preds(loop.header) if p not in loop.blocks]
+        if len(outside) != 1:
+            return var
+        for instr in reversed(self.cfg.blocks[outside[0]].instrs):
+            if var in defs(instr):
+                if isinstance(instr, Assign) and _int(instr.source) is not None:
+                    return instr.source
+                return var
+        return var
+
+    def _loop(self, loop: Loop):
+        cfg = self.cfg
+        blocks = [b for b in cfg.reverse_postorder() if b in loop.blocks]
+        count: Dict[str, int] = {}
+        where: Dict[str, Tuple[int, int]] = {}
+        calls = False
+        for b in blocks:
+            for k, instr in enumerate(cfg.blocks[b].instrs):
+                for v in defs(instr):
+                    count[v] = count.get(v, 0) + 1
+                    where[v] = (b, k)
+                calls = calls or (isinstance(instr, Call) and may_write(instr, self.functions))
+        variant = set(count) | (self.clobbered if calls else set())
+
+        def invariant(op) -> bool:
+            return op not in variant if is_var(op) else _int(op) is not None
+
+        basics = self._basics(count, where, invariant, calls)
+        self.basic += len(basics)
+        if not basics:
+            return
+
+        pre: List[TAC] = []                                 # instrucciones del preheader
+        after: Dict[Tuple[int, int], List[TAC]] = {}        # se agregan despues de (bloque, indice)
+        replace: Dict[Tuple[int, int], Optional[TAC]] = {}  # None: se borra
+
+        # Reduccion de fuerza
+        scaled: Dict[Tuple[str, object], str] = {}          # (i, c) -> s == i * c
+        for b in blocks:
+            for k, instr in enumerate(cfg.blocks[b].instrs):
+                if not (isinstance(instr, BinaryOp) and instr.op == "*" and is_var(instr.target)):
+                    continue
+                for iv, c in ((instr.left, instr.right), (instr.right, instr.left)):
+                    if iv in basics and c != iv and invariant(c):
+                        break
+                else:
+                    continue
+                basic = basics[iv]
+                s = scaled.get((iv, c))
+                if s is None:
+                    s = scaled[(iv, c)] = self.fresh()
+                    self._emit(pre, self._entry(loop, iv), "*", c, target=s)
+                    delta = self._emit(pre, basic.step, "*", c)
+                    after.setdefault((basic.block, basic.at), []).append(
+                        BinaryOp(target=s, left=s, op=basic.sign, right=delta))
+                replace[(b, k)] = Assign(target=instr.target, source=s)
+                self.reduced += 1
+
+        # Contadores que solo sirven para la condicion del lazo
+        live = Liveness(cfg)
+        exit_live = set().union(*(live.live_in[e] for b in blocks for e in cfg.succs(b)
+                                  if e not in loop.blocks and e != CFG.EXIT))
+        removed: Set[str] = set()
+        for iv, basic in basics.items():
+            incr = [cfg.blocks[basic.block].instrs[k] for k in basic.incr]
+            if any(d in exit_live or d in self.outside for instr in incr for d in defs(instr)) \
+                    or _int(basic.step) is None:
+                continue
+            compares = self._compares(blocks, iv, basic, replace, invariant)
+            if compares is None:
+                continue
+            rewrite = self._rewrite(loop, iv, basic, compares, basics, scaled, removed, pre)
+            if rewrite is None:
+                continue
+            replace.update(rewrite)
+            for k in basic.incr:
+                replace[(basic.block, k)] = None
+            removed.add(iv)
+            self.removed += 1
+
+        if not replace:
+            return
+        for b in blocks:
+            instrs = cfg.blocks[b].instrs
+            if not any(key[0] == b for key in list(replace) + list(after)):
+                continue
+            out: List[TAC] = []
+            for k, instr in enumerate(instrs):
+                new = replace.get((b, k), instr)
+                if new is not None:
+                    out.append(new)
+                out.extend(after.get((b, k), ()))
+            cfg.set_instrs(b, out)
+        if pre:
+            cfg.set_instrs(cfg.insert_preheader(loop.header, loop.latches), pre)
+
+    def _basics(self, count, where, invariant, calls) -> Dict[str, Basic]:
+        basics: Dict[str, Basic] = {}
+        for v, n in count.items():
+            if n != 1 or (calls and v in self.clobbered):
+                continue
+            b, k = where[v]
+            instrs = self.cfg.blocks[b].instrs
+            found, incr = _step(instrs[k], v), [k]
+            d = instrs[k]
+            if found is None and isinstance(d, Assign) and is_temp(d.source) and count.get(d.source) == 1:
+                # t = i + c; i = t
+                tb, tk = where[d.source]
+                if tb == b and tk < k:
+                    found, incr = _step(instrs[tk], v), [tk, k]
+            if found is not None and invariant(found[1]):
+                basics[v] = Basic(v, b, k, found[0], found[1], incr)
+        return basics
+
+    def _compares(self, blocks, iv, basic, replace, invariant) -> Optional[List[Tuple[int, int, BinaryOp]]]:
+        """Comparaciones de iv con invariantes, si son su unico uso fuera del incremento."""
+        cfg = self.cfg
+        temp = cfg.blocks[basic.block].instrs[basic.at].source if len(basic.incr) == 2 else None
+        compares = []
+        for b in blocks:
+            for k, instr in enumerate(cfg.blocks[b].instrs):
+                instr = replace.get((b, k), instr)
+                if instr is None:
+                    continue
+                read = uses(instr)
+                if b == basic.block and k in basic.incr:
+                    continue
+                if temp is not None and temp in read:
+                    return None                 # el temporal del incremento se usa en otro lado
+                if iv not in read:
+                    continue
+                if not (isinstance(instr, BinaryOp) and instr.op in COMPARISONS):
+                    return None
+                other = instr.right if instr.left == iv else instr.left
+                if other == iv or not invariant(other):
+                    return None
+                compares.append((b, k, instr))
+        return compares
+
+    def _rewrite(self, loop, iv, basic, compares, basics, scaled, removed, pre) -> Optional[dict]:
+        """Comparaciones reescritas sobre otra variable que avanza a la par de iv (o None)."""
+        if not compares:
+            return {}                           # el contador no se usa para nada
+        # s == iv * c con c > 0: iv < n <=> s < n * c
+        for (var, c), s in scaled.items():
+            if var == iv and (_int(c) or 0) > 0:
+                return self._replaced(iv, s, compares, lambda value, c=c: self._emit(pre, value, "*", c))
+        # j con el mismo paso, incrementado en el mismo bloque: iv < n <=> j < n + (j - iv)
+        step = _int(basic.step) * (1 if basic.sign == "+" else -1)
+        for j, other in basics.items():
+            if j == iv or j in removed or other.block != basic.block or _int(other.step) is None:
+                continue
+            if _int(other.step) * (1 if other.sign == "+" else -1) != step:
+                continue
+            lo, hi = sorted((basic.at, other.at))
+            if any(b == basic.block and lo < k < hi for b, k, _ in compares):
+                continue                        # entre los dos incrementos no van a la par
+            diff = self._emit(pre, self._entry(loop, j), "-", self._entry(loop, iv))
+            return self._replaced(iv, j, compares, lambda value: self._emit(pre, value, "+", diff))
+        return None
+
+    @staticmethod
+    def _replaced(iv, var, compares, bound) -> dict:
+        rewrite = {}
+        for b, k, instr in compares:
+            if instr.left == iv:
+                new = BinaryOp(target=instr.target, left=var, op=instr.op, right=bound(instr.right))
+            else:
+                new = BinaryOp(target=instr.target, left=bound(instr.left), op=instr.op, right=var)
+            rewrite[(b, k)] = new
+        return rewrite
+
+
+def reduce_induction_variables(code: List[TAC]) -> Tuple[List[TAC], dict]:
+    """Devuelve (TAC con las variables de induccion reducidas, estadisticas). No modifica `code`."""
+    stats = dict.fromkeys(("iv_basic", "iv_reduced", "iv_counters_removed", "iv_instrs_removed"), 0)
+    units = split_functions(code)
+    clobbered = {v for unit in units if unit.is_function
+                 for instr in unit.body for v in defs(instr) if not is_temp(v)}
+    functions = {unit.name for unit in units if unit.is_function}
+    operands = {unit.name: {v for instr in unit.body for v in defs(instr) + uses(instr)} for unit in units}
+    fresh = temp_counter(units)
+    fixed = entered_from_outside(units)
+    for unit in units:
+        if unit.name in fixed:
+            continue
+        before = len(unit.body)
+        outside = visible_outside(units, unit, operands)
+        cfg = CFG.build(unit.body, unit.name)
+        cfg.remove_unreachable()
+        if not cfg.loops().loops:
+            continue
+        split_temps(cfg, fresh, keep=outside)
+        iv = InductionVariables(cfg, fresh, clobbered, functions, outside).run()
+        stats["iv_basic"] += iv.basic
+        if not (iv.reduced or iv.removed):
+            continue                    # sin cambios: se quedan los nombres originales
+        unit.body = cfg.linearize()
+        stats["iv_reduced"] += iv.reduced
+        stats["iv_counters_removed"] += iv.removed
+        stats["iv_instrs_removed"] += before - len(unit.body)
+    return join_functions(units), stats
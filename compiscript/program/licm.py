@@ -0,0 +1,237 @@
+"""
+Movimiento de codigo invariante de lazos (LICM) sobre el TAC. Corre con
+opt_level >= 2 (-O2), despues de la numeracion de valores (gvn.py) y antes
+de la propagacion de copias.
+
+Usa el bosque de lazos del CFG (cfg.loops()) y procesa primero los lazos mas
+internos: lo que sale de un lazo interno queda en su preheader, que es parte
+del lazo externo, y puede seguir subiendo. Una operacion pura
+(Assign/BinaryOp/UnaryOp) pasa al preheader si:
+
+- sus operandos son constantes, variables que no se escriben en el lazo o
+  resultados de otra operacion que ya salio;
+- su destino se escribe una sola vez en el lazo y no se lee antes de esa
+  escritura (no esta vivo a la entrada de la cabecera);
+- se ejecuta en toda vuelta que sale del lazo (su bloque domina a los
+  bloques de salida) o, si no, su destino esta muerto a la salida y la
+  operacion no puede fallar: `t = obj.x` o `t = a / b` en el cuerpo de un
+  while que no da ninguna vuelta no se adelanta.
+
+Efectos: una llamada a una funcion del programa puede escribir memoria y
+las variables que escribe alguna funcion; un "append" escribe memoria. Las
+lecturas de memoria ("[]", ".", "length") solo salen de lazos sin
+escrituras de memoria, y las variables que ven otras unidades (o cualquier
+variable, si el lazo tiene llamadas) solo se adelantan si la instruccion se
+ejecuta igual en toda vuelta. Las llamadas al runtime (print) no escriben.
+
+TACGenerator reutiliza los temporales (`t1` puede ser `a * b` y despues
+`j < 3`), asi que antes se le da un nombre propio a cada rango de vida de
+los temporales de la unidad (liveness.live_ranges); temp_rename.py los
+vuelve a compactar al final.
+
+En las unidades a las que se entra por un salto desde otra unidad
+(cfg.entered_from_outside) no se mueve nada.
+
+    code, stats = hoist_invariants(code)
+    stats -> {"licm_hoisted": 3, "licm_loops": 2, "licm_instrs_removed": 0}
+"""
+import itertools
+from typing import Callable, Dict, List, Set, Tuple
+
+from cfg import CFG, Loop, entered_from_outside, join_functions, split_functions
+from gvn import LOADS, MUTATORS
+from liveness import Liveness, live_ranges
+from tac import TAC, Assign, BinaryOp, Call, Param, UnaryOp, defs, is_const, is_temp, is_var, replace_operands, uses
+
+# Rutinas del runtime: no escriben memoria ni variables del programa
+RUNTIME = {"print"}
+# Pueden fallar segun sus operandos: no se ejecutan si el programa no lo hacia
+TRAPPING = LOADS | {"/", "%"}
+
+
+def may_write(instr: TAC, functions: Set[str]) -> bool:
+    """True si la instruccion puede escribir memoria (y, si es llamada a una funcion, globales)."""
+    if isinstance(instr, Call):
+        return instr.name in functions or instr.name not in RUNTIME
+    return isinstance(instr, BinaryOp) and instr.op in MUTATORS
+
+
+def _can_trap(instr: TAC) -> bool:
+    if not isinstance(instr, BinaryOp) or instr.op not in TRAPPING:
+        return False
+    if instr.op in LOADS:
+        return True
+    return not (is_const(instr.right) and str(instr.right) not in ("0", "0.0"))
+
+
+def split_temps(cfg: CFG, fresh: Callable[[], str], keep: Set[str] = frozenset()) -> None:
+    """
+    Renombra cada rango de vida de los temporales de `cfg` con un nombre nuevo
+    de `fresh()`. Los que llegan vivos a la entrada y los de `keep` quedan igual.
+    """
+    # Los param se leen en la call que les sigue: su rango es el de la call
+    calls: Dict[Tuple[int, int], int] = {}
+    for bid in cfg.order:
+        pending = []
+        for k, instr in enumerate(cfg.blocks[bid].instrs):
+            if isinstance(instr, Param):
+                pending.append(k)
+            elif isinstance(instr, Call):
+                calls.update(((bid, p), k) for p in pending)
+                pending = []
+        keep = keep | {cfg.blocks[bid].instrs[p].value for p in pending}
+    ranges = live_ranges(cfg, only=lambda v: is_temp(v) and v not in keep)
+    index = {pos: i for i, pos in enumerate(ranges.positions)}
+    entry = set(ranges.entry.values())
+    names: Dict[Tuple[str, int], str] = {}
+
+    def name(r):
+        if r in entry:
+            return r[0]
+        if r not in names:
+            names[r] = fresh()
+        return names[r]
+
+    for bid in cfg.order:
+        out = []
+        for k, instr in enumerate(cfg.blocks[bid].instrs):
+            at = index[(bid, calls.get((bid, k), k))]
+            mapping = {v: name(ranges.use_at[(at, v)]) for v in uses(instr) if (at, v) in ranges.use_at}
+            new = replace_operands(instr, mapping)
+            if at in ranges.def_at and not isinstance(instr, Param):
+                new.target = name(ranges.def_at[at])
+            out.append(new)
+        cfg.set_instrs(bid, out)
+
+
+def visible_outside(units, unit, operands: Dict[str, Set[str]]) -> Set[str]:
+    """
+    Variables que aparecen en otras unidades (operands: nombre -> operandos).
+    De los temporales, solo los que cruzan tramos globales: los de una
+    funcion son suyos.
+    """
+    return {v for u in units if u is not unit for v in operands[u.name]
+            if not is_temp(v) or not (unit.is_function or u.is_function)}
+
+
+def temp_counter(units) -> Callable[[], str]:
+    """Generador de temporales nuevos (ninguna unidad usa esos nombres)."""
+    numbers = [int(v[1:]) for unit in units for instr in unit.body
+               for v in defs(instr) + uses(instr) if is_temp(v)]
+    counter = itertools.count(max(numbers, default=-1) + 1)
+    return lambda: f"t{next(counter)}"
+
+
+class LoopInvariantMotion:
+    """LICM de una unidad (modifica los bloques de `cfg`)."""
+
+    def __init__(self, cfg: CFG, clobbered: Set[str] = frozenset(),
+                 functions: Set[str] = frozenset(), outside: Set[str] = frozenset()):
+        self.cfg = cfg
+        self.clobbered = clobbered      # variables que una llamada puede cambiar
+        self.functions = functions      # funciones del programa
+        self.outside = outside          # variables que aparecen en otras unidades
+        self.hoisted = 0                # instrucciones movidas a un preheader
+        self.loops = 0                  # lazos con preheader nuevo
+
+    def run(self) -> "LoopInvariantMotion":
+        done: Set[int] = set()
+        while True:
+            # El bosque se recalcula despues de cada preheader nuevo
+            pending = [l for l in self.cfg.loops().innermost_first() if l.header not in done]
+            if not pending:
+                return self
+            done.add(pending[0].header)
+            self._hoist(pending[0])
+
+    def _hoist(self, loop: Loop):
+        cfg = self.cfg
+        blocks = [b for b in cfg.reverse_postorder() if b in loop.blocks]
+        count: Dict[str, int] = {}
+        calls = memory = False
+        for b in blocks:
+            for instr in cfg.blocks[b].instrs:
+                for v in defs(instr):
+                    count[v] = count.get(v, 0) + 1
+                if may_write(instr, self.functions):
+                    memory = True
+                    calls = calls or isinstance(instr, Call)
+        variant = set(count) | (self.clobbered if calls else set())
+
+        live = Liveness(cfg)
+        exiting = [b for b in blocks if any(s not in loop.blocks for s in cfg.succs(b))]
+        exit_live = set().union(*(live.live_in[s] for b in exiting for s in cfg.succs(b)
+                                  if s not in loop.blocks and s != CFG.EXIT))
+        header_live = live.live_in[loop.header]
+
+        def movable(instr: TAC, b: int) -> bool:
+            if not isinstance(instr, (Assign, BinaryOp, UnaryOp)):
+                return False
+            t = instr.target
+            if not is_var(t) or count.get(t) != 1 or t in header_live:
+                return False
+            if isinstance(instr, BinaryOp) and (instr.op in MUTATORS or (instr.op in LOADS and memory)):
+                return False
+            if any(u in variant for u in uses(instr)):
+                return False
+            # Una llamada del lazo podria leer la variable antes de la escritura
+            if calls and not is_temp(t):
+                return False
+            if exiting and all(cfg.dominates(b, e) for e in exiting):
+                return True
+            return not (_can_trap(instr) or t in exit_live or t in self.outside)
+
+        moved: List[TAC] = []
+        bodies = {b: list(cfg.blocks[b].instrs) for b in blocks}
+        changed = True
+        while changed:
+            changed = False
+            for b in blocks:
+                keep = []
+                for instr in bodies[b]:
+                    if movable(instr, b):
+                        moved.append(instr)
+                        variant.discard(instr.target)
+                        changed = True
+                    else:
+                        keep.append(instr)
+                bodies[b] = keep
+        if not moved:
+            return
+        for b in blocks:
+            if len(bodies[b]) != len(cfg.blocks[b].instrs):
+                cfg.set_instrs(b, bodies[b])
+        pre = cfg.insert_preheader(loop.header, loop.latches)
+        cfg.set_instrs(pre, moved)
+        self.hoisted += len(moved)
+        self.loops += 1
+
+
+def hoist_invariants(code: List[TAC]) -> Tuple[List[TAC], dict]:
+    """Devuelve (TAC con las operaciones invariantes fuera de los lazos, estadisticas). No modifica `code`."""
+    stats = dict.fromkeys(("licm_hoisted", "licm_loops", "licm_instrs_removed"), 0)
+    units = split_functions(code)
+    clobbered = {v for unit in units if unit.is_function
+                 for instr in unit.body for v in defs(instr) if not is_temp(v)}
+    functions = {unit.name for unit in units if unit.is_function}
+    operands = {unit.name: {v for instr in unit.body for v in defs(instr) + uses(instr)} for unit in units}
+    fresh = temp_counter(units)
+    fixed = entered_from_outside(units)
+    for unit in units:
+        if unit.name in fixed:
+            continue
+        before = len(unit.body)
+        outside = visible_outside(units, unit, operands)
+        cfg = CFG.build(unit.body, unit.name)
+        cfg.remove_unreachable()
+        if not cfg.loops().loops:
+            continue
+        split_temps(cfg, fresh, keep=outside)
+        lm = LoopInvariantMotion(cfg, clobbered, functions, outside).run()
+        if not lm.loops:
+            continue                    # sin cambios: se quedan los nombres originales
+        unit.body = cfg.linearize()
+        stats["licm_hoisted"] += lm.hoisted
+        stats["licm_loops"] += lm.loops
+        stats["licm_instrs_removed"] += before - len(unit.body)
+    return join_functions(units), stats
@@ -0,0 +1,307 @@
+"""
+Analisis de vida (liveness) sobre el CFG y rangos de vida lineales.
+
+    live = Liveness(cfg)                  # todas las variables y temporales
+    live = Liveness(cfg, only=is_temp)    # solo temporales
+    live = Liveness(cfg, exit_live={"g"}) # g se lee despues de la unidad
+    live = Liveness(cfg, call_uses={"g"}) # cada llamada puede leer g
+    live.live_in[b], live.live_out[b]     # conjuntos por bloque
+    live.live_after(b)                    # conjunto vivo despues de cada instruccion del bloque
+
+live_intervals() numera las instrucciones en el orden de layout del CFG y
+devuelve, para cada variable, el intervalo [inicio, fin] que cubre todos los
+puntos donde esta viva. Cada instruccion i tiene dos puntos: 2*i (lectura de
+sus operandos) y 2*i + 1 (escritura del destino), de modo que en
+`t1 = t0 + 1` el rango de t0 termina antes de que empiece el de t1 y ambos
+pueden compartir nombre o registro.
+
+MIPSGen carga los argumentos de una llamada recien en la instruccion `call`,
+asi que los operandos de cada `param` tambien cuentan como leidos por la
+`call` que le sigue.
+
+live_ranges() ademas separa cada variable en sus rangos de vida
+independientes (las definiciones que llegan a un mismo uso quedan en el mismo
+rango), de modo que un temporal reutilizado varias veces da varios intervalos
+cortos en vez de uno largo.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from cfg import CFG
+from tac import Call, Param, defs, uses
+
+# Definicion ficticia de las variables que llegan vivas a la entrada
+ENTRY = -1
+
+
+class Liveness:
+    def __init__(self, cfg: CFG, only: Optional[Callable[[str], bool]] = None,
+                 exit_live: Iterable[str] = (), call_uses: Iterable[str] = ()):
+        self.cfg = cfg
+        self.only = only
+        self.exit_live = set(self._filter(exit_live))   # vivas en la salida (CFG.EXIT)
+        self.call_uses = self._filter(sorted(call_uses))  # leidas por cualquier llamada
+        self.uses_of: Dict[int, List[List[str]]] = {}   # operandos leidos por cada instruccion
+        self.defs_of: Dict[int, List[List[str]]] = {}   # operandos escritos por cada instruccion
+        self.use: Dict[int, Set[str]] = {}    # leidos antes de escribirse en el bloque
+        self.defs: Dict[int, Set[str]] = {}
+        self.live_in: Dict[int, Set[str]] = {}
+        self.live_out: Dict[int, Set[str]] = {}
+        self._compute()
+
+    def _filter(self, ops) -> List[str]:
+        if self.only is None:
+            return list(ops)
+        return [op for op in ops if self.only(op)]
+
+    def _block_uses(self, instrs) -> List[List[str]]:
+        result, pending = [], []
+        for instr in instrs:
+            ops = self._filter(uses(instr))
+            if isinstance(instr, Param):
+                pending.extend(ops)
+            elif isinstance(instr, Call):
+                ops, pending = ops + pending + self.call_uses, []
+            result.append(ops)
+        return result
+
+    def _compute(self):
+        cfg = self.cfg
+        for bid, b in cfg.blocks.items():
+            use, d = set(), set()
+            self.uses_of[bid] = self._block_uses(b.instrs)
+            self.defs_of[bid] = [self._filter(defs(instr)) for instr in b.instrs]
+            for read, written in zip(self.uses_of[bid], self.defs_of[bid]):
+                for op in read:
+                    if op not in d:
+                        use.add(op)
+                d.update(written)
+            self.use[bid], self.defs[bid] = use, d
+            self.live_in[bid], self.live_out[bid] = set(), set()
+
+        # Iterar en postorden (hacia atras) hasta el punto fijo
+        reachable = cfg.postorder()
+        seen = set(reachable)
+        order = reachable + [b for b in cfg.order if b not in seen]
+        changed = True
+        while changed:
+            changed = False
+            for bid in order:
+                out = set()
+                for s in cfg.succs(bid):
+                    out |= self.live_in[s] if s != CFG.EXIT else self.exit_live
+                new_in = self.use[bid] | (out - self.defs[bid])
+                if out != self.live_out[bid] or new_in != self.live_in[bid]:
+                    self.live_out[bid], self.live_in[bid] = out, new_in
+                    changed = True
+
+    def live_after(self, bid: int) -> List[Set[str]]:
+        """Conjunto vivo inmediatamente despues de cada instruccion del bloque."""
+        instrs = self.cfg.blocks[bid].instrs
+        read, written = self.uses_of[bid], self.defs_of[bid]
+        live = set(self.live_out[bid])
+        result = [None] * len(instrs)
+        for i in range(len(instrs) - 1, -1, -1):
+            result[i] = set(live)
+            live.difference_update(written[i])
+            live.update(read[i])
+        return result
+
+
+def live_intervals(cfg: CFG, live: Optional[Liveness] = None,
+                   only: Optional[Callable[[str], bool]] = None) -> Tuple[Dict[str, Tuple[int, int]], List[Tuple[int, int]]]:
+    """
+    Intervalos de vida en el orden de layout del CFG.
+
+    Devuelve (intervalos, posiciones) donde intervalos[v] = (inicio, fin) en
+    puntos 2*i / 2*i+1 y posiciones[i] = (id de bloque, indice en el bloque)
+    de la instruccion i.
+    """
+    live = live or Liveness(cfg, only=only)
+    intervals: Dict[str, List[int]] = {}
+    positions: List[Tuple[int, int]] = []
+
+    def cover(v, point):
+        iv = intervals.get(v)
+        if iv is None:
+            intervals[v] = [point, point]
+        else:
+            if point < iv[0]:
+                iv[0] = point
+            if point > iv[1]:
+                iv[1] = point
+
+    i = 0
+    for bid in cfg.order:
+        instrs = cfg.blocks[bid].instrs
+        after = live.live_after(bid)
+        read, written = live.uses_of[bid], live.defs_of[bid]
+        start = i
+        for k, instr in enumerate(instrs):
+            positions.append((bid, k))
+            for v in read[k]:
+                cover(v, 2 * i)
+            for v in written[k]:
+                cover(v, 2 * i + 1)
+            for v in after[k]:
+                # Vivo despues de i: ocupa hasta la lectura de la siguiente instruccion
+                cover(v, 2 * i + 1)
+                cover(v, 2 * i + 2)
+            i += 1
+        # Vivo a la entrada del bloque: desde el inicio del bloque
+        for v in live.live_in[bid]:
+            cover(v, 2 * start)
+    return {v: (iv[0], iv[1]) for v, iv in intervals.items()}, positions
+
+
+@dataclass
+class LiveRanges:
+    """
+    Rangos de vida de una unidad. Cada rango se identifica por (variable, d),
+    donde d es el indice de una de sus definiciones (ENTRY si llega viva a la
+    entrada).
+    """
+    intervals: Dict[Tuple[str, int], Tuple[int, int]]
+    use_at: Dict[Tuple[int, str], Tuple[str, int]]    # (instruccion, variable) -> rango leido
+    def_at: Dict[int, Tuple[str, int]]                # instruccion -> rango que define
+    entry: Dict[str, Tuple[str, int]]                 # variable viva a la entrada -> su rango
+    after: List[Set[Tuple[str, int]]]                 # rangos vivos despues de cada instruccion
+    positions: List[Tuple[int, int]]
+
+
+def live_ranges(cfg: CFG, live: Optional[Liveness] = None,
+                only: Optional[Callable[[str], bool]] = None) -> LiveRanges:
+    """
+    Como live_intervals(), pero con un intervalo por rango de vida: las
+    definiciones que alcanzan un mismo uso (o un mismo punto donde la variable
+    esta viva) se unen, y cada grupo resultante es un rango.
+    """
+    live = live or Liveness(cfg, only=only)
+    positions: List[Tuple[int, int]] = []
+    first: Dict[int, int] = {}
+    for bid in cfg.order:
+        first[bid] = len(positions)
+        positions.extend((bid, k) for k in range(len(cfg.blocks[bid].instrs)))
+
+    # Definiciones que alcanzan la salida de cada bloque: variable -> {indices}
+    gen: Dict[int, Dict[str, int]] = {}
+    for bid in cfg.order:
+        last = gen[bid] = {}
+        for k, written in enumerate(live.defs_of[bid]):
+            for v in written:
+                last[v] = first[bid] + k
+    reach_out: Dict[int, Dict[str, frozenset]] = {bid: {} for bid in cfg.order}
+
+    def reach_in(bid):
+        merged: Dict[str, Set[int]] = {}
+        if bid == cfg.entry:
+            # El valor con que llega a la unidad cuenta como una definicion mas
+            for v in live.live_in[bid]:
+                merged[v] = {ENTRY}
+        for p in cfg.preds(bid):
+            for v, ds in reach_out[p].items():
+                merged.setdefault(v, set()).update(ds)
+        return merged
+
+    order = cfg.reverse_postorder()
+    reachable = set(order)
+    order += [b for b in cfg.order if b not in reachable]
+    changed = True
+    while changed:
+        changed = False
+        for bid in order:
+            cur = {v: frozenset(ds) for v, ds in reach_in(bid).items()}
+            cur.update((v, frozenset((d,))) for v, d in gen[bid].items())
+            if cur != reach_out[bid]:
+                reach_out[bid] = cur
+                changed = True
+
+    parent: Dict[Tuple[str, int], Tuple[str, int]] = {}
+
+    def find(x):
+        root = x
+        while parent.setdefault(root, root) != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    joined: Dict[Tuple[str, frozenset, int], Tuple[str, int]] = {}
+
+    # En un bloque inalcanzable una variable sin definiciones que la alcancen
+    # no tiene valor: se le da un nodo propio (v, -2 - bloque) en vez del de
+    # la entrada, que haria pasar por parametro cualquier variable de ese bloque
+    def join(v, ds, undefined=ENTRY) -> Tuple[str, int]:
+        key = (v, frozenset(ds), undefined)
+        if key in joined:
+            return joined[key]
+        nodes = [(v, d) for d in ds] or [(v, undefined)]
+        root = find(nodes[0])
+        for n in nodes[1:]:
+            other = find(n)
+            if other != root:
+                parent[other] = root
+        joined[key] = nodes[0]
+        return nodes[0]
+
+    use_at, def_at = {}, {}
+    live_nodes: List[List[Tuple[str, int]]] = []
+    spans: Dict[Tuple[str, int], List[int]] = {}     # nodo -> [inicio, fin] antes de unir
+
+    def cover(node, lo, hi):
+        span = spans.get(node)
+        if span is None:
+            spans[node] = [lo, hi]
+        else:
+            if lo < span[0]:
+                span[0] = lo
+            if hi > span[1]:
+                span[1] = hi
+
+    for bid in cfg.order:
+        cur = reach_in(bid)
+        node_of: Dict[str, Tuple[str, int]] = {}     # variable -> nodo de su valor actual
+
+        undefined = ENTRY if bid in reachable else -2 - bid
+
+        def node(v):
+            n = node_of.get(v)
+            if n is None:
+                n = node_of[v] = join(v, cur.get(v, ()), undefined)
+            return n
+
+        start = first[bid]
+        for v in live.live_in[bid]:
+            cover(node(v), 2 * start, 2 * start)
+        after = live.live_after(bid)
+        read, written = live.uses_of[bid], live.defs_of[bid]
+        for k in range(len(read)):
+            i = start + k
+            for v in read[k]:
+                n = use_at[(i, v)] = node(v)
+                cover(n, 2 * i, 2 * i)
+            for v in written[k]:
+                n = node_of[v] = def_at[i] = (v, i)
+                find(n)
+                cover(n, 2 * i + 1, 2 * i + 1)
+            nodes = [node(v) for v in after[k]]
+            for n in nodes:
+                # Vivo despues de i: ocupa hasta la lectura de la siguiente instruccion
+                cover(n, 2 * i + 1, 2 * i + 2)
+            live_nodes.append(nodes)
+
+    intervals: Dict[Tuple[str, int], List[int]] = {}
+    for n, (lo, hi) in spans.items():
+        iv = intervals.setdefault(find(n), [lo, hi])
+        if lo < iv[0]:
+            iv[0] = lo
+        if hi > iv[1]:
+            iv[1] = hi
+    return LiveRanges(
+        intervals={k: (iv[0], iv[1]) for k, iv in intervals.items()},
+        use_at={k: find(n) for k, n in use_at.items()},
+        def_at={k: find(n) for k, n in def_at.items()},
+        entry={v: find((v, d)) for (v, d) in list(parent) if d == ENTRY},
+        after=[{find(n) for n in nodes} for nodes in live_nodes],
+        positions=positions,
+    )
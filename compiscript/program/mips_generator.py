@@ -1,7 +1,17 @@
 #!/usr/bin/env python3
 import sys
 import re
+from dataclasses import dataclass
 from pathlib import Path
+from typing import List, Set
+
+from cfg import CFG, merge_globals, split_functions
+from liveness import Liveness
+from tac import TAC, Assign, BinaryOp, UnaryOp, Label, Jump, CondJump, Param, Call, Return, BeginFunc, EndFunc, is_const, is_var
+from regalloc import ALLOCATORS, allocate_registers
+
+# Estrategias de asignacion de registros (ver regalloc.py); "greedy" es el mapeo historico
+REGALLOCS = tuple(ALLOCATORS) + ("greedy",)
 
 def is_temp(name):
     return re.fullmatch(r"t\d+", name) is not None
@@ -12,9 +22,156 @@ def is_label(line):
 def sanitize_ident(x):
     return x.strip()
 
+def power_of_two(op):
+    """Exponente k si op es el literal 2^k (1 <= k <= 30), si no None."""
+    text = sanitize_ident(str(op))
+    if not re.fullmatch(r"\d+", text):
+        return None
+    n = int(text)
+    k = n.bit_length() - 1
+    return k if 1 <= k <= 30 and n == 1 << k else None
+
+# Comparacion -> rama que salta cuando es falsa ({L}); $t8 de auxiliar
+BRANCH_IF_FALSE = {
+    "==": ("  bne {a}, {b}, {L}",),
+    "!=": ("  beq {a}, {b}, {L}",),
+    "<": ("  slt $t8, {a}, {b}\n  beq $t8, $zero, {L}",),
+    ">": ("  slt $t8, {b}, {a}\n  beq $t8, $zero, {L}",),
+    "<=": ("  slt $t8, {b}, {a}\n  bne $t8, $zero, {L}",),
+    ">=": ("  slt $t8, {a}, {b}\n  bne $t8, $zero, {L}",),
+}
+
+def fused_compares(code: List[TAC]) -> Set[int]:
+    """
+    Posiciones de las comparaciones `t = a op b` seguidas de `if_false t goto L`
+    con t muerto despues del salto: se traducen a una sola rama sin
+    materializar el booleano.
+    """
+    fused = set()
+    for unit in merge_globals(split_functions(code)):
+        cfg = CFG.build(unit.body, unit.name)
+        live = Liveness(cfg)
+        # CFG.build solo descarta las etiquetas: recorre los bloques en el orden original
+        positions = iter([p for p, instr in zip(unit.positions, unit.body) if not isinstance(instr, Label)])
+        for bid in cfg.order:
+            instrs = cfg.blocks[bid].instrs
+            after = live.live_after(bid)
+            for k, instr in enumerate(instrs):
+                pos = next(positions)
+                if k + 1 < len(instrs) and isinstance(instr, BinaryOp) and instr.op in BRANCH_IF_FALSE \
+                        and isinstance(instrs[k + 1], CondJump) and instrs[k + 1].condition == instr.target \
+                        and instr.target not in after[k + 1]:
+                    fused.add(pos)
+    return fused
+
+@dataclass
+class RawLine(TAC):
+    """Linea de tac.txt que el cargador no reconoce (se emite como comentario)."""
+    text: str
+
+    def __str__(self):
+        return self.text
+
+
+def parse_tac_line(line: str) -> TAC:
+    """
+    Convierte una linea de texto TAC (formato de tac.txt) en su instruccion.
+    Solo se usa para cargar TAC desde disco; el pipeline en memoria pasa las
+    instrucciones directamente.
+    """
+    line = line.strip()
+    if is_label(line):
+        return Label(name=line[:-1])
+    if line == "BeginFunc" or line.startswith("BeginFunc "):
+        params = line[len("BeginFunc"):].split(",")
+        return BeginFunc(params=[p.strip() for p in params if p.strip()])
+    if line == "EndFunc":
+        return EndFunc()
+
+    m = re.match(r"goto\s+(\w+)", line)
+    if m:
+        return Jump(target=m.group(1))
+
+    m = re.match(r"if_false\s+(.+)\s+goto\s+(.+)", line)
+    if m:
+        return CondJump(condition=m.group(1).strip(), target=m.group(2).strip())
+
+    m = re.match(r"param\s+(.+)", line)
+    if m:
+        return Param(value=m.group(1).strip())
+
+    m = re.match(r"(?:([\w\d]+)\s*=\s*)?call\s+([\w\d]+),\s*(\d+)", line)
+    if m:
+        dest, fname, num_args = m.groups()
+        return Call(target=dest, name=fname, num_params=int(num_args))
+
+    m = re.match(r"return(?:\s+(.+))?", line)
+    if m:
+        return Return(value=m.group(1))
+
+    m = re.match(r"([\w\d]+)\s*=\s*(.+)", line)
+    if m:
+        left, right = m.groups()
+        mb = re.match(r"(.+)\s*([<>]=?|==|!=|[+\-*\/%])\s*(.+)", right)
+        if mb:
+            L, op, R = mb.groups()
+            return BinaryOp(target=left, left=L.strip(), op=op, right=R.strip())
+        return Assign(target=left, source=right.strip())
+
+    return RawLine(text=line)
+
+
+def parse_tac_lines(lines) -> List[TAC]:
+    return [parse_tac_line(l) for l in lines if l.strip()]
+
+
+def count_instructions(asm: str) -> int:
+    """Instrucciones del programa MIPS (sin etiquetas, directivas ni comentarios)."""
+    count = 0
+    for line in asm.splitlines():
+        line = line.strip()
+        if line and not line.startswith(("#", ".")) and not line.endswith(":"):
+            count += len(line.split("\n"))
+    return count
+
+
+def compare_allocators(code) -> dict:
+    """Numero de instrucciones generadas con cada estrategia de REGALLOCS."""
+    return {name: count_instructions(MIPSGen(code, regalloc=name).translate()) for name in REGALLOCS}
+
+
 class MIPSGen:
-    def __init__(self, tac_lines):
-        self.lines = [l.rstrip() for l in tac_lines if l.strip()]
+    """
+    Traduce TAC a MIPS.
+
+    Recibe directamente las instrucciones de tac.py (salida de TACGenerator) y
+    despacha cada una por su clase en HANDLERS. Si recibe lineas de texto
+    (p. ej. leidas de tac.txt) primero las convierte con parse_tac_lines.
+
+    regalloc elige como se ubican los operandos (REGALLOCS): "linear" asigna
+    registros por rangos de vida (regalloc.py), "getreg" bloque por bloque
+    con proximo uso; "greedy" es el mapeo
+    historico de get_op_location. Tambien acepta una instancia de asignador.
+    """
+
+    def __init__(self, code, regalloc: str = "linear"):
+        code = list(code)
+        if any(isinstance(c, str) for c in code):
+            code = parse_tac_lines(code)
+        if isinstance(regalloc, str):
+            if regalloc not in REGALLOCS:
+                raise ValueError(f"Asignador de registros desconocido: {regalloc} (opciones: {', '.join(REGALLOCS)})")
+            allocator = None if regalloc == "greedy" else ALLOCATORS[regalloc]()
+        else:
+            allocator = regalloc          # instancia ya configurada (p. ej. LinearScan con menos registros)
+        self.code = code
+        self.regalloc = regalloc
+        # posicion -> Allocation de su unidad (None con el mapeo historico)
+        self.allocs = None if allocator is None else allocate_registers(code, allocator)
+        self.fused = fused_compares(code)
+        self.alloc = None
+        self.func_alloc = None
+        self.pos = 0
         self.out_asm = []
         self.func_name = None
         self.local_map = {}
@@ -25,13 +182,23 @@ class MIPSGen:
         self.in_function = False
         self.current_func_buffer = []
 
+    def regalloc_stats(self) -> dict:
+        """Totales de la asignacion de registros (vacio con el mapeo historico)."""
+        if self.allocs is None:
+            return {}
+        units = {id(a): a for a in self.allocs.values()}.values()
+        return {
+            "regalloc_spills": sum(a.stats.get("spilled", 0) for a in units),
+            "moves_coalesced": sum(a.stats.get("coalesced", 0) for a in units),
+        }
+
     def emit(self, line=""):
         if self.in_function:
             self.current_func_buffer.append(line)
         else:
             self.out_asm.append(line)
 
-    def start_function(self, label):
+    def start_function(self, label, params=()):
         self.func_name = label.rstrip(":")
         self.local_map = {}
         self.spill_map = {}
@@ -40,27 +207,46 @@ class MIPSGen:
         self.call_args = []
         self.in_function = True
         self.current_func_buffer = []
+        self.func_alloc = self.alloc
         self.emit(f"# --- start of function {self.func_name} ---")
-        self.emit("# load parameters into s-registers")
-        for i in range(4):
-            self.emit(f"  move $s{i}, $a{i}")
+        if self.allocs is None:
+            self.emit("# load parameters into s-registers")
+            for i in range(4):
+                self.emit(f"  move $s{i}, $a{i}")
+            # Los parametros declarados quedan en el $s donde se copiaron
+            for i, name in enumerate(params[:4]):
+                self.local_map[sanitize_ident(name)] = ('reg', f"$s{i}")
+            self.next_s_reg = min(len(params), 4)
+            return
+        self.emit("# load parameters")
+        if self.func_alloc is not None:
+            # Solo los parametros vivos a la entrada (None: no se leen, su $a se ignora)
+            for i, key in enumerate(self.func_alloc.params[:4]):
+                if key is not None:
+                    self.store_loc(f"$a{i}", self.func_alloc.where(key))
 
     def end_function(self):
         if not self.in_function:
             return
-        saved_s_regs = self.next_s_reg
-        frame_size = self.next_spill_offset + 4 + saved_s_regs * 4
+        if self.allocs is None:
+            saved = [f"$s{i}" for i in range(self.next_s_reg)]
+            spill_bytes = self.next_spill_offset
+        else:
+            alloc = self.func_alloc
+            saved = alloc.callee_saved if alloc else []
+            spill_bytes = 4 * alloc.num_slots if alloc else 0
+        frame_size = spill_bytes + 4 + len(saved) * 4
         prologue = [
             f"{self.func_name}:",
             f"  addiu $sp, $sp, -{frame_size}",
             f"  sw $ra, {frame_size - 4}($sp)"
         ]
-        for i in range(saved_s_regs):
-            prologue.append(f"  sw $s{i}, {frame_size - 8 - 4*i}($sp)")
+        for i, reg in enumerate(saved):
+            prologue.append(f"  sw {reg}, {frame_size - 8 - 4*i}($sp)")
 
         epilogue = [f".epilogue_{self.func_name}:"]
-        for i in reversed(range(saved_s_regs)):
-            epilogue.append(f"  lw $s{i}, {frame_size - 8 - 4*i}($sp)")
+        for i in reversed(range(len(saved))):
+            epilogue.append(f"  lw {saved[i]}, {frame_size - 8 - 4*i}($sp)")
         epilogue += [
             f"  lw $ra, {frame_size - 4}($sp)",
             f"  addiu $sp, $sp, {frame_size}",
@@ -71,9 +257,12 @@ class MIPSGen:
         self.in_function = False
         self.current_func_buffer = []
         self.func_name = None
+        self.func_alloc = None
 
-    def get_op_location(self, op):
+    def get_op_location(self, op, is_def=False):
         op = sanitize_ident(op)
+        if self.allocs is not None:
+            return self.alloc.location(op, self.pos, is_def)
         if op in self.local_map:
             return self.local_map[op]
         if is_temp(op):
@@ -100,144 +289,126 @@ class MIPSGen:
         if re.fullmatch(r"-?\d+", op):
             self.emit(f"  li {dest_reg}, {op}")
             return
+        if is_const(op) and (self.allocs is not None or op in ("true", "True", "false", "False")):
+            # Literales sin soporte en el backend (strings, booleanos, null)
+            self.emit(f"  li {dest_reg}, {1 if op in ('true', 'True') else 0}  # {op}")
+            return
         kind, loc = self.get_op_location(op)
         if kind == 'reg':
             if loc != dest_reg:
                 self.emit(f"  move {dest_reg}, {loc}")
+        elif kind == 'stack':
+            self.emit(f"  lw {dest_reg}, {loc}($sp)")
         else:
             self.emit(f"  lw {dest_reg}, -{loc}($sp)")
 
     def store_op(self, src_reg, dest_op):
         dest_op = sanitize_ident(dest_op)
-        kind, loc = self.get_op_location(dest_op)
+        self.store_loc(src_reg, self.get_op_location(dest_op, is_def=True))
+
+    def store_loc(self, src_reg, location):
+        kind, loc = location
         if kind == 'reg':
             if loc != src_reg:
                 self.emit(f"  move {loc}, {src_reg}")
+        elif kind == 'stack':
+            self.emit(f"  sw {src_reg}, {loc}($sp)")
         else:
             self.emit(f"  sw {src_reg}, -{loc}($sp)")
 
+    # ---------------- traduccion ----------------
+
+    # Instruccion TAC -> metodo que la traduce
+    HANDLERS = {
+        Label: "_gen_label",
+        BeginFunc: "_gen_begin_func",
+        EndFunc: "_gen_end_func",
+        Jump: "_gen_jump",
+        CondJump: "_gen_cond_jump",
+        Param: "_gen_param",
+        Call: "_gen_call",
+        Return: "_gen_return",
+        Assign: "_gen_assign",
+        BinaryOp: "_gen_binary",
+        UnaryOp: "_gen_unary",
+        RawLine: "_gen_raw",
+    }
+
+    # Operador -> instrucciones sobre {a} (izq) y {b} (der); resultado en {d}.
+    # Solo la primera lee {a}/{b}, asi que {d} puede ser uno de ellos
+    BINARY_ASM = {
+        "+": ("  add {d}, {a}, {b}",),
+        "-": ("  sub {d}, {a}, {b}",),
+        "*": ("  mul {d}, {a}, {b}",),
+        "/": ("  div {a}, {b}\n  mflo {d}",),
+        "%": ("  div {a}, {b}\n  mfhi {d}",),
+        "<": ("  slt {d}, {a}, {b}",),
+        ">": ("  slt {d}, {b}, {a}",),
+        "<=": ("  slt {d}, {b}, {a}\n  xori {d}, {d}, 1",),
+        ">=": ("  slt {d}, {a}, {b}\n  xori {d}, {d}, 1",),
+        "==": ("  xor {d}, {a}, {b}\n  sltiu {d}, {d}, 1",),
+        "!=": ("  xor {d}, {a}, {b}\n  sltu {d}, $zero, {d}",),
+    }
+
+    # Multiplicacion, division y modulo por 2^k con desplazamientos ($t9 de auxiliar).
+    # div trunca hacia cero: a un negativo se le suma 2^k - 1 antes del sra
+    SHIFT_ASM = {
+        "*": ("  sll {d}, {a}, {k}",),
+        "/": ("  sra $t9, {a}, 31\n  srl $t9, $t9, {r}\n  addu $t9, {a}, $t9\n  sra {d}, $t9, {k}",),
+        "%": ("  sra $t9, {a}, 31\n  srl $t9, $t9, {r}\n  addu $t9, {a}, $t9\n"
+              "  sra $t9, $t9, {k}\n  sll $t9, $t9, {k}\n  subu {d}, {a}, $t9",),
+    }
+
+    UNARY_ASM = {
+        "-": ("  subu {d}, $zero, {a}",),
+        "!": ("  sltiu {d}, {a}, 1",),
+    }
+
     def translate(self):
-        i = 0
+        code = self.code
         # Verificar si hay funciones definidas
-        has_functions = any(line.strip() == "BeginFunc" for line in self.lines)
+        has_functions = any(isinstance(instr, BeginFunc) for instr in code)
 
         # Si no hay funciones, crear main para todo el código global
+        main_frame = 256
+        if self.allocs:
+            slots = max(a.num_slots for a in self.allocs.values())
+            main_frame = max(main_frame, 4 * slots + 4)
         if not has_functions:
             self.emit(".globl main")
             self.emit("main:")
-            self.emit("  addiu $sp, $sp, -256")
-            self.emit("  sw $ra, 252($sp)")
-
-        while i < len(self.lines):
-            line = self.lines[i].strip()
-            if is_label(line):
-                if i+1 < len(self.lines) and self.lines[i+1].strip() == "BeginFunc":
-                    self.end_function()
-                    self.start_function(line)
-                    i += 2
-                    continue
-                else:
-                    self.emit(line)
-                    i += 1
-                    continue
-            if line == "BeginFunc":
-                self.end_function()
-                self.start_function("anon_func:")
-                i += 1
-                continue
-            if line == "EndFunc":
-                self.end_function()
-                i += 1
-                continue
-
-            # goto
-            m = re.match(r"goto\s+(\w+)", line)
-            if m:
-                self.emit(f"  j {m.group(1)}")
-                i += 1
-                continue
+            self.emit(f"  addiu $sp, $sp, -{main_frame}")
+            self.emit(f"  sw $ra, {main_frame - 4}($sp)")
 
-            # if_false
-            m = re.match(r"if_false\s+(.+)\s+goto\s+(.+)", line)
-            if m:
-                cond, label = m.groups()
-                kind, loc = self.get_op_location(cond.strip())
-                if kind == "reg":
-                    self.emit(f"  beq {loc}, $zero, {label.strip()}")
-                else:
-                    self.load_op(cond.strip(), "$t8")
-                    self.emit(f"  beq $t8, $zero, {label.strip()}")
-                i += 1
-                continue
-
-            # param
-            m = re.match(r"param\s+(.+)", line)
-            if m:
-                self.call_args.append(m.group(1).strip())
-                i += 1
-                continue
-
-            # call
-            m = re.match(r"(?:([\w\d]+)\s*=\s*)?call\s+([\w\d]+),\s*(\d+)", line)
-            if m:
-                dest, fname, num_args = m.groups()
-                for j in range(min(int(num_args), 4)):
-                    self.load_op(self.call_args[j], f"$a{j}")
-                self.emit(f"  jal {fname}")
-                self.call_args = []
-                if dest:
-                    self.store_op("$v0", dest)
-                i += 1
-                continue
-
-            # return
-            m = re.match(r"return(?:\s+(.+))?", line)
-            if m:
-                val = m.group(1)
-                if val:
-                    self.load_op(val, "$v0")
-                if self.func_name:
-                    self.emit(f"  j .epilogue_{self.func_name}")
-                i += 1
-                continue
-
-            # assignment / binary
-            m = re.match(r"([\w\d]+)\s*=\s*(.+)", line)
-            if m:
-                left, right = m.groups()
-                mb = re.match(r"(.+)\s*([<>]=?|==|!=|[+\-*\/%])\s*(.+)", right)
-                if mb:
-                    L, op, R = mb.groups()
-                    self.load_op(L, "$t8")
-                    self.load_op(R, "$t9")
-                    if op == "+": self.emit("  add $t8, $t8, $t9")
-                    elif op == "-": self.emit("  sub $t8, $t8, $t9")
-                    elif op == "*": self.emit("  mul $t8, $t8, $t9")
-                    elif op == "/": self.emit("  div $t8, $t9\n  mflo $t8")
-                    elif op == "%": self.emit("  div $t8, $t9\n  mfhi $t8")
-                    elif op == "<": self.emit("  slt $t8, $t8, $t9")
-                    elif op == ">": self.emit("  slt $t8, $t9, $t8")
-                    elif op == "<=": self.emit("  slt $t8, $t9, $t8\n  xori $t8, $t8, 1")
-                    elif op == ">=": self.emit("  slt $t8, $t8, $t9\n  xori $t8, $t8, 1")
-                    elif op == "==": self.emit("  xor $t8, $t8, $t9\n  sltiu $t8, $t8, 1")
-                    elif op == "!=": self.emit("  xor $t8, $t8, $t9\n  sltu $t8, $zero, $t8")
-                    self.store_op("$t8", left)
-                else:
-                    self.load_op(right.strip(), "$t8")
-                    self.store_op("$t8", left)
+        handlers = {cls: getattr(self, name) for cls, name in self.HANDLERS.items()}
+        i = 0
+        while i < len(code):
+            instr = code[i]
+            self.pos = i
+            if self.allocs is not None:
+                self.alloc = self.allocs.get(i, self.alloc)
+            handler = handlers.get(type(instr))
+            if handler is None:
+                self.emit(f"  # unhandled: {instr}")
                 i += 1
                 continue
-
-            self.emit(f"  # unhandled: {line}")
-            i += 1
+            # Cargas/guardados que pide un asignador local (getreg) alrededor de la instruccion
+            fixups = self.alloc if self.allocs is not None else None
+            for line in fixups.code_before.get(i, ()) if fixups else ():
+                self.emit(f"  {line}")
+            # Cada handler devuelve cuantas instrucciones consumio
+            step = handler(instr, i) or 1
+            for line in fixups.code_after.get(i, ()) if fixups else ():
+                self.emit(f"  {line}")
+            i += step
 
         # Cerrar cualquier función abierta
         self.end_function()
 
         # Si todo es global, cerrar main
         if not has_functions:
-            self.emit("  lw $ra, 252($sp)")
-            self.emit("  addiu $sp, $sp, 256")
+            self.emit(f"  lw $ra, {main_frame - 4}($sp)")
+            self.emit(f"  addiu $sp, $sp, {main_frame}")
             self.emit("  li $v0, 10")
             self.emit("  syscall")
 
@@ -255,17 +426,158 @@ class MIPSGen:
         full_asm.extend(self.out_asm)
         return "\n".join(full_asm)
 
+    def _gen_label(self, instr, i):
+        if i + 1 < len(self.code) and isinstance(self.code[i + 1], BeginFunc):
+            self.end_function()
+            self.start_function(f"{instr.name}:", self.code[i + 1].params)
+            return 2
+        self.emit(f"{instr.name}:")
+        return 1
+
+    def _gen_begin_func(self, instr, i):
+        self.end_function()
+        self.start_function("anon_func:", instr.params)
+
+    def _gen_end_func(self, instr, i):
+        self.end_function()
+
+    def _gen_jump(self, instr, i):
+        self.emit(f"  j {instr.target}")
+
+    def _gen_cond_jump(self, instr, i):
+        cond = str(instr.condition)
+        kind, loc = self.get_op_location(cond)
+        if kind == "reg":
+            self.emit(f"  beq {loc}, $zero, {instr.target}")
+        else:
+            self.load_op(cond, "$t8")
+            self.emit(f"  beq $t8, $zero, {instr.target}")
+
+    def _gen_param(self, instr, i):
+        self.call_args.append(str(instr.value))
+
+    def _gen_call(self, instr, i):
+        # Registros caller-saved con valores que siguen vivos despues de la llamada
+        saves = self.alloc.saves.get(i, ()) if self.allocs is not None else ()
+        for reg, offset in saves:
+            self.emit(f"  sw {reg}, {offset}($sp)")
+        for j in range(min(int(instr.num_params), 4)):
+            self.load_op(self.call_args[j], f"$a{j}")
+        self.emit(f"  jal {instr.name}")
+        self.call_args = []
+        # Primero se restauran los guardados y despues se escribe el resultado:
+        # el destino puede vivir en uno de esos registros (d = f() en un lazo)
+        target = self.get_op_location(str(instr.target), is_def=True) if instr.target else None
+        for reg, offset in saves:
+            if target != ("reg", reg):
+                self.emit(f"  lw {reg}, {offset}($sp)")
+        if target:
+            self.store_loc("$v0", target)
+
+    def _gen_return(self, instr, i):
+        if instr.value is not None and str(instr.value) != "":
+            self.load_op(str(instr.value), "$v0")
+        if self.func_name:
+            self.emit(f"  j .epilogue_{self.func_name}")
+
+    def _gen_assign(self, instr, i):
+        if self.allocs is not None:
+            kind, dst = self.get_op_location(str(instr.target), is_def=True)
+            if kind == "reg":
+                # Directo al registro destino: li, lw o una sola move (nada si se coalescieron)
+                self.load_op(str(instr.source), dst)
+                return
+        self.load_op(str(instr.source), "$t8")
+        self.store_op("$t8", str(instr.target))
+
+    def _gen_binary(self, instr, i):
+        if i in self.fused and self._gen_compare_branch(instr, i):
+            return 2
+        asm = self.BINARY_ASM.get(instr.op)
+        if asm is None:
+            # Operadores de objetos/arreglos ("[]", ".", "length") sin soporte en el backend
+            self.emit(f"  # unhandled: {instr}")
+            return
+        left, right = str(instr.left), str(instr.right)
+        if instr.op == "*" and power_of_two(right) is None:
+            left, right = right, left
+        k = power_of_two(right)
+        if instr.op in self.SHIFT_ASM and k is not None:
+            a = self._source_reg(left, "$t8")
+            d = self._target_reg(str(instr.target))
+            for line in self.SHIFT_ASM[instr.op]:
+                self.emit(line.format(d=d, a=a, k=k, r=32 - k))
+            self.store_op(d, str(instr.target))
+            return
+        a = self._source_reg(str(instr.left), "$t8")
+        b = self._source_reg(str(instr.right), "$t9")
+        d = self._target_reg(str(instr.target))
+        for line in asm:
+            self.emit(line.format(d=d, a=a, b=b))
+        self.store_op(d, str(instr.target))
+
+    def _gen_compare_branch(self, instr, i):
+        """`t = a op b` + `if_false t goto L` como una rama; False si hay que traducirlas por separado."""
+        fixups = self.alloc if self.allocs is not None else None
+        if fixups and (fixups.code_after.get(i) or fixups.code_before.get(i + 1) or fixups.code_after.get(i + 1)):
+            return False                # cargas/guardados de getreg entre la comparacion y el salto
+        left, right = str(instr.left), str(instr.right)
+        a = "$zero" if sanitize_ident(left) == "0" else self._source_reg(left, "$t8")
+        b = "$zero" if sanitize_ident(right) == "0" else self._source_reg(right, "$t9")
+        for line in BRANCH_IF_FALSE[instr.op]:
+            self.emit(line.format(a=a, b=b, L=self.code[i + 1].target))
+        return True
+
+    def _gen_unary(self, instr, i):
+        asm = self.UNARY_ASM.get(instr.op)
+        if asm is None:
+            self.emit(f"  # unhandled: {instr}")
+            return
+        a = self._source_reg(str(instr.source), "$t8")
+        d = self._target_reg(str(instr.target))
+        for line in asm:
+            self.emit(line.format(d=d, a=a))
+        self.store_op(d, str(instr.target))
+
+    def _source_reg(self, op, scratch):
+        """Registro de donde leer op: el suyo si el asignador le dio uno, si no se carga en scratch."""
+        if self.allocs is not None and is_var(sanitize_ident(op)):
+            kind, loc = self.get_op_location(op)
+            if kind == "reg":
+                return loc
+        self.load_op(op, scratch)
+        return scratch
+
+    def _target_reg(self, op):
+        """Registro donde calcular el resultado: el del destino o $t8 (y despues se guarda)."""
+        if self.allocs is not None:
+            kind, loc = self.get_op_location(op, is_def=True)
+            if kind == "reg":
+                return loc
+        return "$t8"
+
+    def _gen_raw(self, instr, i):
+        self.emit(f"  # unhandled: {instr.text}")
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 mips_generator.py tac.txt")
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not args:
+        print(f"Usage: python3 mips_generator.py tac.txt [--regalloc={'|'.join(REGALLOCS)}] [--compare]")
         sys.exit(1)
-    path = Path(sys.argv[1])
+    path = Path(args[0])
     if not path.exists():
         print("File not found:", path)
         sys.exit(1)
     with path.open() as f:
         lines = f.readlines()
-    gen = MIPSGen(lines)
+    code = parse_tac_lines(lines)
+    if "--compare" in sys.argv:
+        for name, count in compare_allocators(code).items():
+            print(f"{name:<8} {count} instrucciones")
+        return
+    regalloc = next((a.split("=", 1)[1] for a in sys.argv if a.startswith("--regalloc=")), "linear")
+    gen = MIPSGen(code, regalloc=regalloc)
     asm = gen.translate()
     out_path = path.parent / "out.s"
     with out_path.open("w") as f:
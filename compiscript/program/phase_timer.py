@@ -0,0 +1,83 @@
+"""
+Instrumentacion por fase del pipeline del compilador.
+
+PhaseTimer mide, para cada fase (lex, parse, semantic, ast, tac, mips, ...):
+- tiempo de reloj (wall) en ms,
+- tiempo de CPU del hilo actual en ms,
+- pico de memoria asignada (tracemalloc) en KiB, solo si trace_memory=True.
+
+tracemalloc es global al proceso y encarece bastante la ejecucion, por eso la
+medicion de memoria es opcional; con varias compilaciones concurrentes los
+picos se mezclan entre hilos.
+
+    timer = PhaseTimer(trace_memory=True)
+    with timer.phase("parse"):
+        ...
+    print(timer.report())
+"""
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class PhaseTimer:
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.phases = {}          # nombre -> {"wall_ms", "cpu_ms", "peak_kib"}
+        self._started_tracing = False
+
+    @contextmanager
+    def phase(self, name: str):
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+        wall0 = time.perf_counter()
+        cpu0 = time.thread_time()
+        try:
+            yield
+        finally:
+            entry = self.phases.setdefault(name, {"wall_ms": 0.0, "cpu_ms": 0.0, "peak_kib": None})
+            entry["wall_ms"] += (time.perf_counter() - wall0) * 1000.0
+            entry["cpu_ms"] += (time.thread_time() - cpu0) * 1000.0
+            if self.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                peak_kib = max(0, peak - base) / 1024.0
+                entry["peak_kib"] = max(entry["peak_kib"] or 0.0, peak_kib)
+
+    def stop(self):
+        """Detiene tracemalloc si fue este timer quien lo inicio."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def total(self) -> dict:
+        wall = sum(p["wall_ms"] for p in self.phases.values())
+        cpu = sum(p["cpu_ms"] for p in self.phases.values())
+        peaks = [p["peak_kib"] for p in self.phases.values() if p["peak_kib"] is not None]
+        return {"wall_ms": wall, "cpu_ms": cpu, "peak_kib": max(peaks) if peaks else None}
+
+    def as_dict(self) -> dict:
+        """Copia serializable a JSON (redondeada)."""
+        def rnd(entry):
+            return {k: (round(v, 3) if v is not None else None) for k, v in entry.items()}
+        out = {name: rnd(entry) for name, entry in self.phases.items()}
+        out["total"] = rnd(self.total())
+        return out
+
+    def report(self) -> str:
+        """Tabla de texto con una fila por fase (para --time-report)."""
+        rows = [("fase", "wall (ms)", "cpu (ms)", "pico (KiB)")]
+        for name, p in list(self.phases.items()) + [("TOTAL", self.total())]:
+            peak = "-" if p["peak_kib"] is None else f"{p['peak_kib']:.1f}"
+            rows.append((name, f"{p['wall_ms']:.2f}", f"{p['cpu_ms']:.2f}", peak))
+        widths = [max(len(r[i]) for r in rows) for i in range(4)]
+        lines = []
+        for idx, r in enumerate(rows):
+            cells = [r[0].ljust(widths[0])] + [c.rjust(w) for c, w in zip(r[1:], widths[1:])]
+            lines.append("  ".join(cells))
+            if idx == 0 or idx == len(rows) - 2:
+                lines.append("  ".join("-" * w for w in widths))
+        return "\n".join(lines)
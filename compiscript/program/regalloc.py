@@ -0,0 +1,510 @@
+"""
+Asignacion de registros para MIPSGen.
+
+MIPSGen pregunta, instruccion por instruccion, donde vive cada operando:
+
+    plan = allocate_registers(code)          # posicion -> Allocation de su unidad
+    plan[i].location("t3", i)                # -> ('reg', '$t1') o ('stack', 8)
+    plan[i].location("x", i, is_def=True)
+
+Estrategias (MIPSGen(code, regalloc=...)):
+
+- "linear" (por defecto): linear scan (Poletto y Sarkar) sobre los rangos de
+  vida de cada funcion (liveness.live_ranges). Un registro se reutiliza en
+  cuanto el valor que tenia muere.
+- "graph" (-O2): Chaitin-Briggs con coalescing conservador (GraphColoring).
+  Compila mas lento pero elimina copias y derrama menos bajo presion.
+- "getreg": el getReg clasico por bloque basico (GetReg, con el
+  RegisterAllocator de lab-obtenReg): los valores viven en la pila entre
+  bloques y dentro de cada bloque se cargan en registros a demanda; al
+  faltar registros se desborda el valor de proximo uso mas lejano.
+- "greedy": el mapeo historico de MIPSGen (tN -> $tN, el resto a $s0..$s7
+  por orden de aparicion y despues a la pila, sin reutilizar nada). Lo
+  implementa MIPSGen mismo; se conserva para comparar.
+
+Clases de registros:
+
+    CALLER_SAVED  $t0..$t7   la funcion llamada puede pisarlos
+    CALLEE_SAVED  $s0..$s7   la funcion que los usa los guarda en su prologo
+
+($t8/$t9 quedan libres como registros de trabajo de MIPSGen.)
+
+Los rangos que cruzan una llamada prefieren un $s y los demas un $t. Si la
+clase preferida esta agotada se usa la otra: un rango en un $t que cruza
+llamadas se parte en cada una (se guarda en su ranura de la pila antes del
+jal y se recarga despues; ver Allocation.saves), salvo que derramarlo
+cueste menos (un lw/sw por cada uso o definicion contra dos por llamada).
+Si no queda ningun registro se derrama, entero, el rango que termina mas
+tarde entre el actual y los activos.
+
+Las ranuras de la pila (rangos derramados y registros guardados alrededor de
+llamadas) se comparten entre rangos que no se solapan y van al fondo del
+marco: la ranura k esta en 4*k($sp).
+
+Los parametros llegan en $a0..$a3 en el orden en que los declara el
+BeginFunc de la funcion (Unit.params); uno que no se lee antes de
+escribirse no ocupa registro y su $a se ignora. Solo si BeginFunc no trae
+parametros (TAC armado a mano) se adivinan como en el mapeo historico: las
+primeras variables (no temporales) que la funcion lee antes de escribirlas.
+"""
+import sys
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cfg import CFG, Unit, merge_globals, split_functions
+from liveness import live_ranges
+from tac import TAC, Assign, Call, CondJump, Jump, Label, Param, Return, is_temp, is_var
+from temp_rename import color_intervals
+
+CALLER_SAVED = tuple(f"$t{i}" for i in range(8))
+CALLEE_SAVED = tuple(f"$s{i}" for i in range(8))
+
+# Rutinas del runtime de MIPSGen que solo tocan $a0/$v0: no cuentan como llamadas
+RUNTIME_HELPERS = ("print",)
+
+Range = Tuple[str, int]
+
+# RegisterAllocator (getReg) vive en lab-obtenReg, que no es un paquete
+_LAB_DIR = Path(__file__).resolve().parents[2] / "lab-obtenReg"
+
+
+@dataclass
+class Allocation:
+    """Registros y ranuras de la pila de una unidad (funcion o codigo global)."""
+    name: str
+    regs: Dict[Range, str] = field(default_factory=dict)
+    slots: Dict[Range, int] = field(default_factory=dict)        # rango -> offset en el marco
+    use_at: Dict[Tuple[int, str], Range] = field(default_factory=dict)
+    def_at: Dict[int, Range] = field(default_factory=dict)
+    saves: Dict[int, List[Tuple[str, int]]] = field(default_factory=dict)   # call -> [(reg, offset)]
+    params: List[Optional[Range]] = field(default_factory=list)  # llegan en $a0, $a1, ... (None: no se usa)
+    num_slots: int = 0
+    stats: Dict[str, int] = field(default_factory=dict)
+    # Asignadores locales (GetReg): ubicacion de cada operando en cada instruccion
+    # y codigo (lw/sw) a emitir antes o despues de ella
+    fixed: Dict[Tuple[int, str, bool], Tuple[str, object]] = field(default_factory=dict)
+    code_before: Dict[int, List[str]] = field(default_factory=dict)
+    code_after: Dict[int, List[str]] = field(default_factory=dict)
+
+    @property
+    def callee_saved(self) -> List[str]:
+        """Registros $s que la unidad usa (y que su prologo debe guardar)."""
+        used = set(self.regs.values()) | {loc for kind, loc in self.fixed.values() if kind == "reg"}
+        return [r for r in CALLEE_SAVED if r in used]
+
+    def where(self, key: Range) -> Tuple[str, object]:
+        reg = self.regs.get(key)
+        if reg is not None:
+            return ("reg", reg)
+        if key not in self.slots:
+            # Operando que el analisis no vio (no deberia pasar): ranura propia
+            self.slots[key] = 4 * self.num_slots
+            self.num_slots += 1
+        return ("stack", self.slots[key])
+
+    def location(self, op: str, pos: int, is_def: bool = False) -> Tuple[str, object]:
+        loc = self.fixed.get((pos, op, is_def))
+        if loc is not None:
+            return loc
+        key = self.def_at.get(pos) if is_def else self.use_at.get((pos, op))
+        if key is None or key[0] != op:
+            key = (op, None)
+        return self.where(key)
+
+
+class _UnitInfo:
+    """Lo que los asignadores necesitan de una unidad: rangos, llamadas y costos."""
+
+    def __init__(self, unit: Unit):
+        self.unit = unit
+        self.cfg = CFG.build(unit.body, unit.name)
+        self.ranges = live_ranges(self.cfg, only=is_var)
+        # CFG.build solo descarta las etiquetas: indice lineal -> posicion original
+        self.index = [p for p, instr in zip(unit.positions, unit.body) if not isinstance(instr, Label)]
+        self.instrs = [self.cfg.blocks[bid].instrs[k] for bid, k in self.ranges.positions]
+        self.calls = [i for i, instr in enumerate(self.instrs)
+                      if isinstance(instr, Call) and instr.name not in RUNTIME_HELPERS]
+        intervals = self.ranges.intervals
+        self.crossing = {key: [c for c in self.calls if s <= 2 * c and e >= 2 * c + 2]
+                         for key, (s, e) in intervals.items()}
+        # Usos + definiciones de cada rango: lo que costaria derramarlo
+        self.refs = {key: 0 for key in intervals}
+        for key in list(self.ranges.use_at.values()) + list(self.ranges.def_at.values()):
+            self.refs[key] += 1
+
+    def weighted_refs(self) -> Dict[Range, float]:
+        """Como refs, pero cada referencia pesa 10**profundidad del lazo que la contiene."""
+        loops = self.cfg.loops()
+        positions = self.ranges.positions
+        weights = {key: 0.0 for key in self.ranges.intervals}
+        refs = [(i, key) for (i, _), key in self.ranges.use_at.items()] + list(self.ranges.def_at.items())
+        for i, key in refs:
+            weights[key] += 10.0 ** loops.depth(positions[i][0])
+        return weights
+
+    def params(self) -> List[Optional[Range]]:
+        """
+        Rango de entrada de cada parametro declarado en BeginFunc (None si no
+        se lee antes de escribirse). Sin parametros declarados: variables vivas
+        a la entrada, en orden de primera lectura. Solo cuentan los rangos
+        vivos en la primera instruccion de la unidad.
+        """
+        ranges, params = self.ranges, []
+        entry = {v: key for v, key in ranges.entry.items() if ranges.intervals[key][0] == 0}
+        if self.unit.params:
+            return [entry.get(v) for v in self.unit.params]
+        for (_, v), key in sorted(ranges.use_at.items()):
+            if entry.get(v) == key and not is_temp(v) and key not in params:
+                params.append(key)
+        return params
+
+    def finish(self, regs: Dict[Range, str], spilled: set, callee_saved: Iterable[str],
+               root=lambda key: key) -> Allocation:
+        """
+        Arma la Allocation a partir de los registros elegidos para cada grupo
+        de rangos (`root` da el grupo de un rango; por defecto cada rango es su
+        propio grupo). Agrega las ranuras de la pila y los guardados alrededor
+        de las llamadas.
+        """
+        ranges, callee_saved = self.ranges, set(callee_saved)
+        hull: Dict[Range, Tuple[int, int]] = {}
+        crossing: Dict[Range, set] = {}
+        for key, (s, e) in ranges.intervals.items():
+            r = root(key)
+            lo, hi = hull.get(r, (s, e))
+            hull[r] = (min(lo, s), max(hi, e))
+            crossing.setdefault(r, set()).update(self.crossing[key])
+
+        alloc = Allocation(self.unit.name)
+        alloc.regs = {key: regs[root(key)] for key in ranges.intervals if root(key) in regs}
+        alloc.use_at = {(self.index[i], v): key for (i, v), key in ranges.use_at.items()}
+        alloc.def_at = {self.index[i]: key for i, key in ranges.def_at.items()}
+
+        saved = {r for r, reg in regs.items() if crossing[r] and reg not in callee_saved}
+        colors = color_intervals({r: hull[r] for r in spilled | saved})
+        alloc.slots = {key: 4 * colors[root(key)] for key in ranges.intervals if root(key) in spilled}
+        alloc.num_slots = max(colors.values()) + 1 if colors else 0
+        for r in sorted(saved):
+            for c in sorted(crossing[r]):
+                alloc.saves.setdefault(self.index[c], []).append((regs[r], 4 * colors[r]))
+
+        alloc.params = self.params()
+        alloc.stats = {"ranges": len(ranges.intervals), "spilled": len(spilled)}
+        return alloc
+
+
+class LinearScan:
+    def __init__(self, caller_saved: Iterable[str] = CALLER_SAVED,
+                 callee_saved: Iterable[str] = CALLEE_SAVED):
+        self.classes = {"caller": list(caller_saved), "callee": list(callee_saved)}
+        self.rank = {r: i for regs in self.classes.values() for i, r in enumerate(regs)}
+
+    def _class_of(self, reg: str) -> str:
+        return "caller" if reg in self.classes["caller"] else "callee"
+
+    def allocate(self, unit: Unit) -> Allocation:
+        info = _UnitInfo(unit)
+        intervals, crossing, refs = info.ranges.intervals, info.crossing, info.refs
+
+        free = {cls: list(regs) for cls, regs in self.classes.items()}
+        regs: Dict[Range, str] = {}
+        spilled = set()
+        active: List[Tuple[int, Range]] = []        # (fin, rango), ordenado por fin
+
+        for key in sorted(intervals, key=lambda k: (intervals[k], k)):
+            start, end = intervals[key]
+            while active and active[0][0] < start:
+                _, old = active.pop(0)
+                free[self._class_of(regs[old])].append(regs[old])
+            prefer, other = ("callee", "caller") if crossing[key] else ("caller", "callee")
+            pool = free[prefer]
+            if not pool and (prefer == "caller" or 2 * len(crossing[key]) < refs[key]):
+                pool = free[other]
+            if not pool and free[other]:
+                spilled.add(key)          # guardarlo en cada llamada saldria mas caro
+                continue
+            if pool:
+                reg = min(pool, key=self.rank.__getitem__)
+                pool.remove(reg)
+                regs[key] = reg
+            else:
+                victim_end, victim = active[-1]
+                if victim_end <= end:
+                    spilled.add(key)
+                    continue
+                active.pop()
+                regs[key] = regs.pop(victim)
+                spilled.add(victim)
+            active.append((end, key))
+            active.sort()
+
+        return info.finish(regs, spilled, self.classes["callee"])
+
+
+class GraphColoring:
+    """
+    Chaitin-Briggs: grafo de interferencia de los rangos de vida, coalescing
+    conservador (criterio de Briggs) de las copias `x = y`, simplificacion,
+    eleccion optimista de candidatos a derrame y seleccion de colores.
+
+    Un rango interfiere con todo lo que esta vivo donde se define, salvo con
+    la fuente de una copia (ambos tienen el mismo valor). Dos rangos unidos
+    por una copia que no interfieren se fusionan si el nodo resultante tiene
+    menos de K vecinos de grado >= K: asi nunca se vuelve incoloreable y la
+    copia desaparece (MIPSGen no emite nada para `x = y` en el mismo registro).
+
+    El costo de derramar un rango son sus referencias pesadas por 10**(profundidad
+    de lazo); se derrama primero el de menor costo / grado. Los rangos que
+    cruzan llamadas prefieren colores callee-saved; si terminan en un $t se
+    guardan alrededor de cada llamada como en LinearScan.
+    """
+
+    def __init__(self, caller_saved: Iterable[str] = CALLER_SAVED,
+                 callee_saved: Iterable[str] = CALLEE_SAVED):
+        self.caller_saved = list(caller_saved)
+        self.callee_saved = list(callee_saved)
+        self.k = len(self.caller_saved) + len(self.callee_saved)
+
+    def allocate(self, unit: Unit) -> Allocation:
+        info = _UnitInfo(unit)
+        ranges = info.ranges
+        adj: Dict[Range, set] = {key: set() for key in ranges.intervals}
+
+        def interfere(a, b):
+            if a != b:
+                adj[a].add(b)
+                adj[b].add(a)
+
+        moves = []              # (destino, fuente)
+        for i, instr in enumerate(info.instrs):
+            d = ranges.def_at.get(i)
+            if d is None:
+                continue
+            src = None
+            if isinstance(instr, Assign) and is_var(instr.source):
+                src = ranges.use_at.get((i, instr.source))
+                if src is not None:
+                    moves.append((d, src))
+            for other in ranges.after[i]:
+                if other != src:
+                    interfere(d, other)
+        entry = list(ranges.entry.values())
+        for i, a in enumerate(entry):
+            for b in entry[i + 1:]:
+                interfere(a, b)
+
+        # ---- coalescing conservador ----
+        alias: Dict[Range, Range] = {}
+
+        def root(n):
+            while n in alias:
+                n = alias[n]
+            return n
+
+        crossing = {key: set(c) for key, c in info.crossing.items()}
+        cost = info.weighted_refs()
+        loops = info.cfg.loops()
+        call_weight = {c: 10.0 ** loops.depth(ranges.positions[c][0]) for c in info.calls}
+        coalesced = 0
+        changed = True
+        while changed:
+            changed = False
+            for d, s in moves:
+                a, b = root(d), root(s)
+                if a == b or b in adj[a]:
+                    continue
+                significant = sum(1 for n in adj[a] | adj[b] if len(adj[n]) >= self.k)
+                if significant >= self.k:
+                    continue
+                alias[b] = a
+                for n in adj.pop(b):
+                    adj[n].discard(b)
+                    interfere(a, n)
+                crossing[a] |= crossing.pop(b)
+                cost[a] += cost.pop(b)
+                coalesced += 1
+                changed = True
+
+        # ---- simplificar / elegir candidatos a derrame ----
+        degree = {n: len(neigh) for n, neigh in adj.items()}
+        remaining = set(adj)
+        low = {n for n in remaining if degree[n] < self.k}
+        stack: List[Range] = []
+        while remaining:
+            if low:
+                n = min(low)
+                low.discard(n)
+            else:
+                n = min(remaining, key=lambda m: (cost[m] / max(degree[m], 1), m))
+            remaining.discard(n)
+            stack.append(n)
+            for m in adj[n]:
+                if m in remaining:
+                    degree[m] -= 1
+                    if degree[m] == self.k - 1:
+                        low.add(m)
+
+        # ---- seleccionar ----
+        partners: Dict[Range, set] = {}
+        for d, s in moves:
+            a, b = root(d), root(s)
+            if a != b:
+                partners.setdefault(a, set()).add(b)
+                partners.setdefault(b, set()).add(a)
+        regs: Dict[Range, str] = {}
+        spilled = set()
+        for n in reversed(stack):
+            taken = {regs[m] for m in adj[n] if m in regs}
+            order = self.callee_saved + self.caller_saved if crossing[n] else self.caller_saved + self.callee_saved
+            free = [r for r in order if r not in taken]
+            if crossing[n] and free and free[0] not in self.callee_saved:
+                # Solo quedan $t: guardarlo en cada llamada puede costar mas que derramarlo
+                if 2 * sum(call_weight[c] for c in crossing[n]) >= cost[n]:
+                    free = []
+            if not free:
+                spilled.add(n)
+                continue
+            # Sesgo: el color de una copia no fusionada, si esta libre
+            bias = [regs[p] for p in sorted(partners.get(n, ())) if regs.get(p) in free]
+            regs[n] = bias[0] if bias else free[0]
+
+        alloc = info.finish(regs, spilled, self.callee_saved, root=root)
+        alloc.stats["coalesced"] = coalesced
+        return alloc
+
+
+def _frame_allocator(caller_saved: Iterable[str], callee_saved: Iterable[str]):
+    """RegisterAllocator cuyas posiciones de la pila son las ranuras del marco de MIPSGen."""
+    if str(_LAB_DIR) not in sys.path:
+        sys.path.insert(0, str(_LAB_DIR))
+    from RegisterAllocator import RegisterAllocator
+
+    class FrameAllocator(RegisterAllocator):
+        def slot_address(self, offset):
+            # Posiciones -4, -8, ... del asignador -> ranuras 0, 4, ... del marco
+            return f"{-offset - 4}($sp)"
+
+    return FrameAllocator(temp_regs=caller_saved, saved_regs=callee_saved, use_saved_regs=True)
+
+
+def _next_use(uses: List[int], i: int) -> Optional[int]:
+    """Distancia desde i hasta el siguiente uso (posiciones ordenadas), o None."""
+    k = bisect_right(uses, i)
+    return uses[k] - i if k < len(uses) else None
+
+
+class GetReg:
+    """
+    getReg clasico (Aho et al., 8.6) bloque por bloque con el RegisterAllocator
+    de lab-obtenReg. Las "variables" del asignador son los rangos de vida
+    (x@d), asi cada uno tiene su propia ranura y la ranura vuelve a estar libre
+    cuando el rango termina.
+
+    Al entrar a un bloque todos los valores estan en su ranura. Cada operando
+    se carga a un registro la primera vez que se lee; cuando no quedan
+    registros se desborda primero un valor muerto o limpio (su copia en la
+    pila sigue vigente) y si no el de proximo uso mas lejano en el bloque. Al
+    salir del bloque (y antes de cada llamada, para los $t) se guardan solo
+    los valores modificados que siguen vivos.
+    """
+
+    def __init__(self, caller_saved: Iterable[str] = CALLER_SAVED,
+                 callee_saved: Iterable[str] = CALLEE_SAVED):
+        self.caller_saved = list(caller_saved)
+        self.callee_saved = list(callee_saved)
+
+    def allocate(self, unit: Unit) -> Allocation:
+        info = _UnitInfo(unit)
+        ranges = info.ranges
+        ra = _frame_allocator(self.caller_saved, self.callee_saved)
+
+        def name(key):
+            return f"{key[0]}@{key[1]}"
+
+        alloc = Allocation(unit.name)
+        alloc.use_at = {(info.index[i], v): key for (i, v), key in ranges.use_at.items()}
+        alloc.def_at = {info.index[i]: key for i, key in ranges.def_at.items()}
+        alloc.params = info.params()
+        # Lo que llega vivo a la entrada (parametros) empieza en su ranura
+        for key in ranges.entry.values():
+            alloc.slots[key] = -ra.place_in_memory(name(key)) - 4
+
+        ends: Dict[int, List[str]] = {}
+        for key, (_, e) in ranges.intervals.items():
+            ends.setdefault(e, []).append(name(key))
+        reads: Dict[int, List[Tuple[str, str]]] = {}
+        for (i, v), key in ranges.use_at.items():
+            if not isinstance(info.instrs[i], Param):     # MIPSGen los lee en la call
+                reads.setdefault(i, []).append((v, name(key)))
+
+        blocks: Dict[int, List[int]] = {}
+        for i, (bid, _) in enumerate(ranges.positions):
+            blocks.setdefault(bid, []).append(i)
+
+        for idxs in blocks.values():
+            live_out = {name(key) for key in ranges.after[idxs[-1]]}
+            uses_in: Dict[str, List[int]] = {}
+            for i in idxs:
+                for _, n in reads.get(i, ()):
+                    uses_in.setdefault(n, []).append(i)
+
+            for i in idxs:
+                instr, pos = info.instrs[i], info.index[i]
+                read = reads.get(i, [])
+                d = ranges.def_at.get(i)
+                operands = {n for _, n in read} | ({name(d)} if d else set())
+                ra.set_next_use({n: _next_use(uses_in.get(n, []), i)
+                                 for n in set(ra.register_descriptor.values()) | operands},
+                                live_out, operands)
+                for v, n in read:
+                    alloc.fixed[(pos, v, False)] = ("reg", ra.load(n))
+                if isinstance(instr, Call) and instr.name not in RUNTIME_HELPERS:
+                    # La llamada pisa los $t: guardar lo que sigue vivo y olvidarlos
+                    ra.flush({name(key) for key in ranges.after[i]}, regs=self.caller_saved)
+                    ra.clear(self.caller_saved)
+                # Los operandos que mueren aqui dejan su registro al destino (x = y + 1)
+                dying = [ra.address_descriptor.get(n) for n in ends.get(2 * i, ())]
+                for n in ends.get(2 * i, ()):
+                    ra.free_var(n)
+                if d is not None:
+                    prefer = next((r for r in dying if isinstance(r, str)), None)
+                    alloc.fixed[(pos, d[0], True)] = ("reg", ra.get_reg(name(d), prefer=prefer))
+                for n in ends.get(2 * i + 1, ()):
+                    ra.free_var(n)
+                code = ra.get_spill_code()
+                if i == idxs[-1]:
+                    ra.flush(live_out)
+                    if isinstance(instr, (Jump, CondJump, Return)):
+                        code += ra.get_spill_code()
+                    elif ra.spill_code:
+                        alloc.code_after[pos] = ra.get_spill_code()
+                    ra.clear()
+                if code:
+                    alloc.code_before[pos] = code
+
+        alloc.num_slots = -ra.stack_offset // 4
+        spilled = sum("# Spill " in line for lines in alloc.code_before.values() for line in lines)
+        alloc.stats = {"ranges": len(ranges.intervals), "spilled": spilled}
+        return alloc
+
+
+ALLOCATORS = {"linear": LinearScan, "graph": GraphColoring, "getreg": GetReg}
+
+
+def allocate_registers(code: List[TAC], allocator=None) -> Dict[int, Allocation]:
+    """
+    Asigna registros a cada unidad del TAC. Devuelve posicion -> Allocation de
+    la unidad que contiene esa instruccion (las funciones tambien quedan
+    registradas en la posicion de su Label/BeginFunc).
+    """
+    allocator = allocator or LinearScan()
+    plan: Dict[int, Allocation] = {}
+    for unit in merge_globals(split_functions(code)):
+        alloc = allocator.allocate(unit)
+        for pos in unit.positions:
+            plan[pos] = alloc
+        if unit.start is not None:
+            plan[unit.start] = alloc
+    return plan
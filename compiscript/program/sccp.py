@@ -0,0 +1,351 @@
+"""
+Propagacion de constantes condicional dispersa (SCCP, Wegman-Zadeck) sobre
+la forma SSA del TAC. Corre con opt_level >= 2 (-O2), despues de generar TAC.
+
+Por cada unidad (cfg.split_functions): to_ssa() -> SCCP -> from_ssa().
+
+- Cada version SSA toma un valor del reticulado TOP > constante > BOTTOM.
+  Se modelan enteros (aritmetica de 32 bits como MIPS, igual que
+  ast_optimizer) y booleanos; strings, floats, resultados de llamadas y los
+  valores que llegan a la entrada de la unidad son BOTTOM. Una llamada
+  define ademas una version BOTTOM de cada variable que alguna funcion
+  escribe (ver to_ssa), asi que `g` no conserva su constante despues de
+  llamar a una funcion que la cambia.
+- Solo se evaluan los bloques alcanzables por aristas ejecutables: un
+  `if_false` con condicion constante solo habilita uno de sus sucesores, y
+  las Phi solo combinan los argumentos de aristas ejecutables.
+- Reescritura: los usos de versiones constantes se reemplazan por el
+  literal, las operaciones con resultado constante pasan a `x = c`, los
+  `if_false` constantes se vuelven `goto` (o desaparecen) y se eliminan los
+  bloques que no se ejecutan nunca. Las definiciones que quedan muertas no se
+  borran aca.
+
+Constantes globales: los tramos globales se procesan primero. Si el AST
+declara `const N = ...` al nivel del programa (y el nombre no se vuelve a
+declarar en ningun otro lado, ver global_constants()), el valor que SCCP
+calcula para N se usa como valor de entrada de N en las unidades que vienen
+despues en el codigo: asi los limites y flags constantes tambien se
+propagan dentro de las funciones.
+
+Las unidades a las que se entra por un salto desde otra unidad
+(cfg.entered_from_outside) quedan como estan.
+
+    code, stats = run_sccp(code, global_constants(ast))
+    stats -> {"ssa_phis": 4, "ssa_copies": 0, "sccp_consts": 9, "sccp_folded": 3,
+              "sccp_branches_removed": 2, "sccp_blocks_removed": 2, "sccp_instrs_removed": 11}
+"""
+import re
+from dataclasses import fields
+from typing import Dict, Iterable, List, Set, Tuple
+
+import ast_nodes as A
+from ast_optimizer import ConstantFolder, _wrap32
+from cfg import CFG, entered_from_outside, join_functions, split_functions
+from ssa import SSAInfo, from_ssa, to_ssa
+from tac import TAC, Assign, BinaryOp, CondJump, Jump, Phi, UnaryOp, defs, is_temp, is_var, replace_uses, uses
+
+
+class _Mark:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+TOP, BOTTOM = _Mark("TOP"), _Mark("BOTTOM")
+
+_INT_RE = re.compile(r"-?\d+\Z")
+
+
+def _same(a, b) -> bool:
+    """Igualdad de valores del reticulado (True y 1 son distintos)."""
+    return type(a) is type(b) and a == b
+
+
+def meet(a, b):
+    if a is TOP:
+        return b
+    if b is TOP:
+        return a
+    if a is BOTTOM or b is BOTTOM or not _same(a, b):
+        return BOTTOM
+    return a
+
+
+def _literal(op):
+    """Valor de un operando literal del TAC (entero o booleano), o BOTTOM."""
+    if isinstance(op, bool):
+        return op
+    if isinstance(op, int):
+        return _wrap32(op)
+    if isinstance(op, str):
+        if _INT_RE.match(op):
+            return _wrap32(int(op))
+        if op in ("true", "True"):
+            return True
+        if op in ("false", "False"):
+            return False
+    return BOTTOM
+
+
+def _typed(value):
+    return ("boolean", value) if isinstance(value, bool) else ("integer", value)
+
+
+def fold_binary(op: str, a, b):
+    """Valor de `a op b` (TOP/BOTTOM se propagan); BOTTOM si no se puede plegar."""
+    # false && x, true || x: el otro operando no importa (ya esta evaluado)
+    for v in (a, b):
+        if isinstance(v, bool) and ((op == "&&" and not v) or (op == "||" and v)):
+            return v
+    if a is BOTTOM or b is BOTTOM:
+        return BOTTOM
+    if a is TOP or b is TOP:
+        return TOP
+    value = ConstantFolder._eval(op, _typed(a), _typed(b))
+    if value is None:
+        return BOTTOM
+    return value if isinstance(value, bool) else _wrap32(value)
+
+
+def fold_unary(op: str, a):
+    if a is TOP or a is BOTTOM:
+        return a
+    if op == "-" and not isinstance(a, bool):
+        return _wrap32(-a)
+    if op == "!" and isinstance(a, bool):
+        return not a
+    return BOTTOM
+
+
+def _truthy(value) -> bool:
+    return value is not False and value != 0
+
+
+class SCCP:
+    """SCCP sobre un CFG ya en SSA. run() calcula los valores y rewrite() aplica los cambios."""
+
+    def __init__(self, cfg: CFG, info: SSAInfo, seeds: Dict[str, object] = None):
+        self.cfg = cfg
+        self.info = info
+        self.seeds = seeds or {}
+        self.values: Dict[str, object] = dict.fromkeys(info.clobbers, BOTTOM)
+        self.executable: Set[Tuple[int, int]] = set()
+        self.visited: Set[int] = set()
+        self.branches_removed = 0
+        self.consts = 0
+        self.folded = 0
+        self._labels = cfg.label_map()
+        self._flow: List[Tuple[int, int]] = []
+        self._ssa: List[str] = []
+
+    def value(self, op):
+        if not is_var(op):
+            return _literal(op)
+        if op in self.info.base:
+            return self.values.get(op, TOP)
+        return self.seeds.get(op, BOTTOM)       # valor de entrada (version 0)
+
+    # ---------------- propagacion ----------------
+
+    def run(self) -> "SCCP":
+        cfg = self.cfg
+        use_sites: Dict[str, List[Tuple[int, int]]] = {}
+        for bid in cfg.order:
+            for k, instr in enumerate(cfg.blocks[bid].instrs):
+                for u in uses(instr):
+                    use_sites.setdefault(u, []).append((bid, k))
+
+        self._flow.append((None, cfg.entry))
+        while self._flow or self._ssa:
+            while self._flow:
+                edge = self._flow.pop()
+                if edge in self.executable:
+                    continue
+                self.executable.add(edge)
+                bid = edge[1]
+                if bid == CFG.EXIT:
+                    continue
+                b = cfg.blocks[bid]
+                if bid in self.visited:
+                    for instr in b.instrs:
+                        if not isinstance(instr, Phi):
+                            break
+                        self._visit(bid, instr)
+                    continue
+                self.visited.add(bid)
+                for instr in b.instrs:
+                    self._visit(bid, instr)
+                if b.terminator is None:
+                    self._flow.append((bid, b.fallthrough))
+            while self._ssa:
+                for bid, k in use_sites.get(self._ssa.pop(), ()):
+                    if bid in self.visited:
+                        self._visit(bid, cfg.blocks[bid].instrs[k])
+        return self
+
+    def _target(self, label: str) -> int:
+        return self._labels.get(label, CFG.EXIT)
+
+    def _visit(self, bid: int, instr: TAC):
+        if isinstance(instr, CondJump):
+            cond = self.value(instr.condition)
+            if cond is TOP:
+                return
+            b = self.cfg.blocks[bid]
+            if cond is BOTTOM or _truthy(cond):
+                self._flow.append((bid, b.fallthrough))
+            if cond is BOTTOM or not _truthy(cond):
+                self._flow.append((bid, self._target(instr.target)))
+            return
+        if isinstance(instr, Jump):
+            self._flow.append((bid, self._target(instr.target)))
+            return
+        targets = defs(instr)
+        if not targets:
+            return
+        target = targets[0]
+        new = meet(self.values.get(target, TOP), self._evaluate(bid, instr))
+        if not _same(new, self.values.get(target, TOP)):
+            self.values[target] = new
+            self._ssa.append(target)
+
+    def _evaluate(self, bid: int, instr: TAC):
+        if isinstance(instr, Assign):
+            return self.value(instr.source)
+        if isinstance(instr, BinaryOp):
+            return fold_binary(instr.op, self.value(instr.left), self.value(instr.right))
+        if isinstance(instr, UnaryOp):
+            return fold_unary(instr.op, self.value(instr.source))
+        if isinstance(instr, Phi):
+            result = TOP
+            for p, arg in instr.args.items():
+                if (p, bid) in self.executable:
+                    result = meet(result, self.value(arg))
+            return result
+        return BOTTOM                           # Call
+
+    # ---------------- reescritura ----------------
+
+    def _constant(self, op) -> bool:
+        v = self.value(op) if is_var(op) else BOTTOM
+        return v is not TOP and v is not BOTTOM
+
+    def rewrite(self) -> List[int]:
+        """Aplica los resultados al CFG. Devuelve los bloques eliminados."""
+        cfg = self.cfg
+        for bid in list(cfg.order):
+            if bid not in self.visited:
+                continue
+            new: List[TAC] = []
+            for instr in cfg.blocks[bid].instrs:
+                if isinstance(instr, Phi):
+                    instr.args = {p: a for p, a in instr.args.items() if (p, bid) in self.executable}
+                    new.append(instr)
+                    continue
+                if isinstance(instr, CondJump) and self._constant(instr.condition):
+                    self.branches_removed += 1
+                    if not _truthy(self.value(instr.condition)):
+                        new.append(Jump(target=instr.target))
+                    continue
+                mapping = {u: self.value(u) for u in uses(instr) if self._constant(u)}
+                if mapping:
+                    self.consts += len(mapping)
+                    instr = replace_uses(instr, mapping)
+                targets = defs(instr)
+                if (isinstance(instr, (BinaryOp, UnaryOp)) and targets
+                        and self._constant(targets[0])):
+                    self.folded += 1
+                    instr = Assign(target=instr.target, source=self.value(targets[0]))
+                new.append(instr)
+            cfg.set_instrs(bid, new)
+        removed = cfg.remove_unreachable()
+        # Un goto al bloque que queda justo despues (porque se elimino lo que
+        # habia en el medio) sobra
+        for here, nxt in zip(cfg.order, cfg.order[1:]):
+            term = cfg.blocks[here].terminator
+            if isinstance(term, Jump) and term.target == cfg.blocks[nxt].label:
+                cfg.set_instrs(here, cfg.blocks[here].instrs[:-1])
+        return removed
+
+
+# ---------------------------------------------------------------------------
+# Constantes globales
+# ---------------------------------------------------------------------------
+
+def _walk(node):
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        if isinstance(n, list):
+            stack.extend(n)
+        elif isinstance(n, A.Node):
+            yield n
+            stack.extend(getattr(n, f.name) for f in fields(n))
+
+
+def global_constants(ast: A.Program) -> Set[str]:
+    """
+    Nombres declarados con `const` al nivel del programa que no se vuelven a
+    declarar (variable, parametro, foreach, catch, funcion o clase) en
+    ningun otro lado, asi que en todo el TAC se refieren a la constante.
+    """
+    declared: Dict[str, int] = {}
+    for n in _walk(ast):
+        name = None
+        if isinstance(n, (A.VarDecl, A.Param, A.FunctionDecl, A.ClassDecl)):
+            name = n.name
+        elif isinstance(n, A.Foreach):
+            name = n.var_name
+        elif isinstance(n, A.TryCatch):
+            name = n.err_name
+        if name is not None:
+            declared[name] = declared.get(name, 0) + 1
+    return {d.name for d in ast.decls
+            if isinstance(d, A.VarDecl) and d.kind == "const" and declared[d.name] == 1}
+
+
+# ---------------------------------------------------------------------------
+# Pasada completa
+# ---------------------------------------------------------------------------
+
+def run_sccp(code: List[TAC], consts: Iterable[str] = ()) -> Tuple[List[TAC], dict]:
+    """Devuelve (TAC optimizado, estadisticas). No modifica `code`."""
+    consts = set(consts)
+    units = split_functions(code)
+    stats = dict.fromkeys(("ssa_phis", "ssa_copies", "sccp_consts", "sccp_folded",
+                           "sccp_branches_removed", "sccp_blocks_removed", "sccp_instrs_removed"), 0)
+    known: Dict[str, Tuple[object, int]] = {}       # constante -> (valor, posicion de su tramo)
+    skip = entered_from_outside(units)
+    clobbered = {v for unit in units if unit.is_function
+                 for instr in unit.body for v in defs(instr) if not is_temp(v)}
+
+    # Primero los tramos globales (definen las constantes), despues las funciones
+    for unit in sorted(units, key=lambda u: u.is_function):
+        if unit.name in skip:
+            continue
+        start = unit.start if unit.is_function else (unit.positions[0] if unit.positions else 0)
+        seeds = {name: value for name, (value, pos) in known.items() if pos < start}
+        before = len(unit.body)
+        cfg = CFG.build(unit.body, unit.name)
+        info = to_ssa(cfg, clobbered)
+        sccp = SCCP(cfg, info, seeds).run()
+        removed = sccp.rewrite()
+        if not unit.is_function:
+            for name in consts:
+                versions = info.versions.get(name, [])
+                value = sccp.value(versions[0]) if len(versions) == 1 else BOTTOM
+                if name not in known and value is not TOP and value is not BOTTOM:
+                    known[name] = (value, start)
+        from_ssa(cfg, info)
+        unit.body = cfg.linearize()
+
+        stats["ssa_phis"] += info.phis
+        stats["ssa_copies"] += info.copies
+        stats["sccp_consts"] += sccp.consts
+        stats["sccp_folded"] += sccp.folded
+        stats["sccp_branches_removed"] += sccp.branches_removed
+        stats["sccp_blocks_removed"] += len(removed) + len(info.removed)
+        stats["sccp_instrs_removed"] += before - len(unit.body)
+    return join_functions(units), stats
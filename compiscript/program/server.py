@@ -1,19 +1,11 @@
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
 from pathlib import Path
-import subprocess, re, traceback, time
-import sys
-from io import StringIO
-from antlr4 import InputStream, CommonTokenStream, ParseTreeWalker
-from CompiscriptLexer import CompiscriptLexer
-from CompiscriptParser import CompiscriptParser
-from PrettyErrorListener import PrettyErrorListener
-from SemanticListener import SemanticListener
-from ast_builder import AstBuilder
-from tac_generator import TACGenerator
-from dataclasses import is_dataclass, fields # Necesario para dump_ast_to_str
-from treeutils import tree_to_pretty_text # Importar para depurar el parse tree
-from mips_generator import MIPSGen
+import os
+import traceback
+from compiler_session import CompilerSession
+from compile_cache import CompileCache, DEFAULT_MAX_BYTES
+from compile_workers import CompilerWorkerPool, PoolBusy
 
 PROG_DIR = Path(__file__).resolve().parent
 FRONTEND_PUBLIC = PROG_DIR / "my-ide-app" / "public"
@@ -22,207 +14,60 @@ FRONTEND_STATIC = FRONTEND_PUBLIC / "static"
 app = Flask(__name__, static_folder=str(FRONTEND_PUBLIC), static_url_path='/ide/static')
 CORS(app)  # permitir llamadas desde el IDE en dev
 
-def dump_ast_to_str(node, indent=0):
-    pad = "  " * indent
-    out = []
-    if not is_dataclass(node):
-        return f"{pad}{repr(node)}"
-    cls = node.__class__.__name__
-    out.append(f"{pad}{cls}")
-    for f in fields(node):
-        if f.name in ("line", "col"):
-            continue
-        val = getattr(node, f.name)
-        if is_dataclass(val):
-            out.append(f"{pad}  .{f.name}:")
-            out.append(dump_ast_to_str(val, indent + 2))
-        elif isinstance(val, list):
-            out.append(f"{pad}  .{f.name}:")
-            for it in val:
-                if is_dataclass(it):
-                    out.append(dump_ast_to_str(it, indent + 2))
-                else:
-                    out.append(f"{pad}    {it}")
-        else:
-            out.append(f"{pad}  {f.name}={val}")
-    return "\n".join(out)
+# Una sola sesion por proceso: ANTLR se importa una vez y cada request solo paga la compilacion.
+# Cada compilacion tiene sus propios artefactos y diagnosticos, asi que la sesion
+# se puede compartir entre hilos.
+# CPS_TRACE_MEMORY=1 agrega el pico de memoria (tracemalloc) a "timings"; es caro.
+SESSION = CompilerSession(capture_output=True, trace_memory=os.environ.get("CPS_TRACE_MEMORY") == "1")
+
+# Backend que realmente compila: la sesion en proceso, o un CompilerWorkerPool
+# si el servidor se levanta con --workers N (ver __main__).
+COMPILER = SESSION
+
+# Cache de resultados por hash del codigo (+ formato y version del compilador).
+# CPS_CACHE_MAX_BYTES limita la memoria; CPS_CACHE_DIR activa la persistencia en disco.
+CACHE = CompileCache(
+    max_bytes=int(os.environ.get("CPS_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+    persist_dir=os.environ.get("CPS_CACHE_DIR") or None,
+)
+
+def cached_compile(source_code: str, output_format: str = "all") -> dict:
+    """Compila pasando por el cache. Devuelve el resultado como dict serializable."""
+    key = CACHE.key(source_code, output_format)
+    hit = CACHE.get(key)
+    if hit is not None:
+        hit["cached"] = True
+        return hit
+
+    result = COMPILER.compile(source_code, output_format)
+    payload = result.to_dict()
+    # Los errores internos (excepciones) pueden ser transitorios: no se guardan
+    if result.success or result.syntax_errors or result.semantic_errors:
+        CACHE.put(key, payload)
+    payload["cached"] = False
+    return payload
 
 @app.route('/compile', methods=['POST'])
-def compile_code():
-    data = request.get_json()
+def compile_route():
+    data = request.get_json() or {}
     code = data.get('code', '')
 
-    # Capturar stderr para errores del compilador
-    old_stderr = sys.stderr
-    redirected_stderr = StringIO()
-    sys.stderr = redirected_stderr
-
-    output_tac = ""
-    compiler_errors = ""
-
     try:
-        # 1. Lexing y Parsing
-        input_stream = InputStream(code + '\n')
-        lexer = CompiscriptLexer(input_stream)
-        
-        # Capturar errores sintácticos
-        parser_error_listener = PrettyErrorListener(code.splitlines())
-        lexer.removeErrorListeners()
-        lexer.addErrorListener(parser_error_listener)
-
-        stream = CommonTokenStream(lexer)
-        parser = CompiscriptParser(stream)
-        parser.removeErrorListeners()
-        parser.addErrorListener(parser_error_listener)
-
-        tree = parser.program()
-
-        # DEBUG: Imprimir el Parse Tree para verificar su contenido
-        print("\n--- Parse Tree Generado ---")
-        print(tree_to_pretty_text(tree, parser.ruleNames))
-        print("---------------------------\n")
-
-        if parser_error_listener.errors:
-            compiler_errors = redirected_stderr.getvalue()
-            return jsonify({'output': '', 'errors': compiler_errors})
-
-        # 2. Análisis Semántico
-        walker = ParseTreeWalker()
-        semantic_listener = SemanticListener(code.splitlines())
-        walker.walk(semantic_listener, tree)
-
-        if semantic_listener.errors:
-            compiler_errors = redirected_stderr.getvalue()
-            return jsonify({'output': '', 'errors': compiler_errors})
-
-        # 3. Construcción del AST
-        ast_builder = AstBuilder()
-        ast = ast_builder.visitProgram(tree)
-
-        # DEBUG: Imprimir el AST para verificar su contenido
-        print("\n--- AST Generado ---")
-        print(dump_ast_to_str(ast))
-        print("--------------------\n")
-
-        semantic_listener.symbtab.assign_memory_addresses()  # solo globales (scope 0)
-        semantic_listener.symbtab.assign_function_labels()
-        print(semantic_listener.symbtab.dump())
-
-        # 4. Generación de TAC
-        tac_generator = TACGenerator(semantic_listener.symbtab)
-        tac_code = tac_generator.generate(ast)
-        
-        # DEBUG: Imprimir el contenido de tac_code
-        print(f"\n--- TAC Generado (longitud: {len(tac_code)}) ---")
-        for i, instr in enumerate(tac_code[:10]): # Imprimir las primeras 10 instrucciones
-            print(f"  {i}: {instr}")
-        if len(tac_code) > 10:
-            print("  ...")
-        print("------------------------------------\n")
-
-        output_tac = "\n".join(map(str, tac_code))
-
-    except Exception as e:
-        compiler_errors = redirected_stderr.getvalue() + str(e)
-    finally:
-        sys.stderr = old_stderr # Restaurar stderr
+        result = cached_compile(code + '\n', "tac")
+    except PoolBusy as e:
+        return jsonify({'output': '', 'errors': str(e)}), 503
+    compiler_errors = ""
+    if not result["success"]:
+        compiler_errors = result["stderr"] or "\n".join(result["errors"])
 
-    return jsonify({'output': output_tac, 'errors': compiler_errors})
+    return jsonify({'output': result["tac"], 'errors': compiler_errors})
 
 def compile_code(source_code: str, output_format: str = "all"):
     """
-    Compila el código fuente usando Driver.py en el directorio PROG_DIR.
-    Retorna un objeto con atributos: success, tac, mips, ast, stdout, stderr, errors, warnings, compilation_time
+    Compila el código fuente en proceso con CompilerSession (pasando por el cache).
+    Retorna un dict con claves: success, tac, mips, ast, stdout, stderr, errors, warnings, compilation_time, cached
     """
-    class Result:
-        success = False
-        tac = ""
-        mips = ""
-        ast = ""
-        stdout = ""
-        stderr = ""
-        errors = []
-        warnings = []
-        compilation_time = 0.0
-
-    res = Result()
-    import time
-    start = time.time()
-
-    try:
-        # escribir archivo temporal
-        tmp_file = PROG_DIR / "tmp_compile.cps"
-        tmp_file.write_text(source_code)
-
-        # verificar Driver.py
-        if not (PROG_DIR / "Driver.py").exists():
-            res.stderr = f"Driver.py not found at {PROG_DIR / 'Driver.py'}"
-            res.errors = [res.stderr]
-            return res
-
-        # construir y ejecutar Driver.py con los flags correctos
-        driver_cmd = [sys.executable, str(PROG_DIR / "Driver.py"), tmp_file.name]
-        # Driver supports --tac, --ast-dump and --ast-dot (not --mips)
-        if output_format in ("all", "tac", "mips"):
-            driver_cmd.append("--tac")
-        if output_format in ("all", "ast"):
-            driver_cmd.append("--ast-dump")
-        # always generate tac when mips requested
-
-        print("[server] Running Driver:", " ".join(driver_cmd))
-        cp = subprocess.run(driver_cmd, cwd=str(PROG_DIR), capture_output=True, text=True, timeout=60)
-
-        res.stdout = cp.stdout or ""
-        res.stderr = cp.stderr or ""
-
-        # leer TAC si fue generado
-        tac_file = PROG_DIR / "tac.txt"
-        if tac_file.exists():
-            res.tac = tac_file.read_text()
-
-        # Si pidieron MIPS, invocar el mips_generator explícitamente
-        if output_format in ("all", "mips"):
-            # ensure tac exists
-            if tac_file.exists():
-                mips_cmd = [sys.executable, str(PROG_DIR / "mips_generator.py"), str(tac_file.name)]
-                print("[server] Running MIPS generator:", " ".join(mips_cmd))
-                mcp = subprocess.run(mips_cmd, cwd=str(PROG_DIR), capture_output=True, text=True, timeout=60)
-                # append any messages
-                if mcp.stdout:
-                    res.stdout += "\n" + mcp.stdout
-                if mcp.stderr:
-                    res.stderr += "\n" + mcp.stderr
-
-        # leer mips y ast si existen
-        mips_file = PROG_DIR / "out.s"
-        if mips_file.exists():
-            try:
-                res.mips = mips_file.read_text()
-            except Exception:
-                res.mips = ""
-
-        ast_file = PROG_DIR / "ast.txt"
-        if ast_file.exists():
-            res.ast = ast_file.read_text()
-
-        res.success = (cp.returncode == 0)
-        if not res.success and not res.errors:
-            # intentar extraer mensaje útil
-            err_msg = res.stderr.strip() or res.stdout.strip() or f"Driver exited with code {cp.returncode}"
-            res.errors = [err_msg]
-
-    except subprocess.TimeoutExpired:
-        res.stderr = "Compilación excedió el tiempo límite"
-        res.errors = [res.stderr]
-    except Exception as e:
-        import traceback
-        res.stderr = traceback.format_exc()
-        res.errors = [str(e)]
-
-    finally:
-        res.compilation_time = time.time() - start
-
-    return res
+    return cached_compile(source_code, output_format)
 
 def _normalize_result(result):
     """Normaliza el objeto de resultado para devolver un dict consistente."""
@@ -237,7 +82,10 @@ def _normalize_result(result):
             "stderr": result.get("stderr", "") or "",
             "errors": result.get("errors", []) or [],
             "warnings": result.get("warnings", []) or [],
-            "compilation_time": float(result.get("compilation_time", 0) or 0)
+            "compilation_time": float(result.get("compilation_time", 0) or 0),
+            "cached": bool(result.get("cached", False)),
+            "metrics": result.get("metrics", {}) or {},
+            "timings": result.get("timings", {}) or {}
         }
     # Si es el objeto CompilationResult u otro con atributos
     return {
@@ -249,7 +97,10 @@ def _normalize_result(result):
         "stderr": getattr(result, "stderr", "") or "",
         "errors": getattr(result, "errors", []) or [],
         "warnings": getattr(result, "warnings", []) or [],
-        "compilation_time": float(getattr(result, "compilation_time", 0) or 0)
+        "compilation_time": float(getattr(result, "compilation_time", 0) or 0),
+        "cached": bool(getattr(result, "cached", False)),
+        "metrics": getattr(result, "metrics", {}) or {},
+        "timings": getattr(result, "timings", {}) or {}
     }
 
 @app.route('/ide/compile', methods=['POST', 'GET'])
@@ -276,9 +127,23 @@ def ide_compile():
         raw = compile_code(code, fmt)
         resp = _normalize_result(raw)
         return jsonify(resp)
+    except PoolBusy as e:
+        return jsonify({"success": False, "errors": [str(e)]}), 503
     except Exception as e:
         return jsonify({"success": False, "errors": [str(e)], "stderr": traceback.format_exc()}), 500
 
+@app.route('/ide/cache/stats', methods=['GET'])
+def cache_stats():
+    """Contadores del cache de compilacion (hits, misses, bytes, desalojos...)."""
+    return jsonify(CACHE.stats())
+
+@app.route('/ide/workers/stats', methods=['GET'])
+def worker_stats():
+    """Estado del pool de trabajadores (solo en modo --workers)."""
+    if isinstance(COMPILER, CompilerWorkerPool):
+        return jsonify(COMPILER.stats())
+    return jsonify({"workers": 0, "mode": "in-process"})
+
 # servir recursos estáticos bajo /ide/static/...
 @app.route('/ide/static/<path:filename>')
 def serve_ide_static(filename):
@@ -291,4 +156,20 @@ def serve_ide_static(filename):
     return ("Not found", 404)
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Servidor del IDE de Compiscript")
+    ap.add_argument("--port", type=int, default=5000)
+    ap.add_argument("--workers", type=int, default=0,
+                    help="procesos de compilacion pre-creados (0 = compilar en el proceso del servidor)")
+    ap.add_argument("--queue-size", type=int, default=64, help="trabajos en espera antes de responder 503")
+    ap.add_argument("--job-timeout", type=float, default=60.0, help="segundos maximos por compilacion")
+    args = ap.parse_args()
+
+    if args.workers > 0:
+        COMPILER = CompilerWorkerPool(workers=args.workers, queue_size=args.queue_size,
+                                      job_timeout=args.job_timeout)
+        # El reloader de Flask volveria a crear el pool en otro proceso
+        app.run(host='0.0.0.0', port=args.port, debug=True, threaded=True, use_reloader=False)
+    else:
+        app.run(host='0.0.0.0', port=args.port, debug=True, threaded=True)
\ No newline at end of file
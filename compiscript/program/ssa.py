@@ -0,0 +1,209 @@
+"""
+Forma SSA sobre el CFG de una unidad de TAC.
+
+    info = to_ssa(cfg)        # en el lugar: x -> x.1, x.2, ... y Phi al inicio de los bloques
+    ...                       # pasadas sobre SSA (sccp.py)
+    from_ssa(cfg, info)       # quita las Phi y vuelve a los nombres originales
+
+- Construccion (Cytron et al.): las Phi de cada variable van en la frontera
+  de dominancia iterada de los bloques que la definen, pero solo donde la
+  variable esta viva a la entrada (SSA podada, con Liveness). El renombrado
+  recorre el arbol de dominadores. El valor que llega a la entrada de la
+  unidad (parametros, globales leidas en una funcion, temporales de otra
+  unidad) conserva el nombre original: es la "version 0".
+  Con `clobbered` (variables que una llamada puede escribir), cada Call
+  define ademas una version nueva de esas variables (info.clobbers): no
+  hay instruccion que le de valor, asi que para una pasada es desconocido.
+  Los bloques inalcanzables se eliminan antes (no tienen dominador).
+- Destruccion: cada Phi se reemplaza por copias al final de sus
+  predecesores (partiendo las aristas criticas), como una copia en paralelo
+  por arista; despues cada version vuelve a su nombre base. Solo se copian
+  los argumentos que no son versiones de la misma variable (constantes u
+  otras variables), asi que una pasada que solo reemplaza usos por
+  constantes y elimina codigo, como SCCP, no agrega ninguna copia.
+
+Volver a los nombres base supone que dos versiones de una misma variable
+nunca estan vivas a la vez (SSA "convencional"). Eso se cumple mientras las
+pasadas no muevan definiciones ni reemplacen una variable por otra.
+"""
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Set, Tuple
+
+from cfg import CFG
+from liveness import Liveness
+from tac import TAC, Assign, Call, CondJump, Jump, Phi, defs, is_temp, replace_operands, replace_uses, uses
+
+
+@dataclass
+class SSAInfo:
+    base: Dict[str, str] = field(default_factory=dict)            # version -> nombre original
+    versions: Dict[str, List[str]] = field(default_factory=dict)  # nombre original -> versiones
+    phis: int = 0                                                  # Phi colocadas
+    copies: int = 0                                                # copias agregadas al destruir
+    removed: List[int] = field(default_factory=list)               # bloques inalcanzables eliminados
+    clobbers: Set[str] = field(default_factory=set)                # versiones que define una llamada
+
+    def base_of(self, name):
+        return self.base.get(name, name)
+
+
+def _phi_blocks(cfg: CFG, def_blocks: Set[int]) -> Set[int]:
+    """Frontera de dominancia iterada de un conjunto de bloques."""
+    df = cfg.dominance_frontiers()
+    result: Set[int] = set()
+    work = list(def_blocks)
+    while work:
+        b = work.pop()
+        for d in df.get(b, ()):
+            if d not in result:
+                result.add(d)
+                if d not in def_blocks:
+                    work.append(d)
+    return result
+
+
+def to_ssa(cfg: CFG, clobbered: Set[str] = frozenset()) -> SSAInfo:
+    """Pasa la unidad a SSA (modifica los bloques de `cfg`)."""
+    info = SSAInfo(removed=cfg.remove_unreachable())
+    live = Liveness(cfg)
+    # Solo importan las variables que la unidad nombra
+    named = {op for bid in cfg.order for instr in cfg.blocks[bid].instrs
+             for op in defs(instr) + uses(instr)}
+    clobbered = sorted(named & set(clobbered))
+
+    def written(instr):
+        if isinstance(instr, Call):
+            return [v for v in clobbered if v not in defs(instr)]
+        return []
+
+    def_blocks: Dict[str, Set[int]] = {}
+    for bid in cfg.order:
+        for instr in cfg.blocks[bid].instrs:
+            for v in defs(instr) + written(instr):
+                def_blocks.setdefault(v, set()).add(bid)
+
+    phis: Dict[int, List[Tuple[str, Phi]]] = {bid: [] for bid in cfg.order}
+    for v in sorted(def_blocks):
+        for d in sorted(_phi_blocks(cfg, def_blocks[v])):
+            if v in live.live_in[d]:
+                phis[d].append((v, Phi(target=v, args={})))
+                info.phis += 1
+
+    stacks: Dict[str, List[str]] = {}
+
+    def top(v):
+        stack = stacks.get(v)
+        return stack[-1] if stack else v
+
+    def new_version(v):
+        versions = info.versions.setdefault(v, [])
+        name = f"{v}.{len(versions) + 1}"
+        versions.append(name)
+        info.base[name] = v
+        stacks.setdefault(v, []).append(name)
+        return name
+
+    children = cfg.dom_tree()
+    # Recorrido en profundidad del arbol de dominadores, sin recursion
+    work: List[Tuple[int, bool]] = [(cfg.entry, False)]
+    pushed: Dict[int, List[str]] = {}
+    while work:
+        bid, leaving = work.pop()
+        if leaving:
+            for v in pushed.pop(bid):
+                stacks[v].pop()
+            continue
+        b = cfg.blocks[bid]
+        defined = []
+        for v, phi in phis[bid]:
+            defined.append(v)
+            phi.target = new_version(v)
+        body = []
+        for instr in b.instrs:
+            ops = uses(instr)
+            if ops:
+                instr = replace_uses(instr, {u: top(u) for u in ops})
+            # Lo que escribe la llamada va antes que su resultado (g = f())
+            for v in written(instr):
+                defined.append(v)
+                info.clobbers.add(new_version(v))
+            for v in defs(instr):
+                defined.append(v)
+                instr = replace(instr, target=new_version(v))
+            body.append(instr)
+        b.instrs = [phi for _, phi in phis[bid]] + body
+        for s in b.succs:
+            if s != CFG.EXIT:
+                for v, phi in phis[s]:
+                    phi.args[bid] = top(v)
+        pushed[bid] = defined
+        work.append((bid, True))
+        for child in reversed(children.get(bid, [])):
+            work.append((child, False))
+    return info
+
+
+def _sequentialize(copies: List[Tuple[str, object]], fresh) -> List[TAC]:
+    """Copias en paralelo (dst, src) como una secuencia de Assign."""
+    pending = {dst: src for dst, src in copies if dst != src}
+    out: List[TAC] = []
+    while pending:
+        read = {src for src in pending.values() if isinstance(src, str)}
+        ready = [dst for dst in pending if dst not in read]
+        if ready:
+            for dst in ready:
+                out.append(Assign(target=dst, source=pending.pop(dst)))
+            continue
+        # Solo quedan ciclos (a <- b, b <- a): guardar un destino aparte
+        dst = next(iter(pending))
+        tmp = fresh()
+        out.append(Assign(target=tmp, source=dst))
+        for k, src in pending.items():
+            if src == dst:
+                pending[k] = tmp
+    return out
+
+
+def from_ssa(cfg: CFG, info: SSAInfo) -> None:
+    """Saca la unidad de SSA (modifica los bloques de `cfg`)."""
+    temps = {op for bid in cfg.order for instr in cfg.blocks[bid].instrs
+             for op in defs(instr) + uses(instr) if is_temp(info.base_of(op))}
+    next_temp = [max((int(info.base_of(t)[1:]) for t in temps), default=-1) + 1]
+
+    def fresh():
+        name = f"t{next_temp[0]}"
+        next_temp[0] += 1
+        return name
+
+    for bid in list(cfg.order):
+        b = cfg.blocks[bid]
+        phis = [instr for instr in b.instrs if isinstance(instr, Phi)]
+        if not phis:
+            continue
+        b.instrs = b.instrs[len(phis):]
+        for p in list(b.preds):
+            copies = []
+            for phi in phis:
+                arg = phi.args.get(p)
+                if arg is None:
+                    continue
+                dst, src = phi.target, arg
+                if info.base_of(src) != info.base_of(dst):
+                    copies.append((info.base_of(dst), info.base_of(src)))
+            if not copies:
+                continue
+            # Las copias van antes del goto; si p termina en un salto condicional
+            # (que ademas lee operandos) se parte la arista
+            if isinstance(cfg.blocks[p].terminator, CondJump) or len(cfg.succs(p)) > 1:
+                where = cfg.split_edge(p, bid)
+            else:
+                where = p
+            instrs = list(cfg.blocks[where].instrs)
+            at = len(instrs) - 1 if isinstance(cfg.blocks[where].terminator, Jump) else len(instrs)
+            seq = _sequentialize(copies, fresh)
+            info.copies += len(seq)
+            cfg.set_instrs(where, instrs[:at] + seq + instrs[at:])
+
+    for bid in cfg.order:
+        b = cfg.blocks[bid]
+        b.instrs = [replace_operands(instr, info.base) for instr in b.instrs]
@@ -1,5 +1,5 @@
-
-from dataclasses import dataclass
+import re
+from dataclasses import dataclass, field
 from typing import Optional, Union
 
 # Define los posibles "operandos" en una instrucción TAC.
@@ -97,14 +97,114 @@ class Return(TAC):
             return f"return {self.value}"
         return "return"
 
+@dataclass
+class Phi(TAC):
+    """Funcion phi de SSA: target = phi(B1: a, B2: b); un argumento por bloque predecesor."""
+    target: Address
+    args: dict
+
+    def __str__(self):
+        args = ", ".join(f"B{b}: {v}" for b, v in self.args.items())
+        return f"{self.target} = phi({args})"
+
 @dataclass
 class BeginFunc(TAC):
-    """Marcador de inicio de una función."""
+    """Marcador de inicio de una función, con sus parámetros en orden ($a0, $a1, ...)."""
+    params: list = field(default_factory=list)
+
     def __str__(self):
-        return "BeginFunc"
+        return f"BeginFunc {', '.join(self.params)}" if self.params else "BeginFunc"
 
 @dataclass
 class EndFunc(TAC):
     """Marcador de fin de una función."""
     def __str__(self):
         return "EndFunc"
+
+
+# --- Operandos definidos/usados (para analisis de flujo de datos) --- #
+
+_TEMP_RE = re.compile(r"t\d+\Z")
+_NUMBER_RE = re.compile(r"-?\d+(\.\d+)?\Z")
+_CONST_WORDS = {"true", "false", "True", "False", "null", "None"}
+
+
+def is_temp(addr: Address) -> bool:
+    """True si el operando es un temporal generado (t0, t1, ...)."""
+    return isinstance(addr, str) and _TEMP_RE.match(addr) is not None
+
+
+def is_const(addr: Address) -> bool:
+    """True si el operando es un literal (numero, string, booleano o null)."""
+    if not isinstance(addr, str):
+        return addr is not None
+    return (_NUMBER_RE.match(addr) is not None or addr in _CONST_WORDS
+            or addr[:1] in ('"', "'"))
+
+
+def is_var(addr: Address) -> bool:
+    """True si el operando es una variable o un temporal (algo que se lee/escribe)."""
+    return isinstance(addr, str) and addr != "" and not is_const(addr)
+
+
+def defs(instr: TAC) -> list:
+    """Operandos que la instruccion escribe."""
+    if isinstance(instr, (Assign, BinaryOp, UnaryOp, Phi)):
+        return [instr.target] if is_var(instr.target) else []
+    if isinstance(instr, Call):
+        return [instr.target] if is_var(instr.target) else []
+    return []
+
+
+def uses(instr: TAC) -> list:
+    """Operandos que la instruccion lee (sin constantes ni etiquetas)."""
+    if isinstance(instr, Assign):
+        ops = (instr.source,)
+    elif isinstance(instr, BinaryOp):
+        ops = (instr.left, instr.right)
+    elif isinstance(instr, UnaryOp):
+        ops = (instr.source,)
+    elif isinstance(instr, CondJump):
+        ops = (instr.condition,)
+    elif isinstance(instr, (Param, Return)):
+        ops = (instr.value,)
+    elif isinstance(instr, Phi):
+        ops = tuple(instr.args.values())
+    else:
+        return []
+    return [op for op in ops if is_var(op)]
+
+
+def replace_operands(instr: TAC, mapping: dict) -> TAC:
+    """
+    Copia de la instruccion con los operandos (definidos y usados) renombrados
+    segun `mapping`. Etiquetas y nombres de funcion no se tocan.
+    """
+    def m(x):
+        return mapping.get(x, x) if isinstance(x, str) else x
+
+    if isinstance(instr, Assign):
+        return Assign(target=m(instr.target), source=m(instr.source))
+    if isinstance(instr, BinaryOp):
+        return BinaryOp(target=m(instr.target), left=m(instr.left), op=instr.op, right=m(instr.right))
+    if isinstance(instr, UnaryOp):
+        return UnaryOp(target=m(instr.target), op=instr.op, source=m(instr.source))
+    if isinstance(instr, CondJump):
+        return CondJump(condition=m(instr.condition), target=instr.target)
+    if isinstance(instr, Param):
+        return Param(value=m(instr.value))
+    if isinstance(instr, Call):
+        return Call(target=m(instr.target), name=instr.name, num_params=instr.num_params)
+    if isinstance(instr, Return):
+        return Return(value=m(instr.value))
+    if isinstance(instr, Phi):
+        return Phi(target=m(instr.target), args={b: m(v) for b, v in instr.args.items()})
+    return instr
+
+
+def replace_uses(instr: TAC, mapping: dict) -> TAC:
+    """Como replace_operands(), pero solo los operandos leidos (el destino queda igual)."""
+    new = replace_operands(instr, mapping)
+    if new is not instr and isinstance(new, (Assign, BinaryOp, UnaryOp, Call, Phi)):
+        new.target = instr.target
+    return new
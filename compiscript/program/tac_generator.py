@@ -4,6 +4,8 @@ from tac import TAC, Assign as TAC_Assign, BinaryOp, Label, Jump, CondJump, Para
 from symbol_table import SymbolTable
 from ast_nodes import Return as AST_Return
 from tac import Return as TAC_Return
+import tracing
+from dataclasses import replace
 
 class TempPool:
     def __init__(self, prefix="t"):
@@ -19,9 +21,13 @@ class TempPool:
         self.counter += 1
         return name
 
+    def owns(self, name) -> bool:
+        """True si `name` es un temporal de este pool (prefijo + numero, no p. ej. 'total')"""
+        return isinstance(name, str) and name.startswith(self.prefix) and name[len(self.prefix):].isdigit()
+
     def release(self, name: str) -> None:
         """Devuelve un temporal al pool (si tiene el prefijo correcto)"""
-        if isinstance(name, str) and name.startswith(self.prefix):
+        if self.owns(name):
             self.free.append(name)
 
 class TACGenerator:
@@ -31,18 +37,23 @@ class TACGenerator:
         self.temp_count = 0
         self.label_count = 0
         self.temp_pool = TempPool("t")
+        # Trazas: se consultan una vez aqui para no pagar nada por nodo si estan apagadas
+        self._trace = tracing.enabled("tac", tracing.DEBUG)
+        if tracing.enabled("tac", tracing.TRACE):
+            self.visit = self._visit_traced
 
     def new_temp(self) -> str:
         return self.temp_pool.acquire()
     
     ARITH_OPS = {"+", "-", "*", "/"}
+    # Comparacion contraria: a < b es falso exactamente cuando a >= b
+    NEGATED = {"<": ">=", ">=": "<", ">": "<=", "<=": ">", "==": "!=", "!=": "=="}
     
     def _is_temp(self, addr):
-        return isinstance(addr, str) and addr.startswith(self.temp_pool.prefix)
+        return self.temp_pool.owns(addr)
     
     def _release_if_temp(self, addr):
-        if isinstance(addr, str) and addr.startswith(self.temp_pool.prefix):
-            self.temp_pool.release(addr)
+        self.temp_pool.release(addr)
 
     def new_label(self) -> str:
         """Genera un nuevo nombre de etiqueta."""
@@ -54,14 +65,20 @@ class TACGenerator:
         if node is None:
             return
         method_name = 'visit' + node.__class__.__name__
-        print(f"[DEBUG TACGen] Visiting node: {node.__class__.__name__}, method: {method_name}")
         visitor = getattr(self, method_name, self.generic_visit)
-        result = visitor(node)
-        print(f"[DEBUG TACGen] Finished visiting node: {node.__class__.__name__}, result: {result}")
+        return visitor(node)
+
+    def _visit_traced(self, node: Node):
+        """visit() con un evento por nodo (solo con nivel trace en la fase 'tac')."""
+        if node is None:
+            return
+        kind = node.__class__.__name__
+        tracing.emit("tac", tracing.TRACE, "visit", node=kind, line=getattr(node, "line", None))
+        result = TACGenerator.visit(self, node)
+        tracing.emit("tac", tracing.TRACE, "visited", node=kind, result=result)
         return result
 
     def generic_visit(self, node: Node):
-        print(f"[DEBUG TACGen] Entering simplified generic_visit for {node.__class__.__name__}")
         if hasattr(node, '__dataclass_fields__'): # Check if it's an AST node
             for field_name in node.__dataclass_fields__:
                 field_value = getattr(node, field_name)
@@ -74,7 +91,6 @@ class TACGenerator:
                 elif field_value is not None and not isinstance(field_value, (str, int, float, bool)):
                     # Handle other non-primitive values
                     self.visit(field_value)
-        print(f"[DEBUG TACGen] Exiting simplified generic_visit for {node.__class__.__name__}")
         return None # Generic visit usually doesn't return a specific value for statements
 
     def generate(self, node: Node):
@@ -85,10 +101,9 @@ class TACGenerator:
     # --- Métodos Visit --- #
 
     def visitProgram(self, ctx: Program):
-        print(f"[DEBUG TACGen] Entering visitProgram")
-        
+        tracing.emit("tac", tracing.INFO, "program_start", statements=len(ctx.decls))
         self.generic_visit(ctx)
-        print(f"[DEBUG TACGen] Exiting visitProgram")
+        tracing.emit("tac", tracing.INFO, "program_end", instructions=len(self.code))
 
 
 
@@ -97,13 +112,14 @@ class TACGenerator:
 
     def visitFunctionDecl(self, ctx: FunctionDecl):
         self.code.append(Label(name=ctx.name))
-        self.code.append(BeginFunc())
+        self.code.append(BeginFunc(params=[p.name for p in ctx.params]))
         self.visit(ctx.body)
         self.code.append(EndFunc())
 
     def visitVarDecl(self, ctx: VarDecl):
-        print(f"[DEBUG TACGen] Entering visitVarDecl for {ctx.name}")
-        print(f"[DEBUG TACGen] ctx.init type: {type(ctx.init)}, value: {ctx.init}")
+        if self._trace:
+            tracing.emit("tac", tracing.DEBUG, "var_decl", name=ctx.name,
+                         init=type(ctx.init).__name__, line=ctx.line)
         if ctx.init:
             # Si ctx.init es una lista, tomar el primer elemento
             if isinstance(ctx.init, list) and len(ctx.init) > 0:
@@ -112,12 +128,12 @@ class TACGenerator:
                 init_node = ctx.init
             
             rhs_addr = self.visit(init_node)
-            print(f"[DEBUG TACGen] rhs_addr after visit: {rhs_addr}")
+            if self._trace:
+                tracing.emit("tac", tracing.DEBUG, "var_decl_rhs", name=ctx.name, addr=rhs_addr)
             if rhs_addr is None:
                 rhs_addr = "0"  # Valor por defecto
             self.code.append(TAC_Assign(target=ctx.name, source=rhs_addr))
             self._release_if_temp(rhs_addr)
-        print(f"[DEBUG TACGen] Exiting visitVarDecl for {ctx.name}")
 
     def visitAssign(self, ctx: Assign):
         # Si ctx.value es una lista, tomar el primer elemento
@@ -136,6 +152,10 @@ class TACGenerator:
             self._release_if_temp(rhs_addr)
 
     def visitBinary(self, ctx: Binary):
+        if ctx.op in ("&&", "||"):
+            # Cortocircuito: el operando derecho solo se evalua si hace falta
+            return self._materialize(ctx)
+
         # normaliza si vienen listas
         left_node  = ctx.left[0]  if isinstance(ctx.left, list) and ctx.left  else ctx.left
         right_node = ctx.right[0] if isinstance(ctx.right, list) and ctx.right else ctx.right
@@ -173,6 +193,106 @@ class TACGenerator:
         return temp_target
 
 
+    # --- Codigo de saltos para condiciones --- #
+    #
+    # Una condicion no se convierte en un booleano para despues preguntar por
+    # el: se traduce a saltos. `a && b` no evalua b si a es falso, `a || b`
+    # no evalua b si a es verdadero y `!a` solo intercambia los destinos. Las
+    # comparaciones quedan como `t = a < b` + `if_false t goto L`, que MIPSGen
+    # traduce a una sola rama.
+
+    def _literal(self, node):
+        """
+        Valor de una condicion que se conoce sin evaluar nada (true, !false,
+        false && f(), ...), o None.
+        """
+        node = node[0] if isinstance(node, list) and node else node
+        if isinstance(node, LiteralBool):
+            return node.value
+        if isinstance(node, Unary) and node.op == "!":
+            value = self._literal(node.expr)
+            return None if value is None else not value
+        if isinstance(node, Binary) and node.op in ("&&", "||"):
+            # El operando izquierdo decide (false && b) o deja solo al derecho (true && b)
+            left = self._literal(node.left)
+            if left is None:
+                return None
+            return left if left == (node.op == "||") else self._literal(node.right)
+        return None
+
+    def _jump_if_false(self, node, target: str):
+        """Salta a target si node es falso; si es verdadero sigue de largo."""
+        node = node[0] if isinstance(node, list) and node else node
+        left = self._literal(node.left) if isinstance(node, Binary) else None
+        if isinstance(node, Binary) and node.op in ("&&", "||") and left is not None:
+            # false && b, true || b: b no se genera (quedaria inalcanzable);
+            # true && b, false || b: solo cuenta b
+            self._jump_if_false(node.left if left == (node.op == "||") else node.right, target)
+        elif isinstance(node, Binary) and node.op == "&&":
+            self._jump_if_false(node.left, target)
+            self._jump_if_false(node.right, target)
+        elif isinstance(node, Binary) and node.op == "||":
+            true_label = self.new_label()
+            self._jump_if_true(node.left, true_label)
+            self._jump_if_false(node.right, target)
+            self.code.append(Label(name=true_label))
+        elif isinstance(node, Unary) and node.op == "!":
+            self._jump_if_true(node.expr, target)
+        elif isinstance(node, LiteralBool):
+            if not node.value:
+                self.code.append(Jump(target=target))
+        else:
+            cond_addr = self.visit(node)
+            if cond_addr is None:
+                cond_addr = "True"
+            self.code.append(CondJump(condition=cond_addr, target=target))
+            self._release_if_temp(cond_addr)
+
+    def _jump_if_true(self, node, target: str):
+        """Salta a target si node es verdadero; si es falso sigue de largo."""
+        node = node[0] if isinstance(node, list) and node else node
+        left = self._literal(node.left) if isinstance(node, Binary) else None
+        if isinstance(node, Binary) and node.op in ("&&", "||") and left is not None:
+            self._jump_if_true(node.left if left == (node.op == "||") else node.right, target)
+        elif isinstance(node, Binary) and node.op == "||":
+            self._jump_if_true(node.left, target)
+            self._jump_if_true(node.right, target)
+        elif isinstance(node, Binary) and node.op == "&&":
+            false_label = self.new_label()
+            self._jump_if_false(node.left, false_label)
+            self._jump_if_true(node.right, target)
+            self.code.append(Label(name=false_label))
+        elif isinstance(node, Unary) and node.op == "!":
+            self._jump_if_false(node.expr, target)
+        elif isinstance(node, LiteralBool):
+            if node.value:
+                self.code.append(Jump(target=target))
+        elif isinstance(node, Binary) and node.op in self.NEGATED:
+            # if_false solo salta por falso: se pregunta por la comparacion contraria
+            self._jump_if_false(replace(node, op=self.NEGATED[node.op]), target)
+        else:
+            cond_addr = self.visit(node)
+            if cond_addr is None:
+                cond_addr = "True"
+            temp_target = self.new_temp()
+            self.code.append(UnaryOp(target=temp_target, op="!", source=cond_addr))
+            self._release_if_temp(cond_addr)
+            self.code.append(CondJump(condition=temp_target, target=target))
+            self._release_if_temp(temp_target)
+
+    def _materialize(self, node) -> str:
+        """Valor (True/False) de una condicion usada como expresion, con codigo de saltos."""
+        false_label = self.new_label()
+        end_label = self.new_label()
+        self._jump_if_false(node, false_label)
+        temp_target = self.new_temp()
+        self.code.append(TAC_Assign(target=temp_target, source=True))
+        self.code.append(Jump(target=end_label))
+        self.code.append(Label(name=false_label))
+        self.code.append(TAC_Assign(target=temp_target, source=False))
+        self.code.append(Label(name=end_label))
+        return temp_target
+
     def visitExprStmt(self, ctx: ExprStmt):
         addr = self.visit(ctx.expr)
         self._release_if_temp(addr)
@@ -199,17 +319,16 @@ class TACGenerator:
             cond_node = ctx.cond[0]
         else:
             cond_node = ctx.cond
-            
-        cond_addr = self.visit(cond_node)
-        if cond_addr is None:
-            cond_addr = "True"  # Valor por defecto si no se puede evaluar la condición
 
-        if ctx.else_:
+        if self._literal(cond_node) is not None:
+            # Condicion literal: solo se genera la rama que se ejecuta
+            self.visit(ctx.then if self._literal(cond_node) else ctx.else_)
+        elif ctx.else_:
             # Caso if-else
             else_label = self.new_label()
             end_label = self.new_label()
 
-            self.code.append(CondJump(condition=cond_addr, target=else_label))
+            self._jump_if_false(cond_node, else_label)
             self.visit(ctx.then)
             self.code.append(Jump(target=end_label))
             self.code.append(Label(name=else_label))
@@ -219,7 +338,7 @@ class TACGenerator:
             # Caso if sin else
             end_label = self.new_label()
 
-            self.code.append(CondJump(condition=cond_addr, target=end_label))
+            self._jump_if_false(cond_node, end_label)
             self.visit(ctx.then)
             self.code.append(Label(name=end_label))
 
@@ -251,6 +370,8 @@ class TACGenerator:
         return ret_temp
 
     def visitWhile(self, ctx: While):
+        if self._literal(ctx.cond) is False:
+            return                      # el cuerpo nunca se ejecuta
         start_label = self.new_label()
         end_label = self.new_label()
 
@@ -261,11 +382,8 @@ class TACGenerator:
             cond_node = ctx.cond[0]
         else:
             cond_node = ctx.cond
-            
-        cond_addr = self.visit(cond_node)
-        if cond_addr is None:
-            cond_addr = "True"  # Valor por defecto
-        self.code.append(CondJump(condition=cond_addr, target=end_label))
+
+        self._jump_if_false(cond_node, end_label)
         self.visit(ctx.body)
         self.code.append(Jump(target=start_label))
         self.code.append(Label(name=end_label))
@@ -276,14 +394,14 @@ class TACGenerator:
 
         self.code.append(Label(name=start_label))
         self.visit(ctx.body)
-        cond_addr = self.visit(ctx.cond)
-        if cond_addr is None:
-            cond_addr = "True"
-        self.code.append(CondJump(condition=cond_addr, target=end_label))
-        self.code.append(Jump(target=start_label))
+        # Vuelve al inicio si la condicion es verdadera: un salto por vuelta
+        self._jump_if_true(ctx.cond, start_label)
         self.code.append(Label(name=end_label))
 
     def visitFor(self, ctx: For):
+        if self._literal(ctx.cond) is False:
+            self.visit(ctx.init)        # solo la inicializacion se ejecuta
+            return
         start_label = self.new_label()
         end_label = self.new_label()
         update_label = self.new_label()
@@ -296,10 +414,7 @@ class TACGenerator:
         
         # Condición
         if ctx.cond:
-            cond_addr = self.visit(ctx.cond)
-            if cond_addr is None:
-                cond_addr = "True"
-            self.code.append(CondJump(condition=cond_addr, target=end_label))
+            self._jump_if_false(ctx.cond, end_label)
         
         # Cuerpo del bucle
         self.visit(ctx.body)
@@ -476,43 +591,49 @@ class TACGenerator:
             cond_node = ctx.cond[0]
         else:
             cond_node = ctx.cond
-            
-        cond_addr = self.visit(cond_node)
-        if cond_addr is None:
-            cond_addr = "True"
-        
-        true_label = self.new_label()
+
+        then_node = ctx.then[0] if isinstance(ctx.then, list) and ctx.then else ctx.then
+        other_node = ctx.otherwise[0] if isinstance(ctx.otherwise, list) and ctx.otherwise else ctx.otherwise
+
+        if self._literal(cond_node) is not None:
+            # Condicion literal: solo se evalua la rama elegida
+            addr = self.visit(then_node if self._literal(cond_node) else other_node)
+            return "0" if addr is None else addr
+
         false_label = self.new_label()
         end_label = self.new_label()
         
-        self.code.append(CondJump(condition=cond_addr, target=true_label))
+        # Salta al caso falso cuando la condicion es falsa
+        self._jump_if_false(cond_node, false_label)
+        
+        # Caso verdadero
+        true_addr = self.visit(then_node)
+        if true_addr is None:
+            true_addr = "0"
+        temp_target = self.new_temp()
+        self.code.append(TAC_Assign(target=temp_target, source=true_addr))
+        self._release_if_temp(true_addr)
+        self.code.append(Jump(target=end_label))
         
         # Caso falso
         self.code.append(Label(name=false_label))
-        false_addr = self.visit(ctx.otherwise)
+        false_addr = self.visit(other_node)
         if false_addr is None:
             false_addr = "0"
-        temp_target = self.new_temp()
         self.code.append(TAC_Assign(target=temp_target, source=false_addr))
-        self.code.append(Jump(target=end_label))
-        
-        # Caso verdadero
-        self.code.append(Label(name=true_label))
-        true_addr = self.visit(ctx.then)
-        if true_addr is None:
-            true_addr = "0"
-        self.code.append(TAC_Assign(target=temp_target, source=true_addr))
+        self._release_if_temp(false_addr)
         
         self.code.append(Label(name=end_label))
         return temp_target
 
     def visitUnary(self, ctx: Unary):
-        operand_addr = self.visit(ctx.operand)
+        operand_node = ctx.expr[0] if isinstance(ctx.expr, list) and ctx.expr else ctx.expr
+        operand_addr = self.visit(operand_node)
         if operand_addr is None:
             operand_addr = "0"
         
         temp_target = self.new_temp()
-        self.code.append(BinaryOp(target=temp_target, left=ctx.op, op="", right=operand_addr))
+        self.code.append(UnaryOp(target=temp_target, op=ctx.op, source=operand_addr))
         self._release_if_temp(operand_addr)
         return temp_target
 
@@ -0,0 +1,273 @@
+"""
+Representacion compacta (struct-of-arrays) del TAC.
+
+En vez de un objeto dataclass por instruccion, PackedTAC guarda cada campo en
+una columna `array`:
+
+    opcode[i]  codigo de operacion (OP_*)
+    dst[i]     operando destino        (indice en la tabla de operandos o NONE)
+    arg1[i]    primer operando         (idem)
+    arg2[i]    segundo operando        (idem)
+    oper[i]    operador de BinaryOp/UnaryOp (indice en la tabla de operadores o NONE)
+
+Los operandos (nombres, temporales, constantes y etiquetas) se internan en
+una OperandTable: cada valor distinto se guarda una sola vez y las
+instrucciones solo llevan su indice, de modo que comparar operandos es
+comparar enteros. La tabla tambien recuerda el tipo de cada operando
+(temporal, nombre, constante, etiqueta). Las etiquetas (y los nombres de
+funcion de Call) se internan aparte de los demas operandos: una variable
+`L1` y la etiqueta `L1` tienen indices distintos.
+
+La conversion desde/hacia las dataclasses de tac.py es exacta:
+
+    packed = PackedTAC.from_instructions(TACGenerator(symtab).generate(ast))
+    code = packed.to_instructions()      # == lista original
+
+Distribucion de campos por instruccion:
+
+    Assign     dst=target  arg1=source
+    BinaryOp   dst=target  arg1=left   arg2=right  oper=op
+    UnaryOp    dst=target  arg1=source             oper=op
+    Label                  arg1=name
+    Jump                   arg1=target
+    CondJump               arg1=condition  arg2=target
+    Param                  arg1=value
+    Call       dst=target  arg1=name   arg2=num_params
+    Return                 arg1=value
+    BeginFunc              arg1=parametros (indice en la tabla de firmas o NONE)
+    EndFunc                (sin operandos)
+"""
+import re
+import sys
+from array import array
+from typing import Iterable, Iterator, List, Optional
+
+from tac import (TAC, Address, Assign, BinaryOp, UnaryOp, Label, Jump, CondJump, Param, Call,
+                 Return, BeginFunc, EndFunc)
+
+# Indice reservado para "sin operando" (None)
+NONE = -1
+
+# Codigos de operacion
+OP_ASSIGN, OP_BINARY, OP_UNARY, OP_LABEL, OP_JUMP, OP_CONDJUMP, OP_PARAM, OP_CALL, \
+    OP_RETURN, OP_BEGINFUNC, OP_ENDFUNC = range(11)
+
+OPCODES = {
+    Assign: OP_ASSIGN, BinaryOp: OP_BINARY, UnaryOp: OP_UNARY, Label: OP_LABEL, Jump: OP_JUMP,
+    CondJump: OP_CONDJUMP, Param: OP_PARAM, Call: OP_CALL, Return: OP_RETURN,
+    BeginFunc: OP_BEGINFUNC, EndFunc: OP_ENDFUNC,
+}
+
+# Tipos de operando
+KIND_NAME, KIND_TEMP, KIND_CONST, KIND_LABEL = range(4)
+
+_TEMP_RE = re.compile(r"t\d+\Z")
+_INT_RE = re.compile(r"-?\d+(\.\d+)?\Z")
+_CONST_WORDS = {"true", "false", "null"}
+
+
+def classify(value: Address, is_label: bool = False) -> int:
+    """Tipo de un operando segun su forma textual."""
+    if is_label:
+        return KIND_LABEL
+    if isinstance(value, (int, float)):
+        return KIND_CONST
+    if _TEMP_RE.match(value):
+        return KIND_TEMP
+    if _INT_RE.match(value) or value in _CONST_WORDS or value[:1] in ('"', "'"):
+        return KIND_CONST
+    return KIND_NAME
+
+
+class OperandTable:
+    """Tabla de internado: valor <-> indice, con el tipo de cada operando."""
+
+    def __init__(self):
+        self.values = []                 # indice -> valor original (str/int)
+        self.kinds = array("B")          # indice -> KIND_*
+        self._index = {}                 # (tipo python, valor, es etiqueta) -> indice
+
+    def intern(self, value: Address, is_label: bool = False) -> int:
+        if value is None:
+            return NONE
+        # La clave incluye el tipo para no confundir 1 con "1", y si es una
+        # etiqueta para no confundir la etiqueta L1 con la variable L1
+        key = (type(value), value, is_label)
+        idx = self._index.get(key)
+        if idx is None:
+            idx = len(self.values)
+            self._index[key] = idx
+            self.values.append(value)
+            self.kinds.append(classify(value, is_label))
+        return idx
+
+    def lookup(self, value: Address, is_label: bool = False) -> int:
+        """Indice de `value` (o de la etiqueta `value`) o NONE si no esta internado."""
+        if value is None:
+            return NONE
+        return self._index.get((type(value), value, is_label), NONE)
+
+    def value(self, idx: int) -> Address:
+        return None if idx == NONE else self.values[idx]
+
+    def kind(self, idx: int) -> Optional[int]:
+        return None if idx == NONE else self.kinds[idx]
+
+    def is_temp(self, idx: int) -> bool:
+        return idx != NONE and self.kinds[idx] == KIND_TEMP
+
+    def __len__(self):
+        return len(self.values)
+
+
+class PackedTAC:
+    """Lista de instrucciones TAC en columnas `array` con operandos internados."""
+
+    def __init__(self, operands: Optional[OperandTable] = None):
+        self.operands = operands or OperandTable()
+        self.operators = []              # indice -> "+", "<", "[]", ...
+        self._operator_index = {}
+        self.signatures = []             # indice -> parametros de un BeginFunc
+        self.opcode = array("B")
+        self.dst = array("i")
+        self.arg1 = array("i")
+        self.arg2 = array("i")
+        self.oper = array("h")
+
+    # ---------------- construccion ----------------
+
+    @classmethod
+    def from_instructions(cls, code: Iterable[TAC]) -> "PackedTAC":
+        packed = cls()
+        packed.extend(code)
+        return packed
+
+    def extend(self, code: Iterable[TAC]) -> None:
+        for instr in code:
+            self.append(instr)
+
+    def append(self, instr: TAC) -> int:
+        """Agrega una instruccion y devuelve su posicion."""
+        opcode = OPCODES.get(type(instr))
+        if opcode is None:
+            raise TypeError(f"Instruccion TAC no soportada: {type(instr).__name__}")
+        intern = self.operands.intern
+        dst = a = b = NONE
+        oper = NONE
+        if opcode == OP_ASSIGN:
+            dst, a = intern(instr.target), intern(instr.source)
+        elif opcode == OP_BINARY:
+            dst, a, b = intern(instr.target), intern(instr.left), intern(instr.right)
+            oper = self._intern_operator(instr.op)
+        elif opcode == OP_UNARY:
+            dst, a = intern(instr.target), intern(instr.source)
+            oper = self._intern_operator(instr.op)
+        elif opcode == OP_LABEL:
+            a = intern(instr.name, is_label=True)
+        elif opcode == OP_JUMP:
+            a = intern(instr.target, is_label=True)
+        elif opcode == OP_CONDJUMP:
+            a, b = intern(instr.condition), intern(instr.target, is_label=True)
+        elif opcode == OP_PARAM:
+            a = intern(instr.value)
+        elif opcode == OP_CALL:
+            dst, a, b = intern(instr.target), intern(instr.name, is_label=True), intern(instr.num_params)
+        elif opcode == OP_RETURN:
+            a = intern(instr.value)
+        elif opcode == OP_BEGINFUNC and instr.params:
+            a = len(self.signatures)
+            self.signatures.append(tuple(instr.params))
+        self.opcode.append(opcode)
+        self.dst.append(dst)
+        self.arg1.append(a)
+        self.arg2.append(b)
+        self.oper.append(oper)
+        return len(self.opcode) - 1
+
+    def _intern_operator(self, op: str) -> int:
+        idx = self._operator_index.get(op)
+        if idx is None:
+            idx = len(self.operators)
+            self._operator_index[op] = idx
+            self.operators.append(op)
+        return idx
+
+    # ---------------- conversion ----------------
+
+    def instruction(self, i: int) -> TAC:
+        """Reconstruye la dataclass de la instruccion i."""
+        op = self.opcode[i]
+        value = self.operands.value
+        if op == OP_ASSIGN:
+            return Assign(target=value(self.dst[i]), source=value(self.arg1[i]))
+        if op == OP_BINARY:
+            return BinaryOp(target=value(self.dst[i]), left=value(self.arg1[i]),
+                            op=self.operators[self.oper[i]], right=value(self.arg2[i]))
+        if op == OP_UNARY:
+            return UnaryOp(target=value(self.dst[i]), op=self.operators[self.oper[i]],
+                           source=value(self.arg1[i]))
+        if op == OP_LABEL:
+            return Label(name=value(self.arg1[i]))
+        if op == OP_JUMP:
+            return Jump(target=value(self.arg1[i]))
+        if op == OP_CONDJUMP:
+            return CondJump(condition=value(self.arg1[i]), target=value(self.arg2[i]))
+        if op == OP_PARAM:
+            return Param(value=value(self.arg1[i]))
+        if op == OP_CALL:
+            return Call(target=value(self.dst[i]), name=value(self.arg1[i]),
+                        num_params=value(self.arg2[i]))
+        if op == OP_RETURN:
+            return Return(value=value(self.arg1[i]))
+        if op == OP_BEGINFUNC:
+            a = self.arg1[i]
+            return BeginFunc(params=list(self.signatures[a]) if a != NONE else [])
+        return EndFunc()
+
+    def to_instructions(self) -> List[TAC]:
+        return [self.instruction(i) for i in range(len(self))]
+
+    def __len__(self):
+        return len(self.opcode)
+
+    def __getitem__(self, i: int) -> TAC:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.instruction(i)
+
+    def __iter__(self) -> Iterator[TAC]:
+        return (self.instruction(i) for i in range(len(self)))
+
+    def __str__(self):
+        return "\n".join(str(instr) for instr in self)
+
+    # ---------------- consultas sobre indices ----------------
+
+    def defined(self, i: int) -> int:
+        """Operando definido por la instruccion i (NONE si no define nada)."""
+        return self.dst[i]
+
+    def used(self, i: int) -> tuple:
+        """Operandos leidos por la instruccion i (sin etiquetas ni constantes)."""
+        op = self.opcode[i]
+        if op in (OP_ASSIGN, OP_UNARY, OP_PARAM, OP_RETURN, OP_CONDJUMP):
+            candidates = (self.arg1[i],)
+        elif op == OP_BINARY:
+            candidates = (self.arg1[i], self.arg2[i])
+        else:
+            return ()
+        kinds = self.operands.kinds
+        return tuple(x for x in candidates if x != NONE and kinds[x] in (KIND_NAME, KIND_TEMP))
+
+    def nbytes(self) -> int:
+        """Memoria aproximada de las columnas y las tablas (en bytes)."""
+        columns = sum(col.itemsize * len(col) for col in (self.opcode, self.dst, self.arg1, self.arg2, self.oper))
+        table = sum(sys.getsizeof(v) for v in self.operands.values) + len(self.operands.kinds)
+        table += sys.getsizeof(self.operands.values) + sys.getsizeof(self.operands._index)
+        return columns + table
+
+
+def pack(code: Iterable[TAC]) -> PackedTAC:
+    return PackedTAC.from_instructions(code)
@@ -0,0 +1,120 @@
+"""
+Simulador minimo de MIPS para los tests: ejecuta el subconjunto que emite
+MIPSGen (aritmetica entera, saltos, lw/sw relativos a $sp, jal/jr y las
+syscalls 1, 4 y 10) y devuelve lo que el programa imprime.
+"""
+import re
+
+MASK = 0xFFFFFFFF
+
+
+def _signed(x):
+    x &= MASK
+    return x - (1 << 32) if x & 0x80000000 else x
+
+
+def run_mips(asm: str, entry: str = "main", stop: str = None, max_steps: int = 200000) -> str:
+    """Ejecuta desde `entry` (None: primera instruccion) hasta el final, `syscall 10` o la etiqueta `stop`."""
+    code, labels, data = [], {}, {}
+    for raw in asm.splitlines():
+        line = raw.split("#", 1)[0].strip()
+        if not line or line.startswith("."):
+            if line.endswith(":"):
+                labels[line[:-1]] = len(code)
+            continue
+        m = re.match(r"(\w+):\s*\.asciiz\s+\"(.*)\"", line)
+        if m:
+            data[m.group(1)] = m.group(2).encode().decode("unicode_escape")
+            continue
+        if line.endswith(":"):
+            labels[line[:-1]] = len(code)
+            continue
+        op, _, rest = line.partition(" ")
+        code.append((op, [a.strip() for a in rest.split(",")] if rest else []))
+
+    regs = {"$zero": 0, "$sp": 0x7FFF0000, "$ra": -1}
+    mem, out = {}, []
+    hi = lo = 0
+
+    def val(r):
+        return regs.get(r, 0)
+
+    def addr(a):
+        off, base = re.match(r"(-?\d+)\((\$\w+)\)", a).groups()
+        return val(base) + int(off)
+
+    pc, steps = (labels[entry] if entry else 0), 0
+    end = labels.get(stop, -1)
+    while 0 <= pc < len(code) and pc != end:
+        steps += 1
+        if steps > max_steps:
+            raise RuntimeError("demasiados pasos")
+        op, a = code[pc]
+        pc += 1
+        if op == "li":
+            regs[a[0]] = int(a[1])
+        elif op == "la":
+            regs[a[0]] = a[1]
+        elif op == "move":
+            regs[a[0]] = val(a[1])
+        elif op in ("add", "addu"):
+            regs[a[0]] = _signed(val(a[1]) + val(a[2]))
+        elif op in ("addi", "addiu"):
+            regs[a[0]] = _signed(val(a[1]) + int(a[2]))
+        elif op in ("sub", "subu"):
+            regs[a[0]] = _signed(val(a[1]) - val(a[2]))
+        elif op == "mul":
+            regs[a[0]] = _signed(val(a[1]) * val(a[2]))
+        elif op == "div":
+            x, y = val(a[0]), val(a[1])
+            q = abs(x) // abs(y) * (1 if (x >= 0) == (y >= 0) else -1)
+            lo, hi = q, x - q * y
+        elif op == "mflo":
+            regs[a[0]] = lo
+        elif op == "mfhi":
+            regs[a[0]] = hi
+        elif op == "slt":
+            regs[a[0]] = int(val(a[1]) < val(a[2]))
+        elif op == "sltu":
+            regs[a[0]] = int((val(a[1]) & MASK) < (val(a[2]) & MASK))
+        elif op == "sltiu":
+            regs[a[0]] = int((val(a[1]) & MASK) < (int(a[2]) & MASK))
+        elif op == "xor":
+            regs[a[0]] = _signed(val(a[1]) ^ val(a[2]))
+        elif op == "xori":
+            regs[a[0]] = _signed(val(a[1]) ^ int(a[2]))
+        elif op == "sll":
+            regs[a[0]] = _signed(val(a[1]) << int(a[2]))
+        elif op == "sra":
+            regs[a[0]] = val(a[1]) >> int(a[2])
+        elif op == "srl":
+            regs[a[0]] = _signed((val(a[1]) & MASK) >> int(a[2]))
+        elif op == "lw":
+            regs[a[0]] = mem.get(addr(a[1]), 0)
+        elif op == "sw":
+            mem[addr(a[1])] = val(a[0])
+        elif op == "beq":
+            if val(a[0]) == val(a[1]):
+                pc = labels[a[2]]
+        elif op == "bne":
+            if val(a[0]) != val(a[1]):
+                pc = labels[a[2]]
+        elif op == "j":
+            pc = labels[a[0]]
+        elif op == "jal":
+            regs["$ra"] = pc
+            pc = labels[a[0]]
+        elif op == "jr":
+            pc = val(a[0])
+        elif op == "syscall":
+            service = val("$v0")
+            if service == 1:
+                out.append(str(val("$a0")))
+            elif service == 4:
+                out.append(data.get(val("$a0"), ""))
+            elif service == 10:
+                break
+        else:
+            raise ValueError(f"instruccion no soportada: {op}")
+        regs["$zero"] = 0
+    return "".join(out)
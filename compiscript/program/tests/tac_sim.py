@@ -0,0 +1,100 @@
+"""
+Interprete minimo de TAC para los tests: ejecuta el codigo global (todos los
+tramos, en orden) con enteros y booleanos, y devuelve lo que imprime.
+
+A diferencia de MIPSGen, las variables globales viven en un solo lugar: lo
+que una funcion le escribe a `g` se ve despues de la llamada. Una variable
+de una funcion es global si no es un parametro ni un temporal y el codigo
+global la define (los tests no declaran locales con el nombre de una
+global). Sirve para comparar la salida de -O2 con la de -O0 cuando lo que
+importa son las globales que tocan las llamadas.
+"""
+import re
+
+from cfg import merge_globals, split_functions
+from tac import Assign, BinaryOp, Call, CondJump, Jump, Label, Param, Return, UnaryOp, defs, is_temp
+
+MASK = 0xFFFFFFFF
+
+
+def _signed(x):
+    x &= MASK
+    return x - (1 << 32) if x & 0x80000000 else x
+
+
+def _binary(op, a, b):
+    if op in ("+", "-", "*"):
+        return _signed(a + b if op == "+" else a - b if op == "-" else a * b)
+    if op in ("/", "%"):
+        q = abs(a) // abs(b) * (1 if (a >= 0) == (b >= 0) else -1)
+        return q if op == "/" else a - q * b
+    return int({"<": a < b, "<=": a <= b, ">": a > b, ">=": a >= b, "==": a == b, "!=": a != b,
+                "&&": bool(a) and bool(b), "||": bool(a) or bool(b)}[op])
+
+
+def run_tac(code, max_steps: int = 200000) -> str:
+    units = merge_globals(split_functions(code))
+    functions = {u.name: u for u in units if u.is_function}
+    glob = [u for u in units if not u.is_function]
+    names = {v for u in glob for instr in u.body for v in defs(instr) if not is_temp(v)}
+    memory = {}
+    out = []
+    steps = [0]
+
+    def execute(unit, local):
+        def frame(op):
+            return memory if op in names and op not in unit.params else local
+
+        def value(op):
+            if isinstance(op, (bool, int)):
+                return int(op)
+            if re.fullmatch(r"-?\d+", op):
+                return int(op)
+            if op in ("true", "True", "false", "False"):
+                return int(op in ("true", "True"))
+            return frame(op)[op]
+
+        def store(target, v):
+            frame(target)[target] = v
+
+        body = unit.body
+        labels = {instr.name: k for k, instr in enumerate(body) if isinstance(instr, Label)}
+        pc, args = 0, []
+        while pc < len(body):
+            steps[0] += 1
+            if steps[0] > max_steps:
+                raise RuntimeError("demasiados pasos")
+            instr = body[pc]
+            pc += 1
+            if isinstance(instr, Assign):
+                store(instr.target, value(instr.source))
+            elif isinstance(instr, BinaryOp):
+                store(instr.target, _binary(instr.op, value(instr.left), value(instr.right)))
+            elif isinstance(instr, UnaryOp):
+                v = value(instr.source)
+                store(instr.target, _signed(-v) if instr.op == "-" else int(not v))
+            elif isinstance(instr, CondJump):
+                if not value(instr.condition):
+                    pc = labels[instr.target]
+            elif isinstance(instr, Jump):
+                pc = labels[instr.target]
+            elif isinstance(instr, Param):
+                args.append(value(instr.value))
+            elif isinstance(instr, Call):
+                passed = args[len(args) - instr.num_params:]
+                del args[len(args) - instr.num_params:]
+                if instr.name == "print":
+                    out.append(str(passed[0]))
+                    result = 0
+                else:
+                    callee = functions[instr.name]
+                    result = execute(callee, dict(zip(callee.params, passed)))
+                if instr.target:
+                    store(instr.target, result)
+            elif isinstance(instr, Return):
+                return value(instr.value) if instr.value is not None else 0
+        return 0
+
+    for unit in glob:
+        execute(unit, {})
+    return "".join(line + "\n" for line in out)
@@ -0,0 +1,42 @@
+import Driver
+from artifacts import ALL_ARTIFACTS, AST_DOT, AST_TXT, PNG, ArtifactPipeline, select_artifacts
+from phase_timer import PhaseTimer
+
+SRC = "let a: integer = 1 + 2;\nprint(a);\n"
+
+
+def test_default_selection_keeps_every_artifact():
+    assert select_artifacts([]) == set(ALL_ARTIFACTS)
+    assert select_artifacts(["--tac", "--mips"]) == set()
+    assert select_artifacts(["--mips", "--ast-dump"]) == {AST_TXT}
+    assert select_artifacts(["--png"]) >= {PNG, AST_DOT, "parse_tree_dot"}
+
+
+def test_pipeline_only_produces_requested(tmp_path):
+    calls = []
+    pipeline = ArtifactPipeline(str(tmp_path), {AST_TXT})
+    pipeline.write(AST_TXT, lambda: calls.append("txt") or "Program")
+    pipeline.write(AST_DOT, lambda: calls.append("dot") or "digraph {}")
+    assert calls == ["txt"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["ast.txt"]
+
+
+def test_png_renders_in_background(tmp_path):
+    pipeline = ArtifactPipeline(str(tmp_path), {AST_DOT, PNG}, dot_cmd="true")
+    pipeline.write(AST_DOT, lambda: "digraph {}")
+    assert len(pipeline._renders) == 1       # lanzado, todavia sin esperar
+    assert any("PNG generado" in m for m in pipeline.wait())
+
+    missing = ArtifactPipeline(str(tmp_path), {AST_DOT, PNG}, dot_cmd="no-such-dot-binary")
+    missing.write(AST_DOT, lambda: "digraph {}")
+    assert any("Graphviz" in m for m in missing.wait())
+
+
+def test_driver_mips_only_skips_artifacts(tmp_path, capsys):
+    src = tmp_path / "p.cps"
+    src.write_text(SRC)
+    timer = PhaseTimer()
+    Driver._run(str(src), str(tmp_path), timer, select_artifacts(["--mips"]), False, True)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["out.s", "p.cps", "tac.txt"]
+    assert not {"parse_tree_txt", "ast_txt", "png_wait"} & set(timer.phases)
+    assert "--- Symbol Table ---" not in capsys.readouterr().out
@@ -0,0 +1,103 @@
+import ast_nodes as A
+from ast_optimizer import fold_constants
+from bench_programs import PRESETS, generate_program
+from compiler_session import CompilerSession
+from tac import BinaryOp, CondJump, UnaryOp
+from tests.mips_sim import run_mips
+
+SRC = """\
+let x: integer = 2 + 3 * 4;
+let y: integer = -5;
+let s: string = "ab" + "cd";
+let b: boolean = !(x < 3) && true;
+let z: integer = x * 1 + 0 - (y * 0);
+if (false) { print(99); } else { print(x); }
+while (false) { print(1); }
+let w: integer = true ? 7 : 8;
+print(w + y);
+print(-(-x));
+print(7 / -2);
+print(-7 % 3);
+print(z);
+if (b) { print(1); }
+"""
+
+
+def _ast(src):
+    res = CompilerSession().compile(src, "ast")
+    assert res.success, res.errors
+    return res.ast_root
+
+
+def _decl(prog, name):
+    return next(d for d in prog.decls if isinstance(d, A.VarDecl) and d.name == name)
+
+
+def test_folds_literals_and_identities():
+    prog, stats = fold_constants(_ast(SRC))
+    assert _decl(prog, "x").init.value == 14
+    assert _decl(prog, "y").init.value == -5
+    assert _decl(prog, "s").init.value == "abcd"
+    assert _decl(prog, "w").init.value == 7
+    # x * 1 + 0 - (y * 0) -> x
+    assert isinstance(_decl(prog, "z").init, A.Name)
+    assert stats["ast_folded"] > 0
+
+
+def test_integer_semantics_match_mips():
+    prog, _ = fold_constants(_ast("let q: integer = 7 / -2;\nlet r: integer = -7 % 3;\n"
+                                  "let big: integer = 2147483647 + 1;\nlet d: integer = 1 / 0;\n"))
+    assert _decl(prog, "q").init.value == -3
+    assert _decl(prog, "r").init.value == -1
+    assert _decl(prog, "big").init.value == -2147483648
+    assert isinstance(_decl(prog, "d").init, A.Binary)     # division por cero: en ejecucion
+
+
+def test_keeps_side_effects_and_string_concat():
+    src = ("function f(): integer { return 3; }\n"
+           "let s: string = \"n\";\n"
+           "let a: integer = f() * 0;\n"
+           "let t: string = s + 0;\n")
+    prog, _ = fold_constants(_ast(src))
+    assert isinstance(_decl(prog, "a").init, A.Binary)     # f() se sigue llamando
+    assert isinstance(_decl(prog, "t").init, A.Binary)     # "n" + 0 es concatenacion
+
+
+def test_prunes_dead_branches():
+    src = ("function g(x: integer): integer {\n"
+           "  if (true) { return x; } else { return 0; }\n"
+           "}\n"
+           "if (1 > 2) { print(1); }\n")
+    original = _ast(src)
+    prog, _ = fold_constants(original)
+    assert not any(isinstance(d, A.If) for d in prog.decls)
+    func = prog.decls[0]
+    assert len(func.body.stmts) == 1 and isinstance(func.body.stmts[0], A.Block)
+    # El AST original queda intacto
+    assert any(isinstance(d, A.If) for d in original.decls)
+
+
+def test_opt_level_1_output_matches_unoptimized():
+    plain = CompilerSession().compile(SRC, "mips")
+    opt = CompilerSession(opt_level=1).compile(SRC, "mips")
+    assert plain.success and opt.success, (plain.errors, opt.errors)
+    assert run_mips(opt.mips) == run_mips(plain.mips) == "14\n2\n14\n-3\n-1\n14\n1\n"
+    assert "fold" in opt.timings and "fold" not in plain.timings
+    assert not any(isinstance(i, CondJump) and i.condition in (True, False) for i in opt.tac_code)
+    assert len(opt.tac_code) < len(plain.tac_code)
+
+
+def test_unary_generates_unary_op():
+    res = CompilerSession().compile("let x: integer = 4;\nlet b: boolean = !(x < 3);\nprint(-x);", "tac")
+    assert res.success, res.errors
+    ops = [i for i in res.tac_code if isinstance(i, UnaryOp)]
+    assert [i.op for i in ops] == ["!", "-"]
+    assert not any(isinstance(i, BinaryOp) and i.op == "" for i in res.tac_code)
+
+
+def test_bench_program_shrinks():
+    src = generate_program(PRESETS["small"])
+    plain = CompilerSession().compile(src, "mips")
+    opt = CompilerSession(opt_level=1).compile(src, "mips")
+    assert opt.success, opt.errors
+    assert opt.metrics["mips_instructions"] < plain.metrics["mips_instructions"]
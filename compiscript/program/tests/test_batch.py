@@ -0,0 +1,56 @@
+import json
+
+from batch import collect_sources, main, output_dir_for, run_batch
+
+
+def _corpus(tmp_path):
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    (src / "a.cps").write_text("let a: integer = 1 + 2;\n")
+    (src / "sub" / "b.cps").write_text("function f(x: integer): integer { return x * 2; }\nlet b: integer = f(3);\n")
+    (src / "bad.cps").write_text('let c: integer = "x";\n')
+    return src
+
+
+def test_collect_and_output_layout(tmp_path):
+    src = _corpus(tmp_path)
+    files = collect_sources([str(src), str(src / "a.cps")])
+    assert [f.name for f in files] == ["a.cps", "bad.cps", "b.cps"]
+    out = output_dir_for(src / "sub" / "b.cps", tmp_path / "out", [src])
+    assert out == tmp_path / "out" / "src" / "sub" / "b"
+
+
+def test_batch_writes_per_file_outputs_and_summary(tmp_path):
+    src = _corpus(tmp_path)
+    out = tmp_path / "out"
+    summary = run_batch([str(src)], str(out), workers=2)
+    assert (summary.succeeded, summary.failed) == (2, 1)
+    assert "call f" in (out / "src" / "sub" / "b" / "tac.txt").read_text()
+    assert (out / "src" / "a" / "out.s").exists()
+    assert "Tipo incompatible" in (out / "src" / "bad" / "diagnostics.txt").read_text()
+    report = summary.report()
+    assert "OK: 2  Fallidos: 1" in report and "parse" in report
+
+
+def test_cli_exit_code_and_json_summary(tmp_path, capsys):
+    src = _corpus(tmp_path)
+    (src / "bad.cps").unlink()
+    summary_path = tmp_path / "summary.json"
+    rc = main([str(src), "-o", str(tmp_path / "out"), "-j", "1", "-q",
+               "--summary-json", str(summary_path)])
+    assert rc == 0
+    data = json.loads(summary_path.read_text())
+    assert data["total"] == 2 and data["failed"] == 0
+    assert "Resumen de compilacion por lotes" in capsys.readouterr().out
+
+
+def test_same_stem_inputs_get_their_own_directory(tmp_path):
+    for name, value in (("a", 1), ("b", 2)):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "x.cps").write_text(f"let v: integer = {value};\n")
+    out = tmp_path / "out"
+    summary = run_batch([str(tmp_path / "a" / "x.cps"), str(tmp_path / "b" / "x.cps")], str(out), workers=1)
+    assert summary.succeeded == 2
+    assert [f["output_dir"] for f in summary.files] == [str(out / "x"), str(out / "x-2")]
+    assert "v = 1" in (out / "x" / "tac.txt").read_text()
+    assert "v = 2" in (out / "x-2" / "tac.txt").read_text()
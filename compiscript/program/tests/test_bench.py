@@ -0,0 +1,37 @@
+import json
+
+from bench_programs import ProgramSpec, generate_program, sweep
+from bench import compare, run_suite, save_results
+from compiler_session import CompilerSession
+
+
+def test_generated_program_compiles():
+    spec = ProgramSpec(functions=3, depth=3, expr_len=5, class_depth=2, array_size=4)
+    src = generate_program(spec)
+    assert src == generate_program(spec)  # deterministico
+    res = CompilerSession().compile(src, "tac")
+    assert res.success, res.errors
+    assert "call fn2" in res.tac
+
+
+def test_parameters_scale_the_program():
+    small = generate_program(functions=2, array_size=4)
+    big = generate_program(functions=20, array_size=4)
+    assert big.count("function fn") == 20 > small.count("function fn")
+    assert "class C3 : C2" in generate_program(class_depth=4)
+    specs = sweep(ProgramSpec(), "depth", [1, 2, 3])
+    assert [s.depth for s in specs] == [1, 2, 3]
+
+
+def test_suite_reports_throughput_and_memory(tmp_path):
+    data = run_suite([ProgramSpec(functions=1, depth=1, expr_len=2, class_depth=1, array_size=2)],
+                     repeat=1, output_format="tac")
+    result = data["results"][0]
+    assert result["success"] and result["tokens"] > 0
+    parse = result["phases"]["parse"]
+    assert parse["lines_per_sec"] > 0 and parse["tokens_per_sec"] > 0
+    assert parse["peak_kib"] is not None
+
+    path = save_results(data, str(tmp_path / "run.json"))
+    loaded = json.loads(open(path).read())
+    assert result["name"] in compare(loaded, data)
@@ -0,0 +1,120 @@
+import pytest
+
+from cfg import CFG, FUNCTION, GLOBAL, join_functions, split_functions
+from compiler_session import CompilerSession
+from tac import Assign, BinaryOp, CondJump, Jump, Label, Return
+
+SRC = """\
+let g: integer = 1;
+function outer(a: integer): integer {
+  function inner(b: integer): integer { return b + g; }
+  let s: integer = 0;
+  while (s < a) {
+    let i: integer = 0;
+    while (i < 3) { i = i + 1; }
+    if (s > 10) { s = s + 2; } else { s = s + inner(s); }
+  }
+  return s;
+}
+print(outer(3));
+"""
+
+
+def _units():
+    res = CompilerSession().compile(SRC, "tac")
+    assert res.success, res.errors
+    return res.tac_code, split_functions(res.tac_code)
+
+
+def _outer_cfg():
+    _, units = _units()
+    outer = next(u for u in units if u.name == "outer")
+    return CFG.build(outer.body, "outer")
+
+
+def test_split_hoists_nested_functions_and_round_trips():
+    code, units = _units()
+    assert [(u.name, u.kind) for u in units] == [
+        ("global0", GLOBAL), ("outer", FUNCTION), ("inner", FUNCTION), ("global1", GLOBAL)]
+    assert units[2].parent == "outer"
+    assert not any(isinstance(i, Label) and i.name == "inner" for i in units[1].body)
+    joined = join_functions(units)
+    assert sorted(map(str, joined)) == sorted(map(str, code))
+    assert join_functions(split_functions(joined)) == joined
+
+
+def test_blocks_edges_and_linearize():
+    cfg = _outer_cfg()
+    for bid, b in cfg.blocks.items():
+        for s in b.succs:
+            assert bid in cfg.preds(s)
+        # Los saltos solo pueden ir al final de un bloque
+        assert not any(isinstance(i, (Jump, CondJump, Return)) for i in b.instrs[:-1])
+    assert cfg.preds(cfg.entry) == []
+    assert CFG.EXIT in {s for b in cfg.blocks.values() for s in b.succs}
+    relinked = CFG.build(cfg.linearize(), "outer")
+    assert [str(i) for i in relinked.linearize()] == [str(i) for i in cfg.linearize()]
+
+
+def test_dominators_and_loop_forest():
+    cfg = _outer_cfg()
+    idom = cfg.idoms()
+    assert all(cfg.dominates(cfg.entry, b) for b in idom)
+    forest = cfg.loops()
+    assert len(forest.loops) == 2
+    outer_loop, inner_loop = forest.loops
+    assert inner_loop.parent is outer_loop and outer_loop.parent is None
+    assert inner_loop.blocks < outer_loop.blocks
+    assert forest.depth(inner_loop.header) == 2
+    for loop in forest.loops:
+        assert all(cfg.dominates(loop.header, b) for b in loop.blocks)
+        assert loop.latches and all(loop.header in cfg.succs(l) for l in loop.latches)
+    # Las fronteras de dominancia de los cuerpos incluyen su cabecera
+    df = cfg.dominance_frontiers()
+    assert any(inner_loop.header in df[l] for l in inner_loop.latches)
+
+
+def test_incremental_preheader_and_split_edge():
+    cfg = _outer_cfg()
+    version = cfg._version
+    loop = cfg.loops().loops[0]
+    pre = cfg.insert_preheader(loop.header, loop.latches)
+    assert cfg._version != version
+    assert set(cfg.preds(loop.header)) == {pre} | loop.latches
+    assert cfg.idoms()[loop.header] == pre
+    # El lazo se recalcula sobre el grafo editado
+    assert cfg.loops().loops[0].header == loop.header
+
+    u, v = next((b, s) for b, s in cfg.edges() if s != CFG.EXIT and len(cfg.succs(b)) > 1)
+    w = cfg.split_edge(u, v)
+    assert cfg.succs(w) == [v] and w in cfg.succs(u) and v not in cfg.succs(u)
+    # La linealizacion sigue describiendo el mismo grafo
+    rebuilt = CFG.build(cfg.linearize(), "outer")
+    assert len(rebuilt.loops().loops) == 2
+
+
+def test_set_instrs_updates_edges_and_remove_unreachable():
+    code = [
+        Assign(target="x", source="0"),
+        Label(name="A"),
+        BinaryOp(target="t0", left="x", op="<", right="3"),
+        CondJump(condition="t0", target="B"),
+        Assign(target="x", source="1"),
+        Jump(target="A"),
+        Label(name="B"),
+        Return(value="x"),
+    ]
+    cfg = CFG.build(code, "f")
+    a = cfg.label_map()["A"]
+    b = cfg.label_map()["B"]
+    body = next(s for s in cfg.succs(a) if s != b)
+    assert cfg.loops().loop_of(body).header == a
+    # Reemplazar el salto de retorno por un return rompe el lazo
+    cfg.set_instrs(body, [Assign(target="x", source="1"), Return(value="x")])
+    assert cfg.succs(body) == [CFG.EXIT]
+    assert cfg.loops().loops == []
+    # Sin la arista condicional, B queda inalcanzable
+    cfg.set_instrs(a, [BinaryOp(target="t0", left="x", op="<", right="3")])
+    assert cfg.remove_unreachable() == [b]
+    with pytest.raises(ValueError):
+        cfg.set_instrs(a, [Return(value=None), Assign(target="x", source="2")])
@@ -0,0 +1,65 @@
+import pytest
+
+from compile_cache import CompileCache
+
+
+def _payload(tac="x = 1", size=0):
+    return {"success": True, "tac": tac + " " * size, "mips": "", "ast": "",
+            "stdout": "", "stderr": "", "errors": [], "warnings": [], "compilation_time": 0.01}
+
+
+def test_key_depends_on_source_format_and_version():
+    cache = CompileCache()
+    k = cache.key("let x = 1;", "all")
+    assert k == cache.key("let x = 1;", "all")
+    assert k != cache.key("let x = 2;", "all")
+    assert k != cache.key("let x = 1;", "tac")
+    assert k != CompileCache(version="other").key("let x = 1;", "all")
+
+
+def test_hit_and_miss_counters():
+    cache = CompileCache()
+    k = cache.key("src")
+    assert cache.get(k) is None
+    cache.put(k, _payload())
+    assert cache.get(k)["tac"] == "x = 1"
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["entries"] == 1 and stats["bytes"] > 0
+
+
+def test_lru_eviction_respects_memory_bound():
+    one = CompileCache._size_of(_payload("a", 100))
+    cache = CompileCache(max_bytes=one * 2)
+    cache.put("a", _payload("a", 100))
+    cache.put("b", _payload("b", 100))
+    cache.get("a")                      # 'a' pasa a ser la mas reciente
+    cache.put("c", _payload("c", 100))  # debe salir 'b'
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_disk_persistence_survives_new_instance(tmp_path):
+    first = CompileCache(persist_dir=str(tmp_path))
+    k = first.key("let y = 2;", "tac")
+    first.put(k, _payload("y = 2"))
+
+    second = CompileCache(persist_dir=str(tmp_path))
+    assert second.get(k)["tac"] == "y = 2"
+    assert second.stats()["disk_hits"] == 1
+
+
+def test_server_reuses_cached_result():
+    pytest.importorskip("flask")
+    pytest.importorskip("flask_cors")
+    import server
+
+    server.CACHE.clear()
+    client = server.app.test_client()
+    body = {"code": "let z: integer = 3 + 4;", "format": "tac"}
+    first = client.post("/ide/compile", json=body).get_json()
+    second = client.post("/ide/compile", json=body).get_json()
+    assert first["success"] and not first["cached"]
+    assert second["cached"] and second["tac"] == first["tac"]
+    assert client.get("/ide/cache/stats").get_json()["hits"] >= 1
@@ -0,0 +1,69 @@
+import pytest
+
+from compile_workers import CompilerWorkerPool, PoolBusy, TIMEOUT_MSG, warm_up
+from compiler_session import CompilerSession
+
+
+def test_warm_up_parses_bundled_corpus():
+    assert warm_up(CompilerSession()) >= 3
+
+
+def test_pool_compiles_jobs_in_parallel():
+    with CompilerWorkerPool(workers=2, queue_size=16) as pool:
+        futures = [pool.submit(f"let v{i}: integer = {i} * 2;", "tac") for i in range(6)]
+        results = [f.result(timeout=60) for f in futures]
+        assert all(r.success for r in results)
+        assert all(f"v{i} = " in r.tac for i, r in enumerate(results))
+        bad = pool.compile('let x: integer = "s";', "tac")
+        assert not bad.success and bad.semantic_errors
+        assert pool.stats()["completed"] == 7
+
+
+def test_job_timeout_restarts_worker():
+    big = "\n".join(f"let a{i}: integer = {i} + {i} * 2 - 1;" for i in range(3000))
+    with CompilerWorkerPool(workers=1, job_timeout=0.01) as pool:
+        res = pool.compile(big, "all")
+        assert not res.success and res.errors == [TIMEOUT_MSG]
+        assert pool.stats()["restarts"] == 1
+        pool.job_timeout = 60
+        assert pool.compile("let ok: integer = 1;", "tac").success
+
+
+def test_unexpected_errors_resolve_the_future_and_keep_the_worker(monkeypatch):
+    with CompilerWorkerPool(workers=1) as pool:
+        worker = pool._workers[0]
+        real_run, real_start = worker.run, worker.start
+        starts = []
+
+        def flaky_start():
+            starts.append(1)
+            if len(starts) == 1:
+                raise OSError("no se pudo crear el proceso")
+            real_start()
+
+        # Un payload que no arma un CompilationResult, y el primer reemplazo falla
+        monkeypatch.setattr(worker, "run", lambda job, timeout: {"bogus": 1})
+        monkeypatch.setattr(worker, "start", flaky_start)
+        with pytest.raises(TypeError):
+            pool.submit("let x: integer = 1;", "tac").result(timeout=60)
+        monkeypatch.setattr(worker, "run", real_run)
+        # El hilo sigue vivo: el pipe cerrado da un error y el trabajador se vuelve a crear
+        lost = pool.submit("let y: integer = 1;", "tac").result(timeout=60)
+        assert not lost.success and lost.errors[0].startswith("Worker caido")
+        assert pool.compile("let z: integer = 2;", "tac").success
+        assert pool.stats()["completed"] == 3 and len(starts) == 2
+
+
+def test_full_queue_rejects_jobs():
+    big = "\n".join(f"let a{i}: integer = {i};" for i in range(2000))
+    with CompilerWorkerPool(workers=1, queue_size=1) as pool:
+        rejected = 0
+        futures = []
+        for _ in range(6):
+            try:
+                futures.append(pool.submit(big, "tac"))
+            except PoolBusy:
+                rejected += 1
+        assert rejected > 0
+        for f in futures:
+            f.result(timeout=120)
@@ -0,0 +1,86 @@
+from compiler_session import CompilerSession
+
+
+def test_compile_in_process_returns_all_artifacts():
+    src = """\
+function id(x: integer): integer { return x; }
+let a: integer = 2 + 3;
+let b: integer = id(a);
+"""
+    res = CompilerSession().compile(src, "all")
+    assert res.success, res.errors
+    assert "call id" in res.tac, res.tac
+    assert "jal id" in res.mips, res.mips
+    assert res.ast.startswith("Program"), res.ast
+    assert res.errors == []
+
+
+def test_format_tac_skips_mips_and_ast():
+    res = CompilerSession().compile("let x: integer = 1 + 2;", "tac")
+    assert res.success
+    assert res.tac
+    assert res.mips == ""
+    assert res.ast == ""
+
+
+def test_syntax_error_is_reported_without_raising():
+    res = CompilerSession().compile("let x: integer = ;", "all")
+    assert not res.success
+    assert res.syntax_errors
+    assert res.errors and res.errors[0].startswith("Error sintactico")
+    assert res.tac == ""
+
+
+def test_semantic_error_is_captured_in_stderr():
+    res = CompilerSession().compile('let x: integer = "a";', "all")
+    assert not res.success
+    assert res.semantic_errors
+    assert "Tipo incompatible" in res.stderr
+    assert any("Error semantico" in e for e in res.errors)
+
+
+def test_session_is_reusable():
+    session = CompilerSession()
+    first = session.compile("let x: integer = 1;", "tac")
+    second = session.compile("let y: integer = 2;", "tac")
+    assert "x = 1" in first.tac
+    assert "y = 2" in second.tac and "x" not in second.tac
+
+
+def test_concurrent_compiles_do_not_share_artifacts():
+    from concurrent.futures import ThreadPoolExecutor
+
+    session = CompilerSession()
+    sources = [f"let v{i}: integer = {i} + 1;" for i in range(8)]
+    sources.append('let bad: integer = "x";')
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda s: session.compile(s, "all"), sources))
+
+    for i, res in enumerate(results[:-1]):
+        assert res.success, res.errors
+        assert f"v{i} = " in res.tac, res.tac
+        assert res.stderr == ""
+    assert not results[-1].success
+    assert "Tipo incompatible" in results[-1].stderr
+
+
+def test_write_artifacts_uses_its_own_directory(tmp_path):
+    res = CompilerSession().compile("let x: integer = 1 + 2;", "all")
+    written = res.write_artifacts(tmp_path / "job1")
+    assert set(written) == {"tac.txt", "out.s", "ast.txt"}
+    assert (tmp_path / "job1" / "tac.txt").read_text() == res.tac
+
+
+def test_valid_program_parses_in_sll_stage():
+    res = CompilerSession().compile("let x: integer = (1 + 2) * 3;", "tac")
+    assert res.success
+    assert res.metrics["parse_stage"] == "sll"
+
+
+def test_syntax_error_falls_back_to_ll_with_same_diagnostics():
+    src = "let x: integer = ;\nlet y = 2;"
+    two_stage = CompilerSession().compile(src, "tac")
+    ll_only = CompilerSession(two_stage_parse=False).compile(src, "tac")
+    assert two_stage.metrics["parse_stage"] == "ll"
+    assert two_stage.syntax_errors == ll_only.syntax_errors
+    assert two_stage.stdout == ll_only.stdout
@@ -0,0 +1,91 @@
+from compiler_session import CompilerSession
+from copyprop import propagate_copies
+from tac import Assign, BeginFunc, BinaryOp, Call, CondJump, EndFunc, Jump, Label, Param, Return
+from tests.mips_sim import run_mips
+
+SRC = """\
+let n: integer = 0;
+let total: integer = 0;
+let step: integer = 3;
+while (n < 6) {
+  let k: integer = n;
+  let m: integer = k;
+  total = total + m * step;
+  n = n + 1;
+}
+let result: integer = total;
+print(result);
+"""
+
+
+def _text(code):
+    return list(map(str, code))
+
+
+def test_forward_propagation_respects_paths():
+    code = [
+        Assign("x", "y"),
+        BinaryOp("t0", "x", "+", 1),         # x -> y
+        CondJump("c", "L0"),
+        Assign("y", 4),                      # y cambia en un solo camino
+        Label("L0"),
+        BinaryOp("t1", "x", "*", "t0"),      # aqui x ya no es y en todos los caminos
+        Assign("z", 5),
+        Return("z"),
+    ]
+    out, stats = propagate_copies(code)
+    text = _text(out)
+    assert "t0 = y + 1" in text and "t1 = x * t0" in text
+    assert "return 5" in text
+    assert stats["copies_propagated"] == 2
+
+
+def test_params_are_checked_at_the_call():
+    code = [
+        Assign("t0", "x"),
+        Assign("t1", "x"),
+        Param("t0"),
+        Assign("x", 9),                      # el backend lee los param en la call
+        Param("t1"),
+        Call(None, "f", 2),
+        Return(None),
+    ]
+    out, _ = propagate_copies(code)
+    assert _text(out)[2:6] == ["param t0", "x = 9", "param t1", "call f, 2"]
+
+
+def test_coalesces_definition_and_copy():
+    code = [
+        BinaryOp("t0", "a", "+", "b"),
+        Assign("x", "t0"),                   # t0 muere aqui: x = a + b
+        BinaryOp("t1", "x", "*", 2),
+        Param("t1"),
+        Call("t2", "g", 1),
+        Assign("y", "t2"),                   # y = call g, 1
+        BinaryOp("t3", "y", "-", 1),
+        Call(None, "h", 0),                  # h puede leer z (global)
+        Assign("z", "t3"),
+        Return("t3"),
+        Label("h"),
+        BeginFunc(),
+        Assign("z", 0),
+        EndFunc(),
+    ]
+    out, stats = propagate_copies(code)
+    text = _text(out)
+    assert text[:3] == ["x = a + b", "t1 = x * 2", "param t1"]
+    assert "y = call g, 1" in text and "z = t3" in text
+    assert stats["copies_coalesced"] == 2 and stats["copies_instrs_removed"] == 2
+
+
+def test_opt_level_2_output_matches_unoptimized():
+    plain = CompilerSession().compile(SRC, "mips")
+    opt = CompilerSession(opt_level=2, regalloc="linear").compile(SRC, "mips")
+    assert plain.success and opt.success, (plain.errors, opt.errors)
+    assert run_mips(opt.mips) == run_mips(plain.mips) == "45\n"
+    assert "copies" in opt.timings
+    assert opt.metrics["copies_propagated"] > 0 and opt.metrics["copies_coalesced"] > 0
+    # k, m y result desaparecen: solo quedan copias propias del lazo
+    assert not any(line.startswith(("k =", "m =", "result =")) for line in opt.tac.splitlines())
+    moves = [line for line in opt.mips.splitlines() if line.strip().startswith("move ")]
+    assert len(moves) <= 2
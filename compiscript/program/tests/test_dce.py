@@ -0,0 +1,102 @@
+from compiler_session import CompilerSession
+from dce import eliminate_dead_code
+from tac import Assign, BeginFunc, BinaryOp, Call, CondJump, EndFunc, Jump, Label, Param, Return
+from tests.mips_sim import run_mips
+from tests.tac_sim import run_tac
+
+SRC = """\
+let n: integer = 5;
+let unused: integer = n * 3;
+let s: integer = 0;
+let i: integer = 0;
+while (i < n) {
+  let sq: integer = i * i;
+  s = s + i;
+  if (s > 100) { }
+  i = i + 1;
+}
+s = s * 2;
+print(s);
+"""
+
+
+def test_removes_dead_temps_and_stores_but_keeps_calls():
+    code = [
+        Assign("x", 1),                  # se sobrescribe antes de leerse
+        BinaryOp("t0", "x", "+", 2),     # nadie lee t0
+        Assign("x", 5),
+        Call("t1", "f", 0),              # resultado sin usar: la llamada se queda
+        Param("x"),
+        Call("t2", "print", 1),
+        Return(None),
+    ]
+    out, stats = eliminate_dead_code(code)
+    assert out == [Assign("x", 5), Call(None, "f", 0), Param("x"), Call(None, "print", 1), Return(None)]
+    assert stats["dce_removed"] == 1 and stats["dce_dead_stores"] == 1
+    assert stats["dce_call_results"] == 2
+
+
+def test_removes_unreachable_blocks_empty_ifs_and_labels():
+    code = [
+        Assign("x", 2),
+        BinaryOp("t0", "x", "<", 3),     # solo alimenta un if sin cuerpo
+        CondJump("t0", "L0"),
+        Label("L0"),
+        Jump("L1"),
+        Assign("y", 7),                  # inalcanzable
+        Label("L1"),
+        Return("x"),
+    ]
+    out, stats = eliminate_dead_code(code)
+    assert out == [Assign("x", 2), Return("x")]
+    assert stats["dce_blocks_removed"] == 1
+    assert stats["dce_jumps_removed"] == 2 and stats["dce_labels_removed"] == 2
+
+
+def test_values_read_by_other_units_stay_live():
+    code = [
+        Assign("g", 4),                  # f lee g
+        Assign("t0", 9),                 # otro tramo global lee t0
+        Jump("L9"),
+        Label("f"),
+        BeginFunc(params=["a"]),
+        Assign("g", "a"),                # puede leerse despues de la llamada
+        Assign("t0", 1),                 # temporal propio de f: muerto
+        Assign("k", 2),                  # local de f: muerto
+        Return("g"),
+        EndFunc(),
+        Label("L9"),
+        Param("t0"),
+        Call("t1", "print", 1),
+    ]
+    out, _ = eliminate_dead_code(code)
+    text = list(map(str, out))
+    assert text[:2] == ["g = 4", "t0 = 9"]
+    assert "t0 = 1" not in text and "k = 2" not in text
+    assert "g = a" in text and "BeginFunc a" in text
+
+
+def test_opt_level_2_output_matches_unoptimized():
+    plain = CompilerSession().compile(SRC, "mips")
+    opt = CompilerSession(opt_level=2).compile(SRC, "mips")
+    assert plain.success and opt.success, (plain.errors, opt.errors)
+    assert run_mips(opt.mips) == run_mips(plain.mips) == "20\n"
+    assert "dce" in opt.timings
+    assert opt.metrics["dce_dead_stores"] >= 2          # unused y sq
+    assert opt.metrics["dce_jumps_removed"] >= 1        # el if vacio
+    text = "\n".join(map(str, opt.tac_code))
+    assert "sq" not in text and "unused" not in text and "> 100" not in text
+
+
+def test_stores_read_by_a_called_function_stay():
+    src = ("let g: integer = 1;\n"
+           "function f(): integer { return g; }\n"
+           "g = 5;\n"
+           "let r: integer = f();\n"
+           "g = 6;\n"
+           "print(r);\n")
+    plain = CompilerSession().compile(src, "tac")
+    opt = CompilerSession(opt_level=2).compile(src, "tac")
+    assert plain.success and opt.success, (plain.errors, opt.errors)
+    assert run_tac(opt.tac_code) == run_tac(plain.tac_code) == "5\n"
+    assert "g = 5" in opt.tac
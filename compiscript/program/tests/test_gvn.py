@@ -0,0 +1,96 @@
+from cfg import CFG
+from compiler_session import CompilerSession
+from gvn import ValueNumbering, value_numbering
+from tac import Assign, BeginFunc, BinaryOp, Call, CondJump, EndFunc, Jump, Label, Param, Return
+from tests.mips_sim import run_mips
+
+SRC = """\
+let a: integer = 0;
+let b: integer = 0;
+while (a < 5) { a = a + 1; b = b + 2; }
+let x: integer = (a + b) * (a - b);
+let y: integer = (a + b) * (a - b) + a;
+if (a > b) { y = y + (a + b) * (a - b); } else { y = y - (a + b) * (a - b); }
+print(x + y);
+"""
+
+
+def _text(code):
+    return list(map(str, code))
+
+
+def test_local_reuses_repeated_loads():
+    code = [
+        BinaryOp("t0", "a", "[]", "i"),
+        BinaryOp("t1", "a", "[]", "i"),
+        BinaryOp("t2", "t0", "+", "t1"),
+        BinaryOp("t3", "p", ".", '"x"'),
+        BinaryOp("t4", "p", ".", '"x"'),
+        BinaryOp("t5", "t3", "*", "t4"),
+        Return("t5"),
+    ]
+    out, stats = value_numbering(code, dominators=False)
+    assert _text(out) == ["t0 = a [] i", "t1 = t0", "t2 = t0 + t0",
+                          't3 = p . "x"', "t4 = t3", "t5 = t3 * t3", "return t5"]
+    assert stats["gvn_local"] == 2 and stats["gvn_operands"] == 2
+
+
+def test_calls_and_stores_invalidate():
+    code = [
+        BinaryOp("t0", "a", "[]", "i"),
+        Call(None, "g", 0),                  # puede modificar el arreglo y escribir k
+        BinaryOp("t1", "a", "[]", "i"),
+        BinaryOp("t2", "k", "*", 2),
+        Param("t2"),
+        Call(None, "g", 0),
+        BinaryOp("t3", "k", "*", 2),
+        Assign("i", 1),
+        BinaryOp("t4", "a", "[]", "i"),      # otro indice
+        Return("t4"),
+        Label("g"),
+        BeginFunc(),
+        Assign("k", 3),
+        EndFunc(),
+    ]
+    out, stats = value_numbering(code)
+    assert stats["gvn_local"] == stats["gvn_global"] == 0
+    assert _text(out) == _text(code)
+
+
+def test_dominators_reuse_only_unchanged_values():
+    code = [
+        BinaryOp("t0", "a", "*", "b"),
+        CondJump("c", "L0"),
+        Assign("a", 7),                      # solo en un camino hacia L1
+        Jump("L1"),
+        Label("L0"),
+        BinaryOp("t1", "b", "*", "a"),       # dominado y sin cambios: se reutiliza
+        Param("t1"),
+        Call(None, "print", 1),
+        Label("L1"),
+        BinaryOp("t2", "a", "*", "b"),       # a pudo cambiar: se recalcula
+        Return("t2"),
+    ]
+    out, stats = value_numbering(code)
+    text = _text(out)
+    assert "t1 = t0" in text and "t2 = a * b" in text
+    assert stats["gvn_global"] == 1
+
+    # Sin dominadores cada bloque empieza de cero
+    cfg = CFG.build(code, "f")
+    vn = ValueNumbering(cfg).run_local()
+    assert vn.local == vn.globl == 0
+
+
+def test_opt_level_2_output_matches_unoptimized():
+    plain = CompilerSession().compile(SRC, "mips")
+    opt = CompilerSession(opt_level=2).compile(SRC, "mips")
+    assert plain.success and opt.success, (plain.errors, opt.errors)
+    assert run_mips(opt.mips) == run_mips(plain.mips) == "-70\n"
+    assert "gvn" in opt.timings
+    assert opt.metrics["gvn_local"] >= 2 and opt.metrics["gvn_global"] >= 1
+    assert opt.metrics["tac_instructions"] < opt.metrics["tac_generated"]
+    summary = opt.optimization_summary()
+    assert "gvn (numeracion de valores)" in summary and "TAC final" in summary
+    # (a + b) * (a - b) se calcula una sola vez
+    assert sum(1 for line in opt.tac.splitlines() if line.endswith("a - b")) == 1
@@ -0,0 +1,110 @@
+from compiler_session import CompilerSession
+from induction import reduce_induction_variables
+from tac import Assign, BeginFunc, BinaryOp, Call, CondJump, EndFunc, Jump, Label, Param, Return
+from tests.mips_sim import run_mips
+
+SRC = """\
+let n: integer = 0;
+let w: integer = 0;
+while (n < 6) { n = n + 1; w = w + 2; }
+let i: integer = 0;
+let k: integer = 3;
+let s: integer = 0;
+while (i < n) {
+  s = s + i * w + k;
+  k = k + 1;
+  i = i + 1;
+}
+let j: integer = 0;
+let acc: integer = 0;
+while (j < 10) {
+  acc = acc + j * 8;
+  j = j + 2;
+}
+print(s);
+print(acc);
+print(acc / 8);
+print((0 - s) / 4);
+print((0 - s) % 4);
+"""
+
+
+def _text(code):
+    return list(map(str, code))
+
+
+def _loop(body, after=()):
+    """i = 0; while (i < n) { body; i = i + 1 }, con el incremento como lo genera TACGenerator."""
+    return [
+        Assign("i", 0),
+        Label("L0"),
+        BinaryOp("t0", "i", "<", "n"),
+        CondJump("t0", "L1"),
+        *body,
+        BinaryOp("t1", "i", "+", 1),
+        Assign("i", "t1"),
+        Jump("L0"),
+        Label("L1"),
+        *after,
+    ]
+
+
+def test_multiplication_becomes_a_running_sum():
+    code = _loop([
+        BinaryOp("t2", "i", "*", "c"),       # c invariante
+        BinaryOp("s", "s", "+", "t2"),
+    ], after=[Return("i")])                  # i sigue viva: el contador se queda
+    out, stats = reduce_induction_variables(code)
+    text = _text(out)
+    assert stats["iv_basic"] == 1 and stats["iv_reduced"] == 1 and stats["iv_counters_removed"] == 0
+    assert not any(line.endswith("i * c") for line in text)
+    loop = text[text.index("L0:"):]
+    # s arranca en 0 * c y avanza c * 1 por vuelta
+    assert text[1].endswith(" = 0") and any(line.endswith(" + c") for line in loop)
+    assert "i = 0" in text
+
+
+def test_counter_used_only_by_the_exit_test_is_removed():
+    code = _loop([
+        Param("j"),
+        Call(None, "print", 1),
+        BinaryOp("t3", "j", "+", 1),         # j avanza a la par de i
+        Assign("j", "t3"),
+    ], after=[Return(None)])
+    out, stats = reduce_induction_variables(code)
+    text = _text(out)
+    assert stats["iv_counters_removed"] == 1
+    assert not any(line.endswith(" = i + 1") for line in text)
+    # i < n pasa a ser j < n + (j - 0)
+    header = text[text.index("L0:") + 1]
+    assert header.split(" = ")[1].startswith("j < t")
+
+
+def test_calls_that_write_the_counter_block_the_analysis():
+    code = _loop([
+        BinaryOp("t2", "i", "*", 4),
+        Param("t2"),
+        Call(None, "f", 1),                  # f escribe i
+    ], after=[Return(None)]) + [
+        Label("f"),
+        BeginFunc(params=["x"]),
+        Assign("i", "x"),
+        EndFunc(),
+    ]
+    out, stats = reduce_induction_variables(code)
+    assert stats["iv_basic"] == 0
+    assert _text(out) == _text(code)
+
+
+def test_opt_level_2_output_matches_unoptimized():
+    plain = CompilerSession().compile(SRC, "mips")
+    opt = CompilerSession(opt_level=2).compile(SRC, "mips")
+    assert plain.success and opt.success, (plain.errors, opt.errors)
+    assert run_mips(opt.mips) == run_mips(plain.mips) == "213\n160\n20\n-53\n-1\n"
+    assert "iv" in opt.timings
+    assert opt.metrics["iv_reduced"] == 2 and opt.metrics["iv_counters_removed"] == 2
+    assert "iv (variables de induccion)" in opt.optimization_summary()
+    # Sin multiplicaciones en el TAC y sin mul/div en MIPS: potencias de dos con desplazamientos
+    assert not any(" * " in line for line in opt.tac.splitlines())
+    assert not any(line.split()[0] in ("mul", "div") for line in opt.mips.splitlines() if line.strip())
+    assert any(line.strip().startswith("sra") for line in plain.mips.splitlines())
@@ -0,0 +1,123 @@
+from compiler_session import CompilerSession
+from licm import hoist_invariants
+from tac import Assign, BeginFunc, BinaryOp, Call, CondJump, EndFunc, Jump, Label, Param, Return
+from tests.mips_sim import run_mips
+
+SRC = """\
+let a: integer = 0;
+let b: integer = 0;
+while (a < 4) { a = a + 1; b = b + 3; }
+let i: integer = 0;
+let s: integer = 0;
+while (i < 5) {
+  let k: integer = a * b + 1;
+  let j: integer = 0;
+  while (j < 3) {
+    s = s + k * (a - b) + j;
+    j = j + 1;
+  }
+  i = i + 1;
+}
+print(s);
+"""
+
+
+def _text(code):
+    return list(map(str, code))
+
+
+def _loop(body, cond="i"):
+    """while (cond < n) { body; i = i + 1 }, con los temporales reutilizados como en TACGenerator."""
+    return [
+        Label("L0"),
+        BinaryOp("t0", cond, "<", "n"),
+        CondJump("t0", "L1"),
+        *body,
+        BinaryOp("t0", "i", "+", 1),
+        Assign("i", "t0"),
+        Jump("L0"),
+        Label("L1"),
+        Return("s"),
+    ]
+
+
+def test_hoists_invariant_temps_into_a_preheader():
+    code = _loop([
+        BinaryOp("t0", "a", "*", "b"),       # invariante
+        BinaryOp("t0", "t0", "+", 1),        # depende solo de la anterior
+        BinaryOp("t1", "s", "+", "t0"),
+        Assign("s", "t1"),
+        Param("s"),
+        Call(None, "print", 1),              # del runtime: no escribe nada
+    ])
+    out, stats = hoist_invariants(code)
+    text = _text(out)
+    assert stats["licm_hoisted"] == 2 and stats["licm_loops"] == 1
+    pre = text.index("L0:")
+    moved = text[pre - 2:pre]
+    assert moved[0].endswith(" = a * b") and moved[1].endswith(" + 1")
+    # Cada rango de t0 tiene ahora su nombre: el incremento se queda en el lazo
+    assert any(line.endswith(" = i + 1") for line in text[pre:])
+
+
+def test_calls_appends_and_possible_traps_stay_in_the_loop():
+    code = _loop([
+        BinaryOp("t1", "g", "*", 2),         # f escribe g
+        BinaryOp("t2", "p", ".", '"x"'),     # puede fallar si el lazo no da vueltas
+        BinaryOp("t3", "a", "/", "b"),       # idem (b puede ser 0)
+        BinaryOp("t4", "t1", "+", "t2"),
+        BinaryOp("t4", "t4", "+", "t3"),
+        Assign("s", "t4"),                   # s se lee despues del lazo
+        Param("s"),
+        Call(None, "f", 1),
+    ]) + [
+        Label("f"),
+        BeginFunc(params=["x"]),
+        Assign("g", "x"),
+        EndFunc(),
+    ]
+    out, stats = hoist_invariants(code)
+    assert stats["licm_hoisted"] == 0
+    assert _text(out)[:2] == ["L0:", "t0 = i < n"]
+
+
+def test_header_loads_move_only_without_stores():
+    code = [
+        Assign("i", 0),
+        Label("L0"),
+        BinaryOp("t0", "xs", "length", "0"),   # como visitForeach: se ejecuta en toda vuelta
+        BinaryOp("t1", "i", "<", "t0"),
+        CondJump("t1", "L1"),
+        BinaryOp("t2", "xs", "[]", "i"),
+        Param("t2"),
+        Call(None, "print", 1),
+        BinaryOp("i", "i", "+", 1),
+        Jump("L0"),
+        Label("L1"),
+        Return(None),
+    ]
+    out, stats = hoist_invariants(code)
+    assert stats["licm_hoisted"] == 1
+    text = _text(out)
+    assert text.index("L0:") == 2 and text[1].endswith(" = xs length 0")
+
+    # Con un append en el cuerpo la longitud cambia en cada vuelta
+    code.insert(8, BinaryOp("xs", "xs", "append", 1))
+    out, stats = hoist_invariants(code)
+    assert stats["licm_hoisted"] == 0
+
+
+def test_opt_level_2_output_matches_unoptimized():
+    plain = CompilerSession().compile(SRC, "mips")
+    opt = CompilerSession(opt_level=2).compile(SRC, "mips")
+    assert plain.success and opt.success, (plain.errors, opt.errors)
+    assert run_mips(opt.mips) == run_mips(plain.mips) == "-5865\n"
+    assert "licm" in opt.timings
+    assert opt.metrics["licm_loops"] == 2
+    assert "licm (invariantes de lazos)" in opt.optimization_summary()
+    # a * b y a - b quedan antes del lazo externo
+    lines = opt.tac.splitlines()
+    outer = lines.index("i = 0")
+    assert any(line.endswith("a * b") for line in lines[outer:outer + 6])
+    assert any(line.endswith("a - b") for line in lines[outer:outer + 6])
+    assert lines.index("L2:") > max(k for k, line in enumerate(lines) if line.endswith(("a * b", "a - b")))
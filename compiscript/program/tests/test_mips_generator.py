@@ -334,4 +334,35 @@ let result: integer = fibonacci(5);
                                first_word in ['main', 'fibonacci'], \
                                f"Instrucción inválida: {first_word}"
             
-            print(f"Sintaxis MIPS válida")
\ No newline at end of file
+            print(f"Sintaxis MIPS válida")
+
+class TestMIPSGeneratorTypedInput:
+    """MIPSGen sobre instrucciones de tac.py (sin pasar por texto)"""
+
+    def test_typed_and_text_input_match(self):
+        from compiler_session import CompilerSession
+        from mips_generator import MIPSGen
+        src = "function f(x: integer): integer { return x * 2; }\nlet a: integer = f(3) + 1;\n"
+        code = CompilerSession().compile(src, "tac").tac_code
+        assert MIPSGen(code).translate() == MIPSGen([str(t) for t in code]).translate()
+
+    def test_text_loader_builds_instructions(self):
+        from mips_generator import parse_tac_line
+        from tac import BeginFunc, BinaryOp, Call, CondJump, Label, Return
+        assert parse_tac_line("L1:") == Label(name="L1")
+        assert parse_tac_line("BeginFunc") == BeginFunc()
+        assert parse_tac_line("BeginFunc a, b") == BeginFunc(params=["a", "b"])
+        assert parse_tac_line("if_false t0 goto L2") == CondJump(condition="t0", target="L2")
+        assert parse_tac_line("t1 = call f, 2") == Call(target="t1", name="f", num_params=2)
+        assert parse_tac_line("t0 = a <= b") == BinaryOp(target="t0", left="a", op="<=", right="b")
+        assert parse_tac_line("return") == Return(value=None)
+
+    def test_typed_operands_are_not_reparsed(self):
+        from mips_generator import MIPSGen
+        from tac import BinaryOp, UnaryOp
+        asm = MIPSGen([BinaryOp(target="t0", left="x", op="+", right='"a - b"'),
+                       UnaryOp(target="t1", op="-", source="t0")]).translate()
+        # El string se carga en $t9; x y t0 se leen desde su registro
+        assert re.search(r"add \$\w+, \$\w+, \$t9", asm)
+        assert "  sub " not in asm
+        assert re.search(r"subu \$\w+, \$zero, \$\w+", asm)
@@ -0,0 +1,29 @@
+from phase_timer import PhaseTimer
+from compiler_session import CompilerSession
+
+
+def test_phase_records_wall_cpu_and_memory():
+    timer = PhaseTimer(trace_memory=True)
+    with timer.phase("work"):
+        data = [i * i for i in range(20000)]
+    timer.stop()
+    entry = timer.phases["work"]
+    assert entry["wall_ms"] > 0 and entry["cpu_ms"] >= 0
+    assert entry["peak_kib"] > 0
+    assert len(data) == 20000
+
+
+def test_memory_is_optional():
+    timer = PhaseTimer()
+    with timer.phase("x"):
+        pass
+    assert timer.phases["x"]["peak_kib"] is None
+    assert "TOTAL" in timer.report()
+
+
+def test_session_reports_timings_per_phase():
+    res = CompilerSession().compile("let x: integer = 1 + 2;", "all", trace_memory=True)
+    for phase in ("lex", "parse", "semantic", "ast", "tac", "mips", "total"):
+        assert phase in res.timings, res.timings
+    assert res.timings["parse"]["peak_kib"] is not None
+    assert "timings" in res.to_dict()
@@ -0,0 +1,301 @@
+import re
+
+import pytest
+
+from bench_programs import PRESETS, generate_program
+from cfg import CFG, join_functions, merge_globals, split_functions
+from compiler_session import CompilerSession
+from liveness import live_ranges
+from mips_generator import MIPSGen, REGALLOCS, compare_allocators
+from regalloc import CALLEE_SAVED, GetReg, GraphColoring, LinearScan, allocate_registers
+from tac import Assign, BeginFunc, BinaryOp, Call, CondJump, EndFunc, Jump, Label, Param, Return, is_var
+from tests.mips_sim import run_mips
+
+LOOP_SRC = """\
+let total: integer = 0;
+let i: integer = 0;
+while (i < 10) {
+  let sq: integer = i * i;
+  if (sq % 2 == 0) { total = total + sq; } else { total = total - i; }
+  i = i + 1;
+}
+print(total);
+let a: integer = 7;
+let b: integer = 3;
+print(a * b + (a - b) * (a + b) / 2);
+"""
+
+# Codigo global que llama a f con valores vivos a traves de la llamada
+CALL_TAC = [
+    Assign("x", 5),
+    Assign("y", 7),
+    Param("x"),
+    Call("t0", "f", 1),
+    BinaryOp("t1", "t0", "+", "y"),
+    BinaryOp("t1", "t1", "+", "x"),
+    Param("t1"),
+    Call("t2", "print", 1),
+    Jump("END"),
+    Label("f"),
+    BeginFunc(),
+    BinaryOp("t0", "a", "*", 2),
+    Return("t0"),
+    EndFunc(),
+    Label("END"),
+    Assign("z", 0),
+]
+
+# f lee b antes que a y no usa c: los registros de entrada siguen la declaracion
+PARAM_TAC = [
+    Param(10),
+    Param(3),
+    Param(0),
+    Call("t0", "f", 3),
+    Param("t0"),
+    Call("t1", "print", 1),
+    Jump("END"),
+    Label("f"),
+    BeginFunc(params=["a", "b", "c"]),
+    BinaryOp("t0", "b", "-", "a"),
+    Return("t0"),
+    EndFunc(),
+    Label("END"),
+    Assign("z", 0),
+]
+
+# d = one() dentro del lazo: d vive alrededor de la llamada y la llamada lo escribe
+CALL_LOOP_TAC = [
+    Assign("d", 2),
+    Assign("i", 0),
+    Label("L0"),
+    BinaryOp("t0", "i", "<", 3),
+    CondJump("t0", "L1"),
+    Call("d", "one", 0),
+    BinaryOp("i", "i", "+", 1),
+    Jump("L0"),
+    Label("L1"),
+    Param("d"),
+    Call("t1", "print", 1),
+    Jump("END"),
+    Label("one"),
+    BeginFunc(),
+    Return(1),
+    EndFunc(),
+    Label("END"),
+    Assign("z", 0),
+]
+
+
+def _tac(src):
+    res = CompilerSession().compile(src, "tac")
+    assert res.success, res.errors
+    return res.tac_code
+
+
+@pytest.mark.parametrize("regalloc", [
+    "linear", "greedy",
+    LinearScan(caller_saved=["$t0"], callee_saved=[]),
+    LinearScan(caller_saved=["$t0", "$t1"], callee_saved=["$s0"]),
+    "graph",
+    GraphColoring(caller_saved=["$t0"], callee_saved=[]),
+    GraphColoring(caller_saved=["$t0", "$t1"], callee_saved=["$s0"]),
+    "getreg",
+    GetReg(caller_saved=["$t0", "$t1", "$t2"], callee_saved=[]),
+])
+def test_loop_program_output(regalloc):
+    asm = MIPSGen(_tac(LOOP_SRC), regalloc=regalloc).translate()
+    assert run_mips(asm) == "95\n41\n"
+
+
+@pytest.mark.parametrize("regalloc", [
+    LinearScan(),
+    LinearScan(callee_saved=[]),               # sin $s: se guardan alrededor de la llamada
+    LinearScan(caller_saved=["$t0"], callee_saved=[]),
+    GraphColoring(),
+    GraphColoring(callee_saved=[]),
+    GraphColoring(caller_saved=["$t0", "$t1"], callee_saved=[]),
+    GetReg(),
+    GetReg(caller_saved=["$t0", "$t1", "$t2"], callee_saved=[]),
+])
+def test_values_survive_calls(regalloc):
+    asm = MIPSGen(CALL_TAC, regalloc=regalloc).translate()
+    assert run_mips(asm, entry=None, stop="END") == "22\n"
+
+
+@pytest.mark.parametrize("regalloc", [
+    LinearScan(callee_saved=[]),
+    GraphColoring(callee_saved=[]),
+    GetReg(callee_saved=[]),
+])
+def test_call_result_is_not_overwritten_by_restores(regalloc):
+    asm = MIPSGen(CALL_LOOP_TAC, regalloc=regalloc).translate()
+    assert run_mips(asm, entry=None, stop="END") == "1\n"
+
+
+@pytest.mark.parametrize("regalloc", REGALLOCS)
+def test_declared_params_arrive_in_order(regalloc):
+    asm = MIPSGen(PARAM_TAC, regalloc=regalloc).translate()
+    assert run_mips(asm, entry=None, stop="END") == "-7\n"
+
+
+def test_call_crossing_prefers_callee_saved():
+    plan = allocate_registers(CALL_TAC)
+    glob = plan[0]
+    assert glob.location("x", 5)[1] in CALLEE_SAVED
+    assert not glob.saves
+
+    # Sin $s: x (tres referencias) se guarda alrededor de la llamada; a y
+    # (dos referencias) le sale mas barato vivir en la pila
+    glob = allocate_registers(CALL_TAC, LinearScan(callee_saved=[]))[0]
+    kind, reg = glob.location("x", 5)
+    assert kind == "reg" and [r for r, _ in glob.saves[3]] == [reg]
+    assert glob.location("y", 4)[0] == "stack"
+    assert allocate_registers(CALL_TAC)[11].params == [("a", -1)]
+    assert allocate_registers(PARAM_TAC)[9].params == [("a", -1), ("b", -1), None]
+
+
+def test_no_overlapping_ranges_share_a_register():
+    code = _tac(generate_program(PRESETS["small"]))
+    for unit in merge_globals(split_functions(code)):
+        ranges = live_ranges(CFG.build(unit.body, unit.name), only=is_var)
+        alloc = LinearScan().allocate(unit)
+        by_reg = {}
+        for key, reg in alloc.regs.items():
+            by_reg.setdefault(reg, []).append(ranges.intervals[key])
+        for ivs in by_reg.values():
+            ivs.sort()
+            assert all(a[1] < b[0] for a, b in zip(ivs, ivs[1:]))
+
+
+def test_linear_scan_beats_greedy_mapping():
+    counts = compare_allocators(_tac(generate_program(PRESETS["small"])))
+    assert set(counts) == set(REGALLOCS)
+    assert counts["linear"] < counts["greedy"]
+
+
+def test_session_option_and_metrics():
+    src = generate_program(PRESETS["small"])
+    linear = CompilerSession().compile(src, "mips")
+    greedy = CompilerSession(regalloc="greedy").compile(src, "mips")
+    assert linear.metrics["mips_instructions"] < greedy.metrics["mips_instructions"]
+    with pytest.raises(ValueError):
+        MIPSGen([], regalloc="nope")
+
+
+def test_live_ranges_split_reused_names():
+    code = [
+        BinaryOp("t0", "a", "+", 1),
+        Param("t0"),
+        BinaryOp("t1", "b", "+", 2),
+        Param("t1"),
+        Call("t2", "g", 2),              # los param se leen en la call
+        BinaryOp("t0", "t2", "*", 2),    # nuevo valor de t0: otro rango
+        Return("t0"),
+    ]
+    ranges = live_ranges(CFG.build(code, "f"), only=is_var)
+    first, second = ranges.def_at[0], ranges.def_at[5]
+    assert first != second
+    assert ranges.use_at[(4, "t0")] == first and ranges.use_at[(6, "t0")] == second
+    # Los argumentos siguen vivos hasta la call (punto 2*4)
+    assert ranges.intervals[first] == (1, 8)
+    assert ranges.intervals[ranges.def_at[2]][1] == 8
+    assert ranges.intervals[second] == (11, 12)
+
+
+def test_live_ranges_join_entry_value():
+    # b se redefine solo en un camino: en L0 llega el valor de entrada o el 9
+    code = [
+        CondJump("a", "L0"),
+        Assign("b", 9),
+        Label("L0"),
+        BinaryOp("t0", "b", "+", 1),
+        Return("t0"),
+    ]
+    ranges = live_ranges(CFG.build(code, "f"), only=is_var)
+    assert ranges.use_at[(2, "b")] == ranges.entry["b"] == ranges.def_at[1]
+
+
+def test_live_ranges_unreachable_block_is_not_the_entry():
+    # L0 es inalcanzable: la lectura de b ahi no hace de b un valor de entrada
+    code = [
+        Assign("b", 2),
+        Param("a"),
+        Call("t0", "print", 1),
+        Jump("L1"),
+        Label("L0"),
+        Param("b"),
+        Call("t0", "print", 1),
+        Label("L1"),
+        Return("b"),
+    ]
+    ranges = live_ranges(CFG.build(code, "f"), only=is_var)
+    assert set(ranges.entry) == {"a"}
+    unit = split_functions([Label("f"), BeginFunc(params=["a", "b"])] + code + [EndFunc()])[0]
+    assert LinearScan().allocate(unit).params == [ranges.entry["a"], None]
+
+
+def test_graph_coloring_coalesces_copies():
+    # x = t0 / y = x: copias que el coalescing deberia hacer desaparecer
+    code = [
+        BinaryOp("t0", "a", "*", 3),
+        Assign("x", "t0"),
+        Assign("y", "x"),
+        BinaryOp("t1", "y", "+", "a"),
+        Return("t1"),
+    ]
+    unit = split_functions(code)[0]
+    alloc = GraphColoring().allocate(unit)
+    assert alloc.stats["coalesced"] == 2
+    assert alloc.location("t0", 0, is_def=True) == alloc.location("x", 1, is_def=True) == alloc.location("y", 3)
+    asm = MIPSGen(code, regalloc="graph").translate()
+    # Ninguna copia entre registros asignables (solo quedan las de $t8/$t9)
+    assert not re.search(r"move \$[ts][0-7], \$[ts][0-7]\b", asm)
+
+
+def test_graph_coloring_not_worse_than_linear_scan():
+    counts = compare_allocators(_tac(generate_program(PRESETS["small"])))
+    assert counts["graph"] <= counts["linear"]
+
+
+def test_opt_level_2_selects_graph_allocator():
+    src = generate_program(PRESETS["small"])
+    res = CompilerSession(opt_level=2).compile(src, "mips")
+    assert res.success, res.errors
+    assert "regalloc" in res.timings
+    # Las copias de este programa ya las coalesce copyprop.py sobre el TAC; el
+    # asignador se queda con las que sobreviven (ninguna aqui)
+    assert "moves_coalesced" in res.metrics and res.metrics["copies_coalesced"] > 0
+    assert CompilerSession(opt_level=2).regalloc == "graph"
+    assert CompilerSession(opt_level=2, regalloc="linear").regalloc == "linear"
+
+
+def test_opt_level_2_call_result_in_a_loop():
+    src = ("function one(): integer { return 1; }\n"
+           "let d: integer = 2;\nlet s: integer = 0;\nlet i: integer = 0;\n"
+           "while (i < 3) { d = one(); s = s + d; i = i + 1; }\nprint(d);\nprint(s);\n")
+    session = CompilerSession(opt_level=2)
+    res = session.compile(src, "tac")
+    assert res.success, res.errors
+    assert "d = call one, 0" in res.tac
+    # Codigo global primero y la funcion despues, como CALL_LOOP_TAC
+    units = split_functions(res.tac_code)
+    code = join_functions(u for u in units if not u.is_function) + [Jump("END")] \
+        + join_functions(u for u in units if u.is_function) + [Label("END"), Assign("z", 0)]
+    # Sin $s, d queda en un $t que se guarda alrededor de la llamada
+    for regalloc in (session.regalloc, GraphColoring(callee_saved=[]),
+                     GraphColoring(caller_saved=["$t0", "$t1"], callee_saved=[])):
+        asm = MIPSGen(code, regalloc=regalloc).translate()
+        assert run_mips(asm, entry=None, stop="END") == "1\n3\n"
+
+
+def test_getreg_keeps_values_in_memory_between_blocks():
+    code = _tac(LOOP_SRC)
+    alloc = GetReg(caller_saved=["$t0", "$t1", "$t2"], callee_saved=[]).allocate(merge_globals(split_functions(code))[0])
+    stores = [line for lines in list(alloc.code_before.values()) + list(alloc.code_after.values())
+              for line in lines if line.startswith("sw")]
+    # total e i cruzan bloques: se guardan en sus ranuras; las ranuras se reutilizan
+    assert any("# Store total" in line for line in stores)
+    assert any("# Store i" in line for line in stores)
+    assert alloc.num_slots <= 3
+    counts = compare_allocators(_tac(generate_program(PRESETS["small"])))
+    assert counts["getreg"] < counts["greedy"]
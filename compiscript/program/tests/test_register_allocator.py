@@ -158,3 +158,71 @@ def test_load_from_stack_error(allocator):
     allocator.get_reg('var_a') # var_a está en $t0, no en la pila
     with pytest.raises(ValueError, match="La variable 'var_a' no está en la pila."):
         allocator.load_from_stack('var_a')
+
+def _fill(allocator, n):
+    """Ocupa n registros con var_0..var_{n-1}, como si cada una se hubiera calculado."""
+    for i in range(n):
+        allocator.get_reg(f'var_{i}')
+
+def test_next_use_spills_furthest_value():
+    """Con información de próximo uso se desborda el valor que se usa más tarde (Belady)."""
+    allocator = RegisterAllocator(temp_regs=['$t0', '$t1', '$t2'])
+    _fill(allocator, 3)
+    allocator.set_next_use({'var_0': 1, 'var_1': 5, 'var_2': 2}, live_out={'var_1'})
+    reg = allocator.get_reg('new_var')
+    assert reg == '$t1'
+    assert allocator.address_descriptor['var_1'] == -4
+    assert allocator.get_spill_code() == ["sw $t1, -4($sp)  # Spill var_1"]
+
+def test_next_use_prefers_dead_value():
+    """Un valor que ya no se usa deja su registro sin generar código."""
+    allocator = RegisterAllocator(temp_regs=['$t0', '$t1'])
+    _fill(allocator, 2)
+    allocator.set_next_use({'var_0': 9, 'var_1': None})
+    assert allocator.get_reg('new_var') == '$t1'
+    assert 'var_1' not in allocator.address_descriptor
+    assert not allocator.get_spill_code()
+    assert allocator.stack_offset == 0
+
+def test_clean_value_is_not_stored_again():
+    """Un valor cargado de la pila y no modificado se desborda sin sw."""
+    allocator = RegisterAllocator(temp_regs=['$t0', '$t1'])
+    _fill(allocator, 2)
+    allocator.get_reg('var_2')              # desborda var_0 a -4
+    allocator.load('var_0')                 # desborda var_1 a -8 y recarga var_0 (limpia)
+    allocator.get_spill_code()
+    allocator.set_next_use({'var_0': 7, 'var_2': 1}, live_out={'var_0', 'var_2'})
+    allocator.get_reg('var_3')
+    assert allocator.address_descriptor['var_0'] == -4
+    assert not allocator.get_spill_code()   # la copia en -4 sigue vigente
+
+def test_freed_stack_slots_are_reused():
+    """La posición de la pila de una variable descartada se reutiliza."""
+    allocator = RegisterAllocator(temp_regs=['$t0'])
+    allocator.get_reg('var_a')
+    allocator.get_reg('var_b')              # var_a -> -4
+    allocator.free_var('var_a')
+    allocator.get_reg('var_c')              # var_b -> la posición que dejó var_a
+    assert allocator.address_descriptor['var_b'] == -4
+    assert allocator.stack_offset == -4
+
+def test_saved_registers_before_spilling():
+    """Con use_saved_regs se usan los $s antes de desbordar."""
+    allocator = RegisterAllocator(use_saved_regs=True)
+    _fill(allocator, 11)
+    assert allocator.address_descriptor['var_10'] == '$s0'
+    assert not allocator.get_spill_code()
+
+def test_flush_and_clear_block_boundary():
+    """Al final de un bloque solo se guardan los valores modificados que siguen vivos."""
+    allocator = RegisterAllocator()
+    allocator.place_in_memory('var_a')
+    allocator.load('var_a')
+    allocator.get_reg('var_b')
+    allocator.get_reg('var_c')
+    assert allocator.get_spill_code() == ["lw $t0, -4($sp)  # Load var_a"]
+    allocator.flush({'var_a', 'var_b'})
+    assert allocator.get_spill_code() == ["sw $t1, -8($sp)  # Store var_b"]
+    allocator.clear()
+    assert not allocator.register_descriptor
+    assert allocator.address_descriptor == {'var_a': -4, 'var_b': -8}
@@ -0,0 +1,201 @@
+from cfg import CFG
+from compiler_session import CompilerSession
+from sccp import BOTTOM, SCCP, fold_binary, global_constants, run_sccp
+from ssa import _sequentialize, from_ssa, to_ssa
+from tac import Assign, BinaryOp, Call, CondJump, Jump, Label, Param, Phi, Return, uses
+from tests.mips_sim import run_mips
+from tests.tac_sim import run_tac
+
+LOOP = [
+    Assign("s", 0),
+    Assign("i", 0),
+    Label("L0"),
+    BinaryOp("t0", "i", "<", "n"),
+    CondJump("t0", "L1"),
+    BinaryOp("t1", "s", "+", "i"),
+    Assign("s", "t1"),
+    BinaryOp("t1", "i", "+", 1),
+    Assign("i", "t1"),
+    Jump("L0"),
+    Label("L1"),
+    Return("s"),
+]
+
+SRC = """\
+let debug: boolean = false;
+let n: integer = 4;
+let total: integer = 0;
+let i: integer = 0;
+while (i < n) {
+  if (debug) { print(i); }
+  total = total + i * 2;
+  i = i + 1;
+}
+let mode: integer = 2;
+let scale: integer = 1;
+if (mode == 2) { scale = 10; } else { scale = 5; }
+print(total * scale);
+print(scale + 1);
+"""
+
+
+def _phis(cfg):
+    return [i for bid in cfg.order for i in cfg.blocks[bid].instrs if isinstance(i, Phi)]
+
+
+def test_ssa_places_pruned_phis_and_renames():
+    cfg = CFG.build(LOOP, "f")
+    info = to_ssa(cfg)
+    # Solo s e i estan vivas en la cabecera del lazo (t0/t1 no llevan Phi)
+    assert sorted(info.base[p.target] for p in _phis(cfg)) == ["i", "s"]
+    header = cfg.label_map()["L0"]
+    phi_i = next(p for p in cfg.blocks[header].instrs if isinstance(p, Phi) and p.target.startswith("i."))
+    assert len(phi_i.args) == 2 and "i.1" in phi_i.args.values()
+    # Cada version se define una sola vez; n no se define y queda como version 0
+    targets = [i.target for bid in cfg.order for i in cfg.blocks[bid].instrs if hasattr(i, "target")
+               and not isinstance(i, (Jump, CondJump))]
+    assert len(targets) == len(set(targets))
+    assert "n" in uses(cfg.blocks[header].instrs[2])
+
+
+def test_ssa_round_trip_restores_names():
+    cfg = CFG.build(LOOP, "f")
+    info = to_ssa(cfg)
+    from_ssa(cfg, info)
+    assert info.copies == 0
+    assert list(map(str, cfg.linearize())) == list(map(str, LOOP))
+
+
+def test_ssa_calls_define_clobbered_variables():
+    code = [
+        Assign("g", 2),
+        Call(None, "f", 0),
+        Param("g"),
+        Call("t0", "print", 1),
+    ]
+    cfg = CFG.build(code, "global")
+    info = to_ssa(cfg, {"g", "k"})
+    # Cada llamada (print incluida) define una version nueva de g; k no aparece
+    assert info.versions == {"g": ["g.1", "g.2", "g.3"], "t0": ["t0.1"]}
+    assert info.clobbers == {"g.2", "g.3"}
+    assert uses(cfg.blocks[cfg.entry].instrs[2]) == ["g.2"]
+    sccp = SCCP(cfg, info).run()
+    assert sccp.value("g.2") is BOTTOM
+
+
+def test_destruction_copies_constants_and_swaps():
+    swap = _sequentialize([("a", "b"), ("b", "a"), ("c", 5)], lambda: "t9")
+    env = {"a": 1, "b": 2, "c": 0}
+    for instr in swap:
+        env[instr.target] = env.get(instr.source, instr.source)
+    assert (env["a"], env["b"], env["c"]) == (2, 1, 5)
+
+    cfg = CFG.build(LOOP, "f")
+    info = to_ssa(cfg)
+    # Reemplazar el argumento de entrada de la Phi de s por el literal 0
+    header = cfg.label_map()["L0"]
+    phi_s = next(p for p in _phis(cfg) if p.target.startswith("s."))
+    phi_s.args = {p: (0 if a == "s.1" else a) for p, a in phi_s.args.items()}
+    from_ssa(cfg, info)
+    assert info.copies == 1
+    code = cfg.linearize()
+    assert sum(1 for i in code if isinstance(i, Assign) and i.target == "s" and i.source == 0) == 2
+    assert header in cfg.blocks
+
+
+def test_fold_binary_follows_mips():
+    assert fold_binary("+", 2147483647, 1) == -2147483648
+    assert fold_binary("/", -7, 2) == -3
+    assert fold_binary("%", -7, 3) == -1
+    assert fold_binary("/", 1, 0) is BOTTOM
+    assert fold_binary("&&", False, BOTTOM) is False
+    assert fold_binary("==", True, 1) is BOTTOM
+
+
+def test_sccp_resolves_constant_branches():
+    code = [
+        Assign("flag", False),
+        Assign("x", 3),
+        CondJump("flag", "L0"),
+        Assign("x", 4),
+        Label("L0"),
+        BinaryOp("t0", "x", "*", 2),
+        Return("t0"),
+    ]
+    cfg = CFG.build(code, "g")
+    info = to_ssa(cfg)
+    sccp = SCCP(cfg, info).run()
+    removed = sccp.rewrite()
+    from_ssa(cfg, info)
+    out = cfg.linearize()
+    assert sccp.branches_removed == 1 and removed
+    assert Return(6) in out
+    assert not any(isinstance(i, CondJump) for i in out)
+
+
+def test_run_sccp_matches_unoptimized_output():
+    plain = CompilerSession().compile(SRC, "mips")
+    opt = CompilerSession(opt_level=2).compile(SRC, "mips")
+    assert plain.success and opt.success, (plain.errors, opt.errors)
+    assert run_mips(opt.mips) == run_mips(plain.mips) == "120\n11\n"
+    assert "sccp" in opt.timings
+    assert opt.metrics["sccp_branches_removed"] == 2
+    assert opt.metrics["sccp_instrs_removed"] > 0
+    assert opt.metrics["mips_instructions"] < plain.metrics["mips_instructions"]
+    # `debug` es false: el print dentro del lazo desaparece
+    assert sum(1 for i in opt.tac_code if str(i).startswith("param")) == 2
+
+
+def test_global_constants_flow_into_functions():
+    src = ("const N: integer = 5;\n"
+           "let k: integer = 3;\n"
+           "function f(a: integer): integer {\n"
+           "  let s: integer = 0;\n"
+           "  let i: integer = 0;\n"
+           "  while (i < N) { s = s + a; i = i + 1; }\n"
+           "  return s;\n"
+           "}\n"
+           "function g(k: integer): integer { return k; }\n"
+           "print(f(k));\n")
+    res = CompilerSession(rename_temps=False).compile(src, "tac")
+    assert res.success, res.errors
+    assert global_constants(res.ast_root) == {"N"}
+    code, stats = run_sccp(res.tac_code, global_constants(res.ast_root))
+    text = "\n".join(map(str, code))
+    assert "< 5" in text and "< N" not in text
+    # k es una variable (y ademas un parametro de g): no se propaga a las funciones
+    assert "return k" in text
+    assert stats["sccp_consts"] >= 1
+
+
+def test_units_entered_from_outside_are_left_alone():
+    # La funcion declarada dentro del while parte el lazo en dos tramos globales
+    src = ("let i: integer = 0;\n"
+           "while (i < 3) {\n"
+           "  function h(x: integer): integer { return x + 1; }\n"
+           "  print(h(i));\n"
+           "  i = i + 1;\n"
+           "}\n"
+           "print(i);\n")
+    res = CompilerSession(rename_temps=False).compile(src, "tac")
+    assert res.success, res.errors
+    code, stats = run_sccp(res.tac_code)
+    assert list(map(str, code)) == list(map(str, res.tac_code))
+    assert stats["sccp_branches_removed"] == stats["sccp_blocks_removed"] == 0
+
+
+def test_globals_written_by_calls_are_not_constant():
+    src = ("let g: integer = 1;\n"
+           "function f(): integer { g = 7; return 0; }\n"
+           "g = 2;\n"
+           "let r: integer = f();\n"
+           "print(g);\n"
+           "let s: integer = g * 3;\n"
+           "g = 2;\n"
+           "r = f();\n"
+           "print(s + g);\n")
+    plain = CompilerSession().compile(src, "tac")
+    opt = CompilerSession(opt_level=2).compile(src, "tac")
+    assert plain.success and opt.success, (plain.errors, opt.errors)
+    assert run_tac(opt.tac_code) == run_tac(plain.tac_code) == "7\n28\n"
+    assert "param 2" not in opt.tac
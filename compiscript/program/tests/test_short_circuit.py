@@ -0,0 +1,87 @@
+from cfg import join_functions, split_functions
+from compiler_session import CompilerSession
+from mips_generator import MIPSGen, REGALLOCS
+from tac import Assign, Jump, Label
+from tests.mips_sim import run_mips
+
+SRC = """\
+let x: integer = 0;
+let n: integer = 5;
+let i: integer = 0;
+let hits: integer = 0;
+while (i < n && !(i == 3)) {
+  if (x != 0 && 10 / x > 1 || i >= 2) { hits = hits + 1; }
+  i = i + 1;
+}
+let ok: boolean = i == 3 || 10 / x > 0;
+let both: boolean = ok && hits > 5;
+do { i = i - 1; } while (i > 0 || !ok);
+print(i);
+print(hits);
+print(ok ? 1 : 0);
+print(both ? 1 : 0);
+"""
+
+
+def _lines(text):
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def test_right_operand_is_skipped():
+    res = CompilerSession().compile("function f(): boolean { return true; }\n"
+                                    "let a: boolean = false;\n"
+                                    "if (a && f()) { print(1); }\n", "tac")
+    assert res.success, res.errors
+    tac = _lines(res.tac)
+    assert not any("&&" in line for line in tac)
+    # if_false a goto L salta por encima de la llamada a f
+    jump = tac.index(next(line for line in tac if line.startswith("if_false a goto")))
+    call = tac.index(next(line for line in tac if "call f" in line))
+    label = tac.index(tac[jump].split()[-1] + ":")
+    assert jump < call < label
+
+
+def test_do_while_jumps_back_on_true():
+    res = CompilerSession().compile("let i: integer = 3;\ndo { i = i - 1; } while (i > 0);\n", "tac")
+    tac = _lines(res.tac)
+    # i > 0 se pregunta como if_false (i <= 0): sin goto extra al final del lazo
+    assert tac[-3].endswith("= i <= 0") and tac[-2].startswith("if_false") and not tac[-1].startswith("goto")
+
+
+def test_comparisons_branch_directly():
+    res = CompilerSession().compile("let i: integer = 0;\nwhile (i != 4) { i = i + 1; }\nprint(i);\n", "mips")
+    asm = _lines(res.mips)
+    assert run_mips(res.mips) == "4\n"
+    # Ni xor/sltu ni el booleano: beq i, 4 sale del lazo
+    assert not any(line.split()[0] in ("xor", "sltu", "sltiu") for line in asm)
+    assert any(line.startswith("beq") and "$zero" not in line for line in asm)
+
+
+def test_output_matches_at_every_level():
+    for level in (0, 1, 2):
+        res = CompilerSession(opt_level=level).compile(SRC, "mips")
+        assert res.success, res.errors
+        assert "unhandled" not in res.mips
+        # Con x == 0 las divisiones no se ejecutan
+        assert run_mips(res.mips) == "0\n1\n1\n0\n", level
+
+
+def test_literal_conditions_leave_no_dead_branches():
+    src = ("function f(a: integer, b: integer): integer {\n"
+           "  b = 2;\n"
+           "  if (true) { print(a); } else { }\n"
+           "  if (false && a > 0) { print(b); }\n"
+           "  return b;\n"
+           "}\n"
+           "print(f(5, 9));\n")
+    res = CompilerSession().compile(src, "tac")
+    assert res.success, res.errors
+    tac = _lines(res.tac)
+    assert not any(line.startswith(("if_false", "goto")) for line in tac)
+    # Codigo global primero y la funcion despues, para correrlo sin main
+    units = split_functions(res.tac_code)
+    code = join_functions(u for u in units if not u.is_function) + [Jump("END")] \
+        + join_functions(u for u in units if u.is_function) + [Label("END"), Assign("z", 0)]
+    for regalloc in REGALLOCS:
+        asm = MIPSGen(code, regalloc=regalloc).translate()
+        assert run_mips(asm, entry=None, stop="END") == "5\n2\n", regalloc
@@ -0,0 +1,85 @@
+import copy
+import tracemalloc
+
+import pytest
+
+from bench_programs import ProgramSpec, generate_program
+from compiler_session import CompilerSession
+from tac import Assign, BinaryOp, Call, CondJump, Jump, Label, Param, Return
+from tac_packed import KIND_CONST, KIND_LABEL, KIND_NAME, KIND_TEMP, NONE, OP_BINARY, PackedTAC
+
+
+def _tac_of(src):
+    res = CompilerSession().compile(src, "tac")
+    assert res.success, res.errors
+    return res.tac_code
+
+
+def test_round_trip_is_exact():
+    code = _tac_of(generate_program(ProgramSpec(functions=4, depth=3, class_depth=2, array_size=5)))
+    packed = PackedTAC.from_instructions(code)
+    assert len(packed) == len(code)
+    assert packed.to_instructions() == code
+    assert str(packed) == "\n".join(map(str, code))
+    assert packed[-1] == code[-1]
+
+
+def test_operands_are_interned_with_kinds():
+    code = [
+        Assign(target="x", source="1"),
+        BinaryOp(target="t0", left="x", op="+", right="x"),
+        CondJump(condition="t0", target="L1"),
+        Call(target=None, name="f", num_params=0),
+        Label(name="L1"),
+        Return(value=None),
+    ]
+    packed = PackedTAC.from_instructions(code)
+    ops = packed.operands
+    x = ops.lookup("x")
+    assert packed.dst[0] == x == packed.arg1[1] == packed.arg2[1]
+    assert packed.opcode[1] == OP_BINARY and packed.operators[packed.oper[1]] == "+"
+    assert [ops.kind(ops.lookup(v)) for v in ("x", "t0", "1")] == [KIND_NAME, KIND_TEMP, KIND_CONST]
+    assert ops.kind(ops.lookup("L1", is_label=True)) == KIND_LABEL and ops.lookup("L1") == NONE
+    assert ops.lookup(0) != NONE and ops.lookup(0) != ops.lookup("0")   # 0 (int) no es "0"
+    assert packed.used(1) == (x, x) and packed.defined(1) == ops.lookup("t0")
+    assert packed.used(3) == () and packed.arg1[5] == NONE
+    assert packed.to_instructions() == code
+
+
+def test_labels_do_not_share_entries_with_variables():
+    # L1 es un nombre valido de variable y tambien el de una etiqueta de TACGenerator
+    code = [
+        Assign(target="L1", source="1"),
+        Label(name="L1"),
+        Param(value="L1"),
+        Jump(target="L1"),
+    ]
+    packed = PackedTAC.from_instructions(code)
+    ops = packed.operands
+    var, label = ops.lookup("L1"), ops.lookup("L1", is_label=True)
+    assert var != label and ops.kind(var) == KIND_NAME and ops.kind(label) == KIND_LABEL
+    assert packed.dst[0] == var and packed.arg1[1] == packed.arg1[3] == label
+    assert packed.used(2) == (var,)
+    assert packed.to_instructions() == code
+
+
+def test_unknown_instruction_rejected():
+    with pytest.raises(TypeError):
+        PackedTAC().append(object())
+
+
+def test_uses_a_fraction_of_the_memory():
+    code = _tac_of(generate_program(ProgramSpec(functions=10, depth=3, expr_len=8, array_size=16)))
+
+    def retained(build):
+        # Los strings de operandos ya existen: solo se mide lo que agrega cada representacion
+        tracemalloc.start()
+        obj = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return obj, size
+
+    objects, objects_size = retained(lambda: copy.deepcopy(code))
+    packed, packed_size = retained(lambda: PackedTAC.from_instructions(code))
+    assert objects == packed.to_instructions()
+    assert packed_size < objects_size / 3, (packed_size, objects_size)
@@ -0,0 +1,77 @@
+from bench_programs import PRESETS, generate_program
+from cfg import CFG
+from compiler_session import CompilerSession
+from liveness import Liveness, live_intervals
+from tac import Assign, BeginFunc, BinaryOp, CondJump, EndFunc, Jump, Label, Param, is_temp
+from temp_rename import color_intervals, rename_temps
+
+
+def _shape(instr):
+    # Instruccion sin nombres de temporales: el renombrado no debe cambiar nada mas
+    return (type(instr), tuple(v for v in vars(instr).values() if not is_temp(v)))
+
+
+def test_liveness_across_loop():
+    code = [
+        Assign("i", 0),
+        Label("L0"),
+        BinaryOp("t0", "i", "<", 3),
+        CondJump("t0", "L1"),
+        BinaryOp("t1", "i", "+", 1),
+        Assign("i", "t1"),
+        Jump("L0"),
+        Label("L1"),
+        Param("i"),
+    ]
+    cfg = CFG.build(code, "f")
+    live = Liveness(cfg)
+    header = cfg.label_map()["L0"]
+    assert live.live_in[header] == {"i"}
+    assert "t0" not in live.live_out[header]
+
+    intervals, positions = live_intervals(cfg, only=is_temp)
+    assert set(intervals) == {"t0", "t1"}
+    assert len(positions) == sum(not isinstance(i, Label) for i in code)
+    # t0 muere en el if_false y t1 nace despues: no se solapan
+    assert intervals["t0"][1] < intervals["t1"][0]
+
+
+def test_color_intervals_is_minimal():
+    colors = color_intervals({"a": (0, 5), "b": (1, 3), "c": (4, 8), "d": (6, 7)})
+    assert colors["a"] != colors["b"] and colors["a"] != colors["c"] and colors["c"] != colors["d"]
+    assert len(set(colors.values())) == 2
+
+
+def test_rename_reduces_temps_and_keeps_shape():
+    src = generate_program(PRESETS["small"])
+    res = CompilerSession(rename_temps=False).compile(src, "tac")
+    assert res.success, res.errors
+    new, stats = rename_temps(res.tac_code)
+    assert stats["temps_after"] < stats["temps_before"]
+    assert [_shape(i) for i in new] == [_shape(i) for i in res.tac_code]
+    # No modifica la lista original
+    assert rename_temps(res.tac_code)[0] == new
+
+
+def test_temp_live_into_unit_keeps_its_name():
+    code = [
+        Label("f"),
+        BeginFunc(),
+        Assign("t5", 1),
+        Assign("x", "t5"),
+        Param("t9"),     # t9 llega vivo a f: no se renombra
+        Assign("t3", 2),
+        Param("t3"),
+        EndFunc(),
+    ]
+    new, _ = rename_temps(code)
+    assert new[4] == Param("t9")
+    assert new[2].target == new[5].target == "t0"
+
+
+def test_session_reports_temp_counts():
+    res = CompilerSession().compile(generate_program(PRESETS["small"]), "tac")
+    assert res.success, res.errors
+    assert {"temps_before", "temps_after"} <= set(res.metrics)
+    assert "temps" in res.timings
+    assert res.metrics["temps_after"] <= res.metrics["temps_before"]
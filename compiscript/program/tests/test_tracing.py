@@ -0,0 +1,52 @@
+import io
+import json
+
+import pytest
+
+import tracing
+from compiler_session import CompilerSession
+from tac_generator import TACGenerator
+
+SRC = "let a: integer = 1 + 2;\nlet b: integer = a * 3;"
+
+
+@pytest.fixture(autouse=True)
+def _reset_tracing():
+    yield
+    tracing.close()
+
+
+def test_disabled_by_default_emits_nothing(capsys):
+    tracing.close()
+    res = CompilerSession().compile(SRC, "all")
+    assert res.success
+    out, err = capsys.readouterr()
+    assert out == "" and err == ""
+    assert TACGenerator.visit is TACGenerator(None).visit.__func__
+
+
+def test_parse_spec_levels_per_phase():
+    assert tracing.parse_spec("info,tac=trace") == (tracing.INFO, {"tac": tracing.TRACE})
+    assert tracing.parse_spec("off") == (tracing.OFF, {})
+    with pytest.raises(ValueError):
+        tracing.parse_spec("tac=verbose")
+
+
+def test_phase_filter_and_text_stream():
+    stream = io.StringIO()
+    tracing.configure("ast=debug", stream=stream)
+    CompilerSession().compile(SRC, "tac")
+    text = stream.getvalue()
+    assert "[ast:debug] var_decl name=a" in text
+    assert "[tac:" not in text
+
+
+def test_json_lines_file_with_node_level_trace(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracing.configure("tac=trace", str(path))
+    CompilerSession().compile(SRC, "tac")
+    tracing.close()
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    events = {r["event"] for r in records}
+    assert {"program_start", "program_end", "var_decl", "visit", "visited"} <= events
+    assert all(r["phase"] == "tac" for r in records)
@@ -0,0 +1,123 @@
+"""
+Trazas estructuradas de las fases del compilador.
+
+Reemplaza los print() de depuracion de AstBuilder y TACGenerator. Apagado
+(el caso normal) no cuesta nada en las rutas calientes: los generadores
+consultan enabled() una sola vez al crearse y, si la traza por nodo no esta
+pedida, ni siquiera usan la version instrumentada de visit().
+
+Configuracion con una especificacion de niveles por fase:
+
+    "debug"               -> todas las fases en nivel debug
+    "tac=trace,ast=info"  -> niveles por fase
+    "info,tac=trace"      -> nivel por defecto + excepciones
+    "off"                 -> apagado
+
+Niveles: off < info < debug < trace (trace = un evento por nodo visitado).
+
+Las trazas salen como texto a stderr y, opcionalmente, como JSON lines a un
+archivo (un objeto por evento). Tambien se pueden activar con las variables
+de entorno CPS_TRACE (especificacion) y CPS_TRACE_FILE (ruta del archivo).
+"""
+import json
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+OFF, INFO, DEBUG, TRACE = 0, 1, 2, 3
+
+LEVEL_NAMES = {"off": OFF, "info": INFO, "debug": DEBUG, "trace": TRACE}
+_NAMES_BY_LEVEL = {v: k for k, v in LEVEL_NAMES.items()}
+
+# Estado global (como el modulo logging): nivel por defecto y por fase
+_default_level = OFF
+_phase_levels = {}
+_stream = None        # texto legible (normalmente sys.stderr)
+_file = None          # JSON lines
+_lock = threading.Lock()
+
+# True si hay alguna fase con traza; permite guardas baratas en el codigo
+ACTIVE = False
+
+
+def parse_spec(spec: str):
+    """'info,tac=trace' -> (INFO, {'tac': TRACE}). Lanza ValueError si no es valida."""
+    default, phases = OFF, {}
+    for part in (spec or "").split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        phase, sep, level = part.partition("=")
+        if not sep:
+            phase, level = None, phase
+        if level not in LEVEL_NAMES:
+            raise ValueError(f"Nivel de traza desconocido: {level!r}")
+        if phase is None:
+            default = LEVEL_NAMES[level]
+        else:
+            phases[phase.strip()] = LEVEL_NAMES[level]
+    return default, phases
+
+
+def configure(spec: Optional[str] = None, file: Optional[str] = None, stream=None) -> None:
+    """
+    (Re)configura las trazas. Sin spec ni file las apaga.
+
+    stream: destino del texto legible (por defecto sys.stderr); con file y sin
+    stream explicito solo se escribe el archivo JSON lines.
+    """
+    global _default_level, _phase_levels, _stream, _file, ACTIVE
+    default, phases = parse_spec(spec or "")
+    if file and not spec:
+        default = DEBUG
+    with _lock:
+        if _file is not None:
+            _file.close()
+        _default_level, _phase_levels = default, phases
+        _file = open(file, "a", encoding="utf-8") if file else None
+        if stream is not None:
+            _stream = stream
+        else:
+            _stream = None if file else sys.stderr
+        ACTIVE = _default_level > OFF or any(v > OFF for v in _phase_levels.values())
+
+
+def configure_from_env() -> None:
+    spec = os.environ.get("CPS_TRACE")
+    file = os.environ.get("CPS_TRACE_FILE")
+    if spec or file:
+        configure(spec, file)
+
+
+def close() -> None:
+    """Apaga las trazas y cierra el archivo, si lo hay."""
+    configure(None)
+
+
+def level_for(phase: str) -> int:
+    return _phase_levels.get(phase, _default_level)
+
+
+def enabled(phase: str, level: int = DEBUG) -> bool:
+    return ACTIVE and level_for(phase) >= level
+
+
+def emit(phase: str, level: int, event: str, **fields) -> None:
+    """Registra un evento si la fase tiene ese nivel habilitado."""
+    if not enabled(phase, level):
+        return
+    record = {"ts": round(time.time(), 6), "phase": phase,
+              "level": _NAMES_BY_LEVEL[level], "event": event}
+    record.update(fields)
+    with _lock:
+        if _stream is not None:
+            details = " ".join(f"{k}={v}" for k, v in fields.items())
+            _stream.write(f"[{phase}:{record['level']}] {event} {details}".rstrip() + "\n")
+        if _file is not None:
+            _file.write(json.dumps(record, default=str) + "\n")
+            _file.flush()
+
+
+configure_from_env()
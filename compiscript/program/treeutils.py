@@ -1,4 +1,5 @@
 from antlr4.tree.Tree import TerminalNodeImpl
+from dataclasses import is_dataclass, fields
 
 def _escape(s: str) -> str:
     return s.replace('"', r'\"')
@@ -48,3 +49,73 @@ def tree_to_dot(tree, parser) -> str:
     walk(tree)
     lines.append("}")
     return "\n".join(lines)
+
+def dump_ast_to_str(node, indent=0):
+    pad = "  " * indent
+    out = []
+    if not is_dataclass(node):
+        return f"{pad}{repr(node)}"
+    cls = node.__class__.__name__
+    out.append(f"{pad}{cls}")
+    for f in fields(node):
+        if f.name in ("line", "col"):  
+            continue
+        val = getattr(node, f.name)
+        if is_dataclass(val):
+            out.append(f"{pad}  .{f.name}:")
+            out.append(dump_ast_to_str(val, indent + 2))
+        elif isinstance(val, list):
+            out.append(f"{pad}  .{f.name}:")
+            for it in val:
+                if is_dataclass(it):
+                    out.append(dump_ast_to_str(it, indent + 2))
+                else:
+                    out.append(f"{pad}    {it}")
+        else:
+            out.append(f"{pad}  {f.name}={val}")
+    return "\n".join(out)
+
+def ast_to_dot(root):
+    lines = ["digraph AST {", '  node [shape=box, fontname="Arial"];']
+    counter = 0
+
+    def new_id():
+        nonlocal counter
+        nid = f"n{counter}"
+        counter += 1
+        return nid
+
+    def label_of(node):
+        lbl = node.__class__.__name__
+        for k in ("name", "op", "kind", "class_name"):
+            if hasattr(node, k):
+                v = getattr(node, k)
+                if v is not None:
+                    lbl += f"\\n{k}={v}"
+        return lbl
+
+    def is_node(x):
+        return is_dataclass(x)
+
+    def walk(node):
+        nid = new_id()
+        lines.append(f'  {nid} [label="{label_of(node)}"];')
+        for f in fields(node):
+            if f.name in ("line", "col"):
+                continue
+            val = getattr(node, f.name)
+            def link(child):
+                if child is None or not is_node(child):
+                    return
+                cid = walk(child)
+                lines.append(f'  {nid} -> {cid} [label="{f.name}"];')
+            if isinstance(val, list):
+                for ch in val:
+                    link(ch)
+            else:
+                link(val)
+        return nid
+
+    walk(root)
+    lines.append("}")
+    return "\n".join(lines)
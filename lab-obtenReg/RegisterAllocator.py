@@ -1,13 +1,22 @@
 import collections
+import math
 
 class RegisterAllocator:
     """
     Gestiona la asignación de registros MIPS y el desbordamiento a la pila (spilling).
-    
+
     Este asignador utiliza un enfoque simple para la gestión de registros.
     Asigna registros temporales ($t0-$t9) primero. Si todos están ocupados,
     realiza un desbordamiento (spill) de un registro a la pila para liberar espacio.
-    
+
+    Con información de próximo uso (set_next_use) se comporta como el getReg
+    clásico dentro de un bloque básico:
+    - al desbordar prefiere registros con valores muertos o que ya están en
+      memoria (limpios), y entre los demás el valor cuyo próximo uso está más
+      lejos (Belady);
+    - no guarda de nuevo un valor limpio: su copia en la pila sigue vigente;
+    - las posiciones de la pila de variables liberadas se reutilizan.
+
     Atributos:
         temp_regs (collections.deque): Cola de registros temporales ($t) disponibles.
         saved_regs (collections.deque): Cola de registros guardados ($s) disponibles.
@@ -17,22 +26,67 @@ class RegisterAllocator:
                                    Ej: {'var_x': '$t0', 'var_y': -4}
         stack_offset (int): El desplazamiento actual en la pila para el próximo desbordamiento.
         spill_code (list): Almacena el código MIPS generado para operaciones de spill/load.
+        stack_home (dict): Posición en la pila asignada a cada variable desbordada.
+        dirty (set): Variables cuyo valor en registro todavía no está en su posición de la pila.
+        free_slots (list): Posiciones de la pila liberadas, disponibles para reutilizar.
+        next_use (dict o None): Distancia al próximo uso de cada variable en el bloque
+                                (None: no se vuelve a usar). None si no hay información.
+        live_out (set): Variables vivas a la salida del bloque actual.
+        pinned (set): Operandos de la instrucción actual, que no se pueden desbordar.
     """
 
-    def __init__(self):
-        """Inicializa el asignador de registros."""
+    def __init__(self, temp_regs=None, saved_regs=None, use_saved_regs=False):
+        """
+        Inicializa el asignador de registros.
+
+        Args:
+            temp_regs (iterable, opcional): Registros temporales a usar (por defecto $t0-$t9).
+            saved_regs (iterable, opcional): Registros guardados a usar (por defecto $s0-$s7).
+            use_saved_regs (bool): Si es True, get_reg usa los registros $s cuando
+                                   se agotan los $t, antes de desbordar.
+        """
         # Inicializa los registros temporales $t0 a $t9
-        self.temp_regs = collections.deque(f'$t{i}' for i in range(10))
+        self.temp_regs = collections.deque(temp_regs if temp_regs is not None else (f'$t{i}' for i in range(10)))
         # Inicializa los registros guardados $s0 a $s7
-        self.saved_regs = collections.deque(f'$s{i}' for i in range(8))
-        
+        self.saved_regs = collections.deque(saved_regs if saved_regs is not None else (f'$s{i}' for i in range(8)))
+        self.use_saved_regs = use_saved_regs
+
         self.register_descriptor = {}
         self.address_descriptor = {}
-        
+
         self.stack_offset = 0
         self.spill_code = []
 
-    def get_reg(self, var_name):
+        self.stack_home = {}
+        self.dirty = set()
+        self.free_slots = []
+
+        self.next_use = None
+        self.live_out = set()
+        self.pinned = set()
+
+    def set_next_use(self, next_use, live_out=(), operands=()):
+        """
+        Fija la información de próximo uso para la instrucción actual.
+
+        Args:
+            next_use (dict): Variable -> distancia (en instrucciones) a su próximo
+                             uso dentro del bloque, o None si no se vuelve a usar.
+            live_out (iterable): Variables vivas a la salida del bloque.
+            operands (iterable): Variables que lee o escribe la instrucción; no
+                                 se eligen para desbordar mientras se procesa.
+        """
+        self.next_use = dict(next_use)
+        self.live_out = set(live_out)
+        self.pinned = set(operands)
+
+    def is_dead(self, var_name):
+        """True si, según la información de próximo uso, el valor ya no se necesita."""
+        if self.next_use is None:
+            return False
+        return self.next_use.get(var_name) is None and var_name not in self.live_out
+
+    def get_reg(self, var_name, prefer=None):
         """
         Obtiene un registro para una variable.
 
@@ -40,23 +94,38 @@ class RegisterAllocator:
         Si hay registros temporales libres, asigna uno nuevo.
         Si no hay registros libres, realiza un desbordamiento a la pila.
 
+        El registro se entrega para escribir la variable: su copia en la pila
+        deja de estar vigente. Para leerla se usa load().
+
         Args:
             var_name (str): El nombre de la variable para la cual se necesita un registro.
+            prefer (str, opcional): Registro a usar si está libre (p. ej. el de un
+                                    operando que acaba de morir, como en x = y).
 
         Returns:
             str: El nombre del registro asignado (ej. '$t0').
         """
+        self.dirty.add(var_name)
         # Caso 1: La variable ya está en un registro.
         if var_name in self.address_descriptor and isinstance(self.address_descriptor[var_name], str):
             return self.address_descriptor[var_name]
 
-        # Caso 2: Hay registros temporales disponibles.
+        # Caso 2: Hay registros libres (el preferido, un $t o, si se permite, un $s).
+        for pool in (self.temp_regs, self.saved_regs):
+            if prefer in pool:
+                pool.remove(prefer)
+                self._assign_reg(prefer, var_name)
+                return prefer
         if self.temp_regs:
             reg = self.temp_regs.popleft()
             self._assign_reg(reg, var_name)
             return reg
+        if self.use_saved_regs and self.saved_regs:
+            reg = self.saved_regs.popleft()
+            self._assign_reg(reg, var_name)
+            return reg
 
-        # Caso 3: No hay registros temporales, se necesita desbordamiento (spill).
+        # Caso 3: No hay registros libres, se necesita desbordamiento (spill).
         return self._spill_register(var_name)
 
     def free_reg(self, reg):
@@ -65,7 +134,7 @@ class RegisterAllocator:
 
         Args:
             reg (str): El registro a liberar.
-        
+
         Returns:
             bool: True si el registro fue liberado, False en caso contrario.
         """
@@ -78,51 +147,167 @@ class RegisterAllocator:
             # Podría haber sido movido a la pila.
             if self.address_descriptor[var_name] == reg:
                 del self.address_descriptor[var_name]
+                self.dirty.discard(var_name)
+                self._release_slot(var_name)
+
+        self._return_reg(reg)
+        return True
+
+    def free_var(self, var_name):
+        """
+        Descarta una variable que ya no se usa: libera su registro y su
+        posición en la pila (que queda disponible para otra variable).
+        """
+        location = self.address_descriptor.get(var_name)
+        if isinstance(location, str):
+            self.free_reg(location)
+            return
+        self.address_descriptor.pop(var_name, None)
+        self.dirty.discard(var_name)
+        self._release_slot(var_name)
+
+    def place_in_memory(self, var_name):
+        """
+        Registra que el valor de la variable está en su posición de la pila
+        (p. ej. un parámetro guardado en el prólogo). Devuelve el desplazamiento.
+        """
+        offset = self._slot_for(var_name)
+        self.address_descriptor[var_name] = offset
+        return offset
+
+    def load(self, var_name):
+        """
+        Devuelve un registro con el valor de la variable, cargándolo desde la
+        pila si hace falta. Una variable sin ubicación recibe un registro nuevo.
+        """
+        location = self.address_descriptor.get(var_name)
+        if isinstance(location, str):
+            return location
+        if isinstance(location, int):
+            return self.load_from_stack(var_name)
+        return self.get_reg(var_name)
+
+    def flush(self, var_names, regs=None):
+        """
+        Guarda en la pila las variables modificadas (dirty) de var_names que
+        están en un registro (solo en `regs`, si se indica). Las variables
+        limpias no generan código.
+        """
+        for reg, var_name in list(self.register_descriptor.items()):
+            if regs is not None and reg not in regs:
+                continue
+            if var_name in var_names and var_name in self.dirty:
+                self._store(reg, var_name, "Store")
+
+    def clear(self, regs=None):
+        """
+        Olvida el contenido de los registros (todos o los de `regs`), p. ej. al
+        final de un bloque o después de una llamada que pisa los $t. Las
+        variables con posición en la pila quedan ubicadas ahí; el resto se
+        descarta. Llamar antes a flush() para no perder valores modificados.
+        """
+        for reg, var_name in list(self.register_descriptor.items()):
+            if regs is not None and reg not in regs:
+                continue
+            del self.register_descriptor[reg]
+            self.dirty.discard(var_name)
+            if var_name in self.stack_home:
+                self.address_descriptor[var_name] = self.stack_home[var_name]
+            else:
+                self.address_descriptor.pop(var_name, None)
+            self._return_reg(reg)
 
+    def slot_address(self, offset):
+        """Dirección MIPS de una posición de la pila."""
+        return f"{offset}($sp)"
+
+    def _return_reg(self, reg):
         # Devolver el registro a la cola de disponibles apropiada
         if reg.startswith('$t'):
             self.temp_regs.append(reg)
         elif reg.startswith('$s'):
             self.saved_regs.append(reg)
-            
-        return True
 
     def _assign_reg(self, reg, var_name):
         """Asigna un registro a una variable y actualiza los descriptores."""
         self.register_descriptor[reg] = var_name
         self.address_descriptor[var_name] = reg
 
+    def _slot_for(self, var_name):
+        """Posición de la pila de la variable; reutiliza una liberada si hay."""
+        if var_name not in self.stack_home:
+            if self.free_slots:
+                self.stack_home[var_name] = self.free_slots.pop()
+            else:
+                self.stack_offset -= 4
+                self.stack_home[var_name] = self.stack_offset
+        return self.stack_home[var_name]
+
+    def _release_slot(self, var_name):
+        offset = self.stack_home.pop(var_name, None)
+        if offset is not None:
+            self.free_slots.append(offset)
+
+    def _store(self, reg, var_name, comment):
+        stack_pos = self._slot_for(var_name)
+        self.spill_code.append(f"sw {reg}, {self.slot_address(stack_pos)}  # {comment} {var_name}")
+        self.dirty.discard(var_name)
+        return stack_pos
+
+    def _spill_cost(self, var_name):
+        """
+        Costo de desbordar una variable: (necesita un sw, -distancia a su
+        próximo uso). Los valores muertos y los limpios no necesitan sw.
+        """
+        distance = self.next_use.get(var_name)
+        if self.is_dead(var_name):
+            return (0, -math.inf)
+        needs_store = var_name in self.dirty or var_name not in self.stack_home
+        return (int(needs_store), -(math.inf if distance is None else distance))
+
+    def _choose_victim(self):
+        candidates = [reg for reg, var in self.register_descriptor.items() if var not in self.pinned]
+        if not candidates:
+            raise RuntimeError("No hay registros disponibles: todos tienen operandos de la instrucción actual.")
+        if self.next_use is None:
+            # Estrategia simple: el primero en uso
+            return candidates[0]
+        return min(candidates, key=lambda reg: self._spill_cost(self.register_descriptor[reg]))
+
     def _spill_register(self, new_var_name):
         """
         Realiza un desbordamiento de un registro a la pila para hacer espacio.
-        
-        La estrategia simple es tomar el primer registro ocupado de la lista de $t.
-        Guarda su valor en la pila y lo reasigna a la nueva variable.
+
+        Sin información de próximo uso toma el primer registro ocupado. Con
+        ella elige según _spill_cost: primero valores muertos o limpios, y
+        luego el de próximo uso más lejano. Guarda su valor en la pila (si
+        hace falta) y reasigna el registro a la nueva variable.
         """
-        # Seleccionar un registro para desbordar (estrategia simple: el primero en uso)
-        reg_to_spill = next(iter(self.register_descriptor))
+        reg_to_spill = self._choose_victim()
         var_to_spill = self.register_descriptor[reg_to_spill]
 
-        # Asignar una nueva ubicación en la pila
-        self.stack_offset -= 4
-        stack_pos = self.stack_offset
-        
-        # Generar código MIPS para el desbordamiento (store word)
-        self.spill_code.append(f"sw {reg_to_spill}, {stack_pos}($sp)  # Spill {var_to_spill}")
-        
-        # Actualizar la ubicación de la variable desbordada
-        self.address_descriptor[var_to_spill] = stack_pos
-        
+        if self.is_dead(var_to_spill):
+            # El valor no se vuelve a usar: no hace falta guardarlo
+            del self.address_descriptor[var_to_spill]
+            self.dirty.discard(var_to_spill)
+            self._release_slot(var_to_spill)
+        else:
+            if var_to_spill in self.dirty or var_to_spill not in self.stack_home:
+                # Generar código MIPS para el desbordamiento (store word)
+                self._store(reg_to_spill, var_to_spill, "Spill")
+            # Actualizar la ubicación de la variable desbordada
+            self.address_descriptor[var_to_spill] = self.stack_home[var_to_spill]
+
         # El registro ahora está "libre" para la nueva variable
         self.register_descriptor.pop(reg_to_spill)
         self._assign_reg(reg_to_spill, new_var_name)
-        
+
         return reg_to_spill
 
     def load_from_stack(self, var_name):
         """
         Carga una variable desde la pila a un registro.
-        
+
         Args:
             var_name (str): La variable a cargar.
 
@@ -134,18 +319,20 @@ class RegisterAllocator:
 
         stack_pos = self.address_descriptor[var_name]
         reg = self.get_reg(var_name) # Obtiene un registro (puede causar otro spill)
-        
+
         # Generar código MIPS para cargar desde la pila (load word)
-        self.spill_code.append(f"lw {reg}, {stack_pos}($sp)  # Load {var_name}")
-        
-        # Actualizar descriptores
+        self.spill_code.append(f"lw {reg}, {self.slot_address(stack_pos)}  # Load {var_name}")
+
+        # Actualizar descriptores (el valor queda limpio: la pila conserva la copia)
         self.address_descriptor[var_name] = reg
         self.register_descriptor[reg] = var_name
-        
+        self.stack_home[var_name] = stack_pos
+        self.dirty.discard(var_name)
+
         return reg
 
     def get_spill_code(self):
         """Devuelve el código de desbordamiento y limpia la lista."""
         code = self.spill_code
         self.spill_code = []
-        return code
\ No newline at end of file
+        return code